@@ -6,9 +6,9 @@
 
 from typing import List
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, defer
 
-from backend.database import get_db
+from backend.database import get_db, get_read_db
 from backend.database.models import Account
 from backend.schemas import (
     AccountCreate, AccountUpdate, AccountResponse, AccountDetailResponse,
@@ -48,21 +48,27 @@ playwright_mgr.set_ws_callback(ws_notification)
 async def get_accounts(
     platform: str = Query(None, description="平台筛选"),
     status: int = Query(None, description="状态筛选"),
-    db: Session = Depends(get_db)
+    skip: int = Query(0, ge=0, description="跳过条数"),
+    limit: int = Query(200, ge=1, le=1000, description="每页数量"),
+    db: Session = Depends(get_read_db)
 ):
     """
     获取账号列表
 
     注意：支持按平台和状态筛选！
+    加密的 cookies / storage_state 不在列表里加载（列表也不返回），授权状态看详情接口
     """
-    query = db.query(Account)
+    query = db.query(Account).options(
+        defer(Account.cookies, raiseload=True),
+        defer(Account.storage_state, raiseload=True)
+    )
 
     if platform:
         query = query.filter(Account.platform == platform)
     if status is not None:
         query = query.filter(Account.status == status)
 
-    accounts = query.order_by(Account.created_at.desc()).all()
+    accounts = query.order_by(Account.created_at.desc()).offset(skip).limit(limit).all()
     return accounts
 
 
@@ -12,9 +12,11 @@ from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
 from pydantic import BaseModel, Field, field_serializer
 from sqlalchemy.orm import Session
 
-from backend.database import get_db
+from backend.database import get_db, get_read_db
 from backend.database.models import ReferenceArticle
 from backend.services.article_collector_service import ArticleCollectorService
+from backend.services.fulltext_search import FulltextSearchService
+from backend.services.pagination import count_cache, next_cursor
 from backend.schemas import ApiResponse
 from backend.config import PLATFORMS
 from loguru import logger
@@ -72,6 +74,8 @@ class ReferenceArticleResponse(BaseModel):
     keyword: Optional[str] = None
     ragflow_synced: bool = False
     collected_at: Optional[datetime] = None
+    # 全文搜索时返回：正文高亮摘要
+    snippet: Optional[str] = None
 
     @field_serializer('collected_at')
     def serialize_collected_at(self, dt: datetime) -> str:
@@ -83,8 +87,10 @@ class ReferenceArticleResponse(BaseModel):
 
 class ReferenceArticleListResponse(BaseModel):
     """参考文章列表响应"""
-    total: int
+    total: Optional[int] = None
     items: List[ReferenceArticleResponse]
+    # 游标分页：下一页的游标，没有下一页时为空
+    next_cursor: Optional[str] = None
 
 
 class DuplicateCheckRequest(BaseModel):
@@ -311,33 +317,42 @@ async def list_collect_tasks(
 async def list_reference_articles(
     platform: Optional[str] = None,
     keyword: Optional[str] = None,
+    search: Optional[str] = None,
     page: int = 1,
     page_size: int = 20,
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = None,
+    with_total: bool = True,
+    db: Session = Depends(get_read_db)
 ):
     """
     获取已采集的参考文章列表
 
-    支持按平台和关键词筛选。
+    支持按平台和采集关键词筛选；search 在标题/摘要/正文/关键词里全文搜索，按相关度排序并返回高亮摘要。
+    不搜索时可以用游标分页：传上一页返回的 next_cursor（忽略 page），总数可用 with_total=false 关掉。
     """
-    query = db.query(ReferenceArticle).filter(ReferenceArticle.status == 1)
-
-    if platform:
-        query = query.filter(ReferenceArticle.platform == platform)
-    if keyword:
-        query = query.filter(ReferenceArticle.keyword.contains(keyword))
-
-    # 总数
-    total = query.count()
+    try:
+        hits, total = FulltextSearchService(db).search_reference_articles(
+            query=search,
+            keyword=keyword,
+            platform=platform,
+            offset=(page - 1) * page_size,
+            limit=page_size,
+            cursor=cursor,
+            with_total=with_total
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
-    # 分页
-    articles = query.order_by(ReferenceArticle.collected_at.desc()).offset(
-        (page - 1) * page_size
-    ).limit(page_size).all()
+    items = []
+    for hit in hits:
+        item = ReferenceArticleResponse.model_validate(hit.item)
+        item.snippet = hit.snippet
+        items.append(item)
 
     return ReferenceArticleListResponse(
         total=total,
-        items=articles
+        items=items,
+        next_cursor=None if search else next_cursor([hit.item for hit in hits], page_size, "collected_at")
     )
 
 
@@ -393,6 +408,7 @@ async def delete_reference_article(article_id: int, db: Session = Depends(get_db
 
     article.status = 0
     db.commit()
+    count_cache.invalidate("reference_articles")
 
     logger.info(f"参考文章已删除: {article_id}")
     return ApiResponse(success=True, message="文章已删除")
@@ -6,12 +6,14 @@
 
 from typing import List, Optional
 from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 from loguru import logger
 
-from backend.database import get_db
+from backend.database import get_db, get_read_db
 from backend.database.models import Client, Project
 from backend.schemas import ApiResponse
+from backend.services.pagination import after_cursor, count_cache, decode_cursor, next_cursor
 
 
 router = APIRouter(prefix="/api/clients", tags=["客户管理"])
@@ -24,12 +26,14 @@ async def get_clients(
     status: Optional[int] = Query(None, description="状态筛选"),
     keyword: Optional[str] = Query(None, description="关键词搜索"),
     industry: Optional[str] = Query(None, description="行业筛选"),
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = Query(None, description="游标分页：上一页返回的 next_cursor，给了就忽略 page"),
+    with_total: bool = Query(True, description="是否返回总数"),
+    db: Session = Depends(get_read_db)
 ):
     """
     获取客户列表
 
-    支持分页、状态筛选、行业筛选、关键词搜索
+    支持分页、状态筛选、行业筛选、关键词搜索；按 (创建时间, ID) 倒序，可用游标分页
     """
     query = db.query(Client)
 
@@ -42,17 +46,35 @@ async def get_clients(
     if keyword:
         query = query.filter(Client.name.contains(keyword) | Client.company_name.contains(keyword))
 
-    # 统计总数
-    total = query.count()
-
-    # 分页查询
-    clients = query.order_by(Client.created_at.desc()).offset((page - 1) * limit).limit(limit).all()
+    # 统计总数（按筛选条件短期缓存）
+    total = None
+    if with_total:
+        filters = (("industry", industry), ("keyword", keyword), ("status", status))
+        total = count_cache.get_or_count("clients", filters, query.count)
+
+    # 分页查询（先排序再 offset/limit，Query 在 offset 之后不能再 order_by）
+    if cursor:
+        try:
+            after = decode_cursor(cursor)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        query = query.filter(after_cursor(Client.created_at, Client.id, after, db.get_bind().dialect.name))
+    query = query.order_by(Client.created_at.desc(), Client.id.desc())
+    if not cursor:
+        query = query.offset((page - 1) * limit)
+    clients = query.limit(limit).all()
+
+    # 这一页客户的项目数量一次查出来
+    project_counts = dict(
+        db.query(Project.client_id, func.count(Project.id)).filter(
+            Project.client_id.in_([c.id for c in clients])
+        ).group_by(Project.client_id).all()
+    ) if clients else {}
 
     # 序列化结果
     items = []
     for c in clients:
-        # 统计项目数量
-        project_count = db.query(Project).filter(Project.client_id == c.id).count()
+        project_count = project_counts.get(c.id, 0)
 
         item = {
             "id": c.id,
@@ -76,7 +98,8 @@ async def get_clients(
         "total": total,
         "items": items,
         "page": page,
-        "limit": limit
+        "limit": limit,
+        "next_cursor": next_cursor(clients, limit, "created_at")
     }
 
 
@@ -175,6 +198,7 @@ async def create_client(data: dict, db: Session = Depends(get_db)):
         db.add(client)
         db.commit()
         db.refresh(client)
+        count_cache.invalidate("clients")
 
         logger.info(f"新客户已创建: {client.name}")
         return ApiResponse(success=True, message="创建成功", data={"client_id": client.id})
@@ -218,6 +242,7 @@ async def update_client(
 
     db.commit()
     db.refresh(client)
+    count_cache.invalidate("clients")
 
     logger.info(f"客户已更新: {client_id}")
     return ApiResponse(success=True, message="更新成功")
@@ -241,13 +266,14 @@ async def delete_client(client_id: int, db: Session = Depends(get_db)):
 
     db.delete(client)
     db.commit()
+    count_cache.invalidate("clients")
 
     logger.info(f"客户已删除: {client_id}")
     return ApiResponse(success=True, message="删除成功")
 
 
 @router.get("/stats/overview", response_model=dict)
-async def get_stats(db: Session = Depends(get_db)):
+async def get_stats(db: Session = Depends(get_read_db)):
     """获取客户统计信息"""
     total = db.query(Client).count()
     active = db.query(Client).filter(Client.status == 1).count()
@@ -270,7 +296,7 @@ async def get_stats(db: Session = Depends(get_db)):
 
 
 @router.get("/indicators/list", response_model=dict)
-async def get_indicators(db: Session = Depends(get_db)):
+async def get_indicators(db: Session = Depends(get_read_db)):
     """获取客户行业列表（用于筛选）"""
     industries = db.query(Client.industry).filter(
         Client.industry.isnot(None),
@@ -9,10 +9,10 @@ from typing import List, Optional, Any
 from datetime import datetime
 from fastapi import APIRouter, Depends, HTTPException, Query, BackgroundTasks
 from pydantic import BaseModel, ConfigDict, Field
-from sqlalchemy.orm import Session
-from sqlalchemy import desc
+from sqlalchemy.orm import Session, defer, with_expression
+from sqlalchemy import desc, func
 
-from backend.database import get_db, SessionLocal
+from backend.database import get_db, get_read_db, SessionLocal
 from backend.services.geo_article_service import GeoArticleService
 from backend.database.models import GeoArticle, Project, Keyword
 from backend.schemas import ApiResponse
@@ -21,6 +21,9 @@ from loguru import logger
 
 router = APIRouter(prefix="/api/geo", tags=["GEO文章"])
 
+# 列表里正文摘要的长度（字符数）
+ARTICLE_PREVIEW_LENGTH = 200
+
 
 # ==================== 请求/响应模型 ====================
 
@@ -48,14 +51,13 @@ class ArticleCallbackRequest(BaseModel):
     status: Optional[str] = Field("success", description="生成状态")
 
 
-class ArticleResponse(BaseModel):
+class ArticleSummary(BaseModel):
     """
-    🌟 核心模型：解决前端列表显示的所有字段需求
+    🌟 核心模型：解决前端列表显示的所有字段需求（不含正文、发布日志、收录详情等大字段）
     """
     id: int
     keyword_id: int
     title: Optional[str] = None
-    content: Optional[str] = None
 
     # 状态字段
     quality_status: Optional[str] = "pending"
@@ -76,9 +78,7 @@ class ArticleResponse(BaseModel):
     # 记录与日志
     retry_count: Optional[int] = 0
     error_msg: Optional[str] = None
-    publish_logs: Optional[str] = None
     platform_url: Optional[str] = None  # 🌟 发布成功后的真实链接
-    index_details: Optional[str] = None
 
     # 时间戳
     publish_time: Optional[datetime] = None
@@ -90,6 +90,18 @@ class ArticleResponse(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
 
+class ArticleListItem(ArticleSummary):
+    """文章列表项：正文只带开头一段摘要"""
+    content_preview: Optional[str] = None
+
+
+class ArticleResponse(ArticleSummary):
+    """文章详情：含完整正文和日志"""
+    content: Optional[str] = None
+    publish_logs: Optional[str] = None
+    index_details: Optional[str] = None
+
+
 class ProjectResponse(BaseModel):
     id: int
     name: str
@@ -153,12 +165,13 @@ async def generate_article(request: GenerateArticleRequest, background_tasks: Ba
     return ApiResponse(success=True, message="生成任务已提交，请在列表查看进度")
 
 
-@router.get("/articles", response_model=List[ArticleResponse])
+@router.get("/articles", response_model=List[ArticleListItem])
 async def list_articles(
     project_id: Optional[int] = Query(None, description="项目ID筛选"),
-    limit: int = Query(100),
+    skip: int = Query(0, ge=0, description="跳过条数"),
+    limit: int = Query(100, ge=1, le=500, description="每页数量"),
     publish_status: Optional[str] = Query(None, description="发布状态过滤: generating/completed/scheduled/publishing/published/failed"),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """
     获取文章列表（按创建时间倒序）
@@ -174,8 +187,15 @@ async def list_articles(
     - failed: 失败
 
     批量发布页面应使用 publish_status=completed 获取待配置发布的文章。
+
+    列表不返回正文、发布日志和收录详情（只带 content_preview 摘要），完整内容走 GET /articles/{article_id}
     """
-    query = db.query(GeoArticle).order_by(desc(GeoArticle.created_at))
+    query = db.query(GeoArticle).options(
+        defer(GeoArticle.content, raiseload=True),
+        defer(GeoArticle.publish_logs, raiseload=True),
+        defer(GeoArticle.index_details, raiseload=True),
+        with_expression(GeoArticle.content_preview, func.substr(GeoArticle.content, 1, ARTICLE_PREVIEW_LENGTH))
+    ).order_by(desc(GeoArticle.created_at))
 
     # 如果指定了项目，进行过滤
     if project_id:
@@ -190,13 +210,19 @@ async def list_articles(
             query = query.filter(GeoArticle.publish_status == publish_status)
 
     # 应用分页限制
-    if limit:
-        query = query.limit(limit)
-
-    articles = query.all()
+    articles = query.offset(skip).limit(limit).all()
     return articles
 
 
+@router.get("/articles/{article_id}", response_model=ArticleResponse)
+async def get_article(article_id: int, db: Session = Depends(get_read_db)):
+    """获取文章详情（含完整正文）"""
+    article = db.query(GeoArticle).filter(GeoArticle.id == article_id).first()
+    if not article:
+        raise HTTPException(status_code=404, detail="文章不存在")
+    return article
+
+
 @router.post("/articles/{article_id}/check-quality", response_model=ApiResponse)
 async def check_quality(article_id: int, db: Session = Depends(get_db)):
     """
@@ -7,12 +7,16 @@
 from typing import List, Optional
 from datetime import datetime
 from fastapi import APIRouter, Depends, HTTPException, Query, BackgroundTasks
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel, field_serializer, ConfigDict
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from backend.database import get_db
+from backend.database import get_db, get_async_db, get_read_db
 from backend.services.index_check_service import IndexCheckService
-from backend.database.models import IndexCheckRecord
+from backend.services.check_job_service import CheckJobService, run_job_in_background
+from backend.services.pagination import decode_cursor, next_cursor
+from backend.services.playwright.browser_pool import get_browser_profile
 from backend.schemas import ApiResponse
 from loguru import logger
 
@@ -27,12 +31,22 @@ class CheckRequest(BaseModel):
     keyword_id: int
     company_name: str
     platforms: Optional[List[str]] = None
+    use_cache: bool = True  # 是否复用有效期内相同问题的回答
+    browser_profile: Optional[str] = None  # 浏览器模式：headed=有界面（调试） headless=无头省资源，默认读取配置
 
 
 class BatchCheckRequest(BaseModel):
     """批量收录检测请求"""
     project_id: int
     platforms: Optional[List[str]] = None
+    budget: Optional[int] = None  # 检测预算（次数），大于 0 时按优先级只检测最有价值的组合
+    browser_profile: Optional[str] = None  # 浏览器模式：headed / headless，默认读取配置
+
+
+class RescoreRequest(BaseModel):
+    """离线重算请求"""
+    project_id: Optional[int] = None
+    dry_run: bool = False
 
 
 class CheckResultResponse(BaseModel):
@@ -53,10 +67,11 @@ class RecordResponse(BaseModel):
     answer: Optional[str]
     keyword_found: Optional[bool]
     company_found: Optional[bool]
-    check_time: str
+    from_cache: Optional[bool] = False
+    check_time: Optional[datetime]
 
     @field_serializer('check_time')
-    def serialize_check_time(self, dt: datetime) -> str:
+    def serialize_check_time(self, dt: Optional[datetime]) -> str:
         return dt.isoformat() if dt else ""
 
     class Config:
@@ -71,6 +86,14 @@ class HitRateResponse(BaseModel):
     company_found: int
 
 
+def check_browser_profile(name: Optional[str]):
+    """校验浏览器模式，未知模式返回 400"""
+    try:
+        get_browser_profile(name)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
 # ==================== 收录检测API ====================
 
 @router.post("/check", response_model=ApiResponse)
@@ -91,14 +114,16 @@ async def check_index(
     if not keyword:
         raise HTTPException(status_code=404, detail="关键词不存在")
 
-    service = IndexCheckService(db)
+    check_browser_profile(request.browser_profile)
+    service = IndexCheckService(db, browser_profile=request.browser_profile)
 
     # 执行检测
     try:
         results = await service.check_keyword(
             keyword_id=request.keyword_id,
             company_name=request.company_name,
-            platforms=request.platforms
+            platforms=request.platforms,
+            use_cache=request.use_cache
         )
 
         return ApiResponse(
@@ -120,6 +145,7 @@ async def batch_check_index(
     批量执行收录检测
     
     调用Playwright自动化检测项目下所有关键词在AI平台的收录情况。
+    检测进度落库为检测任务，服务重启后会从断点继续（见 /jobs 接口）。
     注意：这是一个耗时操作，建议异步执行！
     """
     # 验证项目存在
@@ -128,25 +154,207 @@ async def batch_check_index(
     if not project:
         raise HTTPException(status_code=404, detail="项目不存在")
 
-    service = IndexCheckService(db)
+    check_browser_profile(request.browser_profile)
+    service = CheckJobService(db, browser_profile=request.browser_profile)
 
     # 执行批量检测
     try:
-        results = await service.check_project_keywords(
+        job = service.create_job(
             project_id=request.project_id,
-            platforms=request.platforms
+            platforms=request.platforms,
+            budget=request.budget
         )
+        if not job:
+            return ApiResponse(success=False, message="项目下没有关键词")
+
+        results = await service.run_job(job.id)
 
         return ApiResponse(
             success=True,
             message=f"批量检测完成，共{len(results)}条记录",
-            data={"results": results}
+            data={"results": results, "job_id": job.id}
         )
     except Exception as e:
         logger.error(f"批量收录检测失败: {e}")
         return ApiResponse(success=False, message=f"批量检测失败: {str(e)}")
 
 
+# ==================== 检测任务API ====================
+
+@router.post("/jobs", response_model=ApiResponse)
+async def create_check_job(
+    request: BatchCheckRequest,
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db)
+):
+    """
+    创建项目检测任务并在后台执行
+
+    任务按 关键词 × 问题 × 平台 拆成任务项落库，可通过 /jobs/{job_id} 查询进度。
+    """
+    from backend.database.models import Project
+    project = db.query(Project).filter(Project.id == request.project_id).first()
+    if not project:
+        raise HTTPException(status_code=404, detail="项目不存在")
+
+    check_browser_profile(request.browser_profile)
+    job = CheckJobService(db).create_job(
+        project_id=request.project_id,
+        platforms=request.platforms,
+        budget=request.budget
+    )
+    if not job:
+        return ApiResponse(success=False, message="项目下没有关键词")
+
+    background_tasks.add_task(run_job_in_background, job.id, request.browser_profile)
+    return ApiResponse(success=True, message="检测任务已创建，正在后台执行", data={"job_id": job.id})
+
+
+@router.get("/jobs/{job_id}", response_model=ApiResponse)
+async def get_check_job(job_id: int, db: Session = Depends(get_db)):
+    """获取检测任务进度"""
+    progress = CheckJobService(db).get_job_progress(job_id)
+    if not progress:
+        raise HTTPException(status_code=404, detail="检测任务不存在")
+    return ApiResponse(success=True, message="获取成功", data=progress)
+
+
+@router.post("/jobs/{job_id}/resume", response_model=ApiResponse)
+async def resume_check_job(
+    job_id: int,
+    background_tasks: BackgroundTasks,
+    browser_profile: Optional[str] = Query(None, description="浏览器模式：headed / headless，默认读取配置"),
+    db: Session = Depends(get_db)
+):
+    """从断点继续执行未完成的检测任务"""
+    check_browser_profile(browser_profile)
+    progress = CheckJobService(db).get_job_progress(job_id)
+    if not progress:
+        raise HTTPException(status_code=404, detail="检测任务不存在")
+    if progress["status"] == "completed":
+        return ApiResponse(success=False, message="检测任务已完成")
+
+    background_tasks.add_task(run_job_in_background, job_id, browser_profile)
+    return ApiResponse(success=True, message="检测任务已恢复执行", data=progress)
+
+
+def run_rescore_task(project_id: Optional[int], dry_run: bool):
+    """后台执行离线重算（同步函数，由 BackgroundTasks 放到线程池中执行）"""
+    from backend.database import SessionLocal
+    from backend.services.rescore_service import RescoreService
+
+    db = SessionLocal()
+    try:
+        RescoreService(db).rescore(project_id=project_id, dry_run=dry_run)
+    except Exception as e:
+        logger.error(f"离线重算失败: {e}")
+    finally:
+        db.close()
+
+
+@router.post("/rescore", response_model=ApiResponse)
+async def rescore_records(
+    request: RescoreRequest,
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db)
+):
+    """
+    用当前的公司名/别名/关键词重算历史检测记录
+
+    不开浏览器，直接用已保存的回答重新计算命中结果。
+    注意：数据量大时耗时较长，在后台执行！
+    """
+    if request.project_id:
+        from backend.database.models import Project
+        project = db.query(Project).filter(Project.id == request.project_id).first()
+        if not project:
+            raise HTTPException(status_code=404, detail="项目不存在")
+
+    background_tasks.add_task(run_rescore_task, request.project_id, request.dry_run)
+    return ApiResponse(success=True, message="重算任务已提交，正在后台执行")
+
+
+def run_citation_backfill_task(project_id: Optional[int]):
+    """后台回填历史回答的引用（同步函数，由 BackgroundTasks 放到线程池中执行）"""
+    from backend.database import SessionLocal
+    from backend.services.citation_service import CitationService
+
+    db = SessionLocal()
+    try:
+        CitationService(db).backfill(project_id=project_id)
+    except Exception as e:
+        logger.error(f"引用回填失败: {e}")
+    finally:
+        db.close()
+
+
+@router.post("/citations/backfill", response_model=ApiResponse)
+async def backfill_citations(
+    background_tasks: BackgroundTasks,
+    project_id: Optional[int] = Query(None, description="只回填指定项目，默认全部"),
+    db: Session = Depends(get_db)
+):
+    """
+    从历史检测记录的回答中提取引用并写入引用表
+
+    已有引用的记录会跳过。注意：数据量大时耗时较长，在后台执行！
+    """
+    background_tasks.add_task(run_citation_backfill_task, project_id)
+    return ApiResponse(success=True, message="引用回填任务已提交，正在后台执行")
+
+
+def parse_date_range(start_date: Optional[str], end_date: Optional[str]) -> tuple:
+    """解析 YYYY-MM-DD 格式的日期范围（结束日期取当天 23:59:59）"""
+    start_dt = datetime.strptime(start_date, "%Y-%m-%d") if start_date else None
+    end_dt = datetime.strptime(end_date, "%Y-%m-%d").replace(hour=23, minute=59, second=59) if end_date else None
+    return start_dt, end_dt
+
+
+@router.get("/citations/domains", response_model=ApiResponse)
+async def get_citation_domains(
+    project_id: Optional[int] = Query(None, description="项目ID筛选"),
+    platform: Optional[str] = Query(None, description="平台筛选"),
+    start_date: Optional[str] = Query(None, description="开始时间 YYYY-MM-DD"),
+    end_date: Optional[str] = Query(None, description="结束时间 YYYY-MM-DD"),
+    limit: int = Query(20, ge=1, le=200),
+    db: Session = Depends(get_read_db)
+):
+    """获取AI回答中被引用最多的域名"""
+    from backend.services.citation_service import CitationService
+
+    start_dt, end_dt = parse_date_range(start_date, end_date)
+    # 时间范围用到归档月份时要读归档文件（同步引擎），放到线程池里跑
+    domains = await run_in_threadpool(lambda: CitationService(db).get_top_domains(
+        project_id=project_id,
+        platform=platform,
+        start_date=start_dt,
+        end_date=end_dt,
+        limit=limit
+    ))
+    return ApiResponse(success=True, message="获取成功", data={"domains": domains})
+
+
+@router.get("/citations/articles", response_model=ApiResponse)
+async def get_cited_articles(
+    project_id: Optional[int] = Query(None, description="项目ID筛选"),
+    platform: Optional[str] = Query(None, description="平台筛选"),
+    start_date: Optional[str] = Query(None, description="开始时间 YYYY-MM-DD"),
+    end_date: Optional[str] = Query(None, description="结束时间 YYYY-MM-DD"),
+    db: Session = Depends(get_read_db)
+):
+    """获取已发布文章（GeoArticle.platform_url）被AI回答引用的情况"""
+    from backend.services.citation_service import CitationService
+
+    start_dt, end_dt = parse_date_range(start_date, end_date)
+    articles = await run_in_threadpool(lambda: CitationService(db).get_cited_articles(
+        project_id=project_id,
+        platform=platform,
+        start_date=start_dt,
+        end_date=end_dt
+    ))
+    return ApiResponse(success=True, message="获取成功", data={"articles": articles, "total": len(articles)})
+
+
 @router.get("/records")
 async def get_records(
     keyword_id: Optional[int] = Query(None, description="关键词ID筛选"),
@@ -158,14 +366,26 @@ async def get_records(
     start_date: Optional[str] = Query(None, description="开始时间 YYYY-MM-DD"),
     end_date: Optional[str] = Query(None, description="结束时间 YYYY-MM-DD"),
     question: Optional[str] = Query(None, description="问题搜索"),
-    db: Session = Depends(get_db)
+    include_answer: bool = Query(False, description="是否返回回答正文（默认不返回，打开单条记录时再取）"),
+    cursor: Optional[str] = Query(None, description="游标分页：上一页返回的 next_cursor，给了就忽略 skip"),
+    with_total: bool = Query(True, description="是否返回总数（游标翻页时可以关掉）"),
+    db: Session = Depends(get_read_db)
 ):
     """
     获取检测记录（支持分页和筛选）
+
+    注意：
+    - 列表默认不带回答正文，详情走 GET /records/{record_id}
+    - 偏移分页（skip）保留兼容，翻得越深越慢；游标分页按 (检测时间, ID) 走索引，深翻也不变慢
+    - 热表不够一页时会接着读归档文件（同步引擎），整个查询放到线程池里跑，不占事件循环
     """
+    if cursor:
+        try:
+            decode_cursor(cursor)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
     try:
-        service = IndexCheckService(db)
-        
         # 处理日期
         start_dt = None
         end_dt = None
@@ -174,37 +394,46 @@ async def get_records(
         if end_date:
             end_dt = datetime.strptime(end_date, "%Y-%m-%d").replace(hour=23, minute=59, second=59)
 
-        records, total = service.get_check_records(
-            keyword_id=keyword_id,
-            platform=platform,
-            limit=limit,
-            skip=skip,
-            keyword_found=keyword_found,
-            company_found=company_found,
-            start_date=start_dt,
-            end_date=end_dt,
-            question=question
-        )
-        
-        result = []
-        for record in records:
-            record_dict = {
-                "id": record.id,
-                "keyword_id": record.keyword_id,
-                "platform": record.platform,
-                "question": record.question,
-                "answer": record.answer,
-                "keyword_found": record.keyword_found,
-                "company_found": record.company_found,
-                "check_time": record.check_time.isoformat() if record.check_time else ""
-            }
-            result.append(record_dict)
+        def load(session: Session):
+            records, total = IndexCheckService(session).get_check_records(
+                keyword_id=keyword_id,
+                platform=platform,
+                limit=limit,
+                skip=skip,
+                keyword_found=keyword_found,
+                company_found=company_found,
+                start_date=start_dt,
+                end_date=end_dt,
+                question=question,
+                include_answer=include_answer,
+                cursor=cursor,
+                with_total=with_total
+            )
+
+            result = []
+            for record in records:
+                record_dict = {
+                    "id": record.id,
+                    "keyword_id": record.keyword_id,
+                    "platform": record.platform,
+                    "question": record.question,
+                    "answer": record.answer_text if include_answer else None,
+                    "keyword_found": record.keyword_found,
+                    "company_found": record.company_found,
+                    "from_cache": bool(record.from_cache),
+                    "check_time": record.check_time.isoformat() if record.check_time else ""
+                }
+                result.append(record_dict)
+            return result, total, next_cursor(records, limit, "check_time")
+
+        result, total, cursor_next = await run_in_threadpool(load, db)
         
         return {
             "total": total,
             "items": result,
             "limit": limit,
-            "skip": skip
+            "skip": skip,
+            "next_cursor": cursor_next
         }
     except Exception as e:
         logger.error(f"获取检测记录失败: {e}")
@@ -225,41 +454,45 @@ async def batch_delete_records(
 
 
 @router.get("/keywords/{keyword_id}/hit-rate", response_model=HitRateResponse)
-async def get_hit_rate(keyword_id: int, db: Session = Depends(get_db)):
+async def get_hit_rate(keyword_id: int, db: AsyncSession = Depends(get_async_db)):
     """
     获取关键词命中率
 
     注意：命中率越高，SEO效果越好！
     """
-    # 验证关键词存在
-    from backend.database.models import Keyword as KwModel
-    keyword = db.query(KwModel).filter(KwModel.id == keyword_id).first()
-    if not keyword:
-        raise HTTPException(status_code=404, detail="关键词不存在")
+    def load(session: Session):
+        # 验证关键词存在
+        from backend.database.models import Keyword as KwModel
+        keyword = session.query(KwModel).filter(KwModel.id == keyword_id).first()
+        if not keyword:
+            raise HTTPException(status_code=404, detail="关键词不存在")
 
-    service = IndexCheckService(db)
-    return service.get_hit_rate(keyword_id)
+        return IndexCheckService(session).get_hit_rate(keyword_id)
+
+    return await db.run_sync(load)
 
 
 @router.get("/keywords/{keyword_id}/trend")
 async def get_keyword_trend(
     keyword_id: int,
     days: int = Query(7, ge=1, le=30, description="统计天数"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     获取关键词收录趋势
     
     返回指定天数内的关键词收录趋势数据，包括每日命中率、关键词出现率和公司出现率。
     """
-    # 验证关键词存在
-    from backend.database.models import Keyword as KwModel
-    keyword = db.query(KwModel).filter(KwModel.id == keyword_id).first()
-    if not keyword:
-        raise HTTPException(status_code=404, detail="关键词不存在")
+    def load(session: Session):
+        # 验证关键词存在
+        from backend.database.models import Keyword as KwModel
+        keyword = session.query(KwModel).filter(KwModel.id == keyword_id).first()
+        if not keyword:
+            raise HTTPException(status_code=404, detail="关键词不存在")
 
-    service = IndexCheckService(db)
-    trend_data = service.get_keyword_trend(keyword_id, days)
+        return IndexCheckService(session).get_keyword_trend(keyword_id, days)
+
+    trend_data = await db.run_sync(load)
     
     return ApiResponse(
         success=True,
@@ -268,25 +501,27 @@ async def get_keyword_trend(
     )
 
 
+def _load_project_analytics(db: Session, project_id: int, days: int) -> dict:
+    """验证项目存在并取项目综合分析（在 run_sync 里执行）"""
+    from backend.database.models import Project
+    project = db.query(Project).filter(Project.id == project_id).first()
+    if not project:
+        raise HTTPException(status_code=404, detail="项目不存在")
+    return IndexCheckService(db).get_project_analytics(project_id, days)
+
+
 @router.get("/projects/{project_id}/analytics")
 async def get_project_analytics(
     project_id: int,
     days: int = Query(7, ge=1, le=30, description="统计天数"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     获取项目综合分析
     
     返回项目下所有关键词的收录分析数据，包括命中率、关键词出现率和公司出现率。
     """
-    # 验证项目存在
-    from backend.database.models import Project
-    project = db.query(Project).filter(Project.id == project_id).first()
-    if not project:
-        raise HTTPException(status_code=404, detail="项目不存在")
-
-    service = IndexCheckService(db)
-    analytics = service.get_project_analytics(project_id, days)
+    analytics = await db.run_sync(_load_project_analytics, project_id, days)
     
     return ApiResponse(
         success=True,
@@ -299,15 +534,14 @@ async def get_project_analytics(
 async def get_platform_performance(
     project_id: Optional[int] = Query(None, description="项目ID，可选"),
     days: int = Query(7, ge=1, le=30, description="统计天数"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     获取平台表现分析
     
     返回各AI平台的收录表现数据，包括命中率、成功率等指标。
     """
-    service = IndexCheckService(db)
-    performance = service.get_platform_performance(project_id, days)
+    performance = await db.run_sync(lambda session: IndexCheckService(session).get_platform_performance(project_id, days))
     
     return ApiResponse(
         success=True,
@@ -316,25 +550,35 @@ async def get_platform_performance(
     )
 
 
+@router.get("/platforms/throttle")
+async def get_platform_throttle_status():
+    """
+    获取各AI平台的限流与熔断状态
+
+    返回 platforms 列表，每项包含当前速率（次/分钟）、熔断状态和连续失败次数。
+    """
+    from backend.config import AI_PLATFORMS
+    from backend.services.playwright.platform_throttle import get_platform_throttle
+
+    return ApiResponse(
+        success=True,
+        message="获取平台限流状态成功",
+        data={"platforms": [get_platform_throttle(platform_id).snapshot() for platform_id in AI_PLATFORMS.keys()]}
+    )
+
+
 @router.get("/projects/{project_id}/summary")
 async def get_project_summary(
     project_id: int,
     days: int = Query(7, ge=1, le=30, description="统计天数"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     获取项目收录摘要
     
     返回项目的收录情况摘要，包括总检测数、平均命中率等核心指标。
     """
-    # 验证项目存在
-    from backend.database.models import Project
-    project = db.query(Project).filter(Project.id == project_id).first()
-    if not project:
-        raise HTTPException(status_code=404, detail="项目不存在")
-
-    service = IndexCheckService(db)
-    analytics = service.get_project_analytics(project_id, days)
+    analytics = await db.run_sync(_load_project_analytics, project_id, days)
     
     # 只返回摘要信息
     return ApiResponse(
@@ -351,12 +595,25 @@ async def get_project_summary(
 
 
 @router.get("/records/{record_id}", response_model=RecordResponse)
-async def get_record(record_id: int, db: Session = Depends(get_db)):
-    """获取检测记录详情"""
-    record = db.query(IndexCheckRecord).filter(IndexCheckRecord.id == record_id).first()
-    if not record:
-        raise HTTPException(status_code=404, detail="记录不存在")
-    return record
+async def get_record(record_id: int, db: Session = Depends(get_read_db)):
+    """获取检测记录详情（含回答正文；热表没有时到归档文件里找，所以在线程池里跑）"""
+    def load(session: Session):
+        record = IndexCheckService(session).get_record(record_id)
+        if not record:
+            raise HTTPException(status_code=404, detail="记录不存在")
+        return RecordResponse(
+            id=record.id,
+            keyword_id=record.keyword_id,
+            platform=record.platform,
+            question=record.question,
+            answer=record.answer_text,
+            keyword_found=record.keyword_found,
+            company_found=record.company_found,
+            from_cache=bool(record.from_cache),
+            check_time=record.check_time
+        )
+
+    return await run_in_threadpool(load, db)
 
 
 @router.delete("/records/{record_id}", response_model=ApiResponse)
@@ -366,12 +623,9 @@ async def delete_record(record_id: int, db: Session = Depends(get_db)):
 
     注意：删除操作不可恢复！
     """
-    record = db.query(IndexCheckRecord).filter(IndexCheckRecord.id == record_id).first()
-    if not record:
+    # 走服务层删除，日汇总同步扣减
+    if not IndexCheckService(db).delete_record(record_id):
         raise HTTPException(status_code=404, detail="记录不存在")
 
-    db.delete(record)
-    db.commit()
-
     logger.info(f"检测记录已删除: {record_id}")
     return ApiResponse(success=True, message="记录已删除")
@@ -26,6 +26,7 @@ class ProjectCreate(BaseModel):
     client_id: Optional[int] = None
     name: str
     company_name: str
+    company_aliases: Optional[List[str]] = None
     domain_keyword: Optional[str] = None
     description: Optional[str] = None
     industry: Optional[str] = None
@@ -36,6 +37,7 @@ class ProjectResponse(BaseModel):
     id: int
     name: str
     company_name: str
+    company_aliases: Optional[List[str]] = None
     domain_keyword: Optional[str] = None
     description: Optional[str] = None
     industry: Optional[str] = None
@@ -116,6 +118,7 @@ async def create_project(project_data: ProjectCreate, db: Session = Depends(get_
         client_id=project_data.client_id,
         name=project_data.name,
         company_name=project_data.company_name,
+        company_aliases=project_data.company_aliases,
         domain_keyword=project_data.domain_keyword,
         description=project_data.description,
         industry=project_data.industry,
@@ -137,6 +140,7 @@ async def update_project(project_id: int, project_data: ProjectCreate, db: Sessi
 
     project.name = project_data.name
     project.company_name = project_data.company_name
+    project.company_aliases = project_data.company_aliases
     project.domain_keyword = project_data.domain_keyword
     project.description = project_data.description
     project.industry = project_data.industry
@@ -9,9 +9,10 @@ from fastapi import APIRouter, Depends, HTTPException, Query
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
 
-from backend.database import get_db
+from backend.database import get_db, get_read_db
 from backend.database.models import KnowledgeCategory, Knowledge
 from backend.schemas import ApiResponse
+from backend.services.fulltext_search import FulltextSearchService, SearchHit
 from loguru import logger
 
 
@@ -76,6 +77,23 @@ class KnowledgeResponse(BaseModel):
     type: str
     created_at: str
     updated_at: str
+    # 搜索时返回：高亮摘要、相关度（bm25，越小越相关）
+    snippet: Optional[str] = None
+    score: Optional[float] = None
+
+
+def _knowledge_response(item: Knowledge, hit: Optional[SearchHit] = None) -> KnowledgeResponse:
+    return KnowledgeResponse(
+        id=item.id,
+        category_id=item.category_id,
+        title=item.title,
+        content=item.content,
+        type=item.type,
+        created_at=item.created_at.isoformat() if item.created_at else "",
+        updated_at=item.updated_at.isoformat() if item.updated_at else "",
+        snippet=hit.snippet if hit else None,
+        score=hit.score if hit else None,
+    )
 
 
 # ==================== 知识库分类API ====================
@@ -259,7 +277,7 @@ async def delete_category(
 async def get_knowledge_list(
     category_id: int,
     search: Optional[str] = None,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """
     获取指定分类的知识列表
@@ -270,33 +288,18 @@ async def get_knowledge_list(
         db: 数据库会话
 
     Returns:
-        知识条目列表
+        知识条目列表（有搜索词时按相关度排序）
     """
-    query = db.query(Knowledge).filter(
+    if search:
+        hits, _ = FulltextSearchService(db).search_knowledge(search, category_id=category_id, limit=None)
+        return [_knowledge_response(hit.item, hit) for hit in hits]
+
+    items = db.query(Knowledge).filter(
         Knowledge.category_id == category_id,
         Knowledge.status == 1
-    )
+    ).order_by(Knowledge.updated_at.desc()).all()
 
-    if search:
-        query = query.filter(
-            (Knowledge.title.like(f"%{search}%")) |
-            (Knowledge.content.like(f"%{search}%"))
-        )
-
-    items = query.order_by(Knowledge.updated_at.desc()).all()
-
-    return [
-        KnowledgeResponse(
-            id=item.id,
-            category_id=item.category_id,
-            title=item.title,
-            content=item.content,
-            type=item.type,
-            created_at=item.created_at.isoformat() if item.created_at else "",
-            updated_at=item.updated_at.isoformat() if item.updated_at else "",
-        )
-        for item in items
-    ]
+    return [_knowledge_response(item) for item in items]
 
 
 @router.post("/knowledge", response_model=ApiResponse)
@@ -421,33 +424,21 @@ async def delete_knowledge(
 @router.get("/knowledge/search", response_model=List[KnowledgeResponse])
 async def search_knowledge(
     keyword: str = Query(..., min_length=1),
-    db: Session = Depends(get_db)
+    category_id: Optional[int] = None,
+    limit: int = Query(50, ge=1, le=200),
+    db: Session = Depends(get_read_db)
 ):
     """
-    全局搜索知识
+    全局搜索知识（全文索引，按相关度排序，带高亮摘要）
 
     Args:
-        keyword: 搜索关键词
+        keyword: 搜索关键词，空格分隔多个词
+        category_id: 分类筛选（可选）
+        limit: 返回条数
         db: 数据库会话
 
     Returns:
         知识条目列表
     """
-    items = db.query(Knowledge).filter(
-        Knowledge.status == 1,
-        (Knowledge.title.like(f"%{keyword}%")) |
-        (Knowledge.content.like(f"%{keyword}%"))
-    ).order_by(Knowledge.updated_at.desc()).limit(50).all()
-
-    return [
-        KnowledgeResponse(
-            id=item.id,
-            category_id=item.category_id,
-            title=item.title,
-            content=item.content,
-            type=item.type,
-            created_at=item.created_at.isoformat() if item.created_at else "",
-            updated_at=item.updated_at.isoformat() if item.updated_at else "",
-        )
-        for item in items
-    ]
+    hits, _ = FulltextSearchService(db).search_knowledge(keyword, category_id=category_id, limit=limit)
+    return [_knowledge_response(hit.item, hit) for hit in hits]
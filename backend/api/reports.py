@@ -4,15 +4,24 @@ from datetime import datetime, timedelta
 from fastapi import APIRouter, Depends, Query, BackgroundTasks, HTTPException
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
-from sqlalchemy import func, cast, Integer, desc, case
-from backend.database import get_db
-from backend.database.models import Project, Keyword, IndexCheckRecord, GeoArticle, PublishRecord, Account, QuestionVariant
+from sqlalchemy import func, desc
+from sqlalchemy.ext.asyncio import AsyncSession
+from backend.database import get_db, get_async_db
+from backend.database.models import Project, Keyword, IndexCheckDaily, GeoArticle, PublishRecord, Account, QuestionVariant
 from backend.schemas import ApiResponse
+from backend.services.check_timing_service import CheckTimingService
+from backend.services.check_rollup import DailyRollupService, start_day
 from loguru import logger
 
 router = APIRouter(prefix="/api/reports", tags=["数据报表"])
 
 class SummaryStats(BaseModel):
+    """
+    数据总览卡片
+
+    文章只剩 GeoArticle 一种（普通文章表已经删掉），所以 common_articles 恒为 0、geo_articles 等于 total_articles；
+    发布数按 GeoArticle.publish_status 统计：成功数为 published，总数为 published + failed（还没发的不算）
+    """
     total_articles: int
     common_articles: int
     geo_articles: int
@@ -86,22 +95,10 @@ class ArticleStatsResponse(BaseModel):
 
 
 # ==================== 报表API ====================
+# 报表查询走异步会话：_xxx 是同步查询逻辑，接口里 await db.run_sync(_xxx, ...) 执行，
+# SQL 在 aiosqlite 线程里跑，慢报表不会卡住发布自动化和日志推送
 
-@router.get("/article-stats", response_model=ArticleStatsResponse)
-async def get_article_stats(
-    project_id: Optional[int] = Query(None, description="项目ID筛选"),
-    db: Session = Depends(get_db)
-):
-    """
-    获取 GeoArticle 文章统计信息
-
-    统计不同状态的文章数量：
-    - total: 总数
-    - generating: 生成中
-    - completed: 已生成/待分发 (completed)
-    - published: 已发布
-    - failed: 生成失败
-    """
+def _article_stats(db: Session, project_id: Optional[int]):
     # 构建基础查询
     query = db.query(GeoArticle)
 
@@ -132,15 +129,33 @@ async def get_article_stats(
     )
 
 
-@router.get("/projects", response_model=List[ProjectStatsResponse])
-async def get_project_stats(db: Session = Depends(get_db)):
+@router.get("/article-stats", response_model=ArticleStatsResponse)
+async def get_article_stats(
+    project_id: Optional[int] = Query(None, description="项目ID筛选"),
+    db: AsyncSession = Depends(get_async_db)
+):
     """
-    获取所有项目的统计数据
+    获取 GeoArticle 文章统计信息
 
-    注意：返回每个项目的关键词数量、命中率等！
+    统计不同状态的文章数量：
+    - total: 总数
+    - generating: 生成中
+    - completed: 已生成/待分发 (completed)
+    - published: 已发布
+    - failed: 生成失败
     """
+    return await db.run_sync(_article_stats, project_id)
+
+
+def _project_stats(db: Session):
     projects = db.query(Project).filter(Project.status == 1).all()
 
+    # 各项目启用关键词的检测汇总（读日汇总表，一次查出）
+    check_stats = {
+        row.project_id: row
+        for row in DailyRollupService(db).aggregate(Keyword.project_id, active_only=True).all()
+    }
+
     results = []
     for project in projects:
         # 统计关键词数量
@@ -160,26 +175,11 @@ async def get_project_stats(db: Session = Depends(get_db)):
             QuestionVariant.keyword_id.in_(keyword_ids)
         ).count()
 
-        # 统计检测记录
-        keyword_ids_active = db.query(Keyword.id).filter(
-            Keyword.project_id == project.id,
-            Keyword.status == "active"
-        ).subquery()
-
-        total_checks = db.query(IndexCheckRecord).filter(
-            IndexCheckRecord.keyword_id.in_(keyword_ids_active)
-        ).count()
-
-        # 计算命中率
-        stats = db.query(
-            func.sum(case((IndexCheckRecord.keyword_found == True, 1), else_=0)).label("keyword_found"),
-            func.sum(case((IndexCheckRecord.company_found == True, 1), else_=0)).label("company_found")
-        ).filter(
-            IndexCheckRecord.keyword_id.in_(keyword_ids_active)
-        ).first()
-
-        keyword_found = stats.keyword_found or 0
-        company_found = stats.company_found or 0
+        # 统计检测记录并计算命中率
+        stats = check_stats.get(project.id)
+        total_checks = stats.checks if stats else 0
+        keyword_found = stats.keyword_hits if stats else 0
+        company_found = stats.company_hits if stats else 0
 
         keyword_hit_rate = round(keyword_found / total_checks * 100, 2) if total_checks > 0 else 0
         company_hit_rate = round(company_found / total_checks * 100, 2) if total_checks > 0 else 0
@@ -199,25 +199,31 @@ async def get_project_stats(db: Session = Depends(get_db)):
     return results
 
 
-@router.get("/platforms", response_model=List[PlatformStatsResponse])
-async def get_platform_stats(db: Session = Depends(get_db)):
+@router.get("/projects", response_model=List[ProjectStatsResponse])
+async def get_project_stats(db: AsyncSession = Depends(get_async_db)):
     """
-    获取各平台的统计数据
+    获取所有项目的统计数据
 
-    注意：比较不同平台的收录效果！
+    注意：返回每个项目的关键词数量、命中率等！
     """
+    return await db.run_sync(_project_stats)
+
+
+def _platform_stats(db: Session):
     platforms = ["doubao", "qianwen", "deepseek"]
 
+    # 各平台的检测汇总（读日汇总表，一次查出）
+    platform_stats = {
+        row.platform: row
+        for row in DailyRollupService(db).aggregate(IndexCheckDaily.platform).all()
+    }
+
     results = []
     for platform in platforms:
-        # 统计该平台的检测记录
-        records = db.query(IndexCheckRecord).filter(
-            IndexCheckRecord.platform == platform
-        ).all()
-
-        total_checks = len(records)
-        keyword_found = sum(1 for r in records if r.keyword_found)
-        company_found = sum(1 for r in records if r.company_found)
+        stats = platform_stats.get(platform)
+        total_checks = stats.checks if stats else 0
+        keyword_found = stats.keyword_hits if stats else 0
+        company_found = stats.company_hits if stats else 0
 
         keyword_hit_rate = round(keyword_found / total_checks * 100, 2) if total_checks > 0 else 0
         company_hit_rate = round(company_found / total_checks * 100, 2) if total_checks > 0 else 0
@@ -241,59 +247,52 @@ async def get_platform_stats(db: Session = Depends(get_db)):
     return results
 
 
-@router.get("/trends", response_model=List[TrendDataPoint])
-async def get_trends(
-    days: int = Query(30, ge=1, le=90, description="统计天数"),
-    platform: Optional[str] = Query(None, description="平台筛选"),
-    db: Session = Depends(get_db)
-):
+@router.get("/platforms", response_model=List[PlatformStatsResponse])
+async def get_platform_stats(db: AsyncSession = Depends(get_async_db)):
     """
-    获取收录趋势数据
-    
-    注意：用于绘制趋势图表！
+    获取各平台的统计数据
+
+    注意：比较不同平台的收录效果！
     """
-    start_date = datetime.now() - timedelta(days=days)
-    
-    # 构建查询
-    query = db.query(
-        func.date(IndexCheckRecord.check_time).label("date"),
-        func.sum(case((IndexCheckRecord.keyword_found == True, 1), else_=0)).label("keyword_found"),
-        func.sum(case((IndexCheckRecord.company_found == True, 1), else_=0)).label("company_found"),
-        func.count().label("total_checks")
-    ).filter(
-        IndexCheckRecord.check_time >= start_date
-    )
-    
-    # 增加平台筛选
-    if platform:
-        query = query.filter(IndexCheckRecord.platform == platform)
-        
-    # 按日期分组统计
-    trends = query.group_by(
-        func.date(IndexCheckRecord.check_time)
-    ).order_by(
-        func.date(IndexCheckRecord.check_time)
-    ).all()
+    return await db.run_sync(_platform_stats)
+
+
+def _trends(db: Session, days: int, platform: Optional[str]):
+    # 按日期分组统计（读日汇总表）
+    trends = DailyRollupService(db).aggregate(
+        IndexCheckDaily.date,
+        platform=platform,
+        start_date=start_day(days)
+    ).order_by(IndexCheckDaily.date).all()
 
     # 转换为响应模型
     result = []
     for trend in trends:
         result.append(TrendDataPoint(
             date=str(trend.date),
-            keyword_found_count=trend.keyword_found or 0,
-            company_found_count=trend.company_found or 0,
-            total_checks=trend.total_checks
+            keyword_found_count=trend.keyword_hits,
+            company_found_count=trend.company_hits,
+            total_checks=trend.checks
         ))
 
     return result
 
-@router.get("/stats", response_model=SummaryStats)
-async def get_summary_stats(
-    project_id: Optional[int] = Query(None),
-    days: int = Query(7),
-    db: Session = Depends(get_db)
+
+@router.get("/trends", response_model=List[TrendDataPoint])
+async def get_trends(
+    days: int = Query(30, ge=1, le=90, description="统计天数"),
+    platform: Optional[str] = Query(None, description="平台筛选"),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """获取数据总览卡片数据"""
+    """
+    获取收录趋势数据
+    
+    注意：用于绘制趋势图表！
+    """
+    return await db.run_sync(_trends, days, platform)
+
+
+def _summary_stats(db: Session, project_id: Optional[int], days: int):
     start_date = datetime.now() - timedelta(days=days)
     
     # 1. 文章生成数（仅统计 GeoArticle）
@@ -306,30 +305,28 @@ async def get_summary_stats(
     total_articles = geo_query.count()
 
     # 2. 发布成功率（仅统计 GeoArticle）
-    # 统计 GeoArticle 的发布状态
+    # 统计 GeoArticle 的发布状态；原来返回的 common_count / geo_count / total_pub_* 是普通文章表删掉后
+    # 残留的未定义变量（接口一直 NameError），口径见 SummaryStats
     geo_pub_published = geo_query.filter(GeoArticle.publish_status == "published").count()
     geo_pub_total = geo_query.filter(GeoArticle.publish_status.in_(["published", "failed"])).count()
     pub_rate = round((geo_pub_published / geo_pub_total * 100), 2) if geo_pub_total > 0 else 0
     
-    # 3. 关键词/公司名命中率
-    idx_query = db.query(IndexCheckRecord).filter(IndexCheckRecord.check_time >= start_date)
-    if project_id:
-        idx_query = idx_query.join(Keyword).filter(Keyword.project_id == project_id)
-    
-    idx_total = idx_query.count()
-    kw_hit_count = idx_query.filter(IndexCheckRecord.keyword_found == True).count()
-    co_hit_count = idx_query.filter(IndexCheckRecord.company_found == True).count()
+    # 3. 关键词/公司名命中率（读日汇总表）
+    idx_totals = DailyRollupService(db).totals(project_id=project_id, start_date=start_day(days))
+    idx_total = idx_totals["checks"]
+    kw_hit_count = idx_totals["keyword_hits"]
+    co_hit_count = idx_totals["company_hits"]
     
     kw_rate = round((kw_hit_count / idx_total * 100), 2) if idx_total > 0 else 0
     co_rate = round((co_hit_count / idx_total * 100), 2) if idx_total > 0 else 0
     
     return SummaryStats(
         total_articles=total_articles,
-        common_articles=common_count,
-        geo_articles=geo_count,
+        common_articles=0,
+        geo_articles=total_articles,
         publish_success_rate=pub_rate,
-        publish_success_count=total_pub_success,
-        publish_total_count=total_pub_count,
+        publish_success_count=geo_pub_published,
+        publish_total_count=geo_pub_total,
         keyword_hit_rate=kw_rate,
         keyword_hit_count=kw_hit_count,
         keyword_check_count=idx_total,
@@ -338,43 +335,74 @@ async def get_summary_stats(
         company_check_count=idx_total
     )
 
-@router.get("/platform-comparison", response_model=List[PlatformStat])
-async def get_platform_comparison(
+
+@router.get("/stats", response_model=SummaryStats)
+async def get_summary_stats(
     project_id: Optional[int] = Query(None),
     days: int = Query(7),
-    platform: Optional[str] = Query(None),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """AI平台对比分析"""
-    start_date = datetime.now() - timedelta(days=days)
-    query = db.query(
-        IndexCheckRecord.platform,
-        func.count(IndexCheckRecord.id).label("total"),
-        func.sum(cast(IndexCheckRecord.keyword_found, Integer)).label("kw_hits")
-    ).filter(IndexCheckRecord.check_time >= start_date)
-
-    if project_id:
-        query = query.join(Keyword).filter(Keyword.project_id == project_id)
+    """获取数据总览卡片数据"""
+    return await db.run_sync(_summary_stats, project_id, days)
 
-    if platform:
-        query = query.filter(IndexCheckRecord.platform == platform)
 
-    stats = query.group_by(IndexCheckRecord.platform).all()
+def _platform_comparison(db: Session, project_id: Optional[int], days: int, platform: Optional[str]):
+    stats = DailyRollupService(db).aggregate(
+        IndexCheckDaily.platform,
+        project_id=project_id,
+        platform=platform,
+        start_date=start_day(days)
+    ).all()
 
     return [
         PlatformStat(
             platform=s.platform,
-            total_count=s.total,
-            hit_count=int(s.kw_hits or 0),
-            hit_rate=round((int(s.kw_hits or 0) / s.total * 100), 2) if s.total > 0 else 0
+            total_count=s.checks,
+            hit_count=s.keyword_hits,
+            hit_rate=round((s.keyword_hits / s.checks * 100), 2) if s.checks > 0 else 0
         ) for s in stats
     ]
 
-@router.get("/project-leaderboard", response_model=List[ProjectRank])
-async def get_project_leaderboard(days: int = Query(7), db: Session = Depends(get_db)):
-    """项目影响力排行榜"""
+
+@router.get("/platform-comparison", response_model=List[PlatformStat])
+async def get_platform_comparison(
+    project_id: Optional[int] = Query(None),
+    days: int = Query(7),
+    platform: Optional[str] = Query(None),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """AI平台对比分析"""
+    return await db.run_sync(_platform_comparison, project_id, days, platform)
+
+
+def _platform_latency(db: Session, days: int, platform: Optional[str]):
+    return CheckTimingService(db).get_platform_latency(days=days, platform=platform)
+
+
+@router.get("/platform-latency")
+async def get_platform_latency(
+    days: int = Query(7, ge=1, le=90, description="统计天数"),
+    platform: Optional[str] = Query(None, description="平台筛选"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    AI平台检测延迟（毫秒）
+
+    按平台汇总和按天的 p50/p90/p95/max，分 总耗时/导航/提交/等待回答/抓取 五个阶段，
+    外加平均重试次数和重试率；缓存命中的检测不计入
+    """
+    return await db.run_sync(_platform_latency, days, platform)
+
+
+def _project_leaderboard(db: Session, days: int):
     start_date = datetime.now() - timedelta(days=days)
     projects = db.query(Project).filter(Project.status == 1).all()
+
+    # 各项目的检测汇总（读日汇总表，一次查出）
+    check_stats = {
+        row.project_id: row
+        for row in DailyRollupService(db).aggregate(Keyword.project_id, start_date=start_day(days)).all()
+    }
     
     result = []
     for i, p in enumerate(projects):
@@ -385,12 +413,9 @@ async def get_project_leaderboard(days: int = Query(7), db: Session = Depends(ge
         ).count()
         
         # 统计收录率作为提及率参考
-        idx_query = db.query(IndexCheckRecord).join(Keyword).filter(
-            Keyword.project_id == p.id,
-            IndexCheckRecord.check_time >= start_date
-        )
-        total_checks = idx_query.count()
-        hits = idx_query.filter(IndexCheckRecord.keyword_found == True).count()
+        stats = check_stats.get(p.id)
+        total_checks = stats.checks if stats else 0
+        hits = stats.keyword_hits if stats else 0
         mention_rate = round((hits / total_checks * 100), 2) if total_checks > 0 else 0
         
         result.append(ProjectRank(
@@ -409,18 +434,25 @@ async def get_project_leaderboard(days: int = Query(7), db: Session = Depends(ge
         
     return result[:10]
 
-@router.get("/overview")
-async def get_overview(
-    db: Session = Depends(get_db)
+
+@router.get("/project-leaderboard", response_model=List[ProjectRank])
+async def get_project_leaderboard(
+    days: int = Query(7),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """获取数据总览"""
+    """项目影响力排行榜"""
+    return await db.run_sync(_project_leaderboard, days)
+
+
+def _overview(db: Session):
     # 统计关键词数量
     total_keywords = db.query(Keyword).count()
     
-    # 统计检测记录
-    total_records = db.query(IndexCheckRecord).count()
-    keyword_found = db.query(IndexCheckRecord).filter(IndexCheckRecord.keyword_found == True).count()
-    company_found = db.query(IndexCheckRecord).filter(IndexCheckRecord.company_found == True).count()
+    # 统计检测记录（读日汇总表）
+    totals = DailyRollupService(db).totals()
+    total_records = totals["checks"]
+    keyword_found = totals["keyword_hits"]
+    company_found = totals["company_hits"]
     
     # 计算总体命中率
     overall_hit_rate = 0
@@ -435,12 +467,19 @@ async def get_overview(
     }
 
 
+@router.get("/overview")
+async def get_overview(db: AsyncSession = Depends(get_async_db)):
+    """获取数据总览"""
+    return await db.run_sync(_overview)
+
+
 # ==================== 收录检测相关API ====================
 
 class BatchCheckRequest(BaseModel):
     """批量收录检测请求"""
     project_id: int
     platforms: Optional[List[str]] = None
+    browser_profile: Optional[str] = None  # 浏览器模式：headed / headless，默认读取配置
 
 
 @router.post("/run-check", response_model=ApiResponse)
@@ -460,10 +499,9 @@ async def run_check(
     if not project:
         return ApiResponse(success=False, message="项目不存在")
 
-    service = IndexCheckService(db)
-
     # 执行批量检测（复用收录查询的服务逻辑）
     try:
+        service = IndexCheckService(db, browser_profile=request.browser_profile)
         results = await service.check_project_keywords(
             project_id=request.project_id,
             platforms=request.platforms
@@ -1,51 +1,160 @@
 # -*- coding: utf-8 -*-
 """
 数据库连接管理 - 工业级加固版
-支持 WAL 模式，解决 SQLite 并发锁问题
+默认 SQLite（WAL 模式，解决并发锁问题），配置 DATABASE_URL 可换成 PostgreSQL 供多个后端进程共用；
+报表、列表等读接口走单独的只读连接池，不和写入抢连接
 """
 
 from sqlalchemy import create_engine, event
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, Session, declarative_base
-from typing import Generator
+from typing import Any, AsyncGenerator, Dict, Generator, List, Optional, Sequence
 from loguru import logger
 from sqlalchemy import inspect
 
-from backend.config import DATABASE_DIR, DATABASE_URL
+from backend.config import (
+    ASYNC_DATABASE_URL, DATABASE_DIR, DATABASE_MAX_OVERFLOW, DATABASE_POOL_RECYCLE, DATABASE_POOL_SIZE, DATABASE_URL,
+    IS_SQLITE, SQLITE_PRAGMAS, SQLITE_READ_POOL_OVERFLOW, SQLITE_READ_POOL_SIZE
+)
 
 # 1. 确保数据库目录存在
 DATABASE_DIR.mkdir(exist_ok=True, parents=True)
 
+
+def engine_options(read_only: bool = False, is_async: bool = False) -> dict:
+    """
+    按数据库方言生成引擎参数
+
+    Args:
+        read_only: 只读连接池（SQLite 在 connect 事件里设 query_only，PostgreSQL 设 default_transaction_read_only）
+        is_async: 异步引擎（PostgreSQL 的 asyncpg 和 psycopg2 设置会话参数的方式不同）
+    """
+    options = {
+        "echo": False,  # 开启后可查看所有 SQL 语句，开发调试时有用
+        "pool_pre_ping": True,  # 每次使用连接前检查是否可用
+    }
+    if IS_SQLITE:
+        if read_only:
+            options.update(pool_size=SQLITE_READ_POOL_SIZE, max_overflow=SQLITE_READ_POOL_OVERFLOW)
+        if is_async:
+            # aiosqlite 访问文件库默认不复用连接，这里显式用连接池
+            options["poolclass"] = AsyncAdaptedQueuePool
+        else:
+            # connect_args={"check_same_thread": False} 是 SQLite 在多线程环境下运行的必要参数
+            options["connect_args"] = {"check_same_thread": False}
+        return options
+
+    options.update(pool_size=DATABASE_POOL_SIZE, max_overflow=DATABASE_MAX_OVERFLOW, pool_recycle=DATABASE_POOL_RECYCLE)
+    if read_only:
+        options["connect_args"] = (
+            {"server_settings": {"default_transaction_read_only": "on"}} if is_async
+            else {"options": "-c default_transaction_read_only=on"}
+        )
+    return options
+
+
 # 2. 创建引擎
-# connect_args={"check_same_thread": False} 是 SQLite 在多线程环境下运行的必要参数
-engine = create_engine(
-    DATABASE_URL,
-    connect_args={"check_same_thread": False},
-    echo=False,  # 开启后可查看所有 SQL 语句，开发调试时有用
-    pool_pre_ping=True,  # 每次使用连接前检查是否可用
-)
+engine = create_engine(DATABASE_URL, **engine_options())
+
+# 只读引擎：同步的列表接口用，自己一个连接池
+read_engine = create_engine(DATABASE_URL, **engine_options(read_only=True))
+
+# 异步引擎（只读）：SQL 在驱动自己的线程/协程里执行，await 期间事件循环照常驱动 Playwright 和 WebSocket；
+# 报表等读接口专用
+async_engine = create_async_engine(ASYNC_DATABASE_URL, **engine_options(read_only=True, is_async=True))
 
 
 # 3. 🌟 核心优化：开启 SQLite 的 WAL 模式
 # 这样可以实现“读写不冲突”，极大减少 "database is locked" 错误
-@event.listens_for(engine, "connect")
-def set_sqlite_pragma(dbapi_connection, connection_record):
+def _apply_pragmas(dbapi_connection, read_only: bool = False):
     cursor = dbapi_connection.cursor()
     try:
         cursor.execute("PRAGMA journal_mode=WAL")
         cursor.execute("PRAGMA synchronous=NORMAL")
         cursor.execute("PRAGMA foreign_keys=ON")  # 显式开启外键约束支持
+        # 性能参数：mmap_size / cache_size / temp_store / busy_timeout / wal_autocheckpoint（见 config.SQLITE_PRAGMAS）
+        for name, value in SQLITE_PRAGMAS.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        if read_only:
+            cursor.execute("PRAGMA query_only=ON")  # 只读连接误写时直接报错，不会悄悄拿写锁
         cursor.close()
     except Exception as e:
         logger.error(f"设置 SQLite Pragma 失败: {e}")
 
 
+def set_sqlite_pragma(dbapi_connection, connection_record):
+    _apply_pragmas(dbapi_connection)
+
+
+def set_read_only_pragma(dbapi_connection, connection_record):
+    _apply_pragmas(dbapi_connection, read_only=True)
+
+
+if IS_SQLITE:
+    event.listen(engine, "connect", set_sqlite_pragma)
+    event.listen(read_engine, "connect", set_read_only_pragma)
+    event.listen(async_engine.sync_engine, "connect", set_read_only_pragma)
+
+
 # 4. 创建会话工厂
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+# 异步会话不在提交后过期对象，否则提交后再读属性会触发隐式 IO
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
 
 # 5. 基类
 Base = declarative_base()
 
 
+def dialect_insert(bind):
+    """
+    按数据库方言取支持 ON CONFLICT（upsert / 去重插入）的 insert 构造函数
+
+    Args:
+        bind: Session / Connection / Engine
+    """
+    dialect = bind.get_bind().dialect if isinstance(bind, Session) else bind.dialect
+    if dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert
+
+
+def bulk_insert(
+    db: Session,
+    model,
+    rows: List[Dict[str, Any]],
+    returning: Sequence = (),
+    skip_conflicts_on: Optional[List[str]] = None
+) -> list:
+    """
+    按方言批量插入：SQLite / PostgreSQL 都是多行 INSERT ... VALUES 按批往返，
+    取回主键也走 RETURNING，不会像 bulk_insert_mappings(return_defaults=True) 那样退化成逐行插入
+
+    Args:
+        db: 数据库会话
+        model: ORM 模型
+        rows: 每行一个字典（键为模型属性名）
+        returning: 要取回的列（如主键）；不跳过冲突时结果和 rows 顺序一一对应
+        skip_conflicts_on: 唯一约束的列，已存在的行跳过（ON CONFLICT DO NOTHING），多个进程同时写同一条时不报错
+
+    Returns:
+        returning 的结果行（跳过冲突时只有实际插入的行），不取回时为空列表
+    """
+    if not rows:
+        return []
+    stmt = dialect_insert(db)(model)
+    if skip_conflicts_on:
+        stmt = stmt.on_conflict_do_nothing(index_elements=skip_conflicts_on)
+    if returning:
+        stmt = stmt.returning(*returning, sort_by_parameter_order=not skip_conflicts_on)
+        return db.execute(stmt, rows).all()
+    db.execute(stmt, rows)
+    return []
+
+
 def get_db() -> Generator[Session, None, None]:
     """
     FastAPI 依赖注入：获取数据库会话
@@ -57,38 +166,85 @@ def get_db() -> Generator[Session, None, None]:
         db.close()
 
 
+def get_read_db() -> Generator[Session, None, None]:
+    """
+    FastAPI 依赖注入：获取只读数据库会话（列表、搜索等只读接口用，在这个会话里写入会直接报错）
+    """
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    """
+    FastAPI 依赖注入：获取异步数据库会话（只读连接池）
+
+    注意：
+    - 只能读，写操作继续用 get_db
+    - 复用现有的同步服务层用 await db.run_sync(lambda session: ...)，SQL 仍走异步驱动，不阻塞事件循环
+    - 不要在 run_sync 外面访问未加载的关联/延迟列（会抛 MissingGreenlet），响应在 run_sync 里组装好再返回
+    - 会读收录检测归档文件的查询（归档是同步 pysqlite 引擎）不要放进 run_sync，
+      改用 get_read_db + run_in_threadpool，否则每打开一个归档文件都会卡住事件循环
+    """
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
 def init_db():
     """
     初始化数据库表
-    逻辑：导入所有模型 -> 检查已存在的表 -> 创建新表
+    逻辑：结构版本已是最新则直接返回 -> 拿结构锁（多进程同时启动时只有一个在建表/迁移）-> 导入所有模型 ->
+    检查已存在的表 -> 创建新表 -> 新库记版本 / 老库跑迁移
     """
+    from backend.database.migrations import SCHEMA_VERSION, get_schema_version, migrate, schema_lock, stamp
+
+    with engine.connect() as conn:
+        current_version = get_schema_version(conn)
+    if current_version >= SCHEMA_VERSION:
+        logger.info(f"数据库结构已是最新版本 v{current_version}，跳过初始化")
+        return
+
     # 必须在这里导入模型，否则 Base.metadata 不知道有哪些表
     from backend.database.models import (
         Account, PublishRecord,
         Project, Keyword, QuestionVariant,
-        IndexCheckRecord, GeoArticle,
+        IndexCheckRecord, IndexCheckCitation, IndexCheckTiming, IndexCheckDaily, IndexCheckArchive, AnswerBlob, IndexCheckJob, IndexCheckJobItem, GeoArticle,
         ScheduledTask, KnowledgeCategory, Knowledge  # 🌟 补齐了之前遗漏的表
     )
 
-    # 获取已存在的表名用于对比
-    inspector = inspect(engine)
-    existing_tables = inspector.get_table_names()
-
-    try:
-        # checkfirst=True 会自动处理“表已存在”的情况
-        Base.metadata.create_all(bind=engine)
-
-        # 再次获取所有表名，对比输出日志
-        all_tables = inspect(engine).get_table_names()
-
-        for table in all_tables:
-            if table not in existing_tables:
-                logger.info(f"✨ 新表创建成功: {table}")
+    with schema_lock(engine):
+        # 等锁期间别的进程可能已经升级完了
+        with engine.connect() as conn:
+            if get_schema_version(conn) >= SCHEMA_VERSION:
+                logger.info("数据库结构已由其它进程升级到最新版本")
+                return
+
+        # 获取已存在的表名用于对比
+        inspector = inspect(engine)
+        existing_tables = inspector.get_table_names()
+
+        try:
+            # checkfirst=True 会自动处理“表已存在”的情况
+            Base.metadata.create_all(bind=engine)
+
+            # 再次获取所有表名，对比输出日志
+            all_tables = inspect(engine).get_table_names()
+
+            for table in all_tables:
+                if table not in existing_tables:
+                    logger.info(f"✨ 新表创建成功: {table}")
+                else:
+                    # logger.debug(f"表 {table} 已存在，跳过创建")
+                    pass
+
+            if existing_tables:
+                migrate(engine)
             else:
-                # logger.debug(f"表 {table} 已存在，跳过创建")
-                pass
+                stamp(engine)
 
-        logger.success("✅ 数据库初始化检查完成，WAL 模式已就绪")
-    except Exception as e:
-        logger.error(f"❌ 数据库初始化失败: {str(e)}")
-        raise e
\ No newline at end of file
+            logger.success(f"✅ 数据库初始化检查完成（{engine.dialect.name}）")
+        except Exception as e:
+            logger.error(f"❌ 数据库初始化失败: {str(e)}")
+            raise e
@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+"""
+SQLite FTS5 全文索引
+知识库条目和参考文章的标题/正文建 trigram 分词的外部内容（external content）FTS5 表，
+由触发器跟着原表增删改同步，中文按三字切分，不用额外装分词器
+"""
+
+from typing import Dict, List, Optional, Tuple
+
+from loguru import logger
+from sqlalchemy import event, inspect
+from sqlalchemy.engine import Connection
+
+from backend.database import Base
+
+# {FTS 表名: (原表名, 索引的列)}
+FTS_TABLES: Dict[str, Tuple[str, List[str]]] = {
+    "knowledge_items_fts": ("knowledge_items", ["title", "content"]),
+    "reference_articles_fts": ("reference_articles", ["title", "summary", "content", "keyword"]),
+}
+
+
+def trigram_supported(conn: Connection) -> bool:
+    """当前 SQLite 是否支持 FTS5 的 trigram 分词器（SQLite 3.34+）"""
+    if conn.dialect.name != "sqlite":
+        return False
+    try:
+        conn.exec_driver_sql("CREATE VIRTUAL TABLE temp._fts_probe USING fts5(x, tokenize='trigram')")
+        conn.exec_driver_sql("DROP TABLE temp._fts_probe")
+        return True
+    except Exception:
+        return False
+
+
+def _create_fts(conn: Connection, name: str, source: str, columns: List[str]):
+    cols = ", ".join(columns)
+    new_values = ", ".join(f"new.{c}" for c in columns)
+    old_values = ", ".join(f"old.{c}" for c in columns)
+    conn.exec_driver_sql(
+        f"CREATE VIRTUAL TABLE {name} USING fts5({cols}, content='{source}', content_rowid='id', tokenize='trigram')"
+    )
+    conn.exec_driver_sql(f"""
+        CREATE TRIGGER {name}_ai AFTER INSERT ON {source} BEGIN
+            INSERT INTO {name}(rowid, {cols}) VALUES (new.id, {new_values});
+        END
+    """)
+    conn.exec_driver_sql(f"""
+        CREATE TRIGGER {name}_ad AFTER DELETE ON {source} BEGIN
+            INSERT INTO {name}({name}, rowid, {cols}) VALUES ('delete', old.id, {old_values});
+        END
+    """)
+    conn.exec_driver_sql(f"""
+        CREATE TRIGGER {name}_au AFTER UPDATE OF {cols} ON {source} BEGIN
+            INSERT INTO {name}({name}, rowid, {cols}) VALUES ('delete', old.id, {old_values});
+            INSERT INTO {name}(rowid, {cols}) VALUES (new.id, {new_values});
+        END
+    """)
+    # 原表已有的数据一次性灌进索引
+    conn.exec_driver_sql(f"INSERT INTO {name}({name}) VALUES ('rebuild')")
+    logger.info(f"全文索引已创建: {name} ({source}: {cols})")
+
+
+def ensure_fulltext(conn: Connection, tables: Optional[Dict[str, Tuple[str, List[str]]]] = None):
+    """
+    创建缺失的全文索引（非 SQLite 库、原表不存在或 SQLite 不支持 trigram 时跳过，搜索退回 LIKE）
+
+    Args:
+        tables: 要建的全文索引，格式同 FTS_TABLES，默认 FTS_TABLES（迁移里传写死的定义）
+    """
+    if conn.dialect.name != "sqlite":
+        return
+    tables = FTS_TABLES if tables is None else tables
+    inspector = inspect(conn)
+    existing = set(inspector.get_table_names())
+    missing = [name for name in tables if name not in existing and tables[name][0] in existing]
+    if not missing:
+        return
+    if not trigram_supported(conn):
+        logger.warning("当前数据库不支持 FTS5 trigram 分词器，知识库/参考文章搜索使用 LIKE")
+        return
+    for name in missing:
+        source, columns = tables[name]
+        _create_fts(conn, name, source, columns)
+
+
+@event.listens_for(Base.metadata, "after_create")
+def _fulltext_after_create(target, connection, **kw):
+    # 新库 create_all 后直接记为最新版本、不跑迁移，全文索引在这里建
+    ensure_fulltext(connection)
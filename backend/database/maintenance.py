@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+"""
+SQLite 日常维护
+PRAGMA optimize 按需重新收集查询规划统计（索引选择更准），wal_checkpoint 把 WAL 回写主库并截断，
+防止长时间有读连接时 WAL 文件越涨越大、读越来越慢；由定时任务 db_maintenance_task 每天执行
+"""
+
+from typing import Any, Dict, Optional
+
+from loguru import logger
+from sqlalchemy.engine import Engine
+
+# PRAGMA optimize 每个索引最多抽样的行数，控制大表上的耗时
+ANALYSIS_LIMIT = 400
+
+
+def optimize_sqlite(bind: Optional[Engine] = None, checkpoint: str = "TRUNCATE") -> Dict[str, Any]:
+    """
+    执行一次维护
+
+    Args:
+        bind: 写引擎，默认主库 engine（只读连接不能 checkpoint）
+        checkpoint: wal_checkpoint 模式，PASSIVE 不等读连接，TRUNCATE 回写后把 WAL 截断为 0
+
+    Returns:
+        {"busy": 是否有读写占用导致没回写完, "wal_pages": WAL 页数, "checkpointed": 已回写页数}；非 SQLite 返回空
+    """
+    if bind is None:
+        from backend.database import engine as bind
+
+    if bind.dialect.name != "sqlite":
+        return {}
+
+    with bind.connect() as conn:
+        conn.exec_driver_sql(f"PRAGMA analysis_limit={ANALYSIS_LIMIT}")
+        conn.exec_driver_sql("PRAGMA optimize")
+        busy, wal_pages, checkpointed = conn.exec_driver_sql(f"PRAGMA wal_checkpoint({checkpoint})").one()
+
+    result = {"busy": bool(busy), "wal_pages": wal_pages, "checkpointed": checkpointed}
+    if busy:
+        logger.warning(f"WAL 回写未完成（有连接占用）: {result}")
+    return result
@@ -0,0 +1,261 @@
+# -*- coding: utf-8 -*-
+"""
+数据库版本化迁移
+已应用的版本记在 schema_migrations 表里，启动时版本已是最新就直接跳过，不再每次开机挨个表检查！
+
+新增迁移的规矩：
+    1. 模型改了（加表、加列、加索引）就在末尾加一个 @migration(版本号+1)，版本号只增不改
+    2. 迁移要能重复执行（先检查再修改），老库可能被旧版 fix_database 改过一部分
+    3. 新建的库由 create_all 按模型直接建成最新结构，不跑迁移，只记录版本
+    4. 列、索引、回填 SQL 都写死迁移当时的定义，不要读当前模型的索引或调用服务层函数：
+       模型以后还会加列加索引，老库从低版本一路升级时，前面的迁移会碰到后面版本才有的列
+       （整表新建除外：create_all 已按最新模型建好，迁移里的 create 只是兜底）
+"""
+
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Callable, Dict, Iterator, List, Tuple
+
+from loguru import logger
+from sqlalchemy import Column, DateTime, Integer, String, Table, func, inspect, select
+from sqlalchemy.engine import Connection, Engine
+
+from backend.database import Base
+from backend.database import models  # noqa: F401  注册所有模型的表和索引
+
+
+schema_migrations = Table(
+    "schema_migrations",
+    Base.metadata,
+    Column("version", Integer, primary_key=True, comment="迁移版本号"),
+    Column("description", String(200), nullable=True, comment="迁移说明"),
+    Column("applied_at", DateTime, default=datetime.now, comment="应用时间"),
+    extend_existing=True
+)
+
+# [(版本号, 说明, 迁移函数)]，按版本号升序
+MIGRATIONS: List[Tuple[int, str, Callable[[Connection], None]]] = []
+
+# PostgreSQL 建表/迁移用的 advisory lock 编号（随便取的常量，和别的应用不冲突就行）
+SCHEMA_LOCK_ID = 7_260_301
+
+
+def migration(version: int, description: str):
+    """注册一个迁移（版本号必须连续递增）"""
+    def decorator(upgrade: Callable[[Connection], None]):
+        expected = len(MIGRATIONS) + 1
+        if version != expected:
+            raise ValueError(f"迁移版本号必须连续: 期望 {expected}, 实际 {version}")
+        MIGRATIONS.append((version, description, upgrade))
+        return upgrade
+    return decorator
+
+
+def _add_missing_columns(conn: Connection, table: str, columns: List[Tuple[str, str]]):
+    """给已存在的表补齐缺失的列（表不存在时跳过，由 create_all 建表）"""
+    inspector = inspect(conn)
+    if not inspector.has_table(table):
+        return
+    existing = {col["name"] for col in inspector.get_columns(table)}
+    for name, definition in columns:
+        if name not in existing:
+            conn.exec_driver_sql(f"ALTER TABLE {table} ADD COLUMN {name} {definition}")
+            logger.info(f"添加缺失的列: {table}.{name}")
+
+
+def _create_indexes(conn: Connection, indexes: List[Tuple[str, str, List[str]]]):
+    """
+    创建库里还没有的索引（表不存在时跳过）
+
+    Args:
+        indexes: [(索引名, 表名, 列名列表)]，写死迁移当时的定义
+    """
+    inspector = inspect(conn)
+    for name, table, columns in indexes:
+        if not inspector.has_table(table):
+            continue
+        conn.exec_driver_sql(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({', '.join(columns)})")
+
+
+# ==================== 迁移 ====================
+
+@migration(1, "补齐历史版本缺失的列（原 fix_database 的逐列检查）")
+def _baseline_columns(conn: Connection):
+    if conn.dialect.name != "sqlite":
+        # 缺列的老库都是 SQLite，PostgreSQL 库都是按模型新建的（列定义也是 SQLite 写法）
+        return
+    _add_missing_columns(conn, "geo_articles", [
+        ("publish_time", "DATETIME"),
+        ("last_check_time", "DATETIME"),
+        ("index_details", "TEXT"),
+        ("quality_status", "TEXT DEFAULT 'pending'"),
+        ("quality_score", "INTEGER"),
+        ("ai_score", "INTEGER"),
+        ("readability_score", "INTEGER"),
+        ("retry_count", "INTEGER DEFAULT 0"),
+        ("error_msg", "TEXT"),
+        ("publish_logs", "TEXT"),
+        ("platform_url", "TEXT"),
+        ("index_status", "TEXT DEFAULT 'uncheck'")
+    ])
+    _add_missing_columns(conn, "projects", [("company_aliases", "JSON")])
+    _add_missing_columns(conn, "index_check_records", [("from_cache", "BOOLEAN DEFAULT 0")])
+
+
+@migration(2, "热点表复合索引：检测记录按 关键词/平台/检测时间，文章按 发布状态/创建时间，关键词按 项目/状态")
+def _hot_table_indexes(conn: Connection):
+    _create_indexes(conn, [
+        ("ix_index_check_records_keyword_platform_time", "index_check_records", ["keyword_id", "platform", "check_time"]),
+        ("ix_index_check_records_platform_time", "index_check_records", ["platform", "check_time"]),
+        ("ix_index_check_records_check_time", "index_check_records", ["check_time"]),
+        ("ix_geo_articles_status_created", "geo_articles", ["publish_status", "created_at"]),
+        ("ix_geo_articles_created_at", "geo_articles", ["created_at"]),
+        ("ix_keywords_project_status", "keywords", ["project_id", "status"])
+    ])
+    if conn.dialect.name == "sqlite":
+        # 更新统计信息，让查询规划器用上新索引
+        conn.exec_driver_sql("ANALYZE")
+
+
+@migration(3, "收录检测日汇总表 index_check_daily，并用历史检测记录回填")
+def _daily_rollup(conn: Connection):
+    models.IndexCheckDaily.__table__.create(bind=conn, checkfirst=True)
+    _create_indexes(conn, [("ix_index_check_daily_date_platform", "index_check_daily", ["date", "platform"])])
+
+    # v3 时的回填口径（此时还没有 answer_hash 列，回答都在 answer 列里）；以后口径变了另加迁移重建，不要改这里
+    day = "date(check_time)" if conn.dialect.name == "sqlite" else "CAST(check_time AS DATE)"
+    conn.exec_driver_sql("DELETE FROM index_check_daily")
+    conn.exec_driver_sql(f"""
+        INSERT INTO index_check_daily (keyword_id, platform, date, checks, keyword_hits, company_hits, answered)
+        SELECT keyword_id, platform, {day}, COUNT(*),
+               SUM(CASE WHEN keyword_found THEN 1 ELSE 0 END),
+               SUM(CASE WHEN company_found THEN 1 ELSE 0 END),
+               SUM(CASE WHEN TRIM(COALESCE(answer, '')) <> '' THEN 1 ELSE 0 END)
+        FROM index_check_records
+        WHERE check_time IS NOT NULL
+        GROUP BY keyword_id, platform, {day}
+    """)
+
+
+@migration(4, "回答正文按哈希去重压缩存储：answer_blobs 表和 index_check_records.answer_hash 列")
+def _answer_blobs(conn: Connection):
+    # 历史正文不在这里搬（数据量大时会拖慢启动），用 scripts/compact_answers.py 分批搬
+    models.AnswerBlob.__table__.create(bind=conn, checkfirst=True)
+    _add_missing_columns(conn, "index_check_records", [("answer_hash", "VARCHAR(64)")])
+    _create_indexes(conn, [("ix_index_check_records_answer_hash", "index_check_records", ["answer_hash"])])
+
+
+@migration(5, "收录检测归档目录表 index_check_archives")
+def _check_archives(conn: Connection):
+    models.IndexCheckArchive.__table__.create(bind=conn, checkfirst=True)
+
+
+@migration(6, "知识库条目和参考文章的 FTS5 全文索引（trigram 分词，触发器同步）")
+def _fulltext_indexes(conn: Connection):
+    from backend.database.fulltext import ensure_fulltext
+
+    ensure_fulltext(conn, {
+        "knowledge_items_fts": ("knowledge_items", ["title", "content"]),
+        "reference_articles_fts": ("reference_articles", ["title", "summary", "content", "keyword"]),
+    })
+
+
+@migration(7, "游标分页排序索引：客户按创建时间，参考文章按 状态/采集时间")
+def _listing_indexes(conn: Connection):
+    _create_indexes(conn, [
+        ("ix_clients_created_at", "clients", ["created_at"]),
+        ("ix_reference_articles_status_collected", "reference_articles", ["status", "collected_at"])
+    ])
+
+
+@migration(8, "检测任务的执行器租约：index_check_jobs.lease_owner / lease_until")
+def _job_leases(conn: Connection):
+    timestamp = "DATETIME" if conn.dialect.name == "sqlite" else "TIMESTAMP"
+    _add_missing_columns(conn, "index_check_jobs", [
+        ("lease_owner", "VARCHAR(64)"),
+        ("lease_until", timestamp)
+    ])
+
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+# ==================== 执行 ====================
+
+@contextmanager
+def schema_lock(engine: Engine) -> Iterator[None]:
+    """
+    建表/迁移期间的跨进程锁：多个后端进程同时启动时只有一个在改结构，其余的等它做完
+
+    PostgreSQL 用会话级 advisory lock；SQLite 是单机单文件，迁移本身可重复执行，不加锁
+    """
+    if engine.dialect.name != "postgresql":
+        yield
+        return
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.exec_driver_sql(f"SELECT pg_advisory_lock({SCHEMA_LOCK_ID})")
+        try:
+            yield
+        finally:
+            conn.exec_driver_sql(f"SELECT pg_advisory_unlock({SCHEMA_LOCK_ID})")
+
+
+def get_schema_version(conn: Connection) -> int:
+    """当前库已应用的最高迁移版本（没有版本表时为 0）"""
+    if not inspect(conn).has_table(schema_migrations.name):
+        return 0
+    return conn.execute(select(func.max(schema_migrations.c.version))).scalar() or 0
+
+
+def _record(conn: Connection, version: int, description: str):
+    conn.execute(schema_migrations.insert().values(version=version, description=description, applied_at=datetime.now()))
+
+
+def stamp(engine: Engine):
+    """把新建的库直接标记为最新版本（create_all 已按模型建好所有表、列和索引）"""
+    with engine.begin() as conn:
+        schema_migrations.create(bind=conn, checkfirst=True)
+        current = get_schema_version(conn)
+        for version, description, _ in MIGRATIONS:
+            if version > current:
+                _record(conn, version, description)
+    logger.info(f"新数据库已标记为最新结构版本 v{SCHEMA_VERSION}")
+
+
+def migrate(engine: Engine) -> int:
+    """
+    把数据库升级到最新版本
+
+    每个迁移单独一个事务，迁移和版本记录一起提交；中途失败时已完成的迁移保留，下次启动接着跑
+
+    Returns:
+        本次执行的迁移数
+    """
+    with engine.begin() as conn:
+        schema_migrations.create(bind=conn, checkfirst=True)
+        current = get_schema_version(conn)
+
+    pending = [m for m in MIGRATIONS if m[0] > current]
+    if not pending:
+        logger.debug(f"数据库结构已是最新版本 v{current}")
+        return 0
+
+    logger.info(f"数据库结构 v{current} -> v{SCHEMA_VERSION}，待执行 {len(pending)} 个迁移")
+    for version, description, upgrade in pending:
+        with engine.begin() as conn:
+            upgrade(conn)
+            _record(conn, version, description)
+        logger.success(f"✓ 迁移 v{version} 完成: {description}")
+    return len(pending)
+
+
+def get_migration_status(engine: Engine) -> List[Dict]:
+    """各迁移的应用情况（给命令行查看用）"""
+    with engine.connect() as conn:
+        applied = {}
+        if inspect(conn).has_table(schema_migrations.name):
+            applied = {row.version: row.applied_at for row in conn.execute(select(schema_migrations))}
+    return [
+        {"version": version, "description": description, "applied_at": applied.get(version)}
+        for version, description, _ in MIGRATIONS
+    ]
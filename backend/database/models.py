@@ -4,10 +4,11 @@
 包含基础发布、GEO、监控、知识库及AI招聘所有表结构
 """
 
-from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, func, ForeignKey, JSON
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, Text, Date, DateTime, Boolean, func, ForeignKey, JSON, Index, LargeBinary
+from sqlalchemy.orm import relationship, deferred, query_expression
 from backend.database import Base
 from datetime import datetime
+import zlib
 
 # 表参数：允许扩展现有表
 TABLE_ARGS = {"extend_existing": True}
@@ -63,7 +64,10 @@ class Client(Base):
     存储客户/公司信息，一个客户可以有多个项目
     """
     __tablename__ = "clients"
-    __table_args__ = TABLE_ARGS
+    __table_args__ = (
+        Index("ix_clients_created_at", "created_at"),
+        TABLE_ARGS
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True, comment="主键ID")
     name = Column(String(200), nullable=False, comment="客户名称")
@@ -164,6 +168,7 @@ class Project(Base):
     # 项目信息
     name = Column(String(200), nullable=False, comment="项目名称")
     company_name = Column(String(200), nullable=True, comment="公司名称")
+    company_aliases = Column(JSON, nullable=True, comment="公司别名列表（JSON数组）：英文名、简称等，用于收录命中检测")
     domain_keyword = Column(String(200), nullable=True, comment="领域关键词，用于关键词蒸馏")
     description = Column(Text, nullable=True, comment="项目描述")
     industry = Column(String(100), nullable=True, comment="行业")
@@ -189,7 +194,10 @@ class Keyword(Base):
     存储AI分析出的高价值关键词
     """
     __tablename__ = "keywords"
-    __table_args__ = TABLE_ARGS
+    __table_args__ = (
+        Index("ix_keywords_project_status", "project_id", "status"),
+        TABLE_ARGS
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True, comment="主键ID")
     project_id = Column(Integer, ForeignKey("projects.id", ondelete="CASCADE"), nullable=False, index=True, comment="项目ID")
@@ -240,35 +248,246 @@ class IndexCheckRecord(Base):
     存储AI平台收录检测结果
     """
     __tablename__ = "index_check_records"
-    __table_args__ = TABLE_ARGS
+    __table_args__ = (
+        Index("ix_index_check_records_keyword_platform_time", "keyword_id", "platform", "check_time"),
+        Index("ix_index_check_records_platform_time", "platform", "check_time"),
+        Index("ix_index_check_records_check_time", "check_time"),
+        TABLE_ARGS
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True, comment="主键ID")
     keyword_id = Column(Integer, ForeignKey("keywords.id", ondelete="CASCADE"), nullable=False, index=True, comment="关键词ID")
     platform = Column(String(50), nullable=False, comment="检测平台：doubao/qianwen/deepseek")
     question = Column(Text, nullable=False, comment="检测时使用的问题")
-    answer = Column(Text, nullable=True, comment="AI回答内容")
+    # 回答正文按内容哈希压缩存到 answer_blobs，相同回答只存一份；answer 列只剩历史数据（迁移前写入的）
+    # 两者都延迟加载，列表查询不读回答正文，要正文用 answer_text
+    answer = deferred(Column(Text, nullable=True, comment="AI回答内容（历史数据，新记录存 answer_hash）"))
+    answer_hash = Column(String(64), nullable=True, index=True, comment="回答正文的 SHA-256（answer_blobs.hash）")
 
     # 检测结果
     keyword_found = Column(Boolean, nullable=True, comment="是否包含关键词")
     company_found = Column(Boolean, nullable=True, comment="是否包含公司名")
+    from_cache = Column(Boolean, default=False, comment="是否复用了缓存的回答（未实际访问AI平台）")
 
     # 时间戳
     check_time = Column(DateTime, default=func.now(), comment="检测时间")
 
     # 关联关系
     keyword = relationship("Keyword", back_populates="index_records")
+    citations = relationship("IndexCheckCitation", back_populates="record", cascade="all, delete-orphan")
+    timing = relationship("IndexCheckTiming", back_populates="record", uselist=False, cascade="all, delete-orphan")
+    answer_blob = relationship(
+        "AnswerBlob",
+        primaryjoin="foreign(IndexCheckRecord.answer_hash) == AnswerBlob.hash",
+        uselist=False,
+        viewonly=True
+    )
+
+    @property
+    def answer_text(self):
+        """回答正文（新记录从 answer_blobs 解压，历史记录读 answer 列）"""
+        if self.answer_hash:
+            return self.answer_blob.text if self.answer_blob else None
+        return self.answer
 
     def __repr__(self):
         return f"<IndexCheckRecord keyword_id={self.keyword_id} platform={self.platform}>"
 
 
+class AnswerBlob(Base):
+    """
+    回答正文表
+    按内容寻址（SHA-256）去重、zlib 压缩存储，同一问题每天问出来一样的长回答只存一份
+    """
+    __tablename__ = "answer_blobs"
+    __table_args__ = TABLE_ARGS
+
+    hash = Column(String(64), primary_key=True, comment="回答正文 UTF-8 编码的 SHA-256")
+    data = Column(LargeBinary, nullable=False, comment="zlib 压缩后的回答正文")
+    length = Column(Integer, nullable=False, default=0, comment="回答正文长度（字符）")
+    created_at = Column(DateTime, default=func.now(), comment="首次写入时间")
+
+    @property
+    def text(self) -> str:
+        """解压后的回答正文"""
+        return zlib.decompress(self.data).decode("utf-8")
+
+    def __repr__(self):
+        return f"<AnswerBlob {self.hash[:12]} length={self.length}>"
+
+
+class IndexCheckCitation(Base):
+    """
+    收录检测引用表
+    AI回答里引用的链接，一条检测记录对应多条引用，按 URL / 域名建索引
+    """
+    __tablename__ = "index_check_citations"
+    __table_args__ = TABLE_ARGS
+
+    id = Column(Integer, primary_key=True, autoincrement=True, comment="主键ID")
+    record_id = Column(Integer, ForeignKey("index_check_records.id", ondelete="CASCADE"), nullable=False, index=True, comment="检测记录ID")
+    url = Column(String(1000), nullable=False, index=True, comment="引用URL（归一化后，见 citation_extractor.normalize_url）")
+    domain = Column(String(255), nullable=False, index=True, comment="引用域名")
+    title = Column(String(500), nullable=True, comment="引用标题")
+    position = Column(Integer, default=0, comment="在回答中的出现顺序")
+
+    # 关联关系
+    record = relationship("IndexCheckRecord", back_populates="citations")
+
+    def __repr__(self):
+        return f"<IndexCheckCitation record_id={self.record_id} domain={self.domain}>"
+
+
+class IndexCheckTiming(Base):
+    """
+    收录检测耗时表
+    每次实际访问AI平台的检测记一行分阶段耗时（毫秒），缓存命中的记录没有这一行；
+    平台和检测时间冗余存一份，延迟统计只扫这张窄表，不碰带回答全文的记录表
+    """
+    __tablename__ = "index_check_timings"
+    __table_args__ = (
+        Index("ix_index_check_timings_platform_time", "platform", "check_time"),
+        TABLE_ARGS
+    )
+
+    record_id = Column(Integer, ForeignKey("index_check_records.id", ondelete="CASCADE"), primary_key=True, comment="检测记录ID")
+    platform = Column(String(50), nullable=False, comment="检测平台")
+    check_time = Column(DateTime, nullable=False, comment="检测时间（同检测记录）")
+
+    total_ms = Column(Integer, nullable=False, comment="端到端耗时（含重试和限流等待）")
+    navigate_ms = Column(Integer, nullable=True, comment="打开页面到输入框就绪")
+    submit_ms = Column(Integer, nullable=True, comment="输入并提交问题")
+    wait_ms = Column(Integer, nullable=True, comment="等待回答生成")
+    extract_ms = Column(Integer, nullable=True, comment="抓取回答内容和引用")
+    retries = Column(Integer, default=0, comment="重试次数")
+    answer_length = Column(Integer, default=0, comment="回答长度（字符）")
+    wait_signal = Column(String(20), nullable=True, comment="判定回答完成的信号：network/send_button/stop_generating/dom_quiet")
+
+    # 关联关系
+    record = relationship("IndexCheckRecord", back_populates="timing")
+
+    def __repr__(self):
+        return f"<IndexCheckTiming record_id={self.record_id} platform={self.platform} total_ms={self.total_ms}>"
+
+
+class IndexCheckDaily(Base):
+    """
+    收录检测日汇总表
+    日期 × 关键词 × 平台 的检测次数和命中次数，检测记录写入/删除时增量维护（见 services/check_rollup.py），
+    趋势、总览、排行榜等报表都读这张表，不再扫原始检测记录
+    """
+    __tablename__ = "index_check_daily"
+    __table_args__ = (
+        Index("ix_index_check_daily_date_platform", "date", "platform"),
+        TABLE_ARGS
+    )
+
+    keyword_id = Column(Integer, ForeignKey("keywords.id", ondelete="CASCADE"), primary_key=True, comment="关键词ID")
+    platform = Column(String(50), primary_key=True, comment="检测平台")
+    date = Column(Date, primary_key=True, comment="检测日期（按检测时间的本地日期）")
+
+    checks = Column(Integer, nullable=False, default=0, comment="检测次数")
+    keyword_hits = Column(Integer, nullable=False, default=0, comment="回答包含关键词的次数")
+    company_hits = Column(Integer, nullable=False, default=0, comment="回答包含公司名的次数")
+    answered = Column(Integer, nullable=False, default=0, comment="拿到非空回答的次数")
+
+    def __repr__(self):
+        return f"<IndexCheckDaily {self.date} keyword_id={self.keyword_id} platform={self.platform} checks={self.checks}>"
+
+
+class IndexCheckArchive(Base):
+    """
+    收录检测归档目录表
+    超过保留期的检测记录按月搬到独立的 SQLite 归档文件（见 services/check_archive.py），这里记每个月的文件和范围，
+    查询的时间范围落在归档月份时按这张表找到对应文件一起查
+    """
+    __tablename__ = "index_check_archives"
+    __table_args__ = TABLE_ARGS
+
+    month = Column(String(7), primary_key=True, comment="归档月份 YYYY-MM")
+    path = Column(String(500), nullable=False, comment="归档文件名（相对 INDEX_CHECK_ARCHIVE_DIR）")
+    records = Column(Integer, nullable=False, default=0, comment="归档的检测记录数")
+    min_id = Column(Integer, nullable=True, comment="归档记录的最小ID")
+    max_id = Column(Integer, nullable=True, comment="归档记录的最大ID")
+    archived_at = Column(DateTime, default=func.now(), onupdate=func.now(), comment="最近一次归档时间")
+
+    def __repr__(self):
+        return f"<IndexCheckArchive {self.month} records={self.records}>"
+
+
+class IndexCheckJob(Base):
+    """
+    收录检测任务表
+    一次项目批量检测对应一个任务，进度落库，服务重启后可以接着跑
+    """
+    __tablename__ = "index_check_jobs"
+    __table_args__ = TABLE_ARGS
+
+    id = Column(Integer, primary_key=True, autoincrement=True, comment="主键ID")
+    project_id = Column(Integer, ForeignKey("projects.id", ondelete="CASCADE"), nullable=False, index=True, comment="项目ID")
+    platforms = Column(JSON, nullable=False, comment="检测平台列表（JSON数组）")
+
+    # 状态
+    status = Column(String(20), default="pending", index=True, comment="状态：pending=待执行 running=执行中 completed=已完成 failed=未完成（可恢复）")
+    error_msg = Column(Text, nullable=True, comment="错误信息")
+    lease_owner = Column(String(64), nullable=True, comment="正在执行任务的执行器标识（多进程共用数据库时只有它能跑这个任务）")
+    lease_until = Column(DateTime, nullable=True, comment="执行器租约到期时间，执行期间定时续约，过期说明执行器已经不在了")
+
+    # 时间戳
+    created_at = Column(DateTime, default=func.now(), comment="创建时间")
+    started_at = Column(DateTime, nullable=True, comment="开始时间")
+    finished_at = Column(DateTime, nullable=True, comment="结束时间")
+
+    # 关联关系
+    items = relationship("IndexCheckJobItem", back_populates="job", cascade="all, delete-orphan")
+
+    def __repr__(self):
+        return f"<IndexCheckJob project_id={self.project_id} status={self.status}>"
+
+
+class IndexCheckJobItem(Base):
+    """
+    收录检测任务项表
+    每个 关键词 × 问题 × 平台 一条，执行器按租约认领
+    """
+    __tablename__ = "index_check_job_items"
+    __table_args__ = TABLE_ARGS
+
+    id = Column(Integer, primary_key=True, autoincrement=True, comment="主键ID")
+    job_id = Column(Integer, ForeignKey("index_check_jobs.id", ondelete="CASCADE"), nullable=False, index=True, comment="任务ID")
+    keyword_id = Column(Integer, ForeignKey("keywords.id", ondelete="CASCADE"), nullable=False, comment="关键词ID")
+    question_variant_id = Column(Integer, nullable=True, comment="问题变体ID（默认问题为空）")
+    question = Column(Text, nullable=False, comment="检测问题")
+    platform = Column(String(50), nullable=False, comment="检测平台")
+
+    # 执行状态
+    status = Column(String(20), default="pending", comment="状态：pending=待执行 running=执行中 done=已完成 failed=检测失败")
+    attempts = Column(Integer, default=0, comment="认领次数")
+    lease_owner = Column(String(64), nullable=True, comment="当前租约持有者")
+    lease_until = Column(DateTime, nullable=True, comment="租约到期时间，过期后可被重新认领")
+    error_msg = Column(Text, nullable=True, comment="错误信息")
+
+    # 时间戳
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now(), comment="更新时间")
+
+    # 关联关系
+    job = relationship("IndexCheckJob", back_populates="items")
+
+    def __repr__(self):
+        return f"<IndexCheckJobItem job_id={self.job_id} platform={self.platform} status={self.status}>"
+
+
 class GeoArticle(Base):
     """
     GEO文章表
     存储AI生成的文章及质检信息
     """
     __tablename__ = "geo_articles"
-    __table_args__ = TABLE_ARGS
+    __table_args__ = (
+        Index("ix_geo_articles_status_created", "publish_status", "created_at"),
+        Index("ix_geo_articles_created_at", "created_at"),
+        TABLE_ARGS
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True, comment="主键ID")
     keyword_id = Column(Integer, ForeignKey("keywords.id", ondelete="CASCADE"), nullable=False, index=True, comment="关键词ID")
@@ -308,6 +527,9 @@ class GeoArticle(Base):
     created_at = Column(DateTime, default=func.now(), comment="创建时间")
     updated_at = Column(DateTime, default=func.now(), onupdate=func.now(), comment="更新时间")
 
+    # 正文摘要：不是表字段，列表查询用 with_expression 按需算出（只取开头一段，不加载整篇正文）
+    content_preview = query_expression()
+
     # 关联关系
     keyword = relationship("Keyword", back_populates="articles")
     publish_records = relationship("PublishRecord", back_populates="article", cascade="all, delete-orphan")
@@ -409,7 +631,10 @@ class ReferenceArticle(Base):
     存储从各平台采集的爆火/热门文章，用于内容创作参考
     """
     __tablename__ = "reference_articles"
-    __table_args__ = TABLE_ARGS
+    __table_args__ = (
+        Index("ix_reference_articles_status_collected", "status", "collected_at"),
+        TABLE_ARGS
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True, comment="主键ID")
 
@@ -464,4 +689,8 @@ class SiteProject(Base):
     preview_url = Column(String, nullable=True, comment="本地预览 URL")
     
     created_at = Column(DateTime, default=datetime.now)
-    updated_at = Column(DateTime, default=datetime.now, onupdate=datetime.now)
\ No newline at end of file
+    updated_at = Column(DateTime, default=datetime.now, onupdate=datetime.now)
+
+
+# 全文索引随建表一起创建（注册 after_create 监听）
+from backend.database import fulltext  # noqa: E402,F401
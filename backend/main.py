@@ -21,8 +21,8 @@ from backend.config import (
     APP_NAME, APP_VERSION, DEBUG, HOST, PORT, RELOAD,
     CORS_ORIGINS, PLATFORMS
 )
-from backend.database import init_db, get_db, engine, SessionLocal
-from backend.scripts.fix_database import check_and_fix_database
+from backend.database import init_db, get_db, engine, async_engine, read_engine, SessionLocal
+from backend.services.check_archive import dispose_archive_engines
 
 # 导入所有 API 路由模块
 import backend.api.account as account
@@ -44,6 +44,7 @@ import backend.api.client as client  # 客户管理
 # 导入服务组件
 from backend.services.websocket_manager import ws_manager
 from backend.services.scheduler_service import get_scheduler_service
+from backend.services.check_job_service import resume_unfinished_jobs
 from backend.services.n8n_service import get_n8n_service
 from backend.services.playwright_mgr import playwright_mgr
 from backend.services.playwright.publishers import register_publishers
@@ -89,9 +90,8 @@ async def lifespan(app: FastAPI):
 
     # 1. 初始化数据库
     try:
+        # 建表 + 版本化迁移（结构已是最新时直接跳过）
         init_db()
-        # 自动执行数据库修复/迁移（确保新字段存在）
-        check_and_fix_database()
         logger.success("✅ 数据库初始化检查完成")
     except Exception as e:
         logger.error(f"❌ 数据库初始化失败: {e}")
@@ -112,7 +112,10 @@ async def lifespan(app: FastAPI):
     scheduler_instance.start()
     logger.bind(module="调度中心").success("自动化任务引擎已启动")
 
-    # 5. 注册平台发布适配器
+    # 5. 恢复上次中断的收录检测任务
+    asyncio.create_task(resume_unfinished_jobs())
+
+    # 6. 注册平台发布适配器
     register_publishers(PLATFORMS)
     logger.bind(module="发布器").success(f"已注册 {len([k for k in PLATFORMS.keys() if k in ['zhihu', 'baijiahao', 'sohu', 'toutiao']])} 个平台发布器")
 
@@ -124,6 +127,9 @@ async def lifespan(app: FastAPI):
     await playwright_mgr.stop()
     n8n_service = await get_n8n_service()
     await n8n_service.close()
+    await async_engine.dispose()
+    read_engine.dispose()
+    dispose_archive_engines()
     logger.info("服务已安全关闭")
 
 
@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+"""
+归档收录检测历史记录
+把超过保留期的检测记录按月搬到 INDEX_CHECK_ARCHIVE_DIR 下的独立 SQLite 文件，热表只留最近几个月
+
+用法：
+    python backend/scripts/archive_check_records.py                  # 按配置的保留期归档
+    python backend/scripts/archive_check_records.py --months 3       # 只保留最近 3 个月
+    python backend/scripts/archive_check_records.py --dry-run        # 只看每个月会归档多少条
+    python backend/scripts/archive_check_records.py --list           # 列出已有的归档
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+# 添加项目根目录到 Python 路径
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from backend.config import INDEX_CHECK_ARCHIVE_CHUNK_SIZE, INDEX_CHECK_ARCHIVE_MONTHS
+from backend.database import SessionLocal, engine, init_db
+from backend.database.models import IndexCheckArchive
+from backend.services.check_archive import CheckArchiveService
+from loguru import logger
+
+
+def main():
+    parser = argparse.ArgumentParser(description="归档收录检测历史记录")
+    parser.add_argument("--months", type=int, default=INDEX_CHECK_ARCHIVE_MONTHS, help="热表保留的月数")
+    parser.add_argument("--chunk-size", type=int, default=INDEX_CHECK_ARCHIVE_CHUNK_SIZE, help="每块搬移的记录数")
+    parser.add_argument("--dry-run", action="store_true", help="只统计，不搬移")
+    parser.add_argument("--list", action="store_true", help="列出已有的归档")
+    parser.add_argument("--vacuum", action="store_true", help="归档后执行 VACUUM 回收主库磁盘空间（耗时较长，期间锁库）")
+    args = parser.parse_args()
+
+    # 确保归档目录表已创建
+    init_db()
+
+    db = SessionLocal()
+    try:
+        service = CheckArchiveService(db)
+        if args.list:
+            for archive in db.query(IndexCheckArchive).order_by(IndexCheckArchive.month).all():
+                print(f"{archive.month}  {archive.records:>8} 条  {archive.path}")
+            return
+
+        if args.dry_run:
+            preview = service.preview(months=args.months)
+            for month, count in preview.items():
+                print(f"{month}  {count:>8} 条")
+            print(f"\n共 {sum(preview.values())} 条待归档（保留最近 {args.months} 个月）\n")
+            return
+
+        result = service.archive(months=args.months, chunk_size=args.chunk_size)
+        print(f"\n归档完成！{result['records']} 条记录，月份: {list(result['months']) or '无'}，"
+              f"清理回答正文 {result['pruned_answers']} 份，耗时 {result['elapsed']}s\n")
+    except Exception as e:
+        logger.error(f"归档失败: {e}")
+        sys.exit(1)
+    finally:
+        db.close()
+
+    if args.vacuum and engine.dialect.name == "sqlite":
+        # VACUUM 不能在事务里执行
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            conn.exec_driver_sql("VACUUM")
+        print("VACUUM 完成")
+
+
+if __name__ == "__main__":
+    main()
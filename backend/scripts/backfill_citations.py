@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+"""
+回填历史收录记录的引用
+从已保存的回答文本中提取引用 URL 和域名，写入 index_check_citations，不开浏览器
+
+用法：
+    python backend/scripts/backfill_citations.py
+    python backend/scripts/backfill_citations.py --project-id 1 --chunk-size 5000
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+# 添加项目根目录到 Python 路径
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from backend.database import SessionLocal, init_db
+from backend.services.citation_service import CitationService
+from loguru import logger
+
+
+def main():
+    parser = argparse.ArgumentParser(description="回填历史收录记录的引用")
+    parser.add_argument("--project-id", type=int, default=None, help="只回填指定项目，默认全部项目")
+    parser.add_argument("--chunk-size", type=int, default=2000, help="每块读取的记录数")
+    args = parser.parse_args()
+
+    # 确保引用表已创建
+    init_db()
+
+    db = SessionLocal()
+    try:
+        stats = CitationService(db).backfill(project_id=args.project_id, chunk_size=args.chunk_size)
+        print(f"\n回填完成！扫描 {stats['scanned']} 条记录，写入 {stats['inserted']} 条引用，耗时 {stats['elapsed']}s\n")
+    except Exception as e:
+        logger.error(f"回填失败: {e}")
+        sys.exit(1)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
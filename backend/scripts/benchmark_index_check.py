@@ -0,0 +1,278 @@
+# -*- coding: utf-8 -*-
+"""
+收录检测吞吐压测
+在本地模拟AI平台上跑 check_project_keywords，统计每分钟检测数、单问题延迟 p50/p95 和浏览器内存，
+不需要真实账号、不联网，也不碰正式数据库！
+
+用法：
+    python backend/scripts/benchmark_index_check.py
+    python backend/scripts/benchmark_index_check.py --keywords 10 --questions 3 --unthrottled
+    python backend/scripts/benchmark_index_check.py --error-rate 0.1 --login-rate 0.05 --json result.json
+
+说明：
+    - 默认按正式配置的并发上限和平台限流器运行，结果可直接对比线上吞吐
+    - --unthrottled 去掉限流，测的是检测链路本身的上限
+    - 默认使用 headless 浏览器模式（屏蔽图片/字体/媒体），--profile headed 可对比有界面模式
+    - 浏览器内存需要安装 psutil，未安装时不统计
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+# 添加项目根目录到 Python 路径
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from loguru import logger
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+from backend.config import AI_PLATFORMS, INDEX_CHECK_BROWSER_PROFILES
+from backend.database import Base
+from backend.database.models import Project, Keyword, QuestionVariant
+from backend.services.answer_cache import answer_cache
+from backend.services.check_timing_service import percentile
+from backend.services.index_check_service import IndexCheckService
+from backend.services.playwright.browser_pool import BrowserPool
+from backend.services.playwright.check_executor import CheckExecutor
+from backend.services.playwright.platform_throttle import PlatformThrottle
+from backend.scripts.mock_ai_platforms import (
+    MockPlatformServer, PLATFORM_SKINS, add_settings_arguments, settings_from_args
+)
+
+BENCH_COMPANY = "极光数智科技"
+
+# --unthrottled 时使用的限流配置：速率足够高，等同于不限流
+UNTHROTTLED = {
+    "rate_per_minute": 100000,
+    "min_rate_per_minute": 100000,
+    "max_rate_per_minute": 100000,
+    "burst": 1000
+}
+
+
+class BenchmarkIndexCheckService(IndexCheckService):
+    """
+    压测用收录检测服务
+
+    注意：
+    - 检测器的 chat_url 指向本地模拟平台，浏览器不加载/回写真实会话
+    - 不走回答缓存，每个问题都真实驱动一次浏览器
+    - 记录每个问题的端到端耗时
+    """
+
+    def __init__(
+        self,
+        db,
+        server: MockPlatformServer,
+        browser_profile: Optional[str] = None,
+        unthrottled: bool = False,
+        concurrency: Optional[int] = None
+    ):
+        super().__init__(db, browser_profile=browser_profile)
+        self.unthrottled = unthrottled
+        self.concurrency = concurrency
+        self.timings: Dict[str, List[float]] = defaultdict(list)
+        for platform_id, checker in list(self.checkers.items()):
+            config = {**AI_PLATFORMS[platform_id], "chat_url": server.chat_url(platform_id)}
+            self.checkers[platform_id] = checker = type(checker)(platform_id, config)
+            # 压测用独立限流器，不影响进程内正式检测的平台状态
+            checker.throttle = PlatformThrottle(platform_id, UNTHROTTLED if unthrottled else None)
+
+    def create_browser_pool(self) -> BrowserPool:
+        pool = super().create_browser_pool()
+        pool.use_sessions = False
+        return pool
+
+    def create_executor(self, pool: BrowserPool) -> CheckExecutor:
+        default = super().create_executor(pool)
+        limits = {}
+        for platform_id in self.checkers:
+            limit = default.get_limit(platform_id)
+            if self.concurrency:
+                limit["max_concurrency"] = self.concurrency
+            limits[platform_id] = limit
+        return CheckExecutor(pool, limits=limits, page_close_delay=default.page_close_delay)
+
+    async def _check_single_question(self, *args, **kwargs) -> Dict[str, Any]:
+        kwargs["use_cache"] = False
+        started = time.perf_counter()
+        result = await super()._check_single_question(*args, **kwargs)
+        self.timings[kwargs["platform_id"]].append(time.perf_counter() - started)
+        return result
+
+
+class MemorySampler:
+    """定时采样本进程所有子进程（Playwright 驱动 + 浏览器）的常驻内存"""
+
+    def __init__(self, interval: float = 0.5):
+        self.interval = interval
+        self.samples: List[float] = []
+        self._task: Optional[asyncio.Task] = None
+
+    def sample(self) -> float:
+        total = 0
+        for child in psutil.Process().children(recursive=True):
+            try:
+                total += child.memory_info().rss
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                continue
+        return total / 1024 / 1024
+
+    async def _run(self):
+        while True:
+            self.samples.append(self.sample())
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        if psutil is not None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    def summary(self) -> Dict[str, Optional[float]]:
+        if not self.samples:
+            return {"peak_mb": None, "mean_mb": None}
+        return {
+            "peak_mb": round(max(self.samples), 1),
+            "mean_mb": round(sum(self.samples) / len(self.samples), 1)
+        }
+
+
+def seed_project(db, keywords: int, questions: int) -> int:
+    """在压测库里建一个项目，返回项目ID"""
+    project = Project(name="压测项目", company_name=BENCH_COMPANY, company_aliases=["极光数智"])
+    db.add(project)
+    db.flush()
+    for k in range(keywords):
+        keyword = Keyword(project_id=project.id, keyword=f"企业数字化服务{k + 1}", status="active")
+        db.add(keyword)
+        db.flush()
+        for q in range(questions):
+            db.add(QuestionVariant(keyword_id=keyword.id, question=f"{keyword.keyword}哪家好？请推荐第{q + 1}组服务商"))
+    db.commit()
+    return project.id
+
+
+def summarize(service: BenchmarkIndexCheckService, results: List[Dict[str, Any]], elapsed: float,
+              memory: MemorySampler, server: MockPlatformServer) -> Dict[str, Any]:
+    """汇总压测结果"""
+    def latency(values: List[float]) -> Dict[str, Any]:
+        return {
+            "count": len(values),
+            "p50_s": round(percentile(values, 50), 2) if values else None,
+            "p95_s": round(percentile(values, 95), 2) if values else None,
+            "max_s": round(max(values), 2) if values else None
+        }
+
+    all_timings = [t for values in service.timings.values() for t in values]
+    succeeded = sum(1 for r in results if r.get("success"))
+    return {
+        "browser_profile": service.browser_profile["name"],
+        "checks": len(results),
+        "succeeded": succeeded,
+        "company_hits": sum(1 for r in results if r.get("company_found")),
+        "elapsed_s": round(elapsed, 1),
+        "checks_per_minute": round(len(results) / elapsed * 60, 2) if elapsed > 0 else 0.0,
+        "latency": latency(all_timings),
+        "platforms": {pid: latency(values) for pid, values in service.timings.items()},
+        "browser_memory": memory.summary(),
+        "mock_stats": server.stats
+    }
+
+
+async def run_benchmark(args: argparse.Namespace) -> Dict[str, Any]:
+    platforms = args.platforms or list(PLATFORM_SKINS)
+    settings = settings_from_args(args, mentions=[BENCH_COMPANY])
+
+    with tempfile.TemporaryDirectory() as tmp, MockPlatformServer(settings) as server:
+        engine = create_engine(f"sqlite:///{tmp}/benchmark.db", connect_args={"check_same_thread": False})
+        Base.metadata.create_all(bind=engine)
+        db = sessionmaker(bind=engine)()
+        try:
+            project_id = seed_project(db, args.keywords, args.questions)
+            service = BenchmarkIndexCheckService(
+                db, server,
+                browser_profile=args.profile,
+                unthrottled=args.unthrottled,
+                concurrency=args.concurrency
+            )
+            for checker in service.checkers.values():
+                checker.capture_mode = args.capture_mode
+
+            memory = MemorySampler()
+            memory.start()
+            started = time.perf_counter()
+            try:
+                results = await service.check_project_keywords(project_id, platforms=platforms)
+            finally:
+                elapsed = time.perf_counter() - started
+                await memory.stop()
+            return summarize(service, results, elapsed, memory, server)
+        finally:
+            db.close()
+            engine.dispose()
+
+
+def print_report(report: Dict[str, Any]):
+    latency = report["latency"]
+    memory = report["browser_memory"]
+    print("\n========== 收录检测压测结果 ==========")
+    print(f"浏览器模式: {report['browser_profile']}")
+    print(f"检测数: {report['checks']}（成功 {report['succeeded']}，命中公司 {report['company_hits']}）")
+    print(f"总耗时: {report['elapsed_s']}s，吞吐: {report['checks_per_minute']} 次/分钟")
+    print(f"单问题延迟: p50={latency['p50_s']}s p95={latency['p95_s']}s max={latency['max_s']}s")
+    for platform_id, item in report["platforms"].items():
+        print(f"  {platform_id}: {item['count']} 次, p50={item['p50_s']}s p95={item['p95_s']}s")
+    if memory["peak_mb"] is None:
+        print("浏览器内存: 未统计（需要 pip install psutil）")
+    else:
+        print(f"浏览器内存: 峰值 {memory['peak_mb']}MB，平均 {memory['mean_mb']}MB")
+    print("======================================\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="收录检测吞吐压测（本地模拟AI平台）")
+    parser.add_argument("--keywords", type=int, default=5, help="关键词数")
+    parser.add_argument("--questions", type=int, default=2, help="每个关键词的问题数")
+    parser.add_argument("--platforms", nargs="*", choices=list(PLATFORM_SKINS), default=None, help="检测平台，默认全部")
+    parser.add_argument("--concurrency", type=int, default=None, help="覆盖每个平台的并发页面数")
+    parser.add_argument("--unthrottled", action="store_true", help="去掉限流器")
+    parser.add_argument("--profile", choices=list(INDEX_CHECK_BROWSER_PROFILES), default="headless", help="浏览器模式")
+    parser.add_argument("--capture-mode", choices=["dom", "network"], default="dom", help="回答抓取方式")
+    parser.add_argument("--json", dest="json_path", default=None, help="把结果另存为 JSON 文件")
+    add_settings_arguments(parser)
+    args = parser.parse_args()
+
+    # 压测只看结果，检测器的逐步日志降到 WARNING
+    logger.remove()
+    logger.add(sys.stderr, level="WARNING")
+    answer_cache.invalidate()
+
+    report = asyncio.run(run_benchmark(args))
+    print_report(report)
+    if args.json_path:
+        Path(args.json_path).write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+        print(f"结果已保存: {args.json_path}")
+
+
+if __name__ == "__main__":
+    main()
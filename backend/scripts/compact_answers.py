@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+"""
+压缩存储AI回答正文
+把迁移前写在 index_check_records.answer 列里的历史回答搬进 answer_blobs（按哈希去重、zlib 压缩）
+
+用法：
+    python backend/scripts/compact_answers.py                       # 搬移历史回答
+    python backend/scripts/compact_answers.py --prune --vacuum      # 搬完后清理无引用正文并回收磁盘空间
+    python backend/scripts/compact_answers.py --stats               # 只看存储统计
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+# 添加项目根目录到 Python 路径
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from backend.database import SessionLocal, engine, init_db
+from backend.services.answer_store import AnswerStoreService
+from loguru import logger
+
+
+def print_stats(stats: dict):
+    print(f"\n有正文哈希的记录: {stats['records_with_blob']}，待搬移的历史记录: {stats['legacy_records']}")
+    print(f"正文份数: {stats['blobs']}（平均每份被 {stats['dedup_ratio']} 条记录共用）")
+    print(f"原文 {stats['raw_chars']} 字符，压缩后 {stats['stored_bytes']} 字节\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="压缩存储AI回答正文")
+    parser.add_argument("--chunk-size", type=int, default=2000, help="每块处理的记录数")
+    parser.add_argument("--prune", action="store_true", help="删除已经没有记录引用的正文")
+    parser.add_argument("--vacuum", action="store_true", help="执行 VACUUM 回收磁盘空间（SQLite，耗时较长，期间锁库）")
+    parser.add_argument("--stats", action="store_true", help="只输出存储统计，不做修改")
+    args = parser.parse_args()
+
+    # 确保 answer_blobs 表和 answer_hash 列已就绪
+    init_db()
+
+    db = SessionLocal()
+    try:
+        service = AnswerStoreService(db)
+        if not args.stats:
+            result = service.move_legacy_answers(chunk_size=args.chunk_size)
+            print(f"\n搬移完成！{result['moved']} 条记录，耗时 {result['elapsed']}s")
+            if args.prune:
+                print(f"清理无引用正文 {service.prune()} 份")
+        print_stats(service.get_stats())
+    except Exception as e:
+        logger.error(f"压缩回答失败: {e}")
+        sys.exit(1)
+    finally:
+        db.close()
+
+    if args.vacuum and not args.stats and engine.dialect.name == "sqlite":
+        # VACUUM 不能在事务里执行
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            conn.exec_driver_sql("VACUUM")
+        print("VACUUM 完成")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,90 +1,53 @@
 # -*- coding: utf-8 -*-
 """
 修复数据库表结构脚本
+逐列 ALTER TABLE 的检查已经并入版本化迁移（backend/database/migrations.py），这里只是手动执行入口
+
+用法：
+    python backend/scripts/fix_database.py            # 建缺失的表并执行未应用的迁移
+    python backend/scripts/fix_database.py --status   # 只查看各迁移的应用情况
 """
 
-import sqlite3
-import os
+import argparse
+import sys
 from pathlib import Path
+
+# 添加项目根目录到 Python 路径
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
 from loguru import logger
 
+from backend.database import engine, init_db
+
+
 def check_and_fix_database():
     """
-    检查并修复数据库表结构
+    检查并修复数据库表结构（等同于启动时的 init_db）
     """
-    # 数据库路径
-    # 假设此脚本位于 backend/scripts/ 目录下
-    # 向上两级是项目根目录，然后进入 backend/database/
-    # 注意：根据原逻辑 BASE_DIR 是 parent.parent，即 backend/
-    # 数据库路径是 BASE_DIR / "database" / "auto_geo_v3.db"
-    # 即 backend/database/auto_geo_v3.db
-    
-    current_file = Path(__file__).resolve()
-    # 如果作为模块导入，路径计算方式不变
-    BASE_DIR = current_file.parent.parent
-    db_path = BASE_DIR / "database" / "auto_geo_v3.db"
+    init_db()
 
-    logger.info(f"正在检查数据库结构: {db_path}")
 
-    if not db_path.exists():
-        logger.warning(f"数据库文件不存在: {db_path}，跳过结构修复（等待 init_db 创建）")
-        return
+def print_status():
+    from backend.database.migrations import SCHEMA_VERSION, get_migration_status
 
-    # 连接数据库
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
+    print(f"\n最新结构版本: v{SCHEMA_VERSION}")
+    for item in get_migration_status(engine):
+        applied = item["applied_at"].strftime("%Y-%m-%d %H:%M:%S") if item["applied_at"] else "未应用"
+        print(f"  v{item['version']:<3} {applied:<20} {item['description']}")
+    print()
 
-    try:
-        # 检查geo_articles表结构
-        cursor.execute("PRAGMA table_info(geo_articles)")
-        columns = cursor.fetchall()
-        
-        # 获取现有列名列表
-        existing_columns = [col[1] for col in columns]
-        
-        # 定义需要检查的列及其定义
-        columns_to_check = [
-            ("publish_time", "DATETIME"),
-            ("last_check_time", "DATETIME"),
-            ("index_details", "TEXT"),
-            ("quality_status", "TEXT DEFAULT 'pending'"),
-            ("quality_score", "INTEGER"),
-            ("ai_score", "INTEGER"),
-            ("readability_score", "INTEGER"),
-            ("retry_count", "INTEGER DEFAULT 0"),
-            ("error_msg", "TEXT"),
-            ("publish_logs", "TEXT"),
-            ("platform_url", "TEXT"),
-            ("index_status", "TEXT DEFAULT 'uncheck'")
-        ]
-
-        for col_name, col_def in columns_to_check:
-            if col_name not in existing_columns:
-                logger.info(f"添加缺失的列: {col_name}...")
-                try:
-                    cursor.execute(f"ALTER TABLE geo_articles ADD COLUMN {col_name} {col_def}")
-                    conn.commit()
-                    logger.success(f"✓ {col_name} 列添加成功")
-                except Exception as e:
-                    logger.error(f"✗ 添加 {col_name} 列失败: {e}")
-                    conn.rollback()
-            else:
-                # logger.debug(f"{col_name} 列已存在")
-                pass
-
-        logger.success("数据库表结构检查和修复完成")
-
-    except Exception as e:
-        logger.error(f"数据库修复过程出错: {e}")
-    finally:
-        # 关闭连接
-        conn.close()
 
 if __name__ == "__main__":
     # 配置 logger 输出到控制台
-    import sys
     logger.remove()
     logger.add(sys.stdout, level="INFO")
-    
-    check_and_fix_database()
 
+    parser = argparse.ArgumentParser(description="数据库结构检查与迁移")
+    parser.add_argument("--status", action="store_true", help="只查看迁移状态，不做修改")
+    args = parser.parse_args()
+
+    if args.status:
+        print_status()
+    else:
+        check_and_fix_database()
@@ -0,0 +1,461 @@
+# -*- coding: utf-8 -*-
+"""
+本地模拟AI平台
+模仿豆包/通义千问/DeepSeek 的聊天页面（输入框、流式回答、停止按钮、登录墙），
+不需要真实账号就能跑收录检测和压测！
+
+用法：
+    python backend/scripts/mock_ai_platforms.py --port 8765
+    python backend/scripts/mock_ai_platforms.py --first-token-ms 1500 --error-rate 0.1 --login-rate 0.05
+
+页面地址：http://127.0.0.1:8765/doubao/ 、/qianwen/ 、/deepseek/
+把平台配置的 chat_url 指向这些地址即可（见 benchmark_index_check.py）
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import socket
+import sys
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+# 添加项目根目录到 Python 路径
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+import uvicorn
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import HTMLResponse, StreamingResponse
+from loguru import logger
+
+
+@dataclass
+class MockPlatformSettings:
+    """模拟平台的延迟和故障注入配置（概率均为 0~1）"""
+    first_token_ms: int = 800          # 提交后首个字出现的延迟
+    chunk_ms: int = 40                 # 每个流式片段的间隔
+    chunk_chars: int = 20              # 每个流式片段的字数
+    answer_chars: int = 600            # 回答总字数
+    page_latency_ms: int = 100         # 页面响应延迟
+    jitter: float = 0.2                # 所有延迟的随机浮动比例
+    error_rate: float = 0.0            # 对话接口直接报错的概率
+    page_error_rate: float = 0.0       # 页面返回 503 的概率
+    login_rate: float = 0.0            # 打开页面时出现登录墙的概率
+    login_dismiss_ms: int = 3000       # 登录墙多久后自动消失（模拟用户手动登录）
+    captcha_rate: float = 0.0          # 打开页面时出现验证码的概率
+    mention_rate: float = 0.5          # 回答中提到 mentions 里名称的概率
+    mentions: List[str] = field(default_factory=list)
+    seed: Optional[int] = None
+
+
+# 各平台页面的 DOM 结构和流式协议，与 ai_platforms 下检测器的选择器、parse_stream_body 对应
+# reduce: 页面内把一条流式事件合并进当前回答的 JS 函数体（参数 acc, p）
+PLATFORM_SKINS: Dict[str, Dict[str, Any]] = {
+    "doubao": {
+        "title": "豆包",
+        "stream_path": "samantha/chat/completion",
+        "input": '<textarea class="chat-textarea" data-testid="chat_input" placeholder="发消息，输入 @ 选择技能"></textarea>',
+        "send": '<button class="send-btn" data-testid="chat_send_button">发送</button>',
+        "stop": '<button class="stop-btn" data-testid="chat_stop_button">停止</button>',
+        "answer_class": "message-card",
+        "answer_testid": "message-card",
+        "reduce": "const ev = JSON.parse(p.event_data); return acc + JSON.parse(ev.message.content).text;",
+    },
+    "qianwen": {
+        "title": "通义千问",
+        "stream_path": "dialog/conversation",
+        "input": '<textarea class="ant-input chat-textarea" placeholder="向千问提问"></textarea>',
+        "send": '<div class="ant-input-suffix"><button class="ant-btn send-btn">发送</button></div>',
+        "stop": '<div class="stop-btn">停止生成</div>',
+        "answer_class": "answer-content markdown-body",
+        "answer_testid": "",
+        "reduce": "return p.contents.filter(c => c.contentType === 'text').map(c => c.content).join('\\n');",
+    },
+    "deepseek": {
+        "title": "DeepSeek",
+        "stream_path": "api/v0/chat/completion",
+        "input": '<textarea id="chat-input" placeholder="给 DeepSeek 发送消息"></textarea>',
+        "send": '<div class="ds-button send-button" role="button"><span class="send-icon">发送</span>'
+                '<span class="stop-icon">停止</span></div>',
+        "stop": "",
+        "answer_class": "ds-message ds-markdown",
+        "answer_testid": "",
+        "reduce": "return acc + (p.choices[0].delta.content || '');",
+    },
+}
+
+_PAGE_TEMPLATE = """<!DOCTYPE html>
+<html lang="zh-CN">
+<head>
+<meta charset="utf-8">
+<title>{title}（本地模拟）</title>
+<style>
+  body {{ font-family: sans-serif; margin: 0; display: flex; }}
+  .side-panel {{ width: 180px; padding: 12px; background: #f5f5f5; }}
+  .chat-main {{ flex: 1; padding: 12px; }}
+  .chat-list > div {{ margin: 8px 0; padding: 8px; }}
+  .user-bubble {{ background: #e8f0fe; }}
+  .hidden, .stop-icon {{ display: none; }}
+  .generating .stop-icon {{ display: inline; }}
+  .generating .send-icon {{ display: none; }}
+  .login-modal, .captcha-mask {{ position: fixed; inset: 0; background: rgba(0,0,0,.6); color: #fff; padding: 40px; }}
+</style>
+</head>
+<body>
+<div class="side-panel"><button class="new-chat" title="新对话">新对话</button></div>
+<div class="chat-main">
+  <div class="chat-list" id="chat-list"></div>
+  <div class="chat-input-area" id="input-area">{input}{send}{stop}</div>
+</div>
+{overlay}
+<script>
+(() => {{
+  const STREAM_URL = "{stream_url}";
+  const reduce = (acc, p) => {{ {reduce} }};
+  const list = document.getElementById('chat-list');
+  const area = document.getElementById('input-area');
+  const input = area.querySelector('textarea');
+  const send = area.querySelector('.send-btn, .ds-button');
+  const stop = area.querySelector('.stop-btn');
+  if (stop) stop.classList.add('hidden');
+  let busy = false;
+
+  const setGenerating = (on) => {{
+    busy = on;
+    area.classList.toggle('generating', on);
+    if (stop) {{
+      stop.classList.toggle('hidden', !on);
+      send.classList.toggle('hidden', on);
+    }}
+  }};
+
+  async function ask() {{
+    const question = input.value.trim();
+    if (!question || busy) return;
+    input.value = '';
+    const userBox = document.createElement('div');
+    userBox.className = 'user-bubble';
+    userBox.textContent = question;
+    list.appendChild(userBox);
+    const answerBox = document.createElement('div');
+    answerBox.className = "{answer_class}";
+    if ("{answer_testid}") answerBox.setAttribute('data-testid', "{answer_testid}");
+    setGenerating(true);
+    try {{
+      const resp = await fetch(STREAM_URL, {{
+        method: 'POST',
+        headers: {{'Content-Type': 'application/json'}},
+        body: JSON.stringify({{question: question}})
+      }});
+      if (!resp.ok) throw new Error('HTTP ' + resp.status);
+      list.appendChild(answerBox);
+      const reader = resp.body.getReader();
+      const decoder = new TextDecoder();
+      let buffer = '', text = '';
+      while (true) {{
+        const {{done, value}} = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, {{stream: true}});
+        const lines = buffer.split('\\n');
+        buffer = lines.pop();
+        for (const line of lines) {{
+          if (!line.startsWith('data:')) continue;
+          const data = line.slice(5).trim();
+          if (!data || data === '[DONE]') continue;
+          text = reduce(text, JSON.parse(data));
+          answerBox.textContent = text;
+        }}
+      }}
+    }} catch (e) {{
+      const tip = document.createElement('div');
+      tip.className = 'error-tip';
+      tip.textContent = '服务异常，请稍后重试';
+      list.appendChild(tip);
+    }} finally {{
+      setGenerating(false);
+    }}
+  }}
+
+  send.addEventListener('click', ask);
+  input.addEventListener('keydown', (e) => {{
+    if (e.key === 'Enter' && !e.shiftKey) {{ e.preventDefault(); ask(); }}
+  }});
+  document.querySelector('.new-chat').addEventListener('click', () => {{ list.innerHTML = ''; }});
+  const wall = document.querySelector('.login-modal');
+  if (wall) setTimeout(() => wall.remove(), {login_dismiss_ms});
+}})();
+</script>
+</body>
+</html>
+"""
+
+_LOGIN_OVERLAY = '<div class="login-modal"><p>登录后继续使用</p><button>登录</button></div>'
+_CAPTCHA_OVERLAY = '<div class="captcha-mask"><p>安全验证</p></div>'
+
+# 模拟回答的素材
+_ANSWER_SENTENCES = [
+    "综合行业口碑、服务能力和案例积累来看，可以从以下几个方面进行比较。",
+    "首先需要明确自身需求，包括预算、交付周期以及后续的运维支持。",
+    "其次建议实地考察服务商的过往项目，重点关注同行业的落地效果。",
+    "市场上主流的服务商各有侧重，有的擅长技术研发，有的擅长渠道运营。",
+    "最后，签约前务必确认售后条款和数据安全方面的保障措施。",
+    "以上信息仅供参考，具体选择还需结合实际情况综合判断。",
+]
+
+
+def build_answer(question: str, settings: MockPlatformSettings, rng: random.Random) -> str:
+    """
+    生成模拟回答：复述问题 + 通用素材，按 mention_rate 提到 mentions 中的名称
+
+    Args:
+        question: 用户问题
+        settings: 模拟配置
+        rng: 随机数生成器
+
+    Returns:
+        长度约为 answer_chars 的回答文本
+    """
+    parts = [f"关于“{question}”这个问题，以下是一些参考建议。"]
+    if settings.mentions and rng.random() < settings.mention_rate:
+        parts.append(f"其中{rng.choice(settings.mentions)}在该领域有较多成功案例，口碑较好。")
+    while sum(len(p) for p in parts) < settings.answer_chars:
+        parts.append(rng.choice(_ANSWER_SENTENCES))
+    return "".join(parts)[:max(settings.answer_chars, len(parts[0]))]
+
+
+def format_stream_event(platform_id: str, delta: str, text_so_far: str) -> str:
+    """
+    按平台的流式协议格式化一条 SSE 事件
+
+    Args:
+        platform_id: 平台ID
+        delta: 本次新增的文本
+        text_so_far: 截至本次的完整文本（通义千问是累积协议）
+
+    Returns:
+        SSE 事件文本（以空行结尾）
+    """
+    if platform_id == "doubao":
+        payload = {"event_data": json.dumps({"message": {"content": json.dumps({"text": delta}, ensure_ascii=False)}}, ensure_ascii=False)}
+    elif platform_id == "qianwen":
+        payload = {"contents": [{"contentType": "text", "content": text_so_far}]}
+    else:
+        payload = {"choices": [{"delta": {"content": delta, "type": "text"}}]}
+    return f"data: {json.dumps(payload, ensure_ascii=False)}\n\n"
+
+
+def create_mock_app(
+    settings: Optional[MockPlatformSettings] = None,
+    platform_settings: Optional[Dict[str, MockPlatformSettings]] = None
+) -> FastAPI:
+    """
+    创建模拟AI平台应用
+
+    Args:
+        settings: 所有平台共用的配置
+        platform_settings: 单个平台的覆盖配置
+
+    Returns:
+        FastAPI 应用，app.state.stats 中记录各平台的请求和故障注入次数
+    """
+    settings = settings or MockPlatformSettings()
+    platform_settings = platform_settings or {}
+    rng = random.Random(settings.seed)
+    app = FastAPI(title="AutoGeo 模拟AI平台")
+    app.state.stats = {pid: {"pages": 0, "answers": 0, "page_errors": 0, "errors": 0, "logins": 0, "captchas": 0}
+                       for pid in PLATFORM_SKINS}
+
+    def get_settings(platform_id: str) -> MockPlatformSettings:
+        if platform_id not in PLATFORM_SKINS:
+            raise HTTPException(status_code=404, detail=f"未知的平台: {platform_id}")
+        return platform_settings.get(platform_id, settings)
+
+    async def delay(ms: float, cfg: MockPlatformSettings):
+        if ms > 0:
+            await asyncio.sleep(ms * rng.uniform(1 - cfg.jitter, 1 + cfg.jitter) / 1000)
+
+    @app.get("/{platform_id}/", response_class=HTMLResponse)
+    async def chat_page(platform_id: str):
+        cfg = get_settings(platform_id)
+        stats = app.state.stats[platform_id]
+        stats["pages"] += 1
+        await delay(cfg.page_latency_ms, cfg)
+
+        if rng.random() < cfg.page_error_rate:
+            stats["page_errors"] += 1
+            return HTMLResponse("<html><body><h1>服务繁忙，请稍后再试</h1></body></html>", status_code=503)
+
+        overlay = ""
+        if rng.random() < cfg.captcha_rate:
+            stats["captchas"] += 1
+            overlay = _CAPTCHA_OVERLAY
+        elif rng.random() < cfg.login_rate:
+            stats["logins"] += 1
+            overlay = _LOGIN_OVERLAY
+
+        skin = PLATFORM_SKINS[platform_id]
+        return HTMLResponse(_PAGE_TEMPLATE.format(
+            title=skin["title"],
+            input=skin["input"],
+            send=skin["send"],
+            stop=skin["stop"],
+            overlay=overlay,
+            stream_url=f"/{platform_id}/{skin['stream_path']}",
+            reduce=skin["reduce"],
+            answer_class=skin["answer_class"],
+            answer_testid=skin["answer_testid"],
+            login_dismiss_ms=cfg.login_dismiss_ms
+        ))
+
+    @app.post("/{platform_id}/{stream_path:path}")
+    async def chat_stream(platform_id: str, stream_path: str, request: Request):
+        cfg = get_settings(platform_id)
+        if stream_path != PLATFORM_SKINS[platform_id]["stream_path"]:
+            raise HTTPException(status_code=404, detail="接口不存在")
+        stats = app.state.stats[platform_id]
+        question = (await request.json()).get("question", "")
+
+        if rng.random() < cfg.error_rate:
+            stats["errors"] += 1
+            await delay(cfg.first_token_ms, cfg)
+            raise HTTPException(status_code=500, detail="模拟服务异常")
+
+        stats["answers"] += 1
+        answer = build_answer(question, cfg, rng)
+
+        async def events():
+            await delay(cfg.first_token_ms, cfg)
+            step = max(1, cfg.chunk_chars)
+            for end in range(step, len(answer) + step, step):
+                start = end - step
+                yield format_stream_event(platform_id, answer[start:end], answer[:end])
+                await delay(cfg.chunk_ms, cfg)
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    @app.get("/_mock/stats")
+    async def mock_stats():
+        return app.state.stats
+
+    return app
+
+
+def find_free_port(host: str = "127.0.0.1") -> int:
+    """找一个空闲端口"""
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind((host, 0))
+        return sock.getsockname()[1]
+
+
+class MockPlatformServer:
+    """
+    在后台线程里运行的模拟平台服务
+
+    注意：
+    - 作为 with 语句使用，进入时启动、退出时停止
+    - port 为 0 时自动选择空闲端口
+    """
+
+    def __init__(
+        self,
+        settings: Optional[MockPlatformSettings] = None,
+        platform_settings: Optional[Dict[str, MockPlatformSettings]] = None,
+        host: str = "127.0.0.1",
+        port: int = 0
+    ):
+        self.host = host
+        self.port = port or find_free_port(host)
+        self.app = create_mock_app(settings, platform_settings)
+        self._server = uvicorn.Server(uvicorn.Config(self.app, host=self.host, port=self.port, log_level="warning"))
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def chat_url(self, platform_id: str) -> str:
+        """平台模拟聊天页地址（填入平台配置的 chat_url）"""
+        return f"{self.base_url}/{platform_id}/"
+
+    @property
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        return self.app.state.stats
+
+    def start(self, timeout: float = 10.0):
+        self._thread = threading.Thread(target=self._server.run, name="mock-ai-platforms", daemon=True)
+        self._thread.start()
+        deadline = time.time() + timeout
+        while not self._server.started:
+            if time.time() > deadline or not self._thread.is_alive():
+                raise RuntimeError("模拟平台服务启动失败")
+            time.sleep(0.05)
+        logger.info(f"[MockPlatforms] 模拟平台已启动: {self.base_url}")
+
+    def stop(self):
+        self._server.should_exit = True
+        if self._thread is not None:
+            self._thread.join(timeout=10)
+            self._thread = None
+
+    def __enter__(self) -> "MockPlatformServer":
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+
+def add_settings_arguments(parser: argparse.ArgumentParser):
+    """把 MockPlatformSettings 的延迟/故障注入参数加到命令行（压测脚本复用）"""
+    defaults = MockPlatformSettings()
+    parser.add_argument("--first-token-ms", type=int, default=defaults.first_token_ms, help="首字延迟（毫秒）")
+    parser.add_argument("--chunk-ms", type=int, default=defaults.chunk_ms, help="流式片段间隔（毫秒）")
+    parser.add_argument("--answer-chars", type=int, default=defaults.answer_chars, help="回答字数")
+    parser.add_argument("--page-latency-ms", type=int, default=defaults.page_latency_ms, help="页面响应延迟（毫秒）")
+    parser.add_argument("--error-rate", type=float, default=defaults.error_rate, help="对话接口报错概率")
+    parser.add_argument("--page-error-rate", type=float, default=defaults.page_error_rate, help="页面 503 概率")
+    parser.add_argument("--login-rate", type=float, default=defaults.login_rate, help="登录墙概率")
+    parser.add_argument("--captcha-rate", type=float, default=defaults.captcha_rate, help="验证码概率")
+    parser.add_argument("--mention-rate", type=float, default=defaults.mention_rate, help="回答提到公司名的概率")
+    parser.add_argument("--seed", type=int, default=None, help="随机种子（便于复现）")
+
+
+def settings_from_args(args: argparse.Namespace, mentions: Optional[List[str]] = None) -> MockPlatformSettings:
+    """从命令行参数构造模拟配置"""
+    return MockPlatformSettings(
+        first_token_ms=args.first_token_ms,
+        chunk_ms=args.chunk_ms,
+        answer_chars=args.answer_chars,
+        page_latency_ms=args.page_latency_ms,
+        error_rate=args.error_rate,
+        page_error_rate=args.page_error_rate,
+        login_rate=args.login_rate,
+        captcha_rate=args.captcha_rate,
+        mention_rate=args.mention_rate,
+        mentions=list(mentions or []),
+        seed=args.seed
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="本地模拟AI平台（豆包/通义千问/DeepSeek）")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--mention", action="append", default=[], help="回答中可能提到的公司名，可重复")
+    add_settings_arguments(parser)
+    args = parser.parse_args()
+
+    app = create_mock_app(settings_from_args(args, args.mention))
+    for platform_id in PLATFORM_SKINS:
+        print(f"  {platform_id}: http://{args.host}:{args.port}/{platform_id}/")
+    uvicorn.run(app, host=args.host, port=args.port, log_level="info")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+"""
+重建收录检测日汇总
+从原始检测记录按 日期 × 关键词 × 平台 重新聚合 index_check_daily，汇总和记录对不上时用
+
+用法：
+    python backend/scripts/rebuild_daily_rollup.py                  # 全量重建
+    python backend/scripts/rebuild_daily_rollup.py --days 7         # 只重建最近 7 天
+    python backend/scripts/rebuild_daily_rollup.py --start 2026-01-01 --end 2026-01-31
+"""
+
+import argparse
+import sys
+from datetime import date, datetime
+from pathlib import Path
+
+# 添加项目根目录到 Python 路径
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from backend.database import SessionLocal, init_db
+from backend.services.check_rollup import DailyRollupService, start_day
+from loguru import logger
+
+
+def parse_date(value: str) -> date:
+    return datetime.strptime(value, "%Y-%m-%d").date()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="重建收录检测日汇总")
+    parser.add_argument("--days", type=int, default=None, help="只重建最近 N 天（含今天）")
+    parser.add_argument("--start", type=parse_date, default=None, help="起始日期 YYYY-MM-DD（含）")
+    parser.add_argument("--end", type=parse_date, default=None, help="截止日期 YYYY-MM-DD（含）")
+    args = parser.parse_args()
+
+    start_date = start_day(args.days) if args.days else args.start
+
+    # 确保汇总表已创建
+    init_db()
+
+    db = SessionLocal()
+    try:
+        stats = DailyRollupService(db).rebuild(start_date=start_date, end_date=args.end)
+        print(f"\n重建完成！删除 {stats['deleted']} 行旧汇总，写入 {stats['inserted']} 行新汇总\n")
+    except Exception as e:
+        logger.error(f"重建失败: {e}")
+        sys.exit(1)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -71,7 +71,8 @@ if __name__ == "__main__":
     import sqlite3
     db_path = project_root / "backend" / "database" / "auto_geo_v3.db"
 
-    if db_path.exists():
+    # 只有本地 SQLite 文件需要检查占用，PostgreSQL 由数据库自己处理锁
+    if engine.dialect.name == "sqlite" and db_path.exists():
         try:
             # 尝试连接数据库，检查是否有锁
             conn = sqlite3.connect(str(db_path))
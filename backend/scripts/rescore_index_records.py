@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+"""
+离线重算收录记录的命中结果
+公司名/别名/关键词调整后，用已保存的回答重新计算 keyword_found / company_found，不开浏览器
+
+用法：
+    python backend/scripts/rescore_index_records.py --project-id 1
+    python backend/scripts/rescore_index_records.py --workers 8 --chunk-size 5000 --dry-run
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+# 添加项目根目录到 Python 路径
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from backend.database import SessionLocal
+from backend.services.rescore_service import RescoreService
+from loguru import logger
+
+
+def main():
+    parser = argparse.ArgumentParser(description="离线重算收录记录的命中结果")
+    parser.add_argument("--project-id", type=int, default=None, help="只重算指定项目，默认全部项目")
+    parser.add_argument("--chunk-size", type=int, default=2000, help="每块读取的记录数")
+    parser.add_argument("--workers", type=int, default=None, help="进程数，默认 CPU 核数")
+    parser.add_argument("--dry-run", action="store_true", help="只统计变化，不回写数据库")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        stats = RescoreService(db).rescore(
+            project_id=args.project_id,
+            chunk_size=args.chunk_size,
+            workers=args.workers,
+            dry_run=args.dry_run
+        )
+        print(f"\n重算完成！扫描 {stats['scanned']} 条，{'将' if args.dry_run else '已'}更新 {stats['updated']} 条，耗时 {stats['elapsed']}s\n")
+    except Exception as e:
+        logger.error(f"重算失败: {e}")
+        sys.exit(1)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+"""
+问题级回答缓存
+同一平台、同一问题在有效期内直接复用回答，不再开浏览器重新问一遍！
+"""
+
+import asyncio
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import Dict, Optional, Tuple
+
+from backend.config import INDEX_CHECK_ANSWER_CACHE_TTL, INDEX_CHECK_ANSWER_CACHE_SIZE
+from backend.services.hit_matcher import normalize_text
+
+
+class AnswerCache:
+    """
+    回答缓存（进程内，TTL + LRU）
+
+    注意：
+    - 只缓存回答原文，命中结果每次按当前关键词/公司名重新计算（不同关键词共享问题时结果不同）
+    - 键为 (平台, 规范化后的问题)，标点、大小写、多余空格不同的问题视为同一个
+    - lock() 用于合并同时进行的相同提问：后到的等先到的问完，直接读缓存
+    """
+
+    def __init__(self, ttl: int = INDEX_CHECK_ANSWER_CACHE_TTL, max_size: int = INDEX_CHECK_ANSWER_CACHE_SIZE):
+        """
+        初始化缓存
+
+        Args:
+            ttl: 有效期（秒），0 表示关闭缓存
+            max_size: 最多缓存的回答数量
+        """
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[float, str]]" = OrderedDict()
+        self._locks: Dict[Tuple[str, str], Tuple[asyncio.Lock, int]] = {}  # 键 -> (锁, 使用者数量)
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0
+
+    @staticmethod
+    def make_key(platform_id: str, question: str) -> Tuple[str, str]:
+        return platform_id, normalize_text(question)
+
+    def get(self, platform_id: str, question: str) -> Optional[str]:
+        """
+        读取缓存的回答
+
+        Returns:
+            回答原文，未命中或已过期返回 None
+        """
+        if not self.enabled:
+            return None
+
+        key = self.make_key(platform_id, question)
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        stored_at, answer = entry
+        if time.monotonic() - stored_at > self.ttl:
+            del self._entries[key]
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return answer
+
+    def put(self, platform_id: str, question: str, answer: str):
+        """缓存一条回答（超出容量时淘汰最久未使用的）"""
+        if not self.enabled or not answer:
+            return
+
+        key = self.make_key(platform_id, question)
+        self._entries[key] = (time.monotonic(), answer)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, platform_id: Optional[str] = None):
+        """清空缓存（可只清某个平台）"""
+        if platform_id is None:
+            self._entries.clear()
+            return
+        for key in [k for k in self._entries if k[0] == platform_id]:
+            del self._entries[key]
+
+    @asynccontextmanager
+    async def lock(self, platform_id: str, question: str):
+        """同一平台同一问题同一时间只问一次"""
+        if not self.enabled:
+            yield
+            return
+
+        key = self.make_key(platform_id, question)
+        lock, users = self._locks.get(key) or (asyncio.Lock(), 0)
+        self._locks[key] = (lock, users + 1)
+        try:
+            async with lock:
+                yield
+        finally:
+            lock, users = self._locks[key]
+            if users <= 1:
+                del self._locks[key]
+            else:
+                self._locks[key] = (lock, users - 1)
+
+    def stats(self) -> Dict[str, int]:
+        """缓存统计"""
+        return {"size": len(self._entries), "hits": self.hits, "misses": self.misses, "ttl": self.ttl}
+
+
+# 全局单例
+answer_cache = AnswerCache()
@@ -0,0 +1,195 @@
+# -*- coding: utf-8 -*-
+"""
+AI回答正文存储
+回答正文按 SHA-256 内容寻址、zlib 压缩存进 answer_blobs，检测记录只存哈希，相同回答只存一份！
+"""
+
+import hashlib
+import time
+import zlib
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from loguru import logger
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from backend.database import dialect_insert
+from backend.database.models import AnswerBlob, IndexCheckRecord
+
+# zlib 压缩级别（中文长回答在 6 级能压到原来的 30%~40%，再往上收益很小）
+COMPRESS_LEVEL = 6
+
+# IN 查询每批的哈希数量（SQLite 变量数上限）
+HASH_BATCH_SIZE = 500
+
+
+def answer_hash(text: str) -> str:
+    """回答正文的内容哈希"""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def compress_answer(text: str) -> bytes:
+    return zlib.compress(text.encode("utf-8"), COMPRESS_LEVEL)
+
+
+def decompress_answer(data: Optional[bytes]) -> Optional[str]:
+    if data is None:
+        return None
+    return zlib.decompress(data).decode("utf-8")
+
+
+def split_answers(rows: Iterable[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], Dict[str, str]]:
+    """
+    把检测记录字段字典里的回答正文换成哈希
+
+    不修改传入的字典（写入失败重试时还要用原文）
+
+    Returns:
+        (换成 answer_hash 的新记录字典列表, {哈希: 正文})
+    """
+    records = []
+    blobs: Dict[str, str] = {}
+    for row in rows:
+        record = dict(row)
+        text = record.pop("answer", None)
+        if text and text.strip():
+            digest = answer_hash(text)
+            blobs[digest] = text
+            record["answer_hash"] = digest
+        records.append(record)
+    return records, blobs
+
+
+def store_blobs(db: Session, blobs: Dict[str, str]) -> int:
+    """
+    写入回答正文（已存在的哈希直接跳过），不提交事务
+
+    Returns:
+        本次提交写入的正文数（含已存在被跳过的）
+    """
+    if not blobs:
+        return 0
+    insert = dialect_insert(db)
+    rows = [
+        {"hash": digest, "data": compress_answer(text), "length": len(text)}
+        for digest, text in blobs.items()
+    ]
+    db.execute(insert(AnswerBlob).values(rows).on_conflict_do_nothing(index_elements=["hash"]))
+    return len(rows)
+
+
+def load_answers(db: Session, hashes: Iterable[str]) -> Dict[str, str]:
+    """按哈希批量读取回答正文"""
+    wanted = list({h for h in hashes if h})
+    result: Dict[str, str] = {}
+    for start in range(0, len(wanted), HASH_BATCH_SIZE):
+        rows = db.query(AnswerBlob.hash, AnswerBlob.data).filter(
+            AnswerBlob.hash.in_(wanted[start:start + HASH_BATCH_SIZE])
+        ).all()
+        for digest, data in rows:
+            result[digest] = decompress_answer(data)
+    return result
+
+
+def resolve_answers(db: Session, rows: List[Tuple[Optional[str], Optional[str]]]) -> List[Optional[str]]:
+    """
+    批量取回答正文
+
+    Args:
+        rows: [(answer 列, answer_hash 列)]，历史记录直接用 answer 列
+
+    Returns:
+        与 rows 一一对应的回答正文
+    """
+    texts = load_answers(db, (digest for answer, digest in rows if answer is None))
+    return [answer if answer is not None else texts.get(digest) for answer, digest in rows]
+
+
+class AnswerStoreService:
+    """
+    回答正文存储维护
+
+    注意：
+    - move_legacy_answers 把迁移前写在 answer 列里的正文搬进 answer_blobs，可反复执行、中断后接着跑
+    - prune 删除已经没有检测记录引用的正文（删除记录时不会顺带删正文，因为别的记录可能共用）
+    - SQLite 删除数据后文件不会变小，需要再执行 VACUUM
+    """
+
+    def __init__(self, db: Session):
+        """
+        初始化回答存储服务
+
+        Args:
+            db: 数据库会话
+        """
+        self.db = db
+
+    def move_legacy_answers(self, chunk_size: int = 2000) -> Dict[str, Any]:
+        """
+        把 answer 列里的历史正文搬进 answer_blobs
+
+        Returns:
+            {"moved", "blobs", "elapsed"}
+        """
+        start_time = time.time()
+        moved = 0
+        blob_count = 0
+        last_id = 0
+
+        while True:
+            rows = self.db.query(IndexCheckRecord.id, IndexCheckRecord.answer).filter(
+                IndexCheckRecord.id > last_id,
+                IndexCheckRecord.answer.isnot(None)
+            ).order_by(IndexCheckRecord.id).limit(chunk_size).all()
+            if not rows:
+                break
+            last_id = rows[-1][0]
+
+            updates, blobs = split_answers({"id": record_id, "answer": answer} for record_id, answer in rows)
+            for update in updates:
+                update["answer"] = None
+                update.setdefault("answer_hash", None)
+            try:
+                blob_count += store_blobs(self.db, blobs)
+                self.db.bulk_update_mappings(IndexCheckRecord, updates)
+                self.db.commit()
+            except Exception as e:
+                logger.error(f"搬移历史回答失败: {e}")
+                self.db.rollback()
+                raise
+            moved += len(rows)
+
+        elapsed = round(time.time() - start_time, 2)
+        logger.info(f"历史回答搬移完成: {moved} 条记录, 写入 {blob_count} 份正文（重复的只存一份）, 耗时 {elapsed}s")
+        return {"moved": moved, "blobs": blob_count, "elapsed": elapsed}
+
+    def prune(self) -> int:
+        """
+        删除没有检测记录引用的回答正文
+
+        Returns:
+            删除的正文数
+        """
+        referenced = self.db.query(IndexCheckRecord.id).filter(IndexCheckRecord.answer_hash == AnswerBlob.hash).exists()
+        count = self.db.query(AnswerBlob).filter(~referenced).delete(synchronize_session=False)
+        self.db.commit()
+        logger.info(f"清理无引用的回答正文: {count} 份")
+        return count
+
+    def get_stats(self) -> Dict[str, Any]:
+        """正文存储统计：记录数、正文数、压缩前后大小"""
+        blobs, raw_chars, stored_bytes = self.db.query(
+            func.count(AnswerBlob.hash),
+            func.coalesce(func.sum(AnswerBlob.length), 0),
+            func.coalesce(func.sum(func.length(AnswerBlob.data)), 0)
+        ).one()
+        records = self.db.query(func.count(IndexCheckRecord.id)).filter(IndexCheckRecord.answer_hash.isnot(None)).scalar()
+        legacy = self.db.query(func.count(IndexCheckRecord.id)).filter(IndexCheckRecord.answer.isnot(None)).scalar()
+        return {
+            "records_with_blob": records,
+            "legacy_records": legacy,
+            "blobs": blobs,
+            "dedup_ratio": round(records / blobs, 2) if blobs else 0.0,
+            "raw_chars": int(raw_chars),
+            "stored_bytes": int(stored_bytes)
+        }
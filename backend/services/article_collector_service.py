@@ -254,6 +254,9 @@ class ArticleCollectorService:
         """
         保存文章到数据库
 
+        先按 URL 和语义去重挑出新文章，再一次批量插入（URL 冲突的跳过，多个进程同时采集到同一篇不会报错），
+        最后逐篇同步 RAGFlow，同步结果一次批量回写
+
         Args:
             articles: 文章列表
             keyword: 采集使用的关键词
@@ -265,25 +268,29 @@ class ArticleCollectorService:
             logger.warning("数据库会话未设置，跳过保存")
             return []
 
+        from backend.database import bulk_insert
         from backend.database.models import ReferenceArticle
+        from backend.services.pagination import count_cache
 
         saved_results = []
 
+        # 1. 根据 URL 去重：已入库的一次查出来，同一批里重复的只留第一篇
+        urls = list({article.get("url", "") for article in articles})
+        existing = dict(self.db.query(ReferenceArticle.url, ReferenceArticle.id).filter(
+            ReferenceArticle.url.in_(urls)
+        ).all()) if urls else {}
+
+        candidates = []
         for article in articles:
+            url = article.get("url", "")
             try:
-                # 1. 检查是否已存在（根据 URL 去重）
-                url = article.get("url", "")
-                existing = self.db.query(ReferenceArticle).filter(
-                    ReferenceArticle.url == url
-                ).first()
-
-                if existing:
+                if url in existing:
                     logger.debug(f"文章 URL 已存在，跳过: {url}")
                     saved_results.append({
                         "url": url,
                         "saved": False,
                         "reason": "url_exists",
-                        "article_id": existing.id
+                        "article_id": existing[url]
                     })
                     continue
 
@@ -306,63 +313,94 @@ class ArticleCollectorService:
                     })
                     continue
 
-                # 4. 创建新记录
-                ref_article = ReferenceArticle(
-                    title=article.get("title", "")[:500],
-                    url=url,
-                    content=cleaned_content,
-                    summary=cleaned_content[:500] if cleaned_content else None,
-                    platform=article.get("platform", ""),
-                    author=article.get("author", ""),
-                    publish_time=article.get("publish_time", ""),
-                    likes=article.get("likes", 0),
-                    reads=article.get("reads", 0),
-                    comments=article.get("comments", 0),
-                    keyword=keyword,
-                    collected_at=datetime.now(),
-                    ragflow_synced=False,
-                    status=1
-                )
-
-                self.db.add(ref_article)
-                self.db.commit()
-                self.db.refresh(ref_article)
-
-                logger.info(f"文章已保存: {ref_article.title[:30]}... (ID: {ref_article.id})")
-
-                # 同步到 RAGFlow
-                sync_result = await self._sync_to_ragflow({
-                    "title": ref_article.title,
-                    "content": cleaned_content,
-                    "platform": ref_article.platform,
-                    "url": ref_article.url,
-                    "likes": ref_article.likes,
-                    "reads": ref_article.reads
-                })
-
-                if sync_result["success"]:
-                    ref_article.ragflow_synced = True
-                    ref_article.ragflow_doc_id = sync_result["doc_id"]
-                    ref_article.ragflow_sync_time = datetime.now()
-                    self.db.commit()
-
-                saved_results.append({
+                existing[url] = None
+                candidates.append({
+                    "title": article.get("title", "")[:500],
                     "url": url,
-                    "saved": True,
-                    "article_id": ref_article.id,
-                    "ragflow_synced": sync_result["success"],
-                    "ragflow_doc_id": sync_result.get("doc_id")
+                    "content": cleaned_content,
+                    "summary": cleaned_content[:500] if cleaned_content else None,
+                    "platform": article.get("platform", ""),
+                    "author": article.get("author", ""),
+                    "publish_time": article.get("publish_time", ""),
+                    "likes": article.get("likes", 0),
+                    "reads": article.get("reads", 0),
+                    "comments": article.get("comments", 0),
+                    "keyword": keyword,
+                    "collected_at": datetime.now(),
+                    "ragflow_synced": False,
+                    "status": 1
                 })
 
             except Exception as e:
                 logger.error(f"保存文章失败: {e}")
-                self.db.rollback()
                 saved_results.append({
-                    "url": article.get("url", ""),
+                    "url": url,
                     "saved": False,
                     "reason": str(e)
                 })
 
+        if not candidates:
+            return saved_results
+
+        # 4. 批量创建新记录
+        try:
+            inserted = {url: article_id for article_id, url in bulk_insert(
+                self.db, ReferenceArticle, candidates,
+                returning=[ReferenceArticle.id, ReferenceArticle.url],
+                skip_conflicts_on=["url"]
+            )}
+            self.db.commit()
+            count_cache.invalidate("reference_articles")
+        except Exception as e:
+            logger.error(f"保存文章失败: {e}")
+            self.db.rollback()
+            saved_results.extend({"url": row["url"], "saved": False, "reason": str(e)} for row in candidates)
+            return saved_results
+
+        # 5. 同步到 RAGFlow
+        synced = []
+        for row in candidates:
+            article_id = inserted.get(row["url"])
+            if article_id is None:
+                logger.debug(f"文章 URL 已被其它进程写入，跳过: {row['url']}")
+                saved_results.append({"url": row["url"], "saved": False, "reason": "url_exists"})
+                continue
+
+            logger.info(f"文章已保存: {row['title'][:30]}... (ID: {article_id})")
+
+            sync_result = await self._sync_to_ragflow({
+                "title": row["title"],
+                "content": row["content"],
+                "platform": row["platform"],
+                "url": row["url"],
+                "likes": row["likes"],
+                "reads": row["reads"]
+            })
+
+            if sync_result["success"]:
+                synced.append({
+                    "id": article_id,
+                    "ragflow_synced": True,
+                    "ragflow_doc_id": sync_result["doc_id"],
+                    "ragflow_sync_time": datetime.now()
+                })
+
+            saved_results.append({
+                "url": row["url"],
+                "saved": True,
+                "article_id": article_id,
+                "ragflow_synced": sync_result["success"],
+                "ragflow_doc_id": sync_result.get("doc_id")
+            })
+
+        if synced:
+            try:
+                self.db.bulk_update_mappings(ReferenceArticle, synced)
+                self.db.commit()
+            except Exception as e:
+                logger.error(f"回写 RAGFlow 同步状态失败: {e}")
+                self.db.rollback()
+
         return saved_results
 
     async def collect_trending_articles(
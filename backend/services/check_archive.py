@@ -0,0 +1,416 @@
+# -*- coding: utf-8 -*-
+"""
+收录检测历史归档
+超过保留期的检测记录按月搬到独立的 SQLite 归档文件（回答正文 zlib 压缩），热表只留最近几个月；
+查询的时间范围用到归档月份时，自动把对应的归档文件一起查上，完整历史照样能查！
+"""
+
+import threading
+import time
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+from loguru import logger
+from sqlalchemy import (
+    Boolean, Column, DateTime, Index, Integer, LargeBinary, MetaData, String, Table, Text, create_engine, func, select
+)
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from backend.config import INDEX_CHECK_ARCHIVE_CHUNK_SIZE, INDEX_CHECK_ARCHIVE_DIR, INDEX_CHECK_ARCHIVE_MONTHS
+from backend.database.models import (
+    IndexCheckArchive, IndexCheckCitation, IndexCheckRecord, IndexCheckTiming, Keyword
+)
+from backend.services.answer_store import AnswerStoreService, compress_answer, decompress_answer, resolve_answers
+
+# ==================== 归档文件结构 ====================
+# 每个月一个 SQLite 文件，表名和主库一致；记录表多存一列 project_id（归档文件里没有关键词表，按项目筛选用），
+# 回答正文直接存 zlib 压缩后的字节，不再走 answer_blobs
+archive_metadata = MetaData()
+
+archived_records = Table(
+    "index_check_records", archive_metadata,
+    Column("id", Integer, primary_key=True, comment="原检测记录ID"),
+    Column("keyword_id", Integer, nullable=False, comment="关键词ID"),
+    Column("project_id", Integer, nullable=True, comment="归档时关键词所属项目ID"),
+    Column("platform", String(50), nullable=False, comment="检测平台"),
+    Column("question", Text, nullable=False, comment="检测时使用的问题"),
+    Column("answer", LargeBinary, nullable=True, comment="zlib 压缩后的回答正文"),
+    Column("keyword_found", Boolean, nullable=True, comment="是否包含关键词"),
+    Column("company_found", Boolean, nullable=True, comment="是否包含公司名"),
+    Column("from_cache", Boolean, nullable=True, comment="是否复用缓存的回答"),
+    Column("check_time", DateTime, nullable=True, comment="检测时间"),
+    Index("ix_archive_records_check_time", "check_time"),
+    Index("ix_archive_records_keyword_id", "keyword_id"),
+    Index("ix_archive_records_project_id", "project_id"),
+)
+archived_citations = IndexCheckCitation.__table__.to_metadata(archive_metadata)
+archived_timings = IndexCheckTiming.__table__.to_metadata(archive_metadata)
+
+_RECORD_COLUMNS = [c.name for c in archived_records.columns if c.name != "answer"]
+
+
+def month_start(value: datetime) -> datetime:
+    return datetime(value.year, value.month, 1)
+
+
+def add_months(value: datetime, months: int) -> datetime:
+    index = value.year * 12 + value.month - 1 + months
+    return datetime(index // 12, index % 12 + 1, 1)
+
+
+def archive_cutoff(months: int, now: Optional[datetime] = None) -> datetime:
+    """保留 months 个月时的归档分界：分界当月 1 日之前的记录归档"""
+    return add_months(month_start(now or datetime.now()), -months)
+
+
+def archived_until(db: Session) -> Optional[date]:
+    """已归档数据的截止日期（最后一个归档月的下个月 1 日），没有归档时为 None"""
+    latest = db.query(func.max(IndexCheckArchive.month)).filter(IndexCheckArchive.records > 0).scalar()
+    if not latest:
+        return None
+    return add_months(datetime.strptime(latest, "%Y-%m"), 1).date()
+
+
+class ArchivedCheckRecord:
+    """归档文件里的一条检测记录，属性和 IndexCheckRecord 同名，接口层不用区分"""
+
+    archived = True
+
+    def __init__(self, row: Dict[str, Any]):
+        for name in _RECORD_COLUMNS:
+            setattr(self, name, row.get(name))
+        self.answer_text = decompress_answer(row.get("answer"))
+
+    def __repr__(self):
+        return f"<ArchivedCheckRecord id={self.id} platform={self.platform}>"
+
+
+# 归档文件的引擎按路径缓存，同一个文件不重复建连接池；归档写完、每日维护时 dispose，关掉闲置连接
+_engines: Dict[str, Engine] = {}
+_engines_lock = threading.Lock()
+
+
+def dispose_archive_engines(paths: Optional[Iterable[Path]] = None) -> int:
+    """
+    关闭归档文件的连接池并移出缓存（下次查询时重新建）
+
+    Args:
+        paths: 归档文件完整路径，不传则全部
+
+    Returns:
+        关闭的引擎数
+    """
+    with _engines_lock:
+        keys = list(_engines) if paths is None else [str(path) for path in paths if str(path) in _engines]
+        engines = [_engines.pop(key) for key in keys]
+    for engine in engines:
+        engine.dispose()
+    return len(engines)
+
+
+class CheckArchiveService:
+    """
+    检测记录归档与归档查询
+
+    注意：
+    - 先写归档文件并提交，再从热表删除；中途失败重跑时归档文件按主键去重，不会重复
+    - 日汇总（index_check_daily）不随归档扣减，趋势/总览等报表照常覆盖完整历史
+    - 归档后没有记录引用的回答正文（answer_blobs）会一并清理
+    """
+
+    def __init__(self, db: Session, archive_dir: Optional[Path] = None):
+        """
+        初始化归档服务
+
+        Args:
+            db: 数据库会话
+            archive_dir: 归档文件目录，默认 INDEX_CHECK_ARCHIVE_DIR
+        """
+        self.db = db
+        self.archive_dir = Path(archive_dir or INDEX_CHECK_ARCHIVE_DIR)
+
+    def _engine(self, path: str) -> Engine:
+        full_path = str(self.archive_dir / path)
+        with _engines_lock:
+            engine = _engines.get(full_path)
+            if engine is None:
+                # 每个月一个文件，连接池开小，月份多了也不会占太多文件句柄
+                engine = create_engine(
+                    f"sqlite:///{full_path}",
+                    connect_args={"check_same_thread": False},
+                    pool_size=1,
+                    max_overflow=4
+                )
+                _engines[full_path] = engine
+        return engine
+
+    # ==================== 归档 ====================
+
+    def preview(self, months: Optional[int] = None) -> Dict[str, int]:
+        """按月统计将要归档的记录数 {YYYY-MM: 条数}"""
+        months = INDEX_CHECK_ARCHIVE_MONTHS if months is None else months
+        if months <= 0:
+            return {}
+        cutoff = archive_cutoff(months)
+        times = self.db.query(IndexCheckRecord.check_time).filter(IndexCheckRecord.check_time < cutoff)
+        counts: Dict[str, int] = {}
+        for (check_time,) in times.yield_per(5000):
+            key = check_time.strftime("%Y-%m")
+            counts[key] = counts.get(key, 0) + 1
+        return dict(sorted(counts.items()))
+
+    def archive(self, months: Optional[int] = None, chunk_size: int = INDEX_CHECK_ARCHIVE_CHUNK_SIZE) -> Dict[str, Any]:
+        """
+        把超过保留期的检测记录按月搬进归档文件
+
+        Args:
+            months: 热表保留的月数（含当月之前的 months 个整月），默认 INDEX_CHECK_ARCHIVE_MONTHS，0 表示不归档
+            chunk_size: 每块搬移的记录数
+
+        Returns:
+            {"months": {YYYY-MM: 条数}, "records", "pruned_answers", "elapsed"}
+        """
+        months = INDEX_CHECK_ARCHIVE_MONTHS if months is None else months
+        start_time = time.time()
+        moved_by_month: Dict[str, int] = {}
+        if months > 0:
+            cutoff = archive_cutoff(months)
+            oldest = self.db.query(func.min(IndexCheckRecord.check_time)).filter(IndexCheckRecord.check_time < cutoff).scalar()
+            month = month_start(oldest) if oldest else cutoff
+            while month < cutoff:
+                moved = self._archive_month(month, add_months(month, 1), chunk_size)
+                if moved:
+                    moved_by_month[month.strftime("%Y-%m")] = moved
+                month = add_months(month, 1)
+
+        # 写入用过的连接不再需要，查询时按需重新连
+        dispose_archive_engines(self.archive_dir / f"index_check_{key}.db" for key in moved_by_month)
+
+        total = sum(moved_by_month.values())
+        pruned = AnswerStoreService(self.db).prune() if total else 0
+        elapsed = round(time.time() - start_time, 2)
+        logger.info(f"检测记录归档完成: {total} 条, 月份={list(moved_by_month) or '无'}, 耗时 {elapsed}s")
+        return {"months": moved_by_month, "records": total, "pruned_answers": pruned, "elapsed": elapsed}
+
+    def _archive_month(self, start: datetime, end: datetime, chunk_size: int) -> int:
+        """搬移 [start, end) 的记录，返回搬移条数（这个月没有记录时不建归档文件）"""
+        in_month = (IndexCheckRecord.check_time >= start, IndexCheckRecord.check_time < end)
+        if self.db.query(IndexCheckRecord.id).filter(*in_month).first() is None:
+            return 0
+
+        key = start.strftime("%Y-%m")
+        path = f"index_check_{key}.db"
+        self.archive_dir.mkdir(parents=True, exist_ok=True)
+        engine = self._engine(path)
+        archive_metadata.create_all(engine)
+
+        moved = 0
+        while True:
+            rows = self.db.query(
+                IndexCheckRecord.id,
+                IndexCheckRecord.keyword_id,
+                Keyword.project_id,
+                IndexCheckRecord.platform,
+                IndexCheckRecord.question,
+                IndexCheckRecord.answer,
+                IndexCheckRecord.answer_hash,
+                IndexCheckRecord.keyword_found,
+                IndexCheckRecord.company_found,
+                IndexCheckRecord.from_cache,
+                IndexCheckRecord.check_time
+            ).outerjoin(Keyword, Keyword.id == IndexCheckRecord.keyword_id).filter(
+                *in_month
+            ).order_by(IndexCheckRecord.id).limit(chunk_size).all()
+            if not rows:
+                break
+
+            ids = [row.id for row in rows]
+            answers = resolve_answers(self.db, [(row.answer, row.answer_hash) for row in rows])
+            record_rows = [
+                {
+                    **{name: getattr(row, name) for name in _RECORD_COLUMNS},
+                    "answer": compress_answer(answer) if answer else None
+                }
+                for row, answer in zip(rows, answers)
+            ]
+            citation_rows = [dict(r._mapping) for r in self.db.execute(
+                select(IndexCheckCitation.__table__).where(IndexCheckCitation.record_id.in_(ids))
+            )]
+            timing_rows = [dict(r._mapping) for r in self.db.execute(
+                select(IndexCheckTiming.__table__).where(IndexCheckTiming.record_id.in_(ids))
+            )]
+
+            # 1. 写归档文件（按主键去重，重跑安全）
+            with engine.begin() as conn:
+                for table, table_rows in ((archived_records, record_rows), (archived_citations, citation_rows), (archived_timings, timing_rows)):
+                    if table_rows:
+                        conn.execute(sqlite_insert(table).on_conflict_do_nothing(), table_rows)
+                count, min_id, max_id = conn.execute(
+                    select(func.count(), func.min(archived_records.c.id), func.max(archived_records.c.id))
+                ).one()
+
+            # 2. 更新归档目录并从热表删除（同一个事务）
+            try:
+                entry = self.db.get(IndexCheckArchive, key)
+                if entry is None:
+                    entry = IndexCheckArchive(month=key, path=path)
+                    self.db.add(entry)
+                entry.records, entry.min_id, entry.max_id = count, min_id, max_id
+                entry.archived_at = datetime.now()
+
+                self.db.query(IndexCheckCitation).filter(IndexCheckCitation.record_id.in_(ids)).delete(synchronize_session=False)
+                self.db.query(IndexCheckTiming).filter(IndexCheckTiming.record_id.in_(ids)).delete(synchronize_session=False)
+                self.db.query(IndexCheckRecord).filter(IndexCheckRecord.id.in_(ids)).delete(synchronize_session=False)
+                self.db.commit()
+            except Exception as e:
+                logger.error(f"归档 {key} 时删除热表记录失败（归档文件已写入，重跑即可）: {e}")
+                self.db.rollback()
+                raise
+            moved += len(rows)
+
+        if moved:
+            logger.info(f"已归档 {key}: {moved} 条 -> {path}")
+        return moved
+
+    # ==================== 查询 ====================
+
+    def covering(self, start_date: Optional[datetime] = None, end_date: Optional[datetime] = None) -> List[IndexCheckArchive]:
+        """时间范围内有数据的归档月份，按月份倒序"""
+        query = self.db.query(IndexCheckArchive).filter(IndexCheckArchive.records > 0)
+        if start_date:
+            query = query.filter(IndexCheckArchive.month >= start_date.strftime("%Y-%m"))
+        if end_date:
+            query = query.filter(IndexCheckArchive.month <= end_date.strftime("%Y-%m"))
+        return query.order_by(IndexCheckArchive.month.desc()).all()
+
+    @staticmethod
+    def record_conditions(
+        keyword_id: Optional[int] = None,
+        project_id: Optional[int] = None,
+        platform: Optional[str] = None,
+        keyword_found: Optional[bool] = None,
+        company_found: Optional[bool] = None,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        question: Optional[str] = None
+    ) -> list:
+        """归档记录表的筛选条件（和热表查询的筛选含义一致）"""
+        c = archived_records.c
+        conditions = []
+        if keyword_id:
+            conditions.append(c.keyword_id == keyword_id)
+        if project_id:
+            conditions.append(c.project_id == project_id)
+        if platform:
+            conditions.append(c.platform == platform)
+        if keyword_found is not None:
+            conditions.append(c.keyword_found == keyword_found)
+        if company_found is not None:
+            conditions.append(c.company_found == company_found)
+        if start_date:
+            conditions.append(c.check_time >= start_date)
+        if end_date:
+            conditions.append(c.check_time <= end_date)
+        if question:
+            conditions.append(c.question.ilike(f"%{question}%"))
+        return conditions
+
+    def count_records(self, archive: IndexCheckArchive, conditions: list) -> int:
+        with self._engine(archive.path).connect() as conn:
+            return conn.execute(select(func.count()).select_from(archived_records).where(*conditions)).scalar()
+
+    def fetch_records(
+        self,
+        archive: IndexCheckArchive,
+        conditions: list,
+        offset: int = 0,
+        limit: int = 100,
+        include_answer: bool = False
+    ) -> List[ArchivedCheckRecord]:
+        """按检测时间倒序分页读取归档记录"""
+        columns = [archived_records.c[name] for name in _RECORD_COLUMNS]
+        if include_answer:
+            columns.append(archived_records.c.answer)
+        stmt = select(*columns).where(*conditions).order_by(
+            archived_records.c.check_time.desc(), archived_records.c.id.desc()
+        ).offset(offset).limit(limit)
+        with self._engine(archive.path).connect() as conn:
+            return [ArchivedCheckRecord(dict(row._mapping)) for row in conn.execute(stmt)]
+
+    def count_archived(
+        self,
+        conditions: list,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None
+    ) -> int:
+        """时间范围内所有归档文件中符合条件的记录总数（每个文件一次 COUNT，调用方自己缓存）"""
+        return sum(self.count_records(archive, conditions) for archive in self.covering(start_date, end_date))
+
+    def page_records(
+        self,
+        conditions: list,
+        skip: int,
+        limit: int,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        include_answer: bool = False
+    ) -> List[ArchivedCheckRecord]:
+        """
+        归档部分的分页（接在热表结果后面，归档的记录都比热表旧）
+
+        按月份从新到旧读，这一页取满就不再打开后面的归档文件；只有要跳过记录时才统计文件里的条数，
+        总数用 count_archived 单独算
+
+        Args:
+            conditions: record_conditions() 生成的筛选条件
+            skip: 跳过的归档记录数（已扣掉热表的条数）
+            limit: 最多返回的条数
+
+        Returns:
+            记录列表
+        """
+        records: List[ArchivedCheckRecord] = []
+        for archive in self.covering(start_date, end_date):
+            remaining = limit - len(records)
+            if remaining <= 0:
+                break
+            if skip:
+                count = self.count_records(archive, conditions)
+                if skip >= count:
+                    skip -= count
+                    continue
+            records.extend(self.fetch_records(archive, conditions, skip, remaining, include_answer))
+            skip = 0
+        return records
+
+    def get_record(self, record_id: int) -> Optional[ArchivedCheckRecord]:
+        """按ID在归档里找记录（按归档目录记的 ID 范围定位文件）"""
+        archives = self.db.query(IndexCheckArchive).filter(
+            IndexCheckArchive.records > 0,
+            IndexCheckArchive.min_id <= record_id,
+            IndexCheckArchive.max_id >= record_id
+        ).all()
+        for archive in archives:
+            rows = self.fetch_records(archive, [archived_records.c.id == record_id], limit=1, include_answer=True)
+            if rows:
+                return rows[0]
+        return None
+
+    def query_archives(
+        self,
+        statement: Callable[[], Any],
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None
+    ) -> Iterator[Any]:
+        """
+        在时间范围内的每个归档文件上执行同一个查询，逐行产出结果（调用方自己合并聚合结果）
+
+        Args:
+            statement: 返回 select 语句的函数，语句里用 archived_records / archived_citations / archived_timings
+        """
+        for archive in self.covering(start_date, end_date):
+            with self._engine(archive.path).connect() as conn:
+                yield from conn.execute(statement()).all()
@@ -0,0 +1,600 @@
+# -*- coding: utf-8 -*-
+"""
+收录检测任务服务
+项目批量检测拆成 关键词 × 问题 × 平台 的任务项落库，服务重启后从断点继续！
+多个进程共用一个数据库时，任务先抢任务级租约，抢到的进程才执行，租约过期前别的进程不会接手
+"""
+
+import asyncio
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from loguru import logger
+from sqlalchemy import and_, func, or_
+from sqlalchemy.orm import Session
+
+from backend.config import (
+    INDEX_CHECK_JOB_CLAIM_SIZE,
+    INDEX_CHECK_JOB_LEASE_SECONDS,
+    INDEX_CHECK_JOB_OWNER_LEASE_SECONDS,
+    INDEX_CHECK_JOB_AUTO_RESUME,
+    INDEX_CHECK_RUN_BUDGET,
+    INDEX_CHECK_UNATTENDED_PROFILE
+)
+from backend.database.models import (
+    IndexCheckJob, IndexCheckJobItem, Keyword, Project, QuestionVariant
+)
+from backend.services.check_prioritizer import CheckPrioritizer
+from backend.services.index_check_service import IndexCheckService
+from backend.services.playwright.check_executor import CheckExecutor
+from backend.services.result_sink import IndexResultSink
+
+
+# 当前进程中正在执行的任务，同进程内重复启动直接挡掉（跨进程靠任务级租约）
+_running_jobs = set()
+
+
+class CheckJobService:
+    """
+    收录检测任务服务
+
+    注意：
+    - 任务按租约执行：执行前用带条件的 UPDATE 抢任务级租约，执行期间定时续约（连同本次认领的任务项）
+    - 任务项按租约认领：认领时写入 lease_owner 和 lease_until，租约过期的任务项可以被重新认领
+    - 检测记录和任务项完成状态由 IndexResultSink 在同一个事务里写入
+    - 任务中断后再次执行，只会跑 pending 和租约过期的任务项
+    """
+
+    def __init__(self, db: Session, browser_profile: Optional[str] = None):
+        """
+        初始化任务服务
+
+        Args:
+            db: 数据库会话
+            browser_profile: 执行检测使用的浏览器模式（headed / headless）
+        """
+        self.db = db
+        self.index_service = IndexCheckService(db, browser_profile=browser_profile)
+
+    # ==================== 任务管理 ====================
+
+    def create_job(
+        self,
+        project_id: int,
+        platforms: Optional[List[str]] = None,
+        budget: Optional[int] = None
+    ) -> Optional[IndexCheckJob]:
+        """
+        创建项目检测任务，并展开任务项
+
+        Args:
+            project_id: 项目ID
+            platforms: 检测平台列表，默认全部
+            budget: 检测预算（次数），为空时使用 INDEX_CHECK_RUN_BUDGET；
+                    大于 0 时只按优先级挑选预算内的组合，否则全量检测
+
+        Returns:
+            任务对象，项目不存在或没有关键词时返回 None
+        """
+        project = self.db.query(Project).filter(Project.id == project_id).first()
+        if not project:
+            logger.error(f"项目不存在: {project_id}")
+            return None
+
+        keywords = self.db.query(Keyword).filter(Keyword.project_id == project_id).all()
+        if not keywords:
+            logger.error(f"项目下没有关键词: {project_id}")
+            return None
+
+        platforms = [p for p in (platforms or list(self.index_service.checkers.keys())) if p in self.index_service.checkers]
+
+        job = IndexCheckJob(project_id=project_id, platforms=platforms, status="pending")
+        self.db.add(job)
+        self.db.flush()
+
+        if budget is None:
+            budget = INDEX_CHECK_RUN_BUDGET
+
+        if budget and budget > 0:
+            # 按优先级挑选，分数高的先入库，认领时也就先执行
+            combos = CheckPrioritizer(self.db).select(keywords, platforms, budget)
+        else:
+            combos = self._expand_all(keywords, platforms)
+
+        items = [{
+            "job_id": job.id,
+            "keyword_id": combo["keyword_id"],
+            "question_variant_id": combo["question_variant_id"],
+            "question": combo["question"],
+            "platform": combo["platform"],
+            "status": "pending",
+            "attempts": 0
+        } for combo in combos]
+
+        try:
+            self.db.bulk_insert_mappings(IndexCheckJobItem, items)
+            self.db.commit()
+        except Exception as e:
+            logger.error(f"创建检测任务失败: {e}")
+            self.db.rollback()
+            raise
+
+        logger.info(f"检测任务已创建: 任务ID={job.id}, 项目ID={project_id}, 任务项={len(items)}")
+        return job
+
+    def _expand_all(self, keywords: List[Keyword], platforms: List[str]) -> List[Dict[str, Any]]:
+        """全量展开 关键词 × 问题 × 平台（按 关键词 -> 问题 -> 平台 的顺序，和原来的检测顺序一致）"""
+        combos = []
+        for keyword_obj in keywords:
+            questions = [(qv.id, qv.question) for qv in self.db.query(QuestionVariant).filter(
+                QuestionVariant.keyword_id == keyword_obj.id
+            ).all()]
+            if not questions:
+                # 如果没有问题变体，使用默认问题
+                questions = [(None, f"什么是{keyword_obj.keyword}？推荐哪家公司？")]
+
+            for question_variant_id, question in questions:
+                for platform_id in platforms:
+                    combos.append({
+                        "keyword_id": keyword_obj.id,
+                        "question_variant_id": question_variant_id,
+                        "question": question,
+                        "platform": platform_id
+                    })
+        return combos
+
+    def get_job_progress(self, job_id: int) -> Optional[Dict[str, Any]]:
+        """
+        获取任务进度
+
+        Returns:
+            任务状态和各状态的任务项数量
+        """
+        job = self.db.query(IndexCheckJob).filter(IndexCheckJob.id == job_id).first()
+        if not job:
+            return None
+
+        counts = dict(
+            self.db.query(IndexCheckJobItem.status, func.count(IndexCheckJobItem.id))
+            .filter(IndexCheckJobItem.job_id == job_id)
+            .group_by(IndexCheckJobItem.status)
+            .all()
+        )
+        total = sum(counts.values())
+        finished = counts.get("done", 0) + counts.get("failed", 0)
+
+        return {
+            "job_id": job.id,
+            "project_id": job.project_id,
+            "platforms": job.platforms,
+            "status": job.status,
+            "error_msg": job.error_msg,
+            "total": total,
+            "done": counts.get("done", 0),
+            "failed": counts.get("failed", 0),
+            "pending": counts.get("pending", 0),
+            "running": counts.get("running", 0),
+            "progress": round(finished / total * 100, 2) if total else 0.0,
+            "created_at": job.created_at.isoformat() if job.created_at else None,
+            "started_at": job.started_at.isoformat() if job.started_at else None,
+            "finished_at": job.finished_at.isoformat() if job.finished_at else None
+        }
+
+    # ==================== 任务租约 ====================
+
+    def claim_job(
+        self,
+        job_id: int,
+        owner: str,
+        lease_seconds: int = INDEX_CHECK_JOB_OWNER_LEASE_SECONDS
+    ) -> Tuple[bool, Optional[str]]:
+        """
+        抢任务级租约
+
+        先读出当前持有者，再用带条件的 UPDATE 比较并交换：持有者没变且租约空闲或已过期才写入，
+        多个进程同时抢只有一个能更新到这一行
+
+        Args:
+            job_id: 任务ID
+            owner: 执行器标识（本次执行的 run_token）
+            lease_seconds: 租约时长（秒）
+
+        Returns:
+            (是否抢到, 上一个持有者)；抢到时上一个持有者的租约已经过期
+        """
+        row = self.db.query(IndexCheckJob.lease_owner).filter(IndexCheckJob.id == job_id).first()
+        if row is None:
+            return False, None
+        previous = row[0]
+
+        now = datetime.now()
+        holder = IndexCheckJob.lease_owner.is_(None) if previous is None else IndexCheckJob.lease_owner == previous
+        try:
+            claimed = self.db.query(IndexCheckJob).filter(
+                IndexCheckJob.id == job_id,
+                holder,
+                or_(IndexCheckJob.lease_until.is_(None), IndexCheckJob.lease_until < now)
+            ).update({
+                IndexCheckJob.status: "running",
+                IndexCheckJob.error_msg: None,
+                IndexCheckJob.started_at: func.coalesce(IndexCheckJob.started_at, now),
+                IndexCheckJob.finished_at: None,
+                IndexCheckJob.lease_owner: owner,
+                IndexCheckJob.lease_until: now + timedelta(seconds=lease_seconds)
+            }, synchronize_session=False)
+            self.db.commit()
+        except Exception as e:
+            logger.error(f"抢检测任务租约失败: {e}")
+            self.db.rollback()
+            return False, None
+
+        return claimed == 1, previous
+
+    def renew_job(
+        self,
+        job_id: int,
+        owner: str,
+        lease_seconds: int = INDEX_CHECK_JOB_OWNER_LEASE_SECONDS,
+        item_lease_seconds: int = INDEX_CHECK_JOB_LEASE_SECONDS
+    ) -> bool:
+        """
+        续约任务级租约，同时续上本次执行认领的任务项，检测慢的任务项不会因租约过期被别人重复认领
+
+        Returns:
+            租约是否还在自己手里（False 说明已经被别的执行器接手，应当停止认领）
+        """
+        now = datetime.now()
+        try:
+            renewed = self.db.query(IndexCheckJob).filter(
+                IndexCheckJob.id == job_id,
+                IndexCheckJob.lease_owner == owner
+            ).update({
+                IndexCheckJob.lease_until: now + timedelta(seconds=lease_seconds)
+            }, synchronize_session=False)
+            if renewed:
+                self.db.query(IndexCheckJobItem).filter(
+                    IndexCheckJobItem.job_id == job_id,
+                    IndexCheckJobItem.status == "running",
+                    IndexCheckJobItem.lease_owner.like(f"{owner}-%")
+                ).update({
+                    IndexCheckJobItem.lease_until: now + timedelta(seconds=item_lease_seconds)
+                }, synchronize_session=False)
+            self.db.commit()
+        except Exception as e:
+            # 偶发写失败不算丢租约，下次心跳再续
+            logger.warning(f"续约检测任务失败: {e}")
+            self.db.rollback()
+            return True
+
+        return renewed == 1
+
+    async def _heartbeat(self, job_id: int, owner: str, lease_lost: asyncio.Event):
+        """执行期间定时续约，租约被别人接手时通知各执行通道停止认领"""
+        while True:
+            await asyncio.sleep(INDEX_CHECK_JOB_OWNER_LEASE_SECONDS / 3)
+            if not self.renew_job(job_id, owner):
+                logger.warning(f"[检测任务] 任务 {job_id} 的租约已被其它执行器接手，停止认领")
+                lease_lost.set()
+                return
+
+    # ==================== 任务项认领 ====================
+
+    def claim_items(
+        self,
+        job_id: int,
+        platform_id: str,
+        owner: str,
+        limit: int = INDEX_CHECK_JOB_CLAIM_SIZE,
+        lease_seconds: int = INDEX_CHECK_JOB_LEASE_SECONDS
+    ) -> List[IndexCheckJobItem]:
+        """
+        认领一批待执行的任务项
+
+        先挑出候选项，再用带条件的 UPDATE 抢租约，被别人抢走的候选项自然会被过滤掉
+
+        Args:
+            job_id: 任务ID
+            platform_id: 平台ID
+            owner: 租约持有者标识
+            limit: 认领数量
+            lease_seconds: 租约时长（秒）
+
+        Returns:
+            认领成功的任务项
+        """
+        now = datetime.now()
+        claimable = or_(
+            IndexCheckJobItem.status == "pending",
+            and_(IndexCheckJobItem.status == "running", IndexCheckJobItem.lease_until < now)
+        )
+
+        candidate_ids = [row[0] for row in self.db.query(IndexCheckJobItem.id).filter(
+            IndexCheckJobItem.job_id == job_id,
+            IndexCheckJobItem.platform == platform_id,
+            claimable
+        ).order_by(IndexCheckJobItem.id).limit(limit).all()]
+
+        if not candidate_ids:
+            return []
+
+        try:
+            self.db.query(IndexCheckJobItem).filter(
+                IndexCheckJobItem.id.in_(candidate_ids),
+                claimable
+            ).update({
+                IndexCheckJobItem.status: "running",
+                IndexCheckJobItem.attempts: IndexCheckJobItem.attempts + 1,
+                IndexCheckJobItem.lease_owner: owner,
+                IndexCheckJobItem.lease_until: now + timedelta(seconds=lease_seconds)
+            }, synchronize_session=False)
+            self.db.commit()
+        except Exception as e:
+            logger.error(f"认领检测任务项失败: {e}")
+            self.db.rollback()
+            return []
+
+        return self.db.query(IndexCheckJobItem).filter(
+            IndexCheckJobItem.id.in_(candidate_ids),
+            IndexCheckJobItem.lease_owner == owner
+        ).order_by(IndexCheckJobItem.id).all()
+
+    def release_items(self, job_id: int, owner_prefix: str) -> int:
+        """
+        释放执行中的任务项，放回待执行队列
+
+        Args:
+            job_id: 任务ID
+            owner_prefix: 只释放租约持有者以此开头的任务项（自己这次执行的，或任务租约已过期的上一个执行器的）
+
+        Returns:
+            释放的数量
+        """
+        query = self.db.query(IndexCheckJobItem).filter(
+            IndexCheckJobItem.job_id == job_id,
+            IndexCheckJobItem.status == "running",
+            IndexCheckJobItem.lease_owner.like(f"{owner_prefix}-%")
+        )
+
+        try:
+            count = query.update({
+                IndexCheckJobItem.status: "pending",
+                IndexCheckJobItem.lease_owner: None,
+                IndexCheckJobItem.lease_until: None
+            }, synchronize_session=False)
+            self.db.commit()
+            return count
+        except Exception as e:
+            logger.error(f"释放检测任务项失败: {e}")
+            self.db.rollback()
+            return 0
+
+    # ==================== 任务执行 ====================
+
+    async def _run_platform(
+        self,
+        job_id: int,
+        run_token: str,
+        platform_id: str,
+        executor: CheckExecutor,
+        keywords: Dict[int, Keyword],
+        company_name: str,
+        matcher: Any,
+        sink: IndexResultSink,
+        results: List[Dict[str, Any]],
+        lease_lost: asyncio.Event
+    ):
+        """单个平台的执行通道：按平台并发上限开页面，各自认领任务项（任务租约丢了就不再认领）"""
+        checker = self.index_service.checkers[platform_id]
+        limit = executor.get_limit(platform_id)
+
+        async def worker(worker_no: int):
+            owner = f"{run_token}-{platform_id}-{worker_no}"
+            page = None
+            try:
+                while not lease_lost.is_set():
+                    items = self.claim_items(job_id, platform_id, owner)
+                    if not items:
+                        break
+
+                    if page is None:
+                        page = await executor.pool.new_page(platform_id)
+
+                    for item in items:
+                        keyword_obj = keywords.get(item.keyword_id)
+                        if keyword_obj is None:
+                            continue
+                        result = await self.index_service._check_single_question(
+                            keyword_id=item.keyword_id,
+                            keyword_obj=keyword_obj,
+                            company_name=company_name,
+                            platform_id=platform_id,
+                            checker=checker,
+                            page=page,
+                            qv=QuestionVariant(
+                                id=item.question_variant_id or 0,
+                                keyword_id=item.keyword_id,
+                                question=item.question
+                            ),
+                            matcher=matcher,
+                            sink=sink,
+                            job_item_id=item.id
+                        )
+                        results.append(result)
+            finally:
+                if page is not None:
+                    try:
+                        await page.close()
+                    except Exception as e:
+                        logger.debug(f"[检测任务] 关闭页面失败: {checker.name}#{worker_no}: {e}")
+
+        concurrency = max(1, int(limit["max_concurrency"]))
+        await asyncio.gather(*(worker(n) for n in range(concurrency)))
+
+    async def run_job(self, job_id: int) -> List[Dict[str, Any]]:
+        """
+        执行（或恢复执行）检测任务
+
+        Args:
+            job_id: 任务ID
+
+        Returns:
+            本次执行产生的检测结果列表（恢复执行时不含之前已完成的部分）
+        """
+        if job_id in _running_jobs:
+            logger.warning(f"检测任务正在执行中: {job_id}")
+            return []
+
+        job = self.db.query(IndexCheckJob).filter(IndexCheckJob.id == job_id).first()
+        if not job:
+            logger.error(f"检测任务不存在: {job_id}")
+            return []
+
+        project = self.db.query(Project).filter(Project.id == job.project_id).first()
+        if not project:
+            logger.error(f"项目不存在: {job.project_id}")
+            return []
+
+        run_token = uuid.uuid4().hex[:12]
+        claimed, previous = self.claim_job(job_id, run_token)
+        if not claimed:
+            logger.warning(f"检测任务正由其它执行器执行: {job_id}")
+            return []
+        if previous:
+            # 上一个执行器的任务租约已经过期（进程挂了），它认领没做完的任务项放回待执行队列
+            released = self.release_items(job_id, owner_prefix=previous)
+            logger.info(f"接手租约过期的检测任务: 任务ID={job_id}, 释放任务项={released}")
+        self.db.refresh(job)
+
+        _running_jobs.add(job_id)
+        results: List[Dict[str, Any]] = []
+        lease_lost = asyncio.Event()
+        heartbeat = asyncio.create_task(self._heartbeat(job_id, run_token, lease_lost))
+        try:
+            keywords = {k.id: k for k in self.db.query(Keyword).filter(Keyword.project_id == project.id).all()}
+            matcher = self.index_service.get_matcher(project, project.company_name)
+            platforms = [p for p in (job.platforms or []) if p in self.index_service.checkers]
+
+            logger.info(f"开始执行检测任务: 任务ID={job_id}, 项目ID={project.id}, 平台={platforms}")
+
+            async with self.index_service.create_browser_pool() as pool, IndexResultSink(self.db) as sink:
+                executor = self.index_service.create_executor(pool)
+                lane_results = await asyncio.gather(
+                    *(self._run_platform(job_id, run_token, platform_id, executor, keywords, project.company_name, matcher, sink, results, lease_lost)
+                      for platform_id in platforms),
+                    return_exceptions=True
+                )
+
+            heartbeat.cancel()
+            errors = [str(r) for r in lane_results if isinstance(r, BaseException)]
+            for error in errors:
+                logger.error(f"[检测任务] 任务 {job_id} 平台执行异常: {error}")
+
+            self._finish_job(job, run_token, "; ".join(errors) or None)
+        except Exception as e:
+            logger.error(f"检测任务执行失败: 任务ID={job_id}, 错误={e}")
+            self.db.rollback()
+            heartbeat.cancel()
+            self._finish_job(job, run_token, str(e))
+        finally:
+            heartbeat.cancel()
+            _running_jobs.discard(job_id)
+
+        logger.info(f"检测任务结束: 任务ID={job_id}, 状态={job.status}, 本次检测数={len(results)}")
+        return results
+
+    def _finish_job(self, job: IndexCheckJob, run_token: str, error_msg: Optional[str]):
+        """收尾：本次执行认领但没做完的任务项放回待执行队列，再根据剩余数量确定任务状态并交还任务租约"""
+        self.release_items(job.id, owner_prefix=run_token)
+        remaining = self.db.query(func.count(IndexCheckJobItem.id)).filter(
+            IndexCheckJobItem.job_id == job.id,
+            IndexCheckJobItem.status.in_(["pending", "running"])
+        ).scalar()
+
+        if remaining and not error_msg:
+            error_msg = f"还有 {remaining} 个任务项未完成，可恢复执行"
+
+        try:
+            # 只在租约还是自己的时候收尾，已被别人接手的任务状态归接手的执行器管
+            finished = self.db.query(IndexCheckJob).filter(
+                IndexCheckJob.id == job.id,
+                IndexCheckJob.lease_owner == run_token
+            ).update({
+                IndexCheckJob.status: "completed" if remaining == 0 else "failed",
+                IndexCheckJob.error_msg: error_msg if remaining else None,
+                IndexCheckJob.finished_at: datetime.now(),
+                IndexCheckJob.lease_owner: None,
+                IndexCheckJob.lease_until: None
+            }, synchronize_session=False)
+            self.db.commit()
+            if not finished:
+                logger.warning(f"检测任务已被其它执行器接手，不更新任务状态: {job.id}")
+        except Exception as e:
+            logger.error(f"更新检测任务状态失败: {e}")
+            self.db.rollback()
+        self.db.refresh(job)
+
+
+async def run_job_in_background(job_id: int, browser_profile: Optional[str] = None):
+    """后台执行检测任务（使用独立的数据库会话）"""
+    from backend.database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        await CheckJobService(db, browser_profile=browser_profile).run_job(job_id)
+    except Exception as e:
+        logger.error(f"后台检测任务失败: {e}")
+    finally:
+        db.close()
+
+
+def find_resumable_jobs(db: Session) -> Tuple[List[int], Optional[datetime]]:
+    """
+    找出可以恢复的未完成任务
+
+    Returns:
+        (任务租约空闲或已过期的任务ID, 其余任务里最晚的租约到期时间)；
+        租约还没过期的任务可能正被别的进程执行，也可能是本机上次挂掉前留下的，到期后再看
+    """
+    now = datetime.now()
+    rows = db.query(IndexCheckJob.id, IndexCheckJob.lease_until).filter(
+        IndexCheckJob.status.in_(["pending", "running"])
+    ).order_by(IndexCheckJob.id).all()
+
+    job_ids = [job_id for job_id, lease_until in rows if lease_until is None or lease_until < now]
+    leased = [lease_until for _, lease_until in rows if lease_until is not None and lease_until >= now]
+    return job_ids, max(leased) if leased else None
+
+
+async def resume_unfinished_jobs():
+    """
+    服务启动时恢复未完成的检测任务
+
+    注意：
+    - 多个进程共用数据库时，别的进程可能正在执行这些任务，这里不动任何租约没过期的任务和任务项，
+      真正执行前由 run_job 抢任务级租约，抢不到就跳过
+    - 租约还没过期的任务等到期后再看一次：那时还在续约说明确实有人在跑，没续约就接手
+    """
+    if not INDEX_CHECK_JOB_AUTO_RESUME:
+        return
+
+    from backend.database import SessionLocal
+
+    for attempt in range(2):
+        db = SessionLocal()
+        try:
+            job_ids, leased_until = find_resumable_jobs(db)
+        except Exception as e:
+            logger.error(f"恢复检测任务失败: {e}")
+            return
+        finally:
+            db.close()
+
+        # 逐个恢复，避免多个任务同时抢占浏览器；无人值守，使用无人值守浏览器模式
+        for job_id in job_ids:
+            logger.info(f"恢复中断的检测任务: 任务ID={job_id}")
+            await run_job_in_background(job_id, browser_profile=INDEX_CHECK_UNATTENDED_PROFILE)
+
+        if leased_until is None or attempt:
+            return
+        await asyncio.sleep(max((leased_until - datetime.now()).total_seconds(), 0) + 1)
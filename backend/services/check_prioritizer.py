@@ -0,0 +1,189 @@
+# -*- coding: utf-8 -*-
+"""
+收录检测优先级
+按过期程度、历史命中波动和关键词业务优先级打分，把有限的检测预算花在最有价值的组合上！
+"""
+
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Sequence
+
+from loguru import logger
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from backend.config import (
+    INDEX_CHECK_STALE_HOURS,
+    INDEX_CHECK_PRIORITY_WEIGHTS,
+    INDEX_CHECK_KEYWORD_PRIORITY
+)
+from backend.database.models import IndexCheckRecord, Keyword, QuestionVariant
+
+# 计算波动时回看的历史天数和每个组合最多使用的记录数
+HISTORY_DAYS = 30
+HISTORY_SIZE = 10
+
+
+def keyword_priority(status: Optional[str]) -> float:
+    """关键词业务优先级（按 Keyword.status）"""
+    return float(INDEX_CHECK_KEYWORD_PRIORITY.get(status or "active", 1.0))
+
+
+def priority_score(
+    hours_since_last: Optional[float],
+    hit_history: Sequence[bool],
+    priority: float = 1.0,
+    stale_hours: float = INDEX_CHECK_STALE_HOURS,
+    weights: Dict[str, float] = INDEX_CHECK_PRIORITY_WEIGHTS
+) -> float:
+    """
+    计算单个 关键词 × 问题 × 平台 组合的检测价值
+
+    Args:
+        hours_since_last: 距上次检测的小时数，从未检测过为 None
+        hit_history: 按时间顺序的历史命中结果
+        priority: 关键词业务优先级
+        stale_hours: 超过多少小时算完全过期
+        weights: 过期程度和波动的权重
+
+    Returns:
+        分数，越高越应该优先检测
+    """
+    if priority <= 0:
+        return 0.0
+
+    # 从未检测过的组合视为完全过期
+    if hours_since_last is None:
+        staleness = 1.0
+    else:
+        staleness = min(max(hours_since_last, 0.0) / stale_hours, 1.0) if stale_hours > 0 else 1.0
+
+    # 波动：相邻两次结果翻转的比例；历史不足两次时视为完全不确定
+    if len(hit_history) < 2:
+        volatility = 1.0
+    else:
+        flips = sum(1 for a, b in zip(hit_history, hit_history[1:]) if a != b)
+        volatility = flips / (len(hit_history) - 1)
+
+    score = weights.get("staleness", 0.0) * staleness + weights.get("volatility", 0.0) * volatility
+    return round(score * priority, 6)
+
+
+class CheckPrioritizer:
+    """
+    收录检测优先级排序器
+
+    注意：
+    - 历史记录只读取命中标志和时间，不读取回答正文
+    - 命中以 company_found 为准（公司名被提及才是真正的收录信号）
+    """
+
+    def __init__(self, db: Session):
+        """
+        初始化排序器
+
+        Args:
+            db: 数据库会话
+        """
+        self.db = db
+
+    def _load_history(self, keyword_ids: List[int]) -> Dict[tuple, List[Any]]:
+        """读取近期检测历史：(关键词ID, 问题, 平台) -> [(检测时间, 是否命中)]"""
+        since = datetime.now() - timedelta(days=HISTORY_DAYS)
+        rows = self.db.query(
+            IndexCheckRecord.keyword_id,
+            IndexCheckRecord.question,
+            IndexCheckRecord.platform,
+            IndexCheckRecord.check_time,
+            IndexCheckRecord.company_found
+        ).filter(
+            IndexCheckRecord.keyword_id.in_(keyword_ids),
+            IndexCheckRecord.check_time >= since
+        ).order_by(IndexCheckRecord.check_time).all()
+
+        history: Dict[tuple, List[Any]] = defaultdict(list)
+        for keyword_id, question, platform, check_time, company_found in rows:
+            history[(keyword_id, question, platform)].append((check_time, bool(company_found)))
+        return history
+
+    def _load_last_check(self, keyword_ids: List[int]) -> Dict[tuple, datetime]:
+        """读取每个组合最后一次检测时间（不限时间窗口）"""
+        rows = self.db.query(
+            IndexCheckRecord.keyword_id,
+            IndexCheckRecord.question,
+            IndexCheckRecord.platform,
+            func.max(IndexCheckRecord.check_time)
+        ).filter(
+            IndexCheckRecord.keyword_id.in_(keyword_ids)
+        ).group_by(
+            IndexCheckRecord.keyword_id,
+            IndexCheckRecord.question,
+            IndexCheckRecord.platform
+        ).all()
+        return {(k, q, p): t for k, q, p, t in rows}
+
+    def rank(self, keywords: List[Keyword], platforms: List[str]) -> List[Dict[str, Any]]:
+        """
+        给所有 关键词 × 问题 × 平台 组合打分并排序
+
+        Args:
+            keywords: 关键词列表
+            platforms: 平台列表
+
+        Returns:
+            按分数从高到低排列的组合：
+            [{"keyword_id", "question_variant_id", "question", "platform", "score"}]
+        """
+        keyword_ids = [k.id for k in keywords]
+        if not keyword_ids:
+            return []
+
+        history = self._load_history(keyword_ids)
+        last_check = self._load_last_check(keyword_ids)
+
+        variants: Dict[int, List[Any]] = defaultdict(list)
+        for qv in self.db.query(QuestionVariant).filter(QuestionVariant.keyword_id.in_(keyword_ids)).all():
+            variants[qv.keyword_id].append((qv.id, qv.question))
+
+        now = datetime.now()
+        candidates = []
+        for keyword_obj in keywords:
+            priority = keyword_priority(keyword_obj.status)
+            if priority <= 0:
+                continue
+
+            # 如果没有问题变体，使用默认问题
+            questions = variants.get(keyword_obj.id) or [(None, f"什么是{keyword_obj.keyword}？推荐哪家公司？")]
+            for question_variant_id, question in questions:
+                for platform_id in platforms:
+                    key = (keyword_obj.id, question, platform_id)
+                    last = last_check.get(key)
+                    hours = (now - last).total_seconds() / 3600 if last else None
+                    hits = [hit for _, hit in history.get(key, [])[-HISTORY_SIZE:]]
+                    candidates.append({
+                        "keyword_id": keyword_obj.id,
+                        "question_variant_id": question_variant_id,
+                        "question": question,
+                        "platform": platform_id,
+                        "score": priority_score(hours, hits, priority)
+                    })
+
+        candidates.sort(key=lambda c: c["score"], reverse=True)
+        return candidates
+
+    def select(self, keywords: List[Keyword], platforms: List[str], budget: int) -> List[Dict[str, Any]]:
+        """
+        在预算内挑选最值得检测的组合
+
+        Args:
+            keywords: 关键词列表
+            platforms: 平台列表
+            budget: 本次最多检测的次数
+
+        Returns:
+            选中的组合（按分数从高到低）
+        """
+        ranked = self.rank(keywords, platforms)
+        selected = [c for c in ranked if c["score"] > 0][:budget]
+        logger.info(f"检测优先级排序: 候选 {len(ranked)} 个组合, 预算 {budget}, 选中 {len(selected)} 个")
+        return selected
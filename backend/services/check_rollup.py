@@ -0,0 +1,247 @@
+# -*- coding: utf-8 -*-
+"""
+收录检测日汇总
+检测记录写入/删除时顺手更新 日期 × 关键词 × 平台 的计数，报表直接读汇总表，历史再多也不变慢！
+
+计数口径和检测记录列表一致（一条记录算一次检测）：
+- 复用缓存回答的记录（from_cache）也是一条检测记录，照常计入
+- 检测时间为空的历史记录归不到任何一天，不计入（重建时同样跳过）
+"""
+
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from loguru import logger
+from sqlalchemy import case, func, literal, or_, select
+from sqlalchemy.orm import Session
+
+from backend.database import dialect_insert
+from backend.database.models import IndexCheckDaily, IndexCheckRecord, Keyword
+from backend.services.check_archive import archived_until
+
+
+def start_day(days: int) -> date:
+    """最近 days 天的起始日期（报表的天数筛选统一按自然日）"""
+    return (datetime.now() - timedelta(days=days)).date()
+
+
+def _to_date(value: Any) -> Optional[date]:
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return None
+
+
+def apply_records(db: Session, records: Iterable[Dict[str, Any]], sign: int = 1) -> int:
+    """
+    把检测记录计入（sign=1）或移出（sign=-1）日汇总
+
+    不提交事务，调用方和写入/删除检测记录放在同一个事务里提交
+
+    Args:
+        db: 数据库会话
+        records: 检测记录字段字典（keyword_id / platform / check_time / keyword_found / company_found / answer / answer_hash）
+        sign: 1 为写入，-1 为删除
+
+    Returns:
+        更新的汇总行数
+    """
+    deltas: Dict[Tuple[int, str, date], Dict[str, int]] = defaultdict(
+        lambda: {"checks": 0, "keyword_hits": 0, "company_hits": 0, "answered": 0}
+    )
+    skipped = 0
+    for record in records:
+        day = _to_date(record.get("check_time"))
+        if day is None:
+            skipped += 1
+            continue
+        delta = deltas[(record["keyword_id"], record["platform"], day)]
+        delta["checks"] += sign
+        delta["keyword_hits"] += sign if record.get("keyword_found") else 0
+        delta["company_hits"] += sign if record.get("company_found") else 0
+        delta["answered"] += sign if record.get("answer_hash") or (record.get("answer") or "").strip() else 0
+    if skipped:
+        logger.warning(f"{skipped} 条检测记录没有检测时间，不计入日汇总")
+    if not deltas:
+        return 0
+
+    insert = dialect_insert(db)
+    rows = [
+        {"keyword_id": keyword_id, "platform": platform, "date": day, **delta}
+        for (keyword_id, platform, day), delta in deltas.items()
+    ]
+    stmt = insert(IndexCheckDaily).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["keyword_id", "platform", "date"],
+        set_={
+            column: getattr(IndexCheckDaily, column) + getattr(stmt.excluded, column)
+            for column in ("checks", "keyword_hits", "company_hits", "answered")
+        }
+    )
+    db.execute(stmt)
+    return len(rows)
+
+
+def record_fields(record: IndexCheckRecord) -> Dict[str, Any]:
+    """ORM 检测记录转成 apply_records 需要的字段字典"""
+    return {
+        "keyword_id": record.keyword_id,
+        "platform": record.platform,
+        "check_time": record.check_time,
+        "keyword_found": record.keyword_found,
+        "company_found": record.company_found,
+        "answer": record.answer,
+        "answer_hash": record.answer_hash
+    }
+
+
+class DailyRollupService:
+    """
+    日汇总查询与重建
+
+    注意：
+    - aggregate() 返回带 checks / keyword_hits / company_hits / answered 四个求和列的查询，调用方自己选分组列
+    - 天数筛选按自然日（汇总粒度是天），和原来按"当前时间往前推 N×24 小时"相比会多算半天
+    """
+
+    def __init__(self, db: Session):
+        """
+        初始化日汇总服务
+
+        Args:
+            db: 数据库会话
+        """
+        self.db = db
+
+    def aggregate(
+        self,
+        *group_by,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        project_id: Optional[int] = None,
+        keyword_id: Optional[int] = None,
+        platform: Optional[str] = None,
+        active_only: bool = False
+    ):
+        """
+        汇总查询
+
+        Args:
+            *group_by: 分组列，如 IndexCheckDaily.date / IndexCheckDaily.platform / Keyword.project_id
+            start_date: 起始日期（含）
+            end_date: 截止日期（含）
+            project_id: 项目筛选
+            keyword_id: 关键词筛选
+            platform: 平台筛选
+            active_only: 只统计启用中的关键词
+
+        Returns:
+            SQLAlchemy 查询，结果行带 group_by 列和 checks / keyword_hits / company_hits / answered
+        """
+        query = self.db.query(
+            *group_by,
+            func.coalesce(func.sum(IndexCheckDaily.checks), 0).label("checks"),
+            func.coalesce(func.sum(IndexCheckDaily.keyword_hits), 0).label("keyword_hits"),
+            func.coalesce(func.sum(IndexCheckDaily.company_hits), 0).label("company_hits"),
+            func.coalesce(func.sum(IndexCheckDaily.answered), 0).label("answered")
+        ).select_from(IndexCheckDaily)
+
+        groups_by_keyword = any(
+            getattr(getattr(col, "expression", col), "table", None) is Keyword.__table__ for col in group_by
+        )
+        if project_id or active_only or groups_by_keyword:
+            query = query.join(Keyword, Keyword.id == IndexCheckDaily.keyword_id)
+        if project_id:
+            query = query.filter(Keyword.project_id == project_id)
+        if active_only:
+            query = query.filter(Keyword.status == "active")
+        if keyword_id:
+            query = query.filter(IndexCheckDaily.keyword_id == keyword_id)
+        if platform:
+            query = query.filter(IndexCheckDaily.platform == platform)
+        if start_date:
+            query = query.filter(IndexCheckDaily.date >= start_date)
+        if end_date:
+            query = query.filter(IndexCheckDaily.date <= end_date)
+        if group_by:
+            query = query.group_by(*group_by)
+        return query
+
+    def totals(self, **filters) -> Dict[str, int]:
+        """不分组的合计：{"checks", "keyword_hits", "company_hits", "answered"}"""
+        row = self.aggregate(**filters).one()
+        return {
+            "checks": int(row.checks),
+            "keyword_hits": int(row.keyword_hits),
+            "company_hits": int(row.company_hits),
+            "answered": int(row.answered)
+        }
+
+    def rebuild(self, start_date: Optional[date] = None, end_date: Optional[date] = None) -> Dict[str, Any]:
+        """
+        从原始检测记录重建日汇总（整段删除后按天重新聚合）
+
+        Args:
+            start_date: 起始日期（含），默认最早；已归档的月份原始记录不在热表，不参与重建，保留原汇总
+            end_date: 截止日期（含），默认最新
+
+        Returns:
+            {"deleted", "inserted"} 汇总行数
+        """
+        until = archived_until(self.db)
+        if until and (start_date is None or start_date < until):
+            logger.warning(f"{until} 之前的检测记录已归档，日汇总从 {until} 开始重建")
+            start_date = until
+        try:
+            deleted, inserted = rebuild_rollup(self.db, start_date, end_date)
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+        return {"deleted": deleted, "inserted": inserted}
+
+
+def rebuild_rollup(conn, start_date: Optional[date] = None, end_date: Optional[date] = None) -> Tuple[int, int]:
+    """
+    重建日汇总（不提交事务，Session 和 Connection 都可以传）
+
+    Returns:
+        (删除的汇总行数, 写入的汇总行数)
+    """
+    day = func.date(IndexCheckRecord.check_time)
+
+    delete_stmt = IndexCheckDaily.__table__.delete()
+    if start_date:
+        delete_stmt = delete_stmt.where(IndexCheckDaily.date >= start_date)
+    if end_date:
+        delete_stmt = delete_stmt.where(IndexCheckDaily.date <= end_date)
+    deleted = conn.execute(delete_stmt).rowcount
+
+    select_stmt = select(
+        IndexCheckRecord.keyword_id,
+        IndexCheckRecord.platform,
+        day,
+        func.count(),
+        func.sum(case((IndexCheckRecord.keyword_found == True, 1), else_=0)),
+        func.sum(case((IndexCheckRecord.company_found == True, 1), else_=0)),
+        func.sum(case((or_(
+            IndexCheckRecord.answer_hash.isnot(None),
+            func.trim(func.coalesce(IndexCheckRecord.answer, literal(""))) != ""
+        ), 1), else_=0))
+    ).where(
+        IndexCheckRecord.check_time.isnot(None)
+    ).group_by(IndexCheckRecord.keyword_id, IndexCheckRecord.platform, day)
+    if start_date:
+        select_stmt = select_stmt.where(IndexCheckRecord.check_time >= datetime.combine(start_date, datetime.min.time()))
+    if end_date:
+        select_stmt = select_stmt.where(IndexCheckRecord.check_time < datetime.combine(end_date + timedelta(days=1), datetime.min.time()))
+
+    insert_stmt = IndexCheckDaily.__table__.insert().from_select(
+        ["keyword_id", "platform", "date", "checks", "keyword_hits", "company_hits", "answered"],
+        select_stmt
+    )
+    inserted = conn.execute(insert_stmt).rowcount
+    logger.info(f"日汇总重建完成: 范围={start_date or '最早'} ~ {end_date or '最新'}, 删除 {deleted} 行, 写入 {inserted} 行")
+    return deleted, inserted
@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+"""
+收录检测耗时统计
+按平台、按天统计检测延迟的百分位数，看哪个平台变慢了、慢在导航还是等回答！
+"""
+
+import math
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from backend.database.models import IndexCheckTiming
+
+
+# 统计的百分位
+LATENCY_PERCENTILES = (50, 90, 95)
+
+# 按阶段统计的耗时列
+PHASES = ("total", "navigate", "submit", "wait", "extract")
+
+
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    """最近秩法求百分位数（values 为空时返回 None）"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def summarize_latency(samples: Dict[str, List[int]], retries: List[int]) -> Dict[str, Any]:
+    """
+    汇总一组检测的耗时
+
+    Args:
+        samples: 各阶段的耗时列表（毫秒），键为 PHASES
+        retries: 每次检测的重试次数
+
+    Returns:
+        {"count", "<阶段>": {"p50", "p90", "p95", "max"}, "avg_retries", "retry_rate"}
+    """
+    count = len(retries)
+    result: Dict[str, Any] = {"count": count}
+    for phase in PHASES:
+        values = samples.get(phase) or []
+        stats = {f"p{pct}": percentile(values, pct) for pct in LATENCY_PERCENTILES}
+        stats["max"] = max(values) if values else None
+        result[phase] = stats
+    result["avg_retries"] = round(sum(retries) / count, 2) if count else 0.0
+    result["retry_rate"] = round(sum(1 for r in retries if r) / count, 4) if count else 0.0
+    return result
+
+
+class CheckTimingService:
+    """
+    检测耗时统计服务
+
+    注意：
+    - 只扫 index_check_timings 窄表（按 平台+检测时间 建了索引），不读回答全文
+    - 缓存命中的检测没有耗时记录，不参与统计
+    """
+
+    def __init__(self, db: Session):
+        """
+        初始化耗时统计服务
+
+        Args:
+            db: 数据库会话
+        """
+        self.db = db
+
+    def get_platform_latency(
+        self,
+        days: int = 7,
+        platform: Optional[str] = None,
+        end_date: Optional[datetime] = None
+    ) -> Dict[str, Any]:
+        """
+        按平台、按天统计检测延迟
+
+        Args:
+            days: 统计天数
+            platform: 平台筛选
+            end_date: 统计截止时间，默认现在
+
+        Returns:
+            {"platforms": {平台: 汇总}, "daily": [{"date", "platform", ...汇总}]}
+        """
+        end_date = end_date or datetime.now()
+        start_date = end_date - timedelta(days=days)
+
+        query = self.db.query(
+            IndexCheckTiming.platform,
+            func.date(IndexCheckTiming.check_time),
+            IndexCheckTiming.total_ms,
+            IndexCheckTiming.navigate_ms,
+            IndexCheckTiming.submit_ms,
+            IndexCheckTiming.wait_ms,
+            IndexCheckTiming.extract_ms,
+            IndexCheckTiming.retries
+        ).filter(
+            IndexCheckTiming.check_time >= start_date,
+            IndexCheckTiming.check_time <= end_date
+        )
+        if platform:
+            query = query.filter(IndexCheckTiming.platform == platform)
+
+        daily: Dict[tuple, Dict[str, List[int]]] = defaultdict(lambda: defaultdict(list))
+        overall: Dict[str, Dict[str, List[int]]] = defaultdict(lambda: defaultdict(list))
+        for row in query.yield_per(5000):
+            row_platform, day, retries = row[0], str(row[1]), row[7] or 0
+            for bucket in (daily[(day, row_platform)], overall[row_platform]):
+                for phase, value in zip(PHASES, row[2:7]):
+                    if value is not None:
+                        bucket[phase].append(value)
+                bucket["retries"].append(retries)
+
+        return {
+            "platforms": {
+                name: summarize_latency(samples, samples["retries"])
+                for name, samples in sorted(overall.items())
+            },
+            "daily": [
+                {"date": day, "platform": name, **summarize_latency(samples, samples["retries"])}
+                for (day, name), samples in sorted(daily.items())
+            ]
+        }
@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+"""
+AI回答引用提取
+从回答文本和页面上的引用链接里抽出被引用的 URL 和域名，落到子表里按索引查询！
+"""
+
+import re
+from typing import Any, Dict, List, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+
+# 文本中的 URL：遇到空白、引号、中文标点和右括号就结束
+_URL_PATTERN = re.compile(r"https?://[^\s<>\"'`，。；：！？、（）【】《》「」)\]]+", re.IGNORECASE)
+# Markdown 链接：[标题](URL)
+_MARKDOWN_LINK_PATTERN = re.compile(r"\[([^\]\n]{1,200})\]\((https?://[^\s)]+)\)", re.IGNORECASE)
+# 没写协议的 www. 域名
+_BARE_HOST_PATTERN = re.compile(r"(?<![A-Za-z0-9_./])www\.[a-z0-9-]+(?:\.[a-z0-9-]+)+(?:/[^\s<>\"'`，。；：！？、（）【】《》「」)\]]*)?", re.IGNORECASE)
+# URL 结尾常被带上的英文标点
+_TRAILING_PUNCTUATION = ".,;:!?*_~"
+
+# 不影响内容的跟踪参数，归一化时去掉
+_TRACKING_PARAMS = {"spm", "from", "source", "share_token", "share_source", "utm_source", "utm_medium",
+                    "utm_campaign", "utm_term", "utm_content", "fbclid", "gclid"}
+
+# 单条回答最多保存的引用数
+MAX_CITATIONS = 50
+
+
+def normalize_url(url: str) -> Optional[str]:
+    """
+    URL 归一化：小写协议和域名、去掉 www. 前缀、片段和跟踪参数、末尾斜杠
+
+    GeoArticle.platform_url 和引用 URL 都按这个规则归一化后再比对
+
+    Args:
+        url: 原始 URL
+
+    Returns:
+        归一化后的 URL，无法解析时返回 None
+    """
+    if not url:
+        return None
+    url = url.strip().rstrip(_TRAILING_PUNCTUATION)
+    if url.lower().startswith("www."):
+        url = "https://" + url
+    try:
+        parts = urlsplit(url)
+    except ValueError:
+        return None
+    if parts.scheme.lower() not in ("http", "https") or not parts.hostname:
+        return None
+
+    host = parts.hostname.lower()
+    if host.startswith("www."):
+        host = host[4:]
+    netloc = host if parts.port in (None, 80, 443) else f"{host}:{parts.port}"
+    query = urlencode([(k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+                       if k.lower() not in _TRACKING_PARAMS and not k.lower().startswith("utm_")])
+    path = parts.path.rstrip("/")
+    return urlunsplit(("https", netloc, path, query, ""))
+
+
+def url_domain(url: str) -> str:
+    """归一化 URL 的域名部分"""
+    return (urlsplit(url).hostname or "").lower()
+
+
+def extract_citations(
+    text: Optional[str],
+    links: Optional[List[Dict[str, Any]]] = None,
+    exclude_domains: Optional[List[str]] = None
+) -> List[Dict[str, Any]]:
+    """
+    提取回答中的引用
+
+    Args:
+        text: 回答文本
+        links: 页面引用区域里抓到的链接 [{"url", "title"}]，优先于文本中的 URL
+        exclude_domains: 排除的域名（如平台自身域名，含子域名）
+
+    Returns:
+        去重后的引用列表 [{"url", "domain", "title", "position"}]，按出现顺序
+    """
+    candidates: List[tuple] = []
+    for link in links or []:
+        candidates.append((link.get("url"), link.get("title")))
+    if text:
+        for match in _MARKDOWN_LINK_PATTERN.finditer(text):
+            candidates.append((match.group(2), match.group(1).strip()))
+        for match in _URL_PATTERN.finditer(text):
+            candidates.append((match.group(0), None))
+        for match in _BARE_HOST_PATTERN.finditer(text):
+            candidates.append((match.group(0), None))
+
+    excluded = tuple(d.lower().lstrip(".") for d in (exclude_domains or []))
+    citations: List[Dict[str, Any]] = []
+    seen: Dict[str, Dict[str, Any]] = {}
+    for raw_url, title in candidates:
+        url = normalize_url(raw_url or "")
+        if not url:
+            continue
+        if url in seen:
+            if title and not seen[url]["title"]:
+                seen[url]["title"] = title[:500]
+            continue
+        domain = url_domain(url)
+        if any(domain == d or domain.endswith("." + d) for d in excluded):
+            continue
+        citation = {
+            "url": url[:1000],
+            "domain": domain[:255],
+            "title": title[:500] if title else None,
+            "position": len(citations)
+        }
+        seen[url] = citation
+        citations.append(citation)
+        if len(citations) >= MAX_CITATIONS:
+            break
+    return citations
@@ -0,0 +1,270 @@
+# -*- coding: utf-8 -*-
+"""
+收录引用服务
+历史回答的引用回填，以及"哪些域名/哪些已发布文章被AI引用了"的索引查询！
+"""
+
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from loguru import logger
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from backend.database import bulk_insert
+from backend.database.models import IndexCheckRecord, IndexCheckCitation, Keyword, GeoArticle
+from backend.services.answer_store import resolve_answers
+from backend.services.check_archive import CheckArchiveService, archived_citations, archived_records
+from backend.services.citation_extractor import extract_citations, normalize_url
+from backend.services.playwright.ai_platforms import DoubaoChecker, QianwenChecker, DeepSeekChecker
+
+
+# 各平台自身域名（与检测器保持一致），回填时不算作引用
+PLATFORM_OWN_DOMAINS = {
+    "doubao": DoubaoChecker.OWN_DOMAINS,
+    "qianwen": QianwenChecker.OWN_DOMAINS,
+    "deepseek": DeepSeekChecker.OWN_DOMAINS,
+}
+
+# IN 查询每批的 URL 数量（SQLite 变量数上限）
+URL_BATCH_SIZE = 500
+
+
+class CitationService:
+    """
+    收录引用服务
+
+    注意：
+    - 引用在检测时随记录一起写入 index_check_citations，这里只负责历史数据回填和查询
+    - 所有 URL 都按 normalize_url 归一化，文章地址和引用地址直接等值匹配，走 url 索引
+    """
+
+    def __init__(self, db: Session):
+        """
+        初始化引用服务
+
+        Args:
+            db: 数据库会话
+        """
+        self.db = db
+
+    # ==================== 回填 ====================
+
+    def _iter_chunks(self, project_id: Optional[int], chunk_size: int):
+        """按主键游标分块读取还没有引用的记录"""
+        last_id = 0
+        has_citation = self.db.query(IndexCheckCitation.id).filter(
+            IndexCheckCitation.record_id == IndexCheckRecord.id
+        ).exists()
+        while True:
+            query = self.db.query(
+                IndexCheckRecord.id,
+                IndexCheckRecord.platform,
+                IndexCheckRecord.answer,
+                IndexCheckRecord.answer_hash
+            ).filter(IndexCheckRecord.id > last_id, ~has_citation)
+
+            if project_id:
+                query = query.join(Keyword, Keyword.id == IndexCheckRecord.keyword_id).filter(Keyword.project_id == project_id)
+
+            rows = query.order_by(IndexCheckRecord.id).limit(chunk_size).all()
+            if not rows:
+                break
+            last_id = rows[-1][0]
+            answers = resolve_answers(self.db, [(row[2], row[3]) for row in rows])
+            yield [(row[0], row[1], answer) for row, answer in zip(rows, answers)]
+
+    def backfill(self, project_id: Optional[int] = None, chunk_size: int = 2000) -> Dict[str, Any]:
+        """
+        从历史回答文本中提取引用并写入引用表
+
+        已有引用的记录会跳过，可以反复执行（中断后再跑会接着处理剩下的）
+
+        Args:
+            project_id: 只回填某个项目，默认全部
+            chunk_size: 每块读取的记录数
+
+        Returns:
+            回填统计信息
+        """
+        start_time = time.time()
+        scanned = 0
+        inserted = 0
+
+        logger.info(f"开始回填收录引用: 项目={project_id or '全部'}, 分块={chunk_size}")
+
+        for rows in self._iter_chunks(project_id, chunk_size):
+            scanned += len(rows)
+            mappings = [
+                {**citation, "record_id": record_id}
+                for record_id, platform, answer in rows
+                for citation in extract_citations(answer, exclude_domains=PLATFORM_OWN_DOMAINS.get(platform))
+            ]
+            if not mappings:
+                continue
+            try:
+                bulk_insert(self.db, IndexCheckCitation, mappings)
+                self.db.commit()
+            except Exception as e:
+                logger.error(f"批量写入引用失败: {e}")
+                self.db.rollback()
+                raise
+            inserted += len(mappings)
+
+        elapsed = round(time.time() - start_time, 2)
+        logger.info(f"收录引用回填完成: 扫描 {scanned} 条记录, 写入 {inserted} 条引用, 耗时 {elapsed}s")
+        return {"scanned": scanned, "inserted": inserted, "elapsed": elapsed}
+
+    # ==================== 查询 ====================
+
+    def _filtered(self, query, project_id: Optional[int], platform: Optional[str],
+                  start_date: Optional[datetime], end_date: Optional[datetime]):
+        """给已 join 检测记录的查询加上项目/平台/时间筛选"""
+        if project_id:
+            query = query.join(Keyword, Keyword.id == IndexCheckRecord.keyword_id).filter(Keyword.project_id == project_id)
+        if platform:
+            query = query.filter(IndexCheckRecord.platform == platform)
+        if start_date:
+            query = query.filter(IndexCheckRecord.check_time >= start_date)
+        if end_date:
+            query = query.filter(IndexCheckRecord.check_time <= end_date)
+        return query
+
+    def get_top_domains(
+        self,
+        project_id: Optional[int] = None,
+        platform: Optional[str] = None,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        limit: int = 20
+    ) -> List[Dict[str, Any]]:
+        """
+        被引用最多的域名
+
+        Returns:
+            [{"domain", "citations", "records"}]，按引用次数倒序
+        """
+        query = self.db.query(
+            IndexCheckCitation.domain,
+            func.count(IndexCheckCitation.id),
+            func.count(func.distinct(IndexCheckCitation.record_id))
+        ).join(IndexCheckRecord, IndexCheckRecord.id == IndexCheckCitation.record_id)
+        query = self._filtered(query, project_id, platform, start_date, end_date)
+        query = query.group_by(IndexCheckCitation.domain).order_by(func.count(IndexCheckCitation.id).desc())
+
+        archive_service = CheckArchiveService(self.db)
+        if not archive_service.covering(start_date, end_date):
+            rows = query.limit(limit).all()
+            return [{"domain": domain, "citations": citations, "records": records} for domain, citations, records in rows]
+
+        # 时间范围用到已归档月份：热表和各归档文件分别按域名聚合再合并（记录不跨文件，记录数可以直接相加）
+        conditions = CheckArchiveService.record_conditions(
+            project_id=project_id, platform=platform, start_date=start_date, end_date=end_date
+        )
+        merged: Dict[str, List[int]] = {}
+        archive_rows = archive_service.query_archives(
+            lambda: select(
+                archived_citations.c.domain,
+                func.count(archived_citations.c.id),
+                func.count(func.distinct(archived_citations.c.record_id))
+            ).join(archived_records, archived_records.c.id == archived_citations.c.record_id).where(
+                *conditions
+            ).group_by(archived_citations.c.domain),
+            start_date,
+            end_date
+        )
+        for domain, citations, records in list(query.all()) + list(archive_rows):
+            item = merged.setdefault(domain, [0, 0])
+            item[0] += citations
+            item[1] += records
+        top = sorted(merged.items(), key=lambda x: x[1][0], reverse=True)[:limit]
+        return [{"domain": domain, "citations": citations, "records": records} for domain, (citations, records) in top]
+
+    def get_cited_articles(
+        self,
+        project_id: Optional[int] = None,
+        platform: Optional[str] = None,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        已发布文章被AI引用的情况（按归一化 URL 等值匹配，走 url 索引）
+
+        Returns:
+            [{"article_id", "title", "platform_url", "citations", "platforms", "last_cited"}]，按引用次数倒序
+        """
+        article_query = self.db.query(GeoArticle.id, GeoArticle.title, GeoArticle.platform_url).filter(
+            GeoArticle.platform_url.isnot(None),
+            GeoArticle.platform_url != ""
+        )
+        if project_id:
+            article_query = article_query.filter(GeoArticle.project_id == project_id)
+
+        articles_by_url: Dict[str, List[tuple]] = {}
+        for article_id, title, platform_url in article_query.all():
+            url = normalize_url(platform_url)
+            if url:
+                articles_by_url.setdefault(url, []).append((article_id, title, platform_url))
+        if not articles_by_url:
+            return []
+
+        stats: Dict[str, Dict[str, Any]] = {}
+
+        def add(url: str, record_platform: str, count: int, last_cited: Optional[datetime]):
+            item = stats.setdefault(url, {"citations": 0, "platforms": {}, "last_cited": None})
+            item["citations"] += count
+            item["platforms"][record_platform] = item["platforms"].get(record_platform, 0) + count
+            if last_cited and (item["last_cited"] is None or last_cited > item["last_cited"]):
+                item["last_cited"] = last_cited
+
+        # 时间范围用到已归档月份时，归档文件里的引用一起统计
+        archive_service = CheckArchiveService(self.db)
+        has_archives = bool(archive_service.covering(start_date, end_date))
+        conditions = CheckArchiveService.record_conditions(platform=platform, start_date=start_date, end_date=end_date)
+
+        urls = list(articles_by_url)
+        for start in range(0, len(urls), URL_BATCH_SIZE):
+            query = self.db.query(
+                IndexCheckCitation.url,
+                IndexCheckRecord.platform,
+                func.count(IndexCheckCitation.id),
+                func.max(IndexCheckRecord.check_time)
+            ).join(IndexCheckRecord, IndexCheckRecord.id == IndexCheckCitation.record_id).filter(
+                IndexCheckCitation.url.in_(urls[start:start + URL_BATCH_SIZE])
+            )
+            query = self._filtered(query, None, platform, start_date, end_date)
+
+            for row in query.group_by(IndexCheckCitation.url, IndexCheckRecord.platform).all():
+                add(*row)
+
+            if has_archives:
+                batch = urls[start:start + URL_BATCH_SIZE]
+                archive_rows = archive_service.query_archives(
+                    lambda: select(
+                        archived_citations.c.url,
+                        archived_records.c.platform,
+                        func.count(archived_citations.c.id),
+                        func.max(archived_records.c.check_time)
+                    ).join(archived_records, archived_records.c.id == archived_citations.c.record_id).where(
+                        archived_citations.c.url.in_(batch), *conditions
+                    ).group_by(archived_citations.c.url, archived_records.c.platform),
+                    start_date,
+                    end_date
+                )
+                for row in archive_rows:
+                    add(*row)
+
+        result = []
+        for url, item in stats.items():
+            for article_id, title, platform_url in articles_by_url[url]:
+                result.append({
+                    "article_id": article_id,
+                    "title": title,
+                    "platform_url": platform_url,
+                    "citations": item["citations"],
+                    "platforms": item["platforms"],
+                    "last_cited": item["last_cited"].isoformat() if item["last_cited"] else None
+                })
+        result.sort(key=lambda x: x["citations"], reverse=True)
+        return result
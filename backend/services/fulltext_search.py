@@ -0,0 +1,253 @@
+# -*- coding: utf-8 -*-
+"""
+全文搜索
+知识库条目、参考文章走 FTS5 trigram 索引（见 database/fulltext.py），按 bm25 相关度排序并带高亮摘要；
+trigram 至少要 3 个字才能匹配，更短的词退回 LIKE 条件，库不支持 FTS5 时整体退回 LIKE
+"""
+
+from dataclasses import dataclass
+from typing import Any, Callable, List, Optional, Tuple
+
+from sqlalchemy import column, func, literal_column, or_, table, text
+from sqlalchemy.orm import Session
+
+from backend.database.models import Knowledge, ReferenceArticle
+from backend.services.pagination import after_cursor, count_cache, decode_cursor
+
+# trigram 分词能匹配的最短词长
+MIN_TERM_LENGTH = 3
+# 摘要长度（trigram 下一个 token 约等于一个字）
+SNIPPET_TOKENS = 48
+HIGHLIGHT_OPEN = "<mark>"
+HIGHLIGHT_CLOSE = "</mark>"
+
+
+@dataclass
+class SearchHit:
+    """一条搜索结果：ORM 对象、相关度（bm25，越小越相关，LIKE 结果为 None）、高亮摘要"""
+    item: Any
+    score: Optional[float] = None
+    snippet: Optional[str] = None
+
+
+def split_terms(query: Optional[str]) -> Tuple[List[str], List[str]]:
+    """按空白切词，返回 (能走全文索引的词, 太短只能走 LIKE 的词)"""
+    terms = list(dict.fromkeys((query or "").split()))
+    return [t for t in terms if len(t) >= MIN_TERM_LENGTH], [t for t in terms if len(t) < MIN_TERM_LENGTH]
+
+
+def phrase(term: str) -> str:
+    """FTS5 短语（双引号转义，避免用户输入被当成查询语法）"""
+    return '"' + term.replace('"', '""') + '"'
+
+
+def make_snippet(content: Optional[str], terms: List[str], width: int = SNIPPET_TOKENS) -> Optional[str]:
+    """LIKE 结果的摘要：截取第一个命中词附近的文字并高亮"""
+    if not content:
+        return None
+    positions = [(content.find(t), t) for t in terms if t and content.find(t) >= 0]
+    if not positions:
+        return content[:width] + ("…" if len(content) > width else "")
+    pos, term = min(positions)
+    start = max(0, pos - width // 3)
+    end = min(len(content), start + width)
+    piece = content[start:end].replace(term, f"{HIGHLIGHT_OPEN}{term}{HIGHLIGHT_CLOSE}")
+    return ("…" if start > 0 else "") + piece + ("…" if end < len(content) else "")
+
+
+class FulltextSearchService:
+    """
+    全文搜索服务
+
+    注意：
+    - 多个词之间是 AND 关系
+    - 原表的增删改由触发器同步到 FTS 表，不需要在服务层维护索引
+    """
+
+    def __init__(self, db: Session):
+        """
+        初始化全文搜索服务
+
+        Args:
+            db: 数据库会话
+        """
+        self.db = db
+
+    def fts_available(self, fts_name: str) -> bool:
+        """FTS 表是否存在（SQLite 不支持 trigram 或非 SQLite 库时没有）"""
+        if self.db.get_bind().dialect.name != "sqlite":
+            return False
+        return self.db.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"), {"name": fts_name}
+        ).first() is not None
+
+    def _search(
+        self,
+        model,
+        fts_name: str,
+        like_columns: list,
+        snippet_column: int,
+        weights: Tuple[float, ...],
+        match_parts: List[str],
+        short_terms: List[str],
+        highlight_terms: List[str],
+        conditions: list,
+        default_order: list,
+        offset: int,
+        limit: Optional[int],
+        ranked: bool = True,
+        count: Optional[Callable[[Callable[[], int]], Optional[int]]] = None,
+        page_conditions: Optional[list] = None
+    ) -> Tuple[List[SearchHit], Optional[int]]:
+        """
+        全文索引 + LIKE 的组合查询，返回 (结果, 总数)
+
+        ranked 为 False 时（只用列过滤、没有全文搜索词）按 default_order 排序、不出摘要；
+        count 用来包一层总数统计（如走缓存），不传时精确 COUNT；
+        page_conditions 只限定这一页取哪些（游标条件），不算进总数
+        """
+        like_conditions = [or_(*[col.contains(term) for col in like_columns]) for term in short_terms]
+        query = self.db.query(model)
+        if match_parts:
+            fts = table(fts_name, column("rowid"))
+            query = query.join(fts, fts.c.rowid == model.id).filter(
+                literal_column(fts_name).op("MATCH")(" AND ".join(match_parts))
+            )
+        query = query.filter(*conditions, *like_conditions)
+        total = count(query.count) if count else query.count()
+        if page_conditions:
+            query = query.filter(*page_conditions)
+
+        if match_parts and ranked:
+            fts_ref = literal_column(fts_name)
+            rank = func.bm25(fts_ref, *weights)
+            snippet = func.snippet(fts_ref, snippet_column, HIGHLIGHT_OPEN, HIGHLIGHT_CLOSE, "…", SNIPPET_TOKENS)
+            rows = query.add_columns(rank.label("score"), snippet.label("snippet")).order_by(
+                rank
+            ).offset(offset).limit(limit).all()
+            return [SearchHit(item, score, snip) for item, score, snip in rows], total
+
+        items = query.order_by(*default_order).offset(offset).limit(limit).all()
+        return [
+            SearchHit(item, None, make_snippet(item.content, highlight_terms) if highlight_terms else None)
+            for item in items
+        ], total
+
+    def search_knowledge(
+        self,
+        query: str,
+        category_id: Optional[int] = None,
+        offset: int = 0,
+        limit: Optional[int] = 50
+    ) -> Tuple[List[SearchHit], int]:
+        """
+        搜索启用中的知识条目（标题 + 内容，标题权重更高）
+
+        Args:
+            query: 搜索词，空格分隔多个词
+            category_id: 分类筛选
+            offset: 跳过条数
+            limit: 返回条数（None 不限）
+
+        Returns:
+            (结果列表, 总数)
+        """
+        long_terms, short_terms = split_terms(query)
+        if not self.fts_available("knowledge_items_fts"):
+            long_terms, short_terms = [], long_terms + short_terms
+
+        conditions = [Knowledge.status == 1]
+        if category_id:
+            conditions.append(Knowledge.category_id == category_id)
+
+        return self._search(
+            Knowledge, "knowledge_items_fts",
+            like_columns=[Knowledge.title, Knowledge.content],
+            snippet_column=1,
+            weights=(10.0, 1.0),
+            match_parts=[phrase(t) for t in long_terms],
+            short_terms=short_terms,
+            highlight_terms=long_terms + short_terms,
+            conditions=conditions,
+            default_order=[Knowledge.updated_at.desc()],
+            offset=offset,
+            limit=limit
+        )
+
+    def search_reference_articles(
+        self,
+        query: Optional[str] = None,
+        keyword: Optional[str] = None,
+        platform: Optional[str] = None,
+        offset: int = 0,
+        limit: int = 20,
+        cursor: Optional[str] = None,
+        with_total: bool = True
+    ) -> Tuple[List[SearchHit], Optional[int]]:
+        """
+        搜索参考文章
+
+        Args:
+            query: 全文搜索词（标题/摘要/正文/采集关键词），空格分隔多个词
+            keyword: 采集关键词包含（整体匹配，不切词）
+            platform: 来源平台筛选
+            offset: 跳过条数
+            limit: 返回条数
+            cursor: 游标分页（按采集时间排序时可用），给了就忽略 offset
+            with_total: 是否返回总数，不需要时返回 None
+
+        Returns:
+            (结果列表, 总数)；有 query 时按相关度排序，没有时按 (采集时间, ID) 倒序，总数按筛选条件短期缓存
+
+        Raises:
+            ValueError: 游标格式不对，或按相关度排序时传了游标
+        """
+        use_fts = self.fts_available("reference_articles_fts")
+        long_terms, short_terms = split_terms(query)
+        if not use_fts:
+            long_terms, short_terms = [], long_terms + short_terms
+
+        conditions = [ReferenceArticle.status == 1]
+        if platform:
+            conditions.append(ReferenceArticle.platform == platform)
+
+        match_parts = [phrase(t) for t in long_terms]
+        if keyword and use_fts and len(keyword) >= MIN_TERM_LENGTH:
+            match_parts.append(f"keyword : {phrase(keyword)}")
+        elif keyword:
+            conditions.append(ReferenceArticle.keyword.contains(keyword))
+
+        ranked = bool(long_terms)
+        page_conditions = []
+        if cursor:
+            if ranked:
+                raise ValueError("按相关度排序的搜索结果不支持游标分页")
+            dialect = self.db.get_bind().dialect.name
+            page_conditions.append(
+                after_cursor(ReferenceArticle.collected_at, ReferenceArticle.id, decode_cursor(cursor), dialect)
+            )
+            offset = 0
+
+        filters = tuple(sorted({"query": query, "keyword": keyword, "platform": platform}.items()))
+
+        def count(exact: Callable[[], int]) -> Optional[int]:
+            if not with_total:
+                return None
+            return count_cache.get_or_count("reference_articles", filters, exact)
+
+        return self._search(
+            ReferenceArticle, "reference_articles_fts",
+            like_columns=[ReferenceArticle.title, ReferenceArticle.summary, ReferenceArticle.content],
+            snippet_column=2,
+            weights=(10.0, 3.0, 1.0, 5.0),
+            match_parts=match_parts,
+            short_terms=short_terms,
+            highlight_terms=long_terms + short_terms,
+            conditions=conditions,
+            default_order=[ReferenceArticle.collected_at.desc(), ReferenceArticle.id.desc()],
+            offset=offset,
+            limit=limit,
+            ranked=ranked,
+            count=count,
+            page_conditions=page_conditions
+        )
@@ -0,0 +1,252 @@
+# -*- coding: utf-8 -*-
+"""
+命中匹配器
+Aho-Corasick 多模式匹配，一遍扫描统计关键词、公司名及其别名的命中情况！
+"""
+
+import re
+from collections import deque
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# 公司名标签，关键词标签为 "keyword:<关键词>"
+COMPANY_LABEL = "company"
+KEYWORD_LABEL_PREFIX = "keyword:"
+
+_NON_WORD_RE = re.compile(r'[^\w\s\u4e00-\u9fa5]')
+_SPACE_RE = re.compile(r'\s+')
+_ASCII_WORD_RE = re.compile(r'^[0-9a-z_ ]+$')
+
+
+def normalize_text(s: str) -> str:
+    """
+    统一清理逻辑：替换非字字符为空格，合并空格，转小写
+    （与原 check_keywords_in_text 的清理规则保持一致）
+    """
+    s = _NON_WORD_RE.sub(' ', s or "")
+    s = _SPACE_RE.sub(' ', s).strip()
+    return s.lower()
+
+
+def keyword_label(keyword: str) -> str:
+    return f"{KEYWORD_LABEL_PREFIX}{keyword}"
+
+
+class HitMatcher:
+    """
+    多模式命中匹配器（Aho-Corasick 自动机）
+
+    注意：
+    - 构建一次，可对任意多条回答重复使用（项目级缓存见 get_project_matcher）
+    - 纯英文/数字的模式（如英文名、缩写）要求两侧不是字母数字，避免 "GE" 命中 "geo"
+    - 只包含基础类型，可以直接传给进程池
+    """
+
+    def __init__(self, patterns: Dict[str, Iterable[str]]):
+        """
+        构建自动机
+
+        Args:
+            patterns: 标签 -> 该标签下的所有写法（原词 + 别名）
+        """
+        # 每个节点：goto 表、fail 指针、输出的模式下标
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[List[int]] = [[]]
+
+        self.patterns: List[str] = []        # 规范化后的模式
+        self.raw_patterns: List[str] = []    # 原始写法
+        self.pattern_labels: List[str] = []  # 模式所属标签
+        self._ascii_word: List[bool] = []
+        self.labels: List[str] = list(patterns.keys())
+
+        seen = set()
+        for label, terms in patterns.items():
+            for term in terms:
+                normalized = normalize_text(term)
+                if not normalized or (label, normalized) in seen:
+                    continue
+                seen.add((label, normalized))
+                self._add_pattern(normalized, term, label)
+
+        self._build_fail_links()
+
+    def _add_pattern(self, normalized: str, raw: str, label: str):
+        node = 0
+        for ch in normalized:
+            nxt = self._goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+            node = nxt
+        index = len(self.patterns)
+        self._output[node].append(index)
+        self.patterns.append(normalized)
+        self.raw_patterns.append(raw)
+        self.pattern_labels.append(label)
+        self._ascii_word.append(bool(_ASCII_WORD_RE.match(normalized)))
+
+    def _build_fail_links(self):
+        queue = deque()
+        for nxt in self._goto[0].values():
+            self._fail[nxt] = 0
+            queue.append(nxt)
+
+        while queue:
+            node = queue.popleft()
+            for ch, nxt in self._goto[node].items():
+                queue.append(nxt)
+                fail = self._fail[node]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[nxt] = self._goto[fail].get(ch, 0)
+                self._output[nxt] = self._output[nxt] + self._output[self._fail[nxt]]
+
+    @staticmethod
+    def _is_ascii_alnum(ch: str) -> bool:
+        return ch.isascii() and ch.isalnum()
+
+    def scan(self, text: str, normalized: bool = False) -> List[Tuple[int, int]]:
+        """
+        一遍扫描，返回所有命中
+
+        Args:
+            text: 待检测文本
+            normalized: 文本是否已经规范化
+
+        Returns:
+            [(模式下标, 起始位置)]，位置基于规范化后的文本
+        """
+        if not normalized:
+            text = normalize_text(text)
+
+        hits = []
+        node = 0
+        goto = self._goto
+        fail = self._fail
+        for i, ch in enumerate(text):
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            for index in self._output[node]:
+                start = i - len(self.patterns[index]) + 1
+                if self._ascii_word[index]:
+                    if start > 0 and self._is_ascii_alnum(text[start - 1]):
+                        continue
+                    if i + 1 < len(text) and self._is_ascii_alnum(text[i + 1]):
+                        continue
+                hits.append((index, start))
+        return hits
+
+    def match(self, text: str) -> Dict[str, Dict[str, Any]]:
+        """
+        统计每个标签的命中次数和位置
+
+        Returns:
+            {标签: {"count": int, "positions": [int], "patterns": {原始写法: 次数}}}
+        """
+        result = {label: {"count": 0, "positions": [], "patterns": {}} for label in self.labels}
+        for index, start in self.scan(text):
+            entry = result[self.pattern_labels[index]]
+            entry["count"] += 1
+            entry["positions"].append(start)
+            raw = self.raw_patterns[index]
+            entry["patterns"][raw] = entry["patterns"].get(raw, 0) + 1
+        for entry in result.values():
+            entry["positions"].sort()
+        return result
+
+    def evaluate(self, text: str, keyword: str, company: str = "") -> Dict[str, Any]:
+        """
+        按原 check_keywords_in_text 的结果格式评估一条回答
+
+        Args:
+            text: 回答文本
+            keyword: 目标关键词（必须已在自动机中）
+            company: 公司名称（仅用于生成说明文字）
+
+        Returns:
+            检测结果详细信息
+        """
+        hits = self.match(text)
+        keyword_hit = hits.get(keyword_label(keyword), {"count": 0, "positions": [], "patterns": {}})
+        company_hit = hits.get(COMPANY_LABEL, {"count": 0, "positions": [], "patterns": {}})
+        keyword_count = keyword_hit["count"]
+        company_count = company_hit["count"]
+
+        result = {
+            "keyword_found": keyword_count > 0,
+            "keyword_count": keyword_count,
+            "keyword_positions": keyword_hit["positions"][:5],
+            "company_found": company_count > 0,
+            "company_count": company_count,
+            "company_patterns": company_hit["patterns"],
+            "hits": {label: entry["count"] for label, entry in hits.items() if entry["count"]},
+            "confidence": 0.0,
+            "reason": ""
+        }
+
+        if keyword_count > 0:
+            result["confidence"] = min(0.5 + keyword_count * 0.1, 0.9)
+            result["reason"] = f"关键词'{keyword}'出现{keyword_count}次"
+
+        if company_count > 0:
+            result["confidence"] = min(result["confidence"] + 0.2, 0.95)
+            names = "/".join(company_hit["patterns"].keys()) or company
+            result["reason"] += f", 公司名'{names}'出现{company_count}次"
+
+        if len(text) < 100 and keyword_count > 0:
+            result["confidence"] = min(result["confidence"] + 0.1, 0.85)
+
+        return result
+
+
+def build_patterns(
+    keywords: Iterable[str],
+    company: Optional[str],
+    aliases: Optional[Iterable[str]] = None
+) -> Dict[str, List[str]]:
+    """
+    组装匹配模式：每个关键词一个标签，公司名和别名共用 company 标签
+    """
+    patterns: Dict[str, List[str]] = {}
+    for keyword in keywords:
+        if keyword:
+            patterns[keyword_label(keyword)] = [keyword]
+    patterns[COMPANY_LABEL] = [name for name in [company, *(aliases or [])] if name]
+    return patterns
+
+
+@lru_cache(maxsize=128)
+def _cached_matcher(
+    keywords: Tuple[str, ...],
+    company: str,
+    aliases: Tuple[str, ...]
+) -> HitMatcher:
+    return HitMatcher(build_patterns(keywords, company, aliases))
+
+
+def get_project_matcher(
+    keywords: Iterable[str],
+    company: Optional[str],
+    aliases: Optional[Iterable[str]] = None
+) -> HitMatcher:
+    """
+    获取项目级匹配器（相同的关键词/公司名/别名组合只构建一次）
+
+    Args:
+        keywords: 项目下的关键词
+        company: 公司名称
+        aliases: 公司别名（英文名、简称等）
+
+    Returns:
+        HitMatcher
+    """
+    return _cached_matcher(
+        tuple(sorted(set(k for k in keywords if k))),
+        company or "",
+        tuple(sorted(set(a for a in (aliases or []) if a)))
+    )
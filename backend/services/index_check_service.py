@@ -6,17 +6,29 @@
 
 from typing import List, Dict, Any, Optional
 from loguru import logger
-from sqlalchemy.orm import Session
-from playwright.async_api import async_playwright, Browser
+from sqlalchemy.orm import Session, selectinload, undefer
+from playwright.async_api import Browser
 import asyncio
 import os
+import time
+from contextlib import nullcontext
 import sys
 import subprocess
 from datetime import datetime
 
-from backend.database.models import IndexCheckRecord, Keyword, QuestionVariant, Project
+from backend.database.models import IndexCheckRecord, IndexCheckCitation, IndexCheckTiming, IndexCheckDaily, Keyword, QuestionVariant, Project
 from backend.config import AI_PLATFORMS, BROWSER_ARGS, DEFAULT_USER_AGENT
 from backend.services.playwright.ai_platforms import DoubaoChecker, QianwenChecker, DeepSeekChecker
+from backend.services.playwright.browser_pool import BrowserPool, get_browser_profile
+from backend.services.playwright.check_executor import CheckExecutor
+from backend.services.playwright.platform_throttle import PlatformUnavailableError
+from backend.services.hit_matcher import HitMatcher, get_project_matcher
+from backend.services.result_sink import IndexResultSink
+from backend.services.answer_cache import answer_cache
+from backend.services.answer_store import split_answers, store_blobs
+from backend.services.check_archive import CheckArchiveService, archived_records
+from backend.services.check_rollup import DailyRollupService, apply_records, record_fields, start_day
+from backend.services.pagination import after_cursor, count_cache, decode_cursor
 
 
 class IndexCheckService:
@@ -26,14 +38,19 @@ class IndexCheckService:
     注意：这个服务负责AI平台收录检测！
     """
 
-    def __init__(self, db: Session):
+    def __init__(self, db: Session, browser_profile: Optional[str] = None):
         """
         初始化收录检测服务
 
         Args:
             db: 数据库会话
+            browser_profile: 浏览器模式（headed / headless），默认读取 INDEX_CHECK_BROWSER_PROFILE
+
+        Raises:
+            ValueError: 未知的浏览器模式
         """
         self.db = db
+        self.browser_profile = get_browser_profile(browser_profile)
         self.checkers = {
             "doubao": DoubaoChecker("doubao", AI_PLATFORMS["doubao"]),
             "qianwen": QianwenChecker("qianwen", AI_PLATFORMS["qianwen"]),
@@ -65,9 +82,9 @@ class IndexCheckService:
                 logger.info(f"✅ [IndexCheck] 找到本地 Chrome 浏览器: {path}")
                 break
         
-        # 准备启动参数
+        # 准备启动参数（有界面/无头由浏览器模式决定）
         launch_options = {
-            "headless": False,
+            "headless": self.browser_profile["headless"],
             "args": BROWSER_ARGS,
             "timeout": 30000
         }
@@ -76,7 +93,7 @@ class IndexCheckService:
             launch_options["executable_path"] = executable_path
         
         # 启动浏览器
-        logger.info(f"🚀 [IndexCheck] 启动浏览器... Executable: {executable_path}")
+        logger.info(f"🚀 [IndexCheck] 启动浏览器... 模式: {self.browser_profile['name']}, Executable: {executable_path}")
         
         browser = None
         try:
@@ -123,11 +140,49 @@ class IndexCheckService:
                 
         return browser
 
+    def create_browser_pool(self) -> BrowserPool:
+        """
+        创建收录检测浏览器池（复用统一的浏览器启动逻辑，按浏览器模式屏蔽资源）
+        """
+        return BrowserPool(
+            launcher=self._launch_browser,
+            block_resource_types=self.browser_profile["block_resource_types"],
+            block_domains=self.browser_profile["block_domains"]
+        )
+
+    def create_executor(self, pool: BrowserPool) -> CheckExecutor:
+        """
+        创建平台并行检测执行器（并发上限和提问节奏读取 INDEX_CHECK_PLATFORM_LIMITS）
+        """
+        return CheckExecutor(pool, page_close_delay=self.browser_profile["page_close_delay"])
+
+    def get_matcher(self, project: Optional[Project], company_name: str, extra_keywords: Optional[List[str]] = None) -> HitMatcher:
+        """
+        获取项目级命中匹配器（项目下全部关键词 + 公司名 + 公司别名，只构建一次）
+
+        Args:
+            project: 项目对象（为空时只用 extra_keywords 和公司名）
+            company_name: 公司名称
+            extra_keywords: 额外需要匹配的关键词
+
+        Returns:
+            HitMatcher
+        """
+        keywords = list(extra_keywords or [])
+        aliases = []
+        if project is not None:
+            keywords += [row[0] for row in self.db.query(Keyword.keyword).filter(Keyword.project_id == project.id).all()]
+            aliases = project.company_aliases or []
+        return get_project_matcher(keywords, company_name, aliases)
+
     async def check_keyword(
         self,
         keyword_id: int,
         company_name: str,
-        platforms: Optional[List[str]] = None
+        platforms: Optional[List[str]] = None,
+        pool: Optional[BrowserPool] = None,
+        sink: Optional[IndexResultSink] = None,
+        use_cache: bool = True
     ) -> List[Dict[str, Any]]:
         """
         检测关键词在所有AI平台的收录情况
@@ -136,6 +191,9 @@ class IndexCheckService:
             keyword_id: 关键词ID
             company_name: 公司名称
             platforms: 要检测的平台列表，默认全部
+            pool: 借用的浏览器池，为空时临时创建
+            sink: 借用的结果写入器，为空时临时创建
+            use_cache: 是否复用有效期内相同问题的回答
 
         Returns:
             检测结果列表
@@ -168,7 +226,11 @@ class IndexCheckService:
             keyword_obj=keyword_obj,
             questions=questions,
             company_name=company_name,
-            platforms=platforms
+            platforms=platforms,
+            pool=pool,
+            matcher=self.get_matcher(keyword_obj.project, company_name, [keyword_obj.keyword]),
+            sink=sink,
+            use_cache=use_cache
         )
 
         logger.info(f"收录检测完成: 关键词ID={keyword_id}, 检测数={len(results)}")
@@ -210,42 +272,40 @@ class IndexCheckService:
         if platforms is None:
             platforms = list(self.checkers.keys())
         
-        # 使用单个Playwright实例处理所有关键词，提高效率
-        async with async_playwright() as p:
-            # 使用统一的启动逻辑
-            browser = await self._launch_browser(p)
-            
-            try:
-                for keyword_obj in keywords:
-                    # 获取关键词的问题变体
-                    questions = self.db.query(QuestionVariant).filter(
-                        QuestionVariant.keyword_id == keyword_obj.id
-                    ).all()
-                    
-                    if not questions:
-                        # 如果没有问题变体，使用默认问题
-                        questions = [QuestionVariant(
-                            id=0,
-                            keyword_id=keyword_obj.id,
-                            question=f"什么是{keyword_obj.keyword}？推荐哪家公司？"
-                        )]
-                    
-                    # 执行检测
-                    results = await self._execute_checks(
+        # 整个项目共用一个命中匹配器
+        matcher = self.get_matcher(project, project.company_name)
+
+        # 整个批次共用一个浏览器池：只启动一次浏览器，每个平台一个常驻上下文
+        # 检测结果统一进写入器，批次结束（或中途异常）时一定会写完
+        async with self.create_browser_pool() as pool, IndexResultSink(self.db) as sink:
+            for keyword_obj in keywords:
+                # 获取关键词的问题变体
+                questions = self.db.query(QuestionVariant).filter(
+                    QuestionVariant.keyword_id == keyword_obj.id
+                ).all()
+                
+                if not questions:
+                    # 如果没有问题变体，使用默认问题
+                    questions = [QuestionVariant(
+                        id=0,
                         keyword_id=keyword_obj.id,
-                        keyword_obj=keyword_obj,
-                        questions=questions,
-                        company_name=project.company_name,
-                        platforms=platforms
-                    )
-                    
-                    all_results.extend(results)
-                    
-                    # 短暂休息，避免被平台检测为自动化
-                    await asyncio.sleep(2)
-                    
-            finally:
-                await browser.close()
+                        question=f"什么是{keyword_obj.keyword}？推荐哪家公司？"
+                    )]
+                
+                # 执行检测
+                results = await self._execute_checks(
+                    keyword_id=keyword_obj.id,
+                    keyword_obj=keyword_obj,
+                    questions=questions,
+                    company_name=project.company_name,
+                    platforms=platforms,
+                    pool=pool,
+                    matcher=matcher,
+                    sink=sink
+                )
+                
+                all_results.extend(results)
+                # 关键词之间不再固定休息，访问节奏由各平台限流器控制
         
         logger.info(f"项目关键词批量检测完成: 项目ID={project_id}, 关键词数={len(keywords)}, 检测数={len(all_results)}")
         return all_results
@@ -256,232 +316,280 @@ class IndexCheckService:
         keyword_obj: Keyword,
         questions: List[QuestionVariant],
         company_name: str,
-        platforms: List[str]
+        platforms: List[str],
+        pool: Optional[BrowserPool] = None,
+        matcher: Optional[HitMatcher] = None,
+        sink: Optional[IndexResultSink] = None,
+        use_cache: bool = True
     ) -> List[Dict[str, Any]]:
         """
         执行检测的通用方法
+
+        优先借用传入的浏览器池和结果写入器；没有传入时临时创建，检测结束后关闭
         """
-        results = []
-        
-        # 临时使用固定的用户ID和项目ID，实际应该从参数传递
-        user_id = 1
-        project_id = 1
-        
-        # 导入会话管理器
-        from backend.services.session_manager import secure_session_manager
-        # 导入UTC时间处理
-        from datetime import datetime, timezone
-        
-        async with async_playwright() as p:
-            # 使用统一的启动逻辑
-            browser = await self._launch_browser(p)
-            
-            try:
-                # 为每个平台创建一个新的上下文和页面
-                for platform_id in platforms:
-                    checker = self.checkers.get(platform_id)
-                    if not checker:
-                        logger.warning(f"未知的平台: {platform_id}")
-                        continue
-                    
-                    logger.info(f"开始检测平台: {checker.name}, 关键词: {keyword_obj.keyword}")
-                    
-                    # 加载平台的存储状态（授权状态）
-                    storage_state = await secure_session_manager.load_session(
-                        user_id=user_id,
-                        project_id=project_id,
-                        platform=platform_id,
-                        validate=False
-                    )
-                    
-                    if storage_state:
-                        logger.info(f"成功加载平台 {checker.name} 的存储状态")
-                    else:
-                        logger.warning(f"未找到平台 {checker.name} 的存储状态，将使用新的会话")
-                    
-                    # 为每个平台创建新的上下文和页面
-                    context = await browser.new_context(
-                        storage_state=storage_state,
-                        user_agent=DEFAULT_USER_AGENT
-                    )
-                    page = await context.new_page()
-                    
-                    try:
-                        # 执行单个平台的检测
-                        platform_results = await self._execute_checks_for_single_platform(
-                            keyword_id=keyword_id,
-                            keyword_obj=keyword_obj,
-                            questions=questions,
-                            company_name=company_name,
-                            platform_id=platform_id,
-                            checker=checker,
-                            page=page
-                        )
-                        results.extend(platform_results)
-                        
-                        # 保存更新后的会话状态（如果登录状态发生了变化）
-                        updated_storage_state = await context.storage_state()
-                        # 保留原始会话中的时间戳信息
-                        if storage_state:
-                            updated_storage_state["created_at"] = storage_state.get("created_at")
-                            updated_storage_state["last_modified"] = storage_state.get("last_modified")
-                        save_result = await secure_session_manager.save_session(
-                            user_id=user_id,
-                            project_id=project_id,
-                            platform=platform_id,
-                            storage_state=updated_storage_state
-                        )
-                        if save_result:
-                            logger.info(f"成功保存平台 {checker.name} 的更新会话状态")
-                        else:
-                            logger.warning(f"保存平台 {checker.name} 的更新会话状态失败")
-                    finally:
-                        # 等待一段时间后再关闭上下文，让用户有时间看到结果
-                        await asyncio.sleep(2)
-                        await context.close()
-            finally:
-                await browser.close()
-        
-        return results
+        if matcher is None:
+            matcher = self.get_matcher(keyword_obj.project, company_name, [keyword_obj.keyword])
+
+        if pool is None or sink is None:
+            async with (self.create_browser_pool() if pool is None else nullcontext(pool)) as own_pool, \
+                    (IndexResultSink(self.db) if sink is None else nullcontext(sink)) as own_sink:
+                return await self._execute_checks(
+                    keyword_id=keyword_id,
+                    keyword_obj=keyword_obj,
+                    questions=questions,
+                    company_name=company_name,
+                    platforms=platforms,
+                    pool=own_pool,
+                    matcher=matcher,
+                    sink=own_sink,
+                    use_cache=use_cache
+                )
+
+        # 各平台并行检测，平台内按配置的并发上限和节奏提问
+        executor = self.create_executor(pool)
+
+        async def handler(checker, page, qv):
+            return await self._check_single_question(
+                keyword_id=keyword_id,
+                keyword_obj=keyword_obj,
+                company_name=company_name,
+                platform_id=checker.platform_id,
+                checker=checker,
+                page=page,
+                qv=qv,
+                matcher=matcher,
+                sink=sink,
+                use_cache=use_cache
+            )
+
+        return await executor.run(
+            checkers=self.checkers,
+            platforms=platforms,
+            questions=questions,
+            handler=handler
+        )
     
-    async def _execute_checks_for_single_platform(
+    async def _check_single_question(
         self,
         keyword_id: int,
         keyword_obj: Keyword,
-        questions: List[QuestionVariant],
         company_name: str,
         platform_id: str,
         checker: Any,
-        page: Any
-    ) -> List[Dict[str, Any]]:
+        page: Any,
+        qv: QuestionVariant,
+        matcher: Optional[HitMatcher] = None,
+        sink: Optional[IndexResultSink] = None,
+        job_item_id: Optional[int] = None,
+        use_cache: bool = True
+    ) -> Dict[str, Any]:
         """
-        为单个平台执行检测
+        在指定页面上检测单个问题（含重试），并保存检测记录
+
+        传入 sink 时记录交给写入器批量保存，否则立即单条提交；
+        job_item_id 为检测任务项ID，记录写入时一并标记任务项完成；
+        use_cache 为 True 时先查问题级回答缓存，命中则不再访问AI平台
         """
-        results = []
-        max_retries = 2
-        
-        # 导入UTC时间处理
-        from datetime import datetime, timezone
-        
-        logger.info(f"开始检测平台: {checker.name}, 关键词: {keyword_obj.keyword}")
+        retry_count = 0
+        from_cache = False
 
-        for qv in questions:
-            retry_count = 0
-            success = False
-            check_result = None
-            
-            while retry_count <= max_retries and not success:
-                try:
-                    # 调用检测器
-                    check_result = await checker.check(
-                        page=page,
-                        question=qv.question,
-                        keyword=keyword_obj.keyword,
-                        company=company_name
-                    )
-                    
-                    success = check_result.get("success", False)
-                    if success:
-                        logger.debug(f"检测成功: 平台={checker.name}, 问题={qv.question[:30]}...")
-                        break
-                    
-                    retry_count += 1
-                    logger.warning(f"检测失败，正在重试 ({retry_count}/{max_retries}): {check_result.get('error_msg', '未知错误')}")
-                    
-                    # 重试前清理聊天记录和等待
-                    await checker.clear_chat_history(page)
-                    await asyncio.sleep(3)
-                    
-                except Exception as e:
-                    retry_count += 1
-                    logger.error(f"检测异常，正在重试 ({retry_count}/{max_retries}): {str(e)}")
-                    
-                    # 重试前等待
-                    await asyncio.sleep(5)
-                    
-                    # 尝试重新导航到页面
-                    if retry_count > 1:
-                        await checker.navigate_to_page(page)
-            
-            if not check_result:
-                check_result = {
-                    "success": False,
-                    "answer": None,
-                    "keyword_found": False,
-                    "company_found": False,
-                    "error_msg": "检测超时或多次失败"
-                }
-            
-            try:
-                # 保存检测结果，强制使用北京时间 (UTC+8)
-                # 导入UTC时间处理
-                from datetime import datetime, timedelta, timezone
-                beijing_time = datetime.now(timezone.utc) + timedelta(hours=8)
-                
-                record = IndexCheckRecord(
-                    keyword_id=keyword_id,
-                    platform=platform_id,
-                    question=qv.question,
-                    answer=check_result.get("answer"),
-                    keyword_found=check_result.get("keyword_found", False),
-                    company_found=check_result.get("company_found", False),
-                    check_time=beijing_time.replace(tzinfo=None)  # 去除时区信息，直接存为本地时间
-                )
-                self.db.add(record)
-                self.db.commit()
-            except Exception as db_error:
-                logger.error(f"保存检测结果失败: {str(db_error)}")
-                # 回滚事务
-                self.db.rollback()
+        if use_cache:
+            # 同一平台同一问题同时只问一次，后到的直接读缓存
+            async with answer_cache.lock(platform_id, qv.question):
+                cached_answer = answer_cache.get(platform_id, qv.question)
+                if cached_answer is not None:
+                    from_cache = True
+                    logger.debug(f"命中回答缓存: 平台={checker.name}, 问题={qv.question[:30]}...")
+                    check_result = {
+                        "success": True,
+                        "answer": cached_answer,
+                        **checker.check_keywords_in_text(cached_answer, keyword_obj.keyword, company_name, matcher=matcher)
+                    }
+                else:
+                    check_result, retry_count = await self._ask_platform(checker, page, qv, keyword_obj, company_name, matcher)
+                    if check_result.get("success") and check_result.get("answer"):
+                        answer_cache.put(platform_id, qv.question, check_result["answer"])
+        else:
+            check_result, retry_count = await self._ask_platform(checker, page, qv, keyword_obj, company_name, matcher)
+
+        # 缓存命中时没有页面，引用只能从回答文本里提取
+        citations = check_result.get("citations")
+        if citations is None and check_result.get("success"):
+            citations = checker.extract_answer_citations(check_result.get("answer"))
+        citations = citations or []
 
-            results.append({
+        try:
+            # 保存检测结果，强制使用北京时间 (UTC+8)
+            # 导入UTC时间处理
+            from datetime import datetime, timedelta, timezone
+            beijing_time = datetime.now(timezone.utc) + timedelta(hours=8)
+            
+            record = {
                 "keyword_id": keyword_id,
-                "keyword": keyword_obj.keyword,
-                "platform": checker.name,
+                "platform": platform_id,
                 "question": qv.question,
+                "answer": check_result.get("answer"),
                 "keyword_found": check_result.get("keyword_found", False),
                 "company_found": check_result.get("company_found", False),
-                "success": check_result.get("success", False),
-                "retry_count": retry_count
-            })
-            
-            # 每个问题检测后短暂休息
-            await asyncio.sleep(1)
-        
-        return results
+                "from_cache": from_cache,
+                "check_time": beijing_time.replace(tzinfo=None)  # 去除时区信息，直接存为本地时间
+            }
+            timing = None if from_cache else self._build_timing(record, check_result, retry_count)
+            if sink is not None:
+                sink.add(
+                    record,
+                    job_item_id=job_item_id,
+                    job_item_status="done" if check_result.get("success") else "failed",
+                    citations=citations,
+                    timing=timing
+                )
+            else:
+                (stored,), blobs = split_answers([record])
+                store_blobs(self.db, blobs)
+                self.db.add(IndexCheckRecord(
+                    **stored,
+                    citations=[IndexCheckCitation(**citation) for citation in citations],
+                    timing=IndexCheckTiming(**timing) if timing else None
+                ))
+                apply_records(self.db, [stored])
+                self.db.commit()
+        except Exception as db_error:
+            logger.error(f"保存检测结果失败: {str(db_error)}")
+            # 回滚事务
+            self.db.rollback()
+
+        return {
+            "keyword_id": keyword_id,
+            "keyword": keyword_obj.keyword,
+            "platform": checker.name,
+            "question": qv.question,
+            "keyword_found": check_result.get("keyword_found", False),
+            "company_found": check_result.get("company_found", False),
+            "success": check_result.get("success", False),
+            "retry_count": retry_count,
+            "cached": from_cache,
+            "citation_count": len(citations),
+            "duration_ms": (check_result.get("timings") or {}).get("total_ms")
+        }
+
+    @staticmethod
+    def _build_timing(record: Dict[str, Any], check_result: Dict[str, Any], retry_count: int) -> Dict[str, Any]:
+        """
+        由检测结果生成耗时记录（IndexCheckTiming 的字段字典，不含 record_id）
+
+        失败的检测没有走完所有阶段，对应阶段的耗时为空
+        """
+        timings = check_result.get("timings") or {}
+        return {
+            "platform": record["platform"],
+            "check_time": record["check_time"],
+            "total_ms": timings.get("total_ms", 0),
+            "navigate_ms": timings.get("navigate_ms"),
+            "submit_ms": timings.get("submit_ms"),
+            "wait_ms": timings.get("wait_ms"),
+            "extract_ms": timings.get("extract_ms"),
+            "wait_signal": timings.get("wait_signal"),
+            "retries": retry_count,
+            "answer_length": check_result.get("answer_length", len(record.get("answer") or ""))
+        }
 
-    async def _execute_checks_for_single_keyword(
+    async def _ask_platform(
         self,
-        keyword_id: int,
+        checker: Any,
+        page: Any,
+        qv: QuestionVariant,
         keyword_obj: Keyword,
-        questions: List[QuestionVariant],
         company_name: str,
-        platforms: List[str],
-        page: Any
-    ) -> List[Dict[str, Any]]:
+        matcher: Optional[HitMatcher] = None
+    ) -> tuple:
         """
-        为单个关键词执行检测（旧方法，保留以兼容其他调用）
+        驱动浏览器向AI平台提问（含重试）
+
+        平台限流只在这一层计数：每次尝试前取一个令牌，结果记一次成功或失败（失败类型取检测器记下的 login / captcha，
+        没有则按 error），检测器内部的导航重试等不再计数
+
+        Returns:
+            (检测结果, 重试次数)，检测结果的 timings 里带端到端耗时 total_ms
         """
-        results = []
+        started = time.perf_counter()
+        max_retries = 2
+        retry_count = 0
+        success = False
+        check_result = None
         
-        for platform_id in platforms:
-            checker = self.checkers.get(platform_id)
-            if not checker:
-                logger.warning(f"未知的平台: {platform_id}")
-                continue
+        while retry_count <= max_retries and not success:
+            try:
+                # 令牌不够时在这里等，提问节奏完全由限流器决定
+                await checker.throttle.acquire()
+            except PlatformUnavailableError as e:
+                logger.warning(f"平台 {checker.name} 熔断中，跳过提问: {e}")
+                check_result = {
+                    "success": False,
+                    "answer": None,
+                    "keyword_found": False,
+                    "company_found": False,
+                    "error_msg": str(e),
+                    "circuit_open": True
+                }
+                break
 
-            platform_results = await self._execute_checks_for_single_platform(
-                keyword_id=keyword_id,
-                keyword_obj=keyword_obj,
-                questions=questions,
-                company_name=company_name,
-                platform_id=platform_id,
-                checker=checker,
-                page=page
-            )
-            results.extend(platform_results)
+            try:
+                # 调用检测器
+                check_result = await checker.check(
+                    page=page,
+                    question=qv.question,
+                    keyword=keyword_obj.keyword,
+                    company=company_name,
+                    matcher=matcher
+                )
+                
+                success = check_result.get("success", False)
+                failure_kind = checker.pop_failure_kind(page)
+                if success:
+                    logger.debug(f"检测成功: 平台={checker.name}, 问题={qv.question[:30]}...")
+                    checker.throttle.record_success()
+                    break
 
-        return results
+                checker.throttle.record_failure(failure_kind or "error")
+                # 平台熔断中，重试也没有意义
+                if checker.throttle.is_open():
+                    logger.warning(f"平台 {checker.name} 熔断中，跳过重试: {check_result.get('error_msg', '未知错误')}")
+                    break
+
+                retry_count += 1
+                logger.warning(f"检测失败，正在重试 ({retry_count}/{max_retries}): {check_result.get('error_msg', '未知错误')}")
+                
+                # 重试前清理聊天记录，等待时间由限流器按平台当前状态决定
+                await checker.clear_chat_history(page)
+                await checker.throttle.backoff(retry_count, base=3)
+                
+            except Exception as e:
+                checker.throttle.record_failure(checker.pop_failure_kind(page) or "error")
+                retry_count += 1
+                logger.error(f"检测异常，正在重试 ({retry_count}/{max_retries}): {str(e)}")
+
+                if checker.throttle.is_open():
+                    break
+
+                # 重试前等待
+                await checker.throttle.backoff(retry_count, base=5)
+                
+                # 尝试重新导航到页面
+                if retry_count > 1:
+                    await checker.navigate_to_page(page)
+        
+        if not check_result:
+            check_result = {
+                "success": False,
+                "answer": None,
+                "keyword_found": False,
+                "company_found": False,
+                "error_msg": "检测超时或多次失败"
+            }
+
+        # 端到端耗时含重试和退避等待；分阶段耗时只来自最后一次尝试
+        check_result.setdefault("timings", {})["total_ms"] = int((time.perf_counter() - started) * 1000)
+        return check_result, retry_count
 
     def get_check_records(
         self,
@@ -493,8 +601,11 @@ class IndexCheckService:
         company_found: Optional[bool] = None,
         start_date: Optional[datetime] = None,
         end_date: Optional[datetime] = None,
-        question: Optional[str] = None
-    ) -> tuple[List[IndexCheckRecord], int]:
+        question: Optional[str] = None,
+        include_answer: bool = False,
+        cursor: Optional[str] = None,
+        with_total: bool = True
+    ) -> tuple[List[IndexCheckRecord], Optional[int]]:
         """
         获取检测记录（支持分页和多维筛选）
 
@@ -502,18 +613,81 @@ class IndexCheckService:
             keyword_id: 关键词ID筛选
             platform: 平台筛选
             limit: 返回数量限制
-            skip: 跳过数量
+            skip: 跳过数量（偏移分页，翻得越深越慢，建议改用 cursor）
             keyword_found: 关键词命中筛选
             company_found: 公司名命中筛选
             start_date: 开始时间
             end_date: 结束时间
             question: 问题搜索（模糊匹配）
+            include_answer: 是否一并加载回答正文（默认不加载，列表只在打开单条记录时取正文）
+            cursor: 游标分页，传上一页最后一条的游标（pagination.next_cursor），给了就忽略 skip
+            with_total: 是否返回总数（见 count_check_records），不需要时返回 None
 
         Returns:
-            (记录列表, 总记录数)
+            (记录列表, 总记录数)；按 (检测时间, ID) 倒序，时间范围用到已归档月份时，
+            归档记录（ArchivedCheckRecord）接在热表记录后面
+
+        Raises:
+            ValueError: 游标格式不对
         """
-        query = self.db.query(IndexCheckRecord)
+        filters = dict(
+            keyword_id=keyword_id,
+            platform=platform,
+            keyword_found=keyword_found,
+            company_found=company_found,
+            start_date=start_date,
+            end_date=end_date,
+            question=question
+        )
+        after = decode_cursor(cursor) if cursor else None
+        if after:
+            skip = 0
+
+        query = self._filter_records(self.db.query(IndexCheckRecord), **filters)
+        if after:
+            dialect = self.db.get_bind().dialect.name
+            query = query.filter(after_cursor(IndexCheckRecord.check_time, IndexCheckRecord.id, after, dialect))
+        if include_answer:
+            query = query.options(undefer(IndexCheckRecord.answer), selectinload(IndexCheckRecord.answer_blob))
 
+        records = query.order_by(
+            IndexCheckRecord.check_time.desc(), IndexCheckRecord.id.desc()
+        ).offset(skip).limit(limit).all()
+
+        # 归档的记录都比热表里的旧，热表这一页不够时接着从归档里取
+        archived = []
+        if len(records) < limit:
+            # 这一页取到了热表记录说明偏移量没超出热表，否则要扣掉热表的条数
+            archive_skip = max(0, skip - query.count()) if skip and not records else 0
+            conditions = CheckArchiveService.record_conditions(**filters)
+            archive_end = end_date
+            if after:
+                conditions.append(after_cursor(archived_records.c.check_time, archived_records.c.id, after))
+                archive_end = min(end_date, after[0]) if end_date else after[0]
+            archived = CheckArchiveService(self.db).page_records(
+                conditions,
+                skip=archive_skip,
+                limit=limit - len(records),
+                start_date=start_date,
+                end_date=archive_end,
+                include_answer=include_answer
+            )
+
+        total = self.count_check_records(**filters) if with_total else None
+        return records + archived, total
+
+    @staticmethod
+    def _filter_records(
+        query,
+        keyword_id: Optional[int] = None,
+        platform: Optional[str] = None,
+        keyword_found: Optional[bool] = None,
+        company_found: Optional[bool] = None,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        question: Optional[str] = None
+    ):
+        """热表检测记录的筛选条件（和 CheckArchiveService.record_conditions 含义一致）"""
         if keyword_id:
             query = query.filter(IndexCheckRecord.keyword_id == keyword_id)
         if platform:
@@ -528,27 +702,102 @@ class IndexCheckService:
             query = query.filter(IndexCheckRecord.check_time <= end_date)
         if question:
             query = query.filter(IndexCheckRecord.question.ilike(f"%{question}%"))
+        return query
+
+    def count_check_records(
+        self,
+        keyword_id: Optional[int] = None,
+        platform: Optional[str] = None,
+        keyword_found: Optional[bool] = None,
+        company_found: Optional[bool] = None,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        question: Optional[str] = None
+    ) -> int:
+        """
+        符合条件的检测记录总数（含归档）
+
+        注意：
+        - 没有问题搜索、时间范围按整天、命中筛选最多一个时，直接从日汇总算，不扫检测记录
+          （口径同日汇总：缓存命中的记录计入，检测时间为空的历史记录不计入）
+        - 其余情况精确 COUNT（热表 + 归档），结果按筛选条件缓存 LIST_COUNT_CACHE_TTL 秒
+        """
+        whole_days = (
+            (start_date is None or start_date.time() == datetime.min.time()) and
+            (end_date is None or (end_date.hour, end_date.minute, end_date.second) == (23, 59, 59))
+        )
+        if not question and whole_days and (keyword_found is None or company_found is None):
+            totals = DailyRollupService(self.db).totals(
+                keyword_id=keyword_id,
+                platform=platform,
+                start_date=start_date.date() if start_date else None,
+                end_date=end_date.date() if end_date else None
+            )
+            if keyword_found is not None:
+                hits = totals["keyword_hits"]
+                return hits if keyword_found else totals["checks"] - hits
+            if company_found is not None:
+                hits = totals["company_hits"]
+                return hits if company_found else totals["checks"] - hits
+            return totals["checks"]
+
+        filters = dict(
+            keyword_id=keyword_id,
+            platform=platform,
+            keyword_found=keyword_found,
+            company_found=company_found,
+            start_date=start_date,
+            end_date=end_date,
+            question=question
+        )
+
+        def count() -> int:
+            hot = self._filter_records(self.db.query(IndexCheckRecord), **filters).count()
+            archived = CheckArchiveService(self.db).count_archived(
+                CheckArchiveService.record_conditions(**filters),
+                start_date=start_date,
+                end_date=end_date
+            )
+            return hot + archived
+
+        return count_cache.get_or_count("index_check_records", tuple(sorted(filters.items())), count)
+
+    def get_record(self, record_id: int) -> Optional[IndexCheckRecord]:
+        """获取单条记录（含回答正文，用 record.answer_text 读取；热表没有时到归档里找）"""
+        record = self.db.query(IndexCheckRecord).options(
+            undefer(IndexCheckRecord.answer),
+            selectinload(IndexCheckRecord.answer_blob)
+        ).filter(IndexCheckRecord.id == record_id).first()
+        return record or CheckArchiveService(self.db).get_record(record_id)
 
-        total = query.count()
-        records = query.order_by(IndexCheckRecord.check_time.desc()).offset(skip).limit(limit).all()
-        
-        return records, total
-        
     def delete_record(self, record_id: int) -> bool:
         """删除单条记录"""
         record = self.db.query(IndexCheckRecord).filter(IndexCheckRecord.id == record_id).first()
         if not record:
             return False
+        apply_records(self.db, [record_fields(record)], sign=-1)
         self.db.delete(record)
         self.db.commit()
+        count_cache.invalidate("index_check_records")
         return True
         
     def batch_delete_records(self, record_ids: List[int]) -> int:
         """批量删除记录"""
+        records = self.db.query(
+            IndexCheckRecord.keyword_id,
+            IndexCheckRecord.platform,
+            IndexCheckRecord.check_time,
+            IndexCheckRecord.keyword_found,
+            IndexCheckRecord.company_found,
+            IndexCheckRecord.answer,
+            IndexCheckRecord.answer_hash
+        ).filter(IndexCheckRecord.id.in_(record_ids)).all()
+        apply_records(self.db, [row._asdict() for row in records], sign=-1)
         count = self.db.query(IndexCheckRecord).filter(
             IndexCheckRecord.id.in_(record_ids)
         ).delete(synchronize_session=False)
         self.db.commit()
+        count_cache.invalidate("index_check_records")
         return count
 
     def get_hit_rate(self, keyword_id: int) -> Dict[str, Any]:
@@ -561,16 +810,14 @@ class IndexCheckService:
         Returns:
             命中率统计
         """
-        records = self.db.query(IndexCheckRecord).filter(
-            IndexCheckRecord.keyword_id == keyword_id
-        ).all()
+        totals = DailyRollupService(self.db).totals(keyword_id=keyword_id)
 
-        if not records:
+        if not totals["checks"]:
             return {"hit_rate": 0, "total": 0, "keyword_found": 0, "company_found": 0}
 
-        total = len(records)
-        keyword_found = sum(1 for r in records if r.keyword_found)
-        company_found = sum(1 for r in records if r.company_found)
+        total = totals["checks"]
+        keyword_found = totals["keyword_hits"]
+        company_found = totals["company_hits"]
 
         return {
             "hit_rate": round((keyword_found + company_found) / (total * 2) * 100, 2),
@@ -594,43 +841,32 @@ class IndexCheckService:
         Returns:
             趋势数据
         """
-        from datetime import datetime, timedelta
-        
-        # 获取起始时间
-        start_date = datetime.now() - timedelta(days=days)
-        
         # 获取关键词信息
         keyword = self.db.query(Keyword).filter(Keyword.id == keyword_id).first()
         if not keyword:
             return {"keyword": None, "trend": []}
         
-        # 按天分组统计
+        # 按天分组统计（读日汇总表）
         trend_data = []
-        
-        for day_offset in range(days, 0, -1):
-            day_start = datetime.now() - timedelta(days=day_offset)
-            day_end = day_start + timedelta(days=1)
-            
-            # 获取当天的检测记录
-            records = self.db.query(IndexCheckRecord).filter(
-                IndexCheckRecord.keyword_id == keyword_id,
-                IndexCheckRecord.check_time >= day_start,
-                IndexCheckRecord.check_time < day_end
-            ).all()
-            
-            if not records:
-                continue
-            
+        daily = DailyRollupService(self.db).aggregate(
+            IndexCheckDaily.date,
+            keyword_id=keyword_id,
+            start_date=start_day(days)
+        ).order_by(IndexCheckDaily.date).all()
+
+        for day in daily:
             # 计算当天的统计数据
-            total = len(records)
-            keyword_found = sum(1 for r in records if r.keyword_found)
-            company_found = sum(1 for r in records if r.company_found)
+            total = day.checks
+            keyword_found = day.keyword_hits
+            company_found = day.company_hits
+            if not total:
+                continue
             
             # 计算命中率
             hit_rate = round((keyword_found + company_found) / (total * 2) * 100, 2) if total > 0 else 0
             
             trend_data.append({
-                "date": day_start.strftime("%Y-%m-%d"),
+                "date": str(day.date),
                 "total": total,
                 "keyword_found": keyword_found,
                 "company_found": company_found,
@@ -660,8 +896,6 @@ class IndexCheckService:
         Returns:
             项目分析数据
         """
-        from datetime import datetime, timedelta
-        
         # 获取项目信息
         project = self.db.query(Project).filter(Project.id == project_id).first()
         if not project:
@@ -687,27 +921,31 @@ class IndexCheckService:
                 }
             }
         
-        start_date = datetime.now() - timedelta(days=days)
-        
         keyword_analytics = []
         total_checks = 0
         total_hit_rate = 0
         total_keyword_avg = 0
         total_company_avg = 0
+
+        # 一次查出所有关键词的汇总（读日汇总表）
+        keyword_stats = {
+            row.keyword_id: row
+            for row in DailyRollupService(self.db).aggregate(
+                IndexCheckDaily.keyword_id,
+                project_id=project_id,
+                active_only=True,
+                start_date=start_day(days)
+            ).all()
+        }
         
         for keyword in keywords:
-            # 获取该关键词的检测记录
-            records = self.db.query(IndexCheckRecord).filter(
-                IndexCheckRecord.keyword_id == keyword.id,
-                IndexCheckRecord.check_time >= start_date
-            ).all()
-            
-            if not records:
+            stats = keyword_stats.get(keyword.id)
+            if not stats or not stats.checks:
                 continue
             
-            total = len(records)
-            keyword_found = sum(1 for r in records if r.keyword_found)
-            company_found = sum(1 for r in records if r.company_found)
+            total = stats.checks
+            keyword_found = stats.keyword_hits
+            company_found = stats.company_hits
             
             hit_rate = round((keyword_found + company_found) / (total * 2) * 100, 2) if total > 0 else 0
             keyword_pct = round((keyword_found / total) * 100, 2) if total > 0 else 0
@@ -762,55 +1000,28 @@ class IndexCheckService:
         Returns:
             平台表现数据
         """
-        from datetime import datetime, timedelta
-        
-        start_date = datetime.now() - timedelta(days=days)
-        
-        # 构建查询条件
-        query = self.db.query(IndexCheckRecord)
-        
-        if project_id:
-            # 通过关键词关联到项目
-            from sqlalchemy import and_
-            query = query.join(Keyword).filter(
-                and_(
-                    IndexCheckRecord.check_time >= start_date,
-                    Keyword.project_id == project_id,
-                    Keyword.status == "active"
-                )
-            )
-        else:
-            query = query.filter(IndexCheckRecord.check_time >= start_date)
+        # 按平台分组统计（读日汇总表；指定项目时只统计启用中的关键词）
+        rows = DailyRollupService(self.db).aggregate(
+            IndexCheckDaily.platform,
+            project_id=project_id,
+            active_only=bool(project_id),
+            start_date=start_day(days)
+        ).all()
         
-        records = query.all()
+        platform_data = {
+            row.platform: {
+                "platform": row.platform,
+                "total": row.checks,
+                "keyword_found": row.keyword_hits,
+                "company_found": row.company_hits,
+                "success_count": row.answered  # 成功检测（有回答）
+            }
+            for row in rows if row.checks
+        }
         
-        if not records:
+        if not platform_data:
             return {"platforms": [], "summary": {"total_checks": 0}}
         
-        # 按平台分组统计
-        platform_data = {}
-        
-        for record in records:
-            platform = record.platform
-            if platform not in platform_data:
-                platform_data[platform] = {
-                    "platform": platform,
-                    "total": 0,
-                    "keyword_found": 0,
-                    "company_found": 0,
-                    "success_count": 0
-                }
-            
-            platform_data[platform]["total"] += 1
-            if record.keyword_found:
-                platform_data[platform]["keyword_found"] += 1
-            if record.company_found:
-                platform_data[platform]["company_found"] += 1
-            
-            # 成功检测（有回答）
-            if record.answer and record.answer.strip():
-                platform_data[platform]["success_count"] += 1
-        
         # 计算各平台的命中率和成功率
         platforms = []
         total_checks = 0
@@ -7,10 +7,11 @@
 from typing import List, Dict, Any, Optional
 from loguru import logger
 from sqlalchemy.orm import Session
-from datetime import datetime, timedelta
+from datetime import datetime
 from dataclasses import dataclass
 
-from backend.database.models import Project, Keyword, IndexCheckRecord
+from backend.database.models import Project, Keyword, IndexCheckDaily
+from backend.services.check_rollup import DailyRollupService, start_day
 from backend.config import AI_PLATFORMS
 
 
@@ -97,14 +98,11 @@ class NotificationService:
         """检查单个关键词的预警"""
         alerts = []
 
-        # 获取最近的检测记录（最近7天）
-        seven_days_ago = datetime.now() - timedelta(days=7)
-        records = self.db.query(IndexCheckRecord).filter(
-            IndexCheckRecord.keyword_id == keyword.id,
-            IndexCheckRecord.check_time >= seven_days_ago
-        ).all()
+        # 最近7天的检测汇总（读日汇总表）
+        rollup = DailyRollupService(self.db)
+        recent = rollup.totals(keyword_id=keyword.id, start_date=start_day(7))
 
-        if not records:
+        if not recent["checks"]:
             # 没有检测记录
             alerts.append({
                 "type": "no_data",
@@ -118,9 +116,9 @@ class NotificationService:
             return alerts
 
         # 计算命中率
-        total = len(records)
-        keyword_found = sum(1 for r in records if r.keyword_found)
-        company_found = sum(1 for r in records if r.company_found)
+        total = recent["checks"]
+        keyword_found = recent["keyword_hits"]
+        company_found = recent["company_hits"]
         hit_rate = (keyword_found + company_found) / (total * 2) * 100
 
         # 检查命中率过低
@@ -151,16 +149,12 @@ class NotificationService:
         # 检查持续低迷
         if self.ALERT_RULES["consistently_low"].enabled:
             # 获取更长时间的数据（30天）
-            thirty_days_ago = datetime.now() - timedelta(days=30)
-            long_term_records = self.db.query(IndexCheckRecord).filter(
-                IndexCheckRecord.keyword_id == keyword.id,
-                IndexCheckRecord.check_time >= thirty_days_ago
-            ).all()
+            long_term = rollup.totals(keyword_id=keyword.id, start_date=start_day(30))
 
-            if long_term_records:
-                lt_total = len(long_term_records)
-                lt_keyword_found = sum(1 for r in long_term_records if r.keyword_found)
-                lt_company_found = sum(1 for r in long_term_records if r.company_found)
+            if long_term["checks"]:
+                lt_total = long_term["checks"]
+                lt_keyword_found = long_term["keyword_hits"]
+                lt_company_found = long_term["company_hits"]
                 lt_hit_rate = (lt_keyword_found + lt_company_found) / (lt_total * 2) * 100
 
                 if lt_hit_rate < self.ALERT_RULES["consistently_low"].threshold:
@@ -223,18 +217,22 @@ class NotificationService:
 
             summary["total_keywords"] += len(keywords)
 
-            for keyword in keywords:
-                # 简单检查当前状态
-                seven_days_ago = datetime.now() - timedelta(days=7)
-                records = self.db.query(IndexCheckRecord).filter(
-                    IndexCheckRecord.keyword_id == keyword.id,
-                    IndexCheckRecord.check_time >= seven_days_ago
+            # 简单检查当前状态：项目下各关键词最近7天的汇总一次查出
+            recent_stats = {
+                row.keyword_id: row
+                for row in DailyRollupService(self.db).aggregate(
+                    IndexCheckDaily.keyword_id,
+                    project_id=project.id,
+                    start_date=start_day(7)
                 ).all()
+            }
 
-                if records:
-                    total = len(records)
-                    keyword_found = sum(1 for r in records if r.keyword_found)
-                    company_found = sum(1 for r in records if r.company_found)
+            for keyword in keywords:
+                stats = recent_stats.get(keyword.id)
+                if stats and stats.checks:
+                    total = stats.checks
+                    keyword_found = stats.keyword_hits
+                    company_found = stats.company_hits
                     hit_rate = (keyword_found + company_found) / (total * 2) * 100
 
                     if hit_rate < 30:
@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+"""
+列表分页
+游标（keyset）分页：记住上一页最后一条的排序键 (时间, id)，下一页直接按索引取排在它后面的，
+不再 OFFSET 扫过前面所有行，翻到多深都一样快；总数按筛选条件短期缓存，翻页不用每页都 COUNT 一遍
+"""
+
+import base64
+import json
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Callable, Hashable, Optional, Tuple
+
+from sqlalchemy import String, and_, literal, or_
+
+from backend.config import LIST_COUNT_CACHE_TTL
+
+
+def encode_cursor(sort_time: datetime, row_id: int) -> str:
+    """把一条记录的排序键编码成游标（URL 安全的字符串）"""
+    payload = json.dumps([sort_time.isoformat(), row_id])
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def next_cursor(items: list, limit: int, time_attr: str) -> Optional[str]:
+    """这一页取满了就返回最后一条的游标，否则说明没有下一页，返回 None"""
+    if len(items) < limit or not items:
+        return None
+    last = items[-1]
+    sort_time = getattr(last, time_attr)
+    return encode_cursor(sort_time, last.id) if sort_time else None
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """解析游标，格式不对时抛 ValueError"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        sort_time, row_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(sort_time), int(row_id)
+    except Exception:
+        raise ValueError(f"无效的分页游标: {cursor}")
+
+
+def after_cursor(time_column, id_column, cursor: Tuple[datetime, int], dialect: str = "sqlite"):
+    """
+    按 (时间 倒序, id 倒序) 排列时，排在游标之后的筛选条件
+
+    SQLite 的时间按文本存：ORM 写入的带微秒（2024-01-01 10:00:00.000000），func.now() 默认值不带（2024-01-01 10:00:00），
+    同一时刻两种写法按文本比较不相等，所以"同一时刻"按 [最短写法, 完整写法] 这个区间判断
+    """
+    sort_time, row_id = cursor
+    if dialect == "sqlite":
+        seconds = sort_time.strftime("%Y-%m-%d %H:%M:%S")
+        full = f"{seconds}.{sort_time.microsecond:06d}"
+        low = literal(full if sort_time.microsecond else seconds, String)
+        high = literal(full, String)
+    else:
+        low = high = sort_time
+    return or_(time_column < low, and_(time_column <= high, id_column < row_id))
+
+
+class CountCache:
+    """
+    列表总数缓存（进程内，TTL + 容量上限）
+
+    注意：
+    - 键为 (表名, 筛选条件)，筛选条件要可哈希（一般传 tuple(sorted(filters.items()))）
+    - 本进程里的增删可以调用 invalidate(表名) 立即失效，其它写入（采集、检测）最多滞后 TTL 秒
+    """
+
+    def __init__(self, ttl: int = LIST_COUNT_CACHE_TTL, max_size: int = 1000):
+        """
+        初始化缓存
+
+        Args:
+            ttl: 有效期（秒），0 表示不缓存
+            max_size: 最多缓存的条目数
+        """
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries: "OrderedDict[Tuple[str, Hashable], Tuple[float, int]]" = OrderedDict()
+
+    def get_or_count(self, table: str, filters: Hashable, count: Callable[[], int]) -> int:
+        """读取缓存的总数，没有或已过期时调用 count() 重新统计"""
+        if self.ttl <= 0:
+            return count()
+
+        key = (table, filters)
+        entry = self._entries.get(key)
+        if entry is not None and time.monotonic() - entry[0] <= self.ttl:
+            self._entries.move_to_end(key)
+            return entry[1]
+
+        total = count()
+        self._entries[key] = (time.monotonic(), total)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+        return total
+
+    def invalidate(self, table: Optional[str] = None):
+        """清掉某张表（不传则全部）的缓存总数"""
+        if table is None:
+            self._entries.clear()
+            return
+        for key in [key for key in self._entries if key[0] == table]:
+            self._entries.pop(key, None)
+
+
+# 全局单例
+count_cache = CountCache()
@@ -12,6 +12,52 @@ import asyncio
 import time
 import random
 
+from backend.config import INDEX_CHECK_CAPTURE_MODE
+from backend.services.hit_matcher import HitMatcher, get_project_matcher, keyword_label
+from backend.services.citation_extractor import extract_citations
+from backend.services.playwright.platform_throttle import get_platform_throttle
+from .stream_capture import StreamCapture, iter_sse_payloads
+
+# 页面异常类型，越往后越严重（同一次提问出现多种时按最严重的计）
+FAILURE_SEVERITY = ["error", "login", "captcha"]
+
+
+class PhaseTimer:
+    """
+    检测分阶段计时（毫秒）
+
+    mark(phase) 记下从上一个标记到现在的耗时，键名与 IndexCheckTiming 的列一致：
+    navigate_ms / submit_ms / wait_ms / extract_ms / wait_signal
+    """
+
+    def __init__(self):
+        self.timings: Dict[str, Any] = {}
+        self._last = time.perf_counter()
+
+    def _lap(self) -> int:
+        now = time.perf_counter()
+        elapsed = int((now - self._last) * 1000)
+        self._last = now
+        return elapsed
+
+    def mark(self, phase: str) -> int:
+        """结束一个阶段，返回该阶段耗时"""
+        elapsed = self._lap()
+        self.timings[f"{phase}_ms"] = elapsed
+        return elapsed
+
+    def mark_answer(self, wait_result: Dict[str, Any]):
+        """
+        结束回答阶段（collect_answer）
+
+        等待耗时取等待结果里的 elapsed_time，剩下的算作抓取回答内容和引用的耗时
+        """
+        elapsed = self._lap()
+        wait_ms = min(elapsed, int(wait_result.get("elapsed_time") or 0))
+        self.timings["wait_ms"] = wait_ms
+        self.timings["extract_ms"] = elapsed - wait_ms
+        self.timings["wait_signal"] = wait_result.get("signal")
+
 
 class AIPlatformChecker(ABC):
     """
@@ -20,6 +66,137 @@ class AIPlatformChecker(ABC):
     注意：所有AI平台检测器都要继承这个类！
     """
 
+    # 回答完成信号（子类可覆盖，选择器必须是纯 CSS，会在页面内执行）
+    # stop_generating: 生成中才可见的"停止生成"按钮
+    # send_button: 生成结束后重新出现/可用的发送按钮
+    # quiet_ms: 没有任何平台信号时，DOM 静默多久视为回答结束
+    # settle_ms: 平台信号表明已结束后，再等多久确认 DOM 不再变化
+    COMPLETION_SIGNALS: Dict[str, Any] = {
+        "stop_generating": [
+            "[class*='stop-generat']",
+            "[class*='stopGenerat']",
+            "[data-testid*='stop']",
+            "button[aria-label*='停止']",
+            "button[aria-label*='Stop']"
+        ],
+        "send_button": [],
+        "quiet_ms": 2500,
+        "settle_ms": 500
+    }
+
+    # 验证码/风控页面特征（出现即视为被平台限制，限流器会大幅收紧）
+    CAPTCHA_INDICATORS: List[str] = [
+        "[class*='captcha']",
+        "[id*='captcha']",
+        "iframe[src*='captcha']",
+        "[class*='verify-wrap']",
+        "[class*='slide-verify']",
+        "text='安全验证'"
+    ]
+
+    # 登录墙出现后，最多等待多久让用户手动登录（秒）
+    LOGIN_WAIT_SECONDS = 30
+
+    # 网络抓取配置（子类覆盖）：url_patterns 为流式对话接口的 URL 片段，为空表示不支持网络抓取
+    STREAM_CAPTURE: Dict[str, Any] = {
+        "url_patterns": [],
+        "via_route": False
+    }
+
+    # 回答中引用链接所在区域（子类可覆盖，纯 CSS），只抓这些区域里的外链，避免混入侧边栏/页脚链接
+    CITATION_SELECTORS: List[str] = [
+        "[class*='markdown'] a[href]",
+        "[class*='reference'] a[href]",
+        "[class*='citation'] a[href]",
+        "[class*='source'] a[href]"
+    ]
+
+    # 平台自身域名（子类覆盖），不算作引用
+    OWN_DOMAINS: List[str] = []
+
+    # 页面内收集引用链接：只要 http(s) 外链，按出现顺序去重
+    _CITATION_LINKS_JS = """(selectors) => {
+        const seen = new Set();
+        const links = [];
+        for (const sel of selectors) {
+            let anchors = [];
+            try { anchors = document.querySelectorAll(sel); } catch (e) { continue; }
+            for (const a of anchors) {
+                const href = a.href || '';
+                if (!/^https?:/i.test(href) || seen.has(href)) continue;
+                try { if (new URL(href).host === location.host) continue; } catch (e) { continue; }
+                seen.add(href);
+                links.push({url: href, title: (a.innerText || a.title || '').trim().slice(0, 200)});
+                if (links.length >= 50) return links;
+            }
+        }
+        return links;
+    }"""
+
+    # 页面内安装 MutationObserver：记录最后一次 DOM 变化时间，以及是否出现过"停止生成"
+    _ANSWER_WATCH_INSTALL_JS = """(stopSelectors) => {
+        if (window.__geoAnswerObserver) window.__geoAnswerObserver.disconnect();
+        const isVisible = (sel) => {
+            try {
+                return Array.from(document.querySelectorAll(sel)).some(el => el.offsetParent !== null);
+            } catch (e) { return false; }
+        };
+        const state = {
+            startedAt: Date.now(),
+            lastMutation: Date.now(),
+            mutations: 0,
+            sawGenerating: false,
+            initialLength: document.body ? document.body.textContent.length : 0
+        };
+        const observer = new MutationObserver(() => {
+            state.lastMutation = Date.now();
+            state.mutations += 1;
+            if (!state.sawGenerating && stopSelectors.some(isVisible)) state.sawGenerating = true;
+        });
+        observer.observe(document.body, {childList: true, subtree: true, characterData: true});
+        window.__geoAnswerWatch = state;
+        window.__geoAnswerObserver = observer;
+        return true;
+    }"""
+
+    # 页面内判断回答是否结束：停止按钮消失 + 发送按钮恢复 + DOM 短暂静默，或长时间静默兜底
+    _ANSWER_SETTLED_JS = """(cfg) => {
+        const state = window.__geoAnswerWatch;
+        if (!state || !document.body) return false;
+        const isVisible = (sel) => {
+            try {
+                return Array.from(document.querySelectorAll(sel)).some(el => el.offsetParent !== null);
+            } catch (e) { return false; }
+        };
+        if (cfg.stop.some(isVisible)) {
+            state.sawGenerating = true;
+            return false;
+        }
+        const grown = document.body.textContent.length - state.initialLength;
+        if (grown < cfg.minGrowth) return false;
+
+        let sendReady = null;
+        for (const sel of cfg.send) {
+            let el = null;
+            try { el = document.querySelector(sel); } catch (e) { continue; }
+            if (!el) continue;
+            sendReady = el.offsetParent !== null && !el.disabled && el.getAttribute('aria-disabled') !== 'true';
+            break;
+        }
+
+        const quiet = Date.now() - state.lastMutation;
+        const result = {quiet: quiet, grown: grown, mutations: state.mutations};
+        if (state.sawGenerating && sendReady !== false && quiet >= cfg.settleMs) {
+            result.signal = sendReady ? 'send_button' : 'stop_generating';
+            return result;
+        }
+        if (quiet >= cfg.quietMs) {
+            result.signal = 'dom_quiet';
+            return result;
+        }
+        return false;
+    }"""
+
     def __init__(self, platform_id: str, config: Dict[str, Any]):
         """
         初始化检测器
@@ -36,6 +213,20 @@ class AIPlatformChecker(ABC):
         self.retry_count = 3
         self.retry_delay = 2
         self.operation_log = []
+        self.capture_mode = config.get("capture_mode", INDEX_CHECK_CAPTURE_MODE)
+        self.throttle = get_platform_throttle(platform_id)
+        # 本次提问中页面上出现的异常类型（按页面记，同一平台多个页面并发提问），由提问方取走后计入限流器
+        self._failure_kinds: Dict[int, str] = {}
+
+    def _note_failure(self, page: Page, kind: str):
+        """记下页面上出现的异常（login / captcha），多次出现时保留最严重的一种"""
+        current = self._failure_kinds.get(id(page))
+        if current is None or FAILURE_SEVERITY.index(kind) > FAILURE_SEVERITY.index(current):
+            self._failure_kinds[id(page)] = kind
+
+    def pop_failure_kind(self, page: Page) -> Optional[str]:
+        """取走页面上一次提问记下的异常类型（没有时为 None）"""
+        return self._failure_kinds.pop(id(page), None)
 
     def _log(self, level: str, message: str, **kwargs):
         """
@@ -73,13 +264,16 @@ class AIPlatformChecker(ABC):
         retry_delay: int = None
     ) -> Dict[str, Any]:
         """
-        通用重试机制
+        通用重试机制（页面内的单个步骤，如导航、清理聊天记录）
+
+        限流计数（acquire / record_success / record_failure）只在提问一层做一次（见 IndexCheckService._ask_platform），
+        这里不再计数，只按限流器当前状态放大重试间隔
 
         Args:
             operation: 异步操作函数
             operation_name: 操作名称（用于日志）
             max_retries: 最大重试次数
-            retry_delay: 重试间隔（秒）
+            retry_delay: 基础重试间隔（秒），实际等待由平台限流器按当前状态放大
 
         Returns:
             操作结果
@@ -102,7 +296,7 @@ class AIPlatformChecker(ABC):
                     self._log("warning", f"操作失败: {operation_name}, 错误: {error_msg}")
 
                     if attempt < max_retries:
-                        delay = retry_delay + random.uniform(0, 1)
+                        delay = self.throttle.backoff_delay(attempt, retry_delay)
                         self._log("info", f"等待 {delay:.2f} 秒后进行第 {attempt + 1} 次重试")
                         await asyncio.sleep(delay)
                     else:
@@ -114,7 +308,7 @@ class AIPlatformChecker(ABC):
                 self._log("error", f"操作异常: {operation_name}, 错误: {e}")
 
                 if attempt < max_retries:
-                    delay = retry_delay + random.uniform(0, 1)
+                    delay = self.throttle.backoff_delay(attempt, retry_delay)
                     self._log("info", f"等待 {delay:.2f} 秒后进行第 {attempt + 1} 次重试")
                     await asyncio.sleep(delay)
 
@@ -123,13 +317,54 @@ class AIPlatformChecker(ABC):
             "error_msg": last_error or f"操作失败，已重试 {max_retries} 次"
         }
 
+    async def _is_any_visible(self, page: Page, indicators: List[str]) -> bool:
+        """任一选择器对应的元素可见"""
+        for indicator in indicators:
+            try:
+                element = await page.query_selector(indicator)
+                if element and await element.is_visible():
+                    return True
+            except Exception:
+                continue
+        return False
+
+    async def _handle_login_wall(self, page: Page, login_indicators: List[str]):
+        """
+        处理登录墙：记下 login 异常（提问失败时按登录墙收紧），然后等待用户手动登录
+
+        登录元素消失就立即继续，最多等待 LOGIN_WAIT_SECONDS 秒（原来固定等 30 秒）
+        """
+        self._note_failure(page, "login")
+        deadline = time.time() + self.LOGIN_WAIT_SECONDS
+        while time.time() < deadline:
+            await asyncio.sleep(1)
+            if not await self._is_any_visible(page, login_indicators):
+                self._log("info", "登录元素已消失，继续检测")
+                break
+        # 重新等待页面稳定
+        await page.wait_for_load_state("domcontentloaded", timeout=30000)
+
+    async def _detect_captcha(self, page: Page) -> bool:
+        """
+        检测验证码/风控页面，出现时记下 captcha 异常（提问失败时按验证码大幅收紧）
+
+        Returns:
+            是否出现验证码
+        """
+        if await self._is_any_visible(page, self.CAPTCHA_INDICATORS):
+            self._log("warning", "检测到验证码/风控页面")
+            self._note_failure(page, "captcha")
+            return True
+        return False
+
     @abstractmethod
     async def check(
         self,
         page: Page,
         question: str,
         keyword: str,
-        company: str
+        company: str,
+        matcher: Optional[HitMatcher] = None
     ) -> Dict[str, Any]:
         """
         检测AI平台收录情况
@@ -139,6 +374,7 @@ class AIPlatformChecker(ABC):
             question: 检测使用的问题
             keyword: 目标关键词
             company: 公司名称
+            matcher: 项目级命中匹配器（含公司别名），可选
 
         Returns:
             检测结果：
@@ -196,23 +432,12 @@ class AIPlatformChecker(ABC):
                 "text='Sign in'"
             ]
             
-            has_login = False
-            for indicator in login_indicators:
-                try:
-                    # 使用 query_selector 而不是 query_selector_all，并检查可见性
-                    element = await page.query_selector(indicator)
-                    if element and await element.is_visible():
-                        has_login = True
-                        break
-                except Exception:
-                    continue
-            
-            if has_login:
+            if await self._is_any_visible(page, login_indicators):
                 self._log("info", "检测到登录页面，请手动完成登录")
-                # 给用户30秒时间完成登录
-                await asyncio.sleep(30)
-                # 重新等待页面稳定
-                await page.wait_for_load_state("domcontentloaded", timeout=30000)
+                await self._handle_login_wall(page, login_indicators)
+
+            if await self._detect_captcha(page):
+                return False
 
             return True
         except Exception as e:
@@ -430,6 +655,239 @@ class AIPlatformChecker(ABC):
             "stable": stable_count >= required_stable_checks
         }
 
+    def get_completion_signals(self) -> Dict[str, Any]:
+        """
+        获取平台的回答完成信号（子类 COMPLETION_SIGNALS 覆盖基类默认值）
+        """
+        signals = dict(AIPlatformChecker.COMPLETION_SIGNALS)
+        signals.update(self.COMPLETION_SIGNALS)
+        return signals
+
+    async def start_answer_watch(self, page: Page) -> bool:
+        """
+        在页面内安装回答监听器（必须在提交问题之前调用）
+
+        Returns:
+            是否安装成功
+        """
+        signals = self.get_completion_signals()
+        try:
+            await page.evaluate(self._ANSWER_WATCH_INSTALL_JS, signals["stop_generating"])
+            return True
+        except Exception as e:
+            self._log("warning", f"安装回答监听器失败: {e}")
+            return False
+
+    async def wait_for_answer_completion(
+        self,
+        page: Page,
+        timeout: int = 60000,
+        min_growth: int = 100,
+        watch_installed: bool = True
+    ) -> Dict[str, Any]:
+        """
+        事件驱动地等待AI回答生成完成
+
+        基于页面内 MutationObserver 和平台的"停止生成"/"发送按钮恢复"信号，
+        回答一稳定立即返回，不再跨进程反复读取整页文本。
+        监听器未安装时回退到 wait_for_answer_generation 轮询。
+
+        Args:
+            page: Playwright Page对象
+            timeout: 最大等待时间（毫秒）
+            min_growth: 页面文本至少增长多少字符才算有回答
+            watch_installed: 是否已调用 start_answer_watch
+
+        Returns:
+            等待结果信息
+        """
+        if not watch_installed:
+            initial_content = await page.inner_text("body")
+            return await self.wait_for_answer_generation(page, initial_content, timeout=timeout)
+
+        signals = self.get_completion_signals()
+        cfg = {
+            "stop": signals["stop_generating"],
+            "send": signals["send_button"],
+            "quietMs": signals["quiet_ms"],
+            "settleMs": signals["settle_ms"],
+            "minGrowth": min_growth
+        }
+
+        self._log("info", f"开始事件驱动等待回答生成, 超时时间: {timeout}ms")
+        start_time = time.time()
+
+        try:
+            handle = await page.wait_for_function(
+                self._ANSWER_SETTLED_JS,
+                arg=cfg,
+                polling=250,
+                timeout=timeout
+            )
+            settled = await handle.json_value()
+            elapsed_time = (time.time() - start_time) * 1000
+            self._log(
+                "info",
+                f"回答生成完成, 信号: {settled.get('signal')}, 耗时: {elapsed_time:.0f}ms, "
+                f"新增内容: {settled.get('grown')} 字符"
+            )
+            return {
+                "success": True,
+                "content_length": settled.get("grown", 0),
+                "elapsed_time": elapsed_time,
+                "stable": True,
+                "signal": settled.get("signal")
+            }
+        except Exception as e:
+            elapsed_time = (time.time() - start_time) * 1000
+            content_length = 0
+            try:
+                content_length = await page.evaluate(
+                    "() => window.__geoAnswerWatch && document.body"
+                    " ? document.body.textContent.length - window.__geoAnswerWatch.initialLength : 0"
+                )
+            except Exception:
+                pass
+
+            self._log("warning", f"等待回答超时或失败: {e}, 耗时: {elapsed_time:.0f}ms, 新增内容: {content_length}")
+            return {
+                "success": content_length > min_growth,
+                "content_length": content_length,
+                "elapsed_time": elapsed_time,
+                "stable": False,
+                "signal": None
+            }
+
+    def parse_stream_body(self, body: str) -> str:
+        """
+        把流式对话接口的响应体组装成完整回答（子类可按平台协议覆盖）
+
+        默认按增量协议处理：逐条取出 OpenAI 风格的 delta 内容或常见的文本字段并拼接
+
+        Args:
+            body: 响应体文本
+
+        Returns:
+            回答文本
+        """
+        parts = []
+        for payload in iter_sse_payloads(body):
+            if not isinstance(payload, dict):
+                continue
+            choices = payload.get("choices")
+            if isinstance(choices, list) and choices:
+                delta = choices[0].get("delta") or choices[0].get("message") or {}
+                content = delta.get("content") if isinstance(delta, dict) else None
+                if isinstance(content, str):
+                    parts.append(content)
+                continue
+            for key in ("content", "text", "answer"):
+                value = payload.get(key)
+                if isinstance(value, str):
+                    parts.append(value)
+                    break
+        return "".join(parts)
+
+    async def start_stream_capture(self, page: Page) -> Optional[StreamCapture]:
+        """
+        网络抓取模式下开始监听平台的流式对话接口（必须在提交问题之前调用）
+
+        Returns:
+            抓取器；未开启网络抓取或平台不支持时返回 None
+        """
+        url_patterns = self.STREAM_CAPTURE.get("url_patterns") or []
+        if self.capture_mode != "network" or not url_patterns:
+            return None
+
+        capture = StreamCapture(
+            page,
+            url_patterns=url_patterns,
+            parser=self.parse_stream_body,
+            via_route=self.STREAM_CAPTURE.get("via_route", False),
+            platform_name=self.name
+        )
+        try:
+            await capture.start()
+            return capture
+        except Exception as e:
+            self._log("warning", f"启动网络抓取失败, 回退到页面抓取: {e}")
+            return None
+
+    async def collect_answer(
+        self,
+        page: Page,
+        question: str,
+        watch_installed: bool = True,
+        capture: Optional[StreamCapture] = None,
+        timeout: int = 60000
+    ) -> tuple:
+        """
+        等待回答完成并获取回答内容
+
+        有网络抓取器时直接从对话接口组装回答，完全跳过DOM等待和抓取；
+        抓取失败时回退到事件驱动等待 + 页面抓取
+
+        Returns:
+            (等待结果, 回答结果)
+        """
+        if capture is not None:
+            try:
+                captured = await capture.wait_for_answer(timeout=timeout)
+            finally:
+                await capture.stop()
+
+            if captured["success"]:
+                answer_text = captured["answer"]
+                self._log("info", f"网络抓取回答成功, 耗时: {captured['elapsed_time']:.0f}ms, 长度: {len(answer_text)}")
+                wait_result = {
+                    "success": True,
+                    "content_length": len(answer_text),
+                    "elapsed_time": captured["elapsed_time"],
+                    "stable": True,
+                    "signal": "network"
+                }
+                answer_result = {
+                    "success": True,
+                    "answer": answer_text[:5000],
+                    "selector": "network-stream",
+                    "length": len(answer_text),
+                    "links": []  # 跳过了DOM等待，引用只从回答文本里提取
+                }
+                return wait_result, answer_result
+
+            self._log("warning", f"网络抓取回答失败, 回退到页面抓取: {captured['error_msg']}")
+
+        wait_result = await self.wait_for_answer_completion(
+            page,
+            timeout=timeout,
+            watch_installed=watch_installed
+        )
+        answer_result = await self.get_answer_content(page, question)
+        answer_result["links"] = await self.collect_citation_links(page)
+        return wait_result, answer_result
+
+    async def collect_citation_links(self, page: Page) -> List[Dict[str, Any]]:
+        """
+        收集回答引用区域里的外链
+
+        Returns:
+            [{"url", "title"}]，失败时返回空列表
+        """
+        try:
+            return await page.evaluate(self._CITATION_LINKS_JS, self.CITATION_SELECTORS)
+        except Exception as e:
+            self._log("debug", f"收集引用链接失败: {e}")
+            return []
+
+    def extract_answer_citations(self, answer: Optional[str], links: Optional[List[Dict[str, Any]]] = None) -> List[Dict[str, Any]]:
+        """
+        从回答文本和引用链接中提取引用（排除平台自身域名）
+
+        Returns:
+            [{"url", "domain", "title", "position"}]
+        """
+        return extract_citations(answer, links, exclude_domains=self.OWN_DOMAINS)
+
     async def get_answer_content(
         self,
         page: Page,
@@ -587,63 +1045,30 @@ class AIPlatformChecker(ABC):
         self,
         text: str,
         keyword: str,
-        company: str
+        company: str,
+        matcher: Optional[HitMatcher] = None
     ) -> Dict[str, Any]:
         """
-        检查文本中是否包含关键词和公司名
+        检查文本中是否包含关键词和公司名（含公司别名）
 
         Args:
             text: 待检测文本
             keyword: 目标关键词
             company: 公司名称
+            matcher: 项目级命中匹配器，为空时按关键词+公司名取缓存的匹配器
 
         Returns:
             检测结果详细信息
         """
         self._log("info", f"开始关键词检测, 文本长度: {len(text)}")
 
-        import re
-        
-        def clean_str(s: str) -> str:
-            # 统一清理逻辑：替换非字字符为空格，合并空格，转小写
-            s = re.sub(r'[^\w\s\u4e00-\u9fa5]', ' ', s)
-            s = re.sub(r'\s+', ' ', s).strip()
-            return s.lower()
-
-        text_lower = clean_str(text)
-        keyword_lower = clean_str(keyword)
-        company_lower = clean_str(company)
-
-        keyword_count = text_lower.count(keyword_lower)
-        company_count = text_lower.count(company_lower)
-
-        keyword_positions = [m.start() for m in re.finditer(re.escape(keyword_lower), text_lower)]
-
-        result = {
-            "keyword_found": keyword_count > 0,
-            "keyword_count": keyword_count,
-            "keyword_positions": keyword_positions[:5],
-            "company_found": company_count > 0,
-            "company_count": company_count,
-            "confidence": 0.0,
-            "reason": ""
-        }
-
-        if keyword_count > 0:
-            result["keyword_found"] = True
-            result["confidence"] = min(0.5 + keyword_count * 0.1, 0.9)
-            result["reason"] = f"关键词'{keyword}'出现{keyword_count}次"
-
-        if company_count > 0:
-            result["company_found"] = True
-            result["confidence"] = min(result["confidence"] + 0.2, 0.95)
-            result["reason"] += f", 公司名'{company}'出现{company_count}次"
+        if matcher is None or keyword_label(keyword) not in matcher.labels:
+            matcher = get_project_matcher([keyword], company)
 
-        if len(text) < 100 and keyword_count > 0:
-            result["confidence"] = min(result["confidence"] + 0.1, 0.85)
+        result = matcher.evaluate(text, keyword, company)
 
-        self._log("info", f"关键词检测完成: 关键词={result['keyword_found']}({keyword_count}次), "
-                         f"公司={result['company_found']}({company_count}次), "
+        self._log("info", f"关键词检测完成: 关键词={result['keyword_found']}({result['keyword_count']}次), "
+                         f"公司={result['company_found']}({result['company_count']}次), "
                          f"置信度={result['confidence']:.2f}")
 
         return result
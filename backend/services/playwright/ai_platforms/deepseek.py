@@ -4,11 +4,13 @@ DeepSeek检测器
 用这个来检测DeepSeek的收录情况！
 """
 
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 from playwright.async_api import Page
 import asyncio
 
-from .base import AIPlatformChecker
+from backend.services.hit_matcher import HitMatcher
+from .base import AIPlatformChecker, PhaseTimer
+from .stream_capture import iter_sse_payloads
 
 
 class DeepSeekChecker(AIPlatformChecker):
@@ -38,6 +40,29 @@ class DeepSeekChecker(AIPlatformChecker):
         ]
     }
 
+    # DeepSeek回答完成信号：发送按钮在生成中变成停止按钮，结束后恢复
+    COMPLETION_SIGNALS = {
+        "stop_generating": [
+            "div[class*='ds-button'] [class*='stop']",
+            "[class*='stop-button']",
+            "[aria-label*='Stop']",
+            "[aria-label*='停止']"
+        ],
+        "send_button": [
+            "div[class*='ds-button']",
+            "[class*='send-button']"
+        ]
+    }
+
+    # 平台自身域名，不算作引用
+    OWN_DOMAINS = ["deepseek.com"]
+
+    # DeepSeek流式对话接口：OpenAI 风格的 choices[].delta，或新版的 {"p": 路径, "v": 增量} 补丁
+    STREAM_CAPTURE = {
+        "url_patterns": ["/api/v0/chat/completion"],
+        "via_route": False
+    }
+
     async def navigate_to_page(self, page: Page) -> bool:
         """
         DeepSeek特殊导航逻辑
@@ -47,7 +72,7 @@ class DeepSeekChecker(AIPlatformChecker):
             是否成功导航
         """
         try:
-            url = "https://chat.deepseek.com"
+            url = self.config.get("chat_url", "https://chat.deepseek.com")
             self._log("info", f"正在导航到DeepSeek页面: {url}")
 
             await page.goto(
@@ -74,20 +99,12 @@ class DeepSeekChecker(AIPlatformChecker):
                 "[class*='auth']"
             ]
             
-            has_login = False
-            for indicator in login_indicators:
-                try:
-                    element = await page.query_selector(indicator)
-                    if element and await element.is_visible():
-                        has_login = True
-                        break
-                except Exception:
-                    continue
-
-            if has_login:
+            if await self._is_any_visible(page, login_indicators):
                 self._log("info", "检测到登录页面，请手动完成登录")
-                await asyncio.sleep(30)
-                await page.wait_for_load_state("domcontentloaded", timeout=30000)
+                await self._handle_login_wall(page, login_indicators)
+
+            if await self._detect_captcha(page):
+                return False
 
             return True
         except Exception as e:
@@ -142,12 +159,33 @@ class DeepSeekChecker(AIPlatformChecker):
         # 如果专用选择器失败，回退到基类逻辑
         return await super().get_answer_content(page, question)
 
+    def parse_stream_body(self, body: str) -> str:
+        """DeepSeek流式协议：兼容 delta 增量和 {"p","v"} 补丁两种格式，跳过思考过程"""
+        parts = []
+        current_path = ""
+        for payload in iter_sse_payloads(body):
+            if not isinstance(payload, dict):
+                continue
+            choices = payload.get("choices")
+            if isinstance(choices, list) and choices:
+                delta = choices[0].get("delta") or {}
+                if delta.get("type", "text") == "text" and isinstance(delta.get("content"), str):
+                    parts.append(delta["content"])
+                continue
+            if "p" in payload:
+                current_path = payload.get("p") or ""
+            value = payload.get("v")
+            if isinstance(value, str) and "thinking" not in current_path:
+                parts.append(value)
+        return "".join(parts)
+
     async def check(
         self,
         page: Page,
         question: str,
         keyword: str,
-        company: str
+        company: str,
+        matcher: Optional[HitMatcher] = None
     ) -> Dict[str, Any]:
         """
         检测DeepSeek收录情况
@@ -158,6 +196,8 @@ class DeepSeekChecker(AIPlatformChecker):
         self._log("info", f"开始检测, 问题: {question[:50]}...")
         self._log("info", f"目标关键词: {keyword}, 公司: {company}")
 
+        timer = PhaseTimer()
+
         try:
             async def navigate_operation():
                 if await self.navigate_to_page(page):
@@ -209,11 +249,17 @@ class DeepSeekChecker(AIPlatformChecker):
                 }
 
             self._log("info", f"找到输入框: {matched_selector}")
+            timer.mark("navigate")
 
             # 使用基类稳健的提交方法
             submit_selectors = self.SELECTORS.get("submit_button", [])
             submit_btn = submit_selectors[0] if submit_selectors else None
             
+            # 提交前安装回答监听器，这样才能捕获到回答生成的全过程
+            watch_installed = await self.start_answer_watch(page)
+            # 网络抓取模式下同时监听平台的流式对话接口
+            capture = await self.start_stream_capture(page)
+
             await self.submit_question(
                 page=page,
                 question=question,
@@ -222,23 +268,22 @@ class DeepSeekChecker(AIPlatformChecker):
             )
             
             self._log("info", "已提交问题")
+            timer.mark("submit")
 
-            initial_content = await page.inner_text("body")
-
-            wait_result = await self.wait_for_answer_generation(
+            wait_result, answer_result = await self.collect_answer(
                 page,
-                initial_content,
-                timeout=60000,
-                check_interval=2.0
+                question,
+                watch_installed=watch_installed,
+                capture=capture,
+                timeout=60000
             )
+            timer.mark_answer(wait_result)
 
             if wait_result["success"]:
                 self._log("info", f"回答生成成功, 长度: {wait_result['content_length']} 字符")
             else:
                 self._log("warning", f"回答生成未完成, 长度: {wait_result.get('content_length', 0)} 字符")
 
-            answer_result = await self.get_answer_content(page, question)
-
             if not answer_result["success"]:
                 self._log("warning", "未能获取到AI回答内容")
 
@@ -248,7 +293,7 @@ class DeepSeekChecker(AIPlatformChecker):
                 answer_text = await page.inner_text("body")
                 self._log("info", f"使用页面全文作为回答, 长度: {len(answer_text)}")
 
-            check_result = self.check_keywords_in_text(answer_text, keyword, company)
+            check_result = self.check_keywords_in_text(answer_text, keyword, company, matcher=matcher)
 
             self._log("info", "检测完成")
             self._log("info", f"关键词 '{keyword}' 检测结果: {check_result['keyword_found']}")
@@ -264,7 +309,10 @@ class DeepSeekChecker(AIPlatformChecker):
                 "keyword_count": check_result.get("keyword_count", 0),
                 "company_count": check_result.get("company_count", 0),
                 "confidence": check_result.get("confidence", 0.0),
+                "hits": check_result.get("hits", {}),
                 "answer_length": len(answer_text),
+                "citations": self.extract_answer_citations(answer_result.get("answer", ""), answer_result.get("links")),
+                "timings": timer.timings,
                 "wait_info": wait_result,
                 "answer_selector": answer_result.get("selector"),
                 "operation_logs": operation_logs,
@@ -4,11 +4,14 @@
 用这个来检测豆包的收录情况！
 """
 
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 from playwright.async_api import Page
 import asyncio
+import json
 
-from .base import AIPlatformChecker
+from backend.services.hit_matcher import HitMatcher
+from .base import AIPlatformChecker, PhaseTimer
+from .stream_capture import iter_sse_payloads
 
 
 class DoubaoChecker(AIPlatformChecker):
@@ -28,7 +31,7 @@ class DoubaoChecker(AIPlatformChecker):
         """
         try:
             # 使用与配置一致的URL（与心跳检测保持一致）
-            chat_url = "https://www.doubao.com"
+            chat_url = self.config.get("chat_url", "https://www.doubao.com")
             self._log("info", f"正在导航到豆包页面: {chat_url}")
 
             # 使用 domcontentloaded 代替 load/networkidle，加快响应速度
@@ -67,24 +70,12 @@ class DoubaoChecker(AIPlatformChecker):
                 "text='Sign in'"
             ]
 
-            has_login = False
-            # 快速扫描登录元素
-            for indicator in doubao_login_indicators:
-                try:
-                    # 使用较短的超时时间
-                    element = await page.query_selector(indicator)
-                    if element and await element.is_visible():
-                        has_login = True
-                        break
-                except Exception:
-                    continue
-
-            if has_login:
+            if await self._is_any_visible(page, doubao_login_indicators):
                 self._log("info", "检测到豆包登录页面，请手动完成登录")
-                # 给用户30秒时间完成登录
-                await asyncio.sleep(30)
-                # 重新等待页面稳定
-                await page.wait_for_load_state("domcontentloaded", timeout=30000)
+                await self._handle_login_wall(page, doubao_login_indicators)
+
+            if await self._detect_captcha(page):
+                return False
             
             self._log("info", "豆包平台导航完成")
             return True
@@ -115,6 +106,29 @@ class DoubaoChecker(AIPlatformChecker):
         ]
     }
 
+    # 豆包回答完成信号：生成中输入区出现"停止"按钮，结束后恢复发送按钮
+    COMPLETION_SIGNALS = {
+        "stop_generating": [
+            "button[data-testid*='stop']",
+            "[data-testid*='break']",
+            "button[class*='stop']",
+            "[class*='break-btn']"
+        ],
+        "send_button": [
+            "button[data-testid*='send']",
+            "button[class*='send']"
+        ]
+    }
+
+    # 平台自身域名，不算作引用
+    OWN_DOMAINS = ["doubao.com", "bytedance.com", "douyin.com"]
+
+    # 豆包流式对话接口：每条事件的 event_data 是嵌套的 JSON 字符串，内容为增量文本
+    STREAM_CAPTURE = {
+        "url_patterns": ["/samantha/chat/completion", "/chat/completion"],
+        "via_route": False
+    }
+
     async def get_answer_content(
         self,
         page: Page,
@@ -252,12 +266,39 @@ class DoubaoChecker(AIPlatformChecker):
         text = text.replace("内容由 AI 生成", "")
         return text.strip()
 
+    def parse_stream_body(self, body: str) -> str:
+        """豆包流式协议：event_data -> message.content -> text 逐层解析后拼接增量文本"""
+        parts = []
+        for payload in iter_sse_payloads(body):
+            if not isinstance(payload, dict):
+                continue
+            event_data = payload.get("event_data")
+            if isinstance(event_data, str):
+                try:
+                    event_data = json.loads(event_data)
+                except ValueError:
+                    continue
+            if not isinstance(event_data, dict):
+                continue
+            message = event_data.get("message") or {}
+            content = message.get("content") if isinstance(message, dict) else None
+            if isinstance(content, str):
+                try:
+                    content = json.loads(content)
+                except ValueError:
+                    parts.append(content)
+                    continue
+            if isinstance(content, dict) and isinstance(content.get("text"), str):
+                parts.append(content["text"])
+        return "".join(parts) or super().parse_stream_body(body)
+
     async def check(
         self,
         page: Page,
         question: str,
         keyword: str,
-        company: str
+        company: str,
+        matcher: Optional[HitMatcher] = None
     ) -> Dict[str, Any]:
         """
         检测豆包收录情况
@@ -268,6 +309,8 @@ class DoubaoChecker(AIPlatformChecker):
         self._log("info", f"开始检测, 问题: {question[:50]}...")
         self._log("info", f"目标关键词: {keyword}, 公司: {company}")
 
+        timer = PhaseTimer()
+
         try:
             async def navigate_operation():
                 if await self.navigate_to_page(page):
@@ -319,11 +362,17 @@ class DoubaoChecker(AIPlatformChecker):
                 }
 
             self._log("info", f"找到输入框: {matched_selector}")
+            timer.mark("navigate")
 
             # 使用基类稳健的提交方法
             submit_selectors = self.SELECTORS.get("submit_button", [])
             submit_btn = submit_selectors[0] if submit_selectors else None
             
+            # 提交前安装回答监听器，这样才能捕获到回答生成的全过程
+            watch_installed = await self.start_answer_watch(page)
+            # 网络抓取模式下同时监听平台的流式对话接口
+            capture = await self.start_stream_capture(page)
+
             await self.submit_question(
                 page=page,
                 question=question,
@@ -332,23 +381,22 @@ class DoubaoChecker(AIPlatformChecker):
             )
             
             self._log("info", "已提交问题")
+            timer.mark("submit")
 
-            initial_content = await page.inner_text("body")
-
-            wait_result = await self.wait_for_answer_generation(
+            wait_result, answer_result = await self.collect_answer(
                 page,
-                initial_content,
-                timeout=60000,
-                check_interval=2.0
+                question,
+                watch_installed=watch_installed,
+                capture=capture,
+                timeout=60000
             )
+            timer.mark_answer(wait_result)
 
             if wait_result["success"]:
                 self._log("info", f"回答生成成功, 长度: {wait_result['content_length']} 字符")
             else:
                 self._log("warning", f"回答生成未完成, 长度: {wait_result.get('content_length', 0)} 字符")
 
-            answer_result = await self.get_answer_content(page, question)
-
             if not answer_result["success"]:
                 self._log("warning", "未能获取到AI回答内容")
 
@@ -358,7 +406,7 @@ class DoubaoChecker(AIPlatformChecker):
                 answer_text = await page.inner_text("body")
                 self._log("info", f"使用页面全文作为回答, 长度: {len(answer_text)}")
 
-            check_result = self.check_keywords_in_text(answer_text, keyword, company)
+            check_result = self.check_keywords_in_text(answer_text, keyword, company, matcher=matcher)
 
             self._log("info", "检测完成")
             self._log("info", f"关键词 '{keyword}' 检测结果: {check_result['keyword_found']}")
@@ -374,7 +422,10 @@ class DoubaoChecker(AIPlatformChecker):
                 "keyword_count": check_result.get("keyword_count", 0),
                 "company_count": check_result.get("company_count", 0),
                 "confidence": check_result.get("confidence", 0.0),
+                "hits": check_result.get("hits", {}),
                 "answer_length": len(answer_text),
+                "citations": self.extract_answer_citations(answer_result.get("answer", ""), answer_result.get("links")),
+                "timings": timer.timings,
                 "wait_info": wait_result,
                 "answer_selector": answer_result.get("selector"),
                 "operation_logs": operation_logs,
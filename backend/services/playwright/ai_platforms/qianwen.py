@@ -4,11 +4,13 @@
 用这个来检测通义千问的收录情况！
 """
 
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 from playwright.async_api import Page
 import asyncio
 
-from .base import AIPlatformChecker
+from backend.services.hit_matcher import HitMatcher
+from .base import AIPlatformChecker, PhaseTimer
+from .stream_capture import iter_sse_payloads
 
 
 class QianwenChecker(AIPlatformChecker):
@@ -44,6 +46,30 @@ class QianwenChecker(AIPlatformChecker):
         ]
     }
 
+    # 通义千问回答完成信号：生成中出现"停止生成"，结束后出现复制/重新生成等操作栏
+    COMPLETION_SIGNALS = {
+        "stop_generating": [
+            "[class*='stop-btn']",
+            "[class*='stopBtn']",
+            "[class*='stop-generat']",
+            "button[aria-label*='停止']"
+        ],
+        "send_button": [
+            "div[class*='ant-input-suffix'] button",
+            "span[class*='ant-input-suffix'] button"
+        ],
+        "settle_ms": 800
+    }
+
+    # 平台自身域名，不算作引用
+    OWN_DOMAINS = ["tongyi.aliyun.com", "qianwen.com", "aliyun.com"]
+
+    # 通义千问流式对话接口：每条事件携带截至当前的完整回答（累积协议）
+    STREAM_CAPTURE = {
+        "url_patterns": ["/dialog/conversation"],
+        "via_route": False
+    }
+
     async def navigate_to_page(self, page: Page) -> bool:
         """
         通义千问特殊导航逻辑
@@ -54,7 +80,7 @@ class QianwenChecker(AIPlatformChecker):
         """
         try:
             # 确保使用正确的聊天URL
-            url = "https://tongyi.aliyun.com/qianwen/"
+            url = self.config.get("chat_url", "https://tongyi.aliyun.com/qianwen/")
             self._log("info", f"正在导航到通义千问页面: {url}")
 
             await page.goto(
@@ -82,20 +108,12 @@ class QianwenChecker(AIPlatformChecker):
                 "[class*='auth']"
             ]
             
-            has_login = False
-            for indicator in login_indicators:
-                try:
-                    element = await page.query_selector(indicator)
-                    if element and await element.is_visible():
-                        has_login = True
-                        break
-                except Exception:
-                    continue
-
-            if has_login:
+            if await self._is_any_visible(page, login_indicators):
                 self._log("info", "检测到登录页面，请手动完成登录")
-                await asyncio.sleep(30)
-                await page.wait_for_load_state("domcontentloaded", timeout=30000)
+                await self._handle_login_wall(page, login_indicators)
+
+            if await self._detect_captcha(page):
+                return False
 
             return True
         except Exception as e:
@@ -318,12 +336,30 @@ class QianwenChecker(AIPlatformChecker):
             "length": 0
         }
 
+    def parse_stream_body(self, body: str) -> str:
+        """通义千问流式协议：取最后一条事件里的完整文本内容"""
+        answer = ""
+        for payload in iter_sse_payloads(body):
+            if not isinstance(payload, dict):
+                continue
+            contents = payload.get("contents")
+            if not isinstance(contents, list):
+                continue
+            texts = [
+                c.get("content") for c in contents
+                if isinstance(c, dict) and c.get("contentType", "text") == "text" and isinstance(c.get("content"), str)
+            ]
+            if texts:
+                answer = "\n".join(texts)
+        return answer or super().parse_stream_body(body)
+
     async def check(
         self,
         page: Page,
         question: str,
         keyword: str,
-        company: str
+        company: str,
+        matcher: Optional[HitMatcher] = None
     ) -> Dict[str, Any]:
         """
         检测通义千问收录情况
@@ -334,6 +370,8 @@ class QianwenChecker(AIPlatformChecker):
         self._log("info", f"开始检测, 问题: {question[:50]}...")
         self._log("info", f"目标关键词: {keyword}, 公司: {company}")
 
+        timer = PhaseTimer()
+
         try:
             async def navigate_operation():
                 if await self.navigate_to_page(page):
@@ -385,11 +423,17 @@ class QianwenChecker(AIPlatformChecker):
                 }
 
             self._log("info", f"找到输入框: {matched_selector}")
+            timer.mark("navigate")
 
             # 使用基类稳健的提交方法
             submit_selectors = self.SELECTORS.get("submit_button", [])
             submit_btn = submit_selectors[0] if submit_selectors else None
             
+            # 提交前安装回答监听器，这样才能捕获到回答生成的全过程
+            watch_installed = await self.start_answer_watch(page)
+            # 网络抓取模式下同时监听平台的流式对话接口
+            capture = await self.start_stream_capture(page)
+
             await self.submit_question(
                 page=page,
                 question=question,
@@ -398,23 +442,22 @@ class QianwenChecker(AIPlatformChecker):
             )
             
             self._log("info", "已提交问题")
+            timer.mark("submit")
 
-            initial_content = await page.inner_text("body")
-
-            wait_result = await self.wait_for_answer_generation(
+            wait_result, answer_result = await self.collect_answer(
                 page,
-                initial_content,
-                timeout=60000,
-                check_interval=2.0
+                question,
+                watch_installed=watch_installed,
+                capture=capture,
+                timeout=60000
             )
+            timer.mark_answer(wait_result)
 
             if wait_result["success"]:
                 self._log("info", f"回答生成成功, 长度: {wait_result['content_length']} 字符")
             else:
                 self._log("warning", f"回答生成未完成, 长度: {wait_result.get('content_length', 0)} 字符")
 
-            answer_result = await self.get_answer_content(page, question)
-
             if not answer_result["success"]:
                 self._log("warning", "未能获取到AI回答内容")
 
@@ -424,7 +467,7 @@ class QianwenChecker(AIPlatformChecker):
                 answer_text = await page.inner_text("body")
                 self._log("info", f"使用页面全文作为回答, 长度: {len(answer_text)}")
 
-            check_result = self.check_keywords_in_text(answer_text, keyword, company)
+            check_result = self.check_keywords_in_text(answer_text, keyword, company, matcher=matcher)
 
             self._log("info", "检测完成")
             self._log("info", f"关键词 '{keyword}' 检测结果: {check_result['keyword_found']}")
@@ -440,7 +483,10 @@ class QianwenChecker(AIPlatformChecker):
                 "keyword_count": check_result.get("keyword_count", 0),
                 "company_count": check_result.get("company_count", 0),
                 "confidence": check_result.get("confidence", 0.0),
+                "hits": check_result.get("hits", {}),
                 "answer_length": len(answer_text),
+                "citations": self.extract_answer_citations(answer_result.get("answer", ""), answer_result.get("links")),
+                "timings": timer.timings,
                 "wait_info": wait_result,
                 "answer_selector": answer_result.get("selector"),
                 "operation_logs": operation_logs,
@@ -0,0 +1,179 @@
+# -*- coding: utf-8 -*-
+"""
+AI回答网络抓取
+直接读平台的流式对话接口，不再从DOM里扒回答！
+"""
+
+import asyncio
+import json
+import time
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from loguru import logger
+from playwright.async_api import Page, Response, Route
+
+
+def iter_sse_payloads(body: str) -> Iterator[Any]:
+    """
+    解析 SSE / NDJSON 响应体，逐条返回 JSON 数据
+
+    Args:
+        body: 响应体文本
+
+    Yields:
+        解析后的 JSON 对象（无法解析的行跳过）
+    """
+    for raw_line in body.splitlines():
+        line = raw_line.strip()
+        if not line:
+            continue
+        if line.startswith("data:"):
+            line = line[5:].strip()
+        elif line.startswith(("event:", "id:", "retry:", ":")):
+            continue
+        if not line or line == "[DONE]":
+            continue
+        try:
+            yield json.loads(line)
+        except (ValueError, TypeError):
+            continue
+
+
+class StreamCapture:
+    """
+    流式回答抓取器
+
+    注意：
+    - 默认通过 page.on("response") 监听，不影响页面的流式渲染
+    - via_route=True 时改用 page.route + route.fetch 拦截，整段读取后再原样交给页面，
+      适用于 response 事件拿不到流式响应体的平台
+    """
+
+    def __init__(
+        self,
+        page: Page,
+        url_patterns: List[str],
+        parser: Callable[[str], str],
+        via_route: bool = False,
+        platform_name: str = ""
+    ):
+        """
+        初始化抓取器
+
+        Args:
+            page: Playwright Page对象
+            url_patterns: 对话接口 URL 片段（任一命中即视为回答流）
+            parser: 响应体 -> 回答文本 的解析函数
+            via_route: 是否使用路由拦截
+            platform_name: 平台名称（用于日志）
+        """
+        self.page = page
+        self.url_patterns = url_patterns
+        self.parser = parser
+        self.via_route = via_route
+        self.platform_name = platform_name
+        self._matched = asyncio.Event()
+        self._body_ready = asyncio.Event()
+        self._response: Optional[Response] = None
+        self._body: Optional[str] = None
+        self._started = False
+
+    def _matches(self, url: str) -> bool:
+        return any(pattern in url for pattern in self.url_patterns)
+
+    def _on_response(self, response: Response):
+        if self._response is None and self._matches(response.url):
+            self._response = response
+            self._matched.set()
+
+    async def _on_route(self, route: Route):
+        if self._body is not None or route.request.method != "POST":
+            await route.continue_()
+            return
+        try:
+            self._matched.set()
+            fetched = await route.fetch()
+            self._body = await fetched.text()
+            self._body_ready.set()
+            await route.fulfill(response=fetched, body=self._body)
+        except Exception as e:
+            logger.debug(f"[{self.platform_name}] 路由拦截对话接口失败: {e}")
+            self._body_ready.set()
+            try:
+                await route.continue_()
+            except Exception:
+                pass
+
+    def _route_matcher(self, url: str) -> bool:
+        return self._matches(url)
+
+    async def start(self):
+        """开始监听（必须在提交问题之前调用）"""
+        if self._started:
+            return
+        if self.via_route:
+            await self.page.route(self._route_matcher, self._on_route)
+        else:
+            self.page.on("response", self._on_response)
+        self._started = True
+
+    async def stop(self):
+        """停止监听"""
+        if not self._started:
+            return
+        try:
+            if self.via_route:
+                await self.page.unroute(self._route_matcher, self._on_route)
+            else:
+                self.page.remove_listener("response", self._on_response)
+        except Exception as e:
+            logger.debug(f"[{self.platform_name}] 移除网络监听失败: {e}")
+        self._started = False
+
+    async def wait_for_answer(
+        self,
+        timeout: int = 60000,
+        start_timeout: int = 15000
+    ) -> Dict[str, Any]:
+        """
+        等待对话接口返回完毕并组装回答
+
+        Args:
+            timeout: 总超时（毫秒）
+            start_timeout: 等待对话接口出现的超时（毫秒），超时说明接口没命中，尽快回退
+
+        Returns:
+            {"success": bool, "answer": str, "elapsed_time": float, "error_msg": str}
+        """
+        start_time = time.time()
+
+        def elapsed_ms() -> float:
+            return (time.time() - start_time) * 1000
+
+        try:
+            await asyncio.wait_for(self._matched.wait(), timeout=start_timeout / 1000)
+        except asyncio.TimeoutError:
+            return {"success": False, "answer": "", "elapsed_time": elapsed_ms(), "error_msg": "未捕获到对话接口"}
+
+        remaining = max(timeout - elapsed_ms(), 1000) / 1000
+        try:
+            if self.via_route:
+                await asyncio.wait_for(self._body_ready.wait(), timeout=remaining)
+                body = self._body or ""
+            else:
+                await asyncio.wait_for(self._response.finished(), timeout=remaining)
+                body = await self._response.text()
+        except Exception as e:
+            return {"success": False, "answer": "", "elapsed_time": elapsed_ms(), "error_msg": f"读取对话接口失败: {e}"}
+
+        try:
+            answer = self.parser(body).strip()
+        except Exception as e:
+            return {"success": False, "answer": "", "elapsed_time": elapsed_ms(), "error_msg": f"解析回答流失败: {e}"}
+
+        return {
+            "success": bool(answer),
+            "answer": answer,
+            "elapsed_time": elapsed_ms(),
+            "error_msg": None if answer else "回答流为空"
+        }
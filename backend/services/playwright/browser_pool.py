@@ -0,0 +1,227 @@
+# -*- coding: utf-8 -*-
+"""
+收录检测浏览器池
+一次批量检测只启动一个浏览器，每个AI平台一个常驻上下文！
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from urllib.parse import urlparse
+
+from loguru import logger
+from playwright.async_api import async_playwright, Browser, BrowserContext, Page, Route
+
+from backend.config import DEFAULT_USER_AGENT, INDEX_CHECK_BROWSER_PROFILES, INDEX_CHECK_BROWSER_PROFILE
+
+
+def get_browser_profile(name: Optional[str] = None) -> Dict[str, Any]:
+    """
+    获取收录检测浏览器模式配置
+
+    Args:
+        name: 模式名（headed / headless），为空时使用 INDEX_CHECK_BROWSER_PROFILE
+
+    Returns:
+        模式配置（附带 name 字段）
+
+    Raises:
+        ValueError: 未知的模式名
+    """
+    name = name or INDEX_CHECK_BROWSER_PROFILE
+    if name not in INDEX_CHECK_BROWSER_PROFILES:
+        raise ValueError(f"未知的浏览器模式: {name}，可选: {', '.join(INDEX_CHECK_BROWSER_PROFILES)}")
+    return {"name": name, **INDEX_CHECK_BROWSER_PROFILES[name]}
+
+
+class BrowserPool:
+    """
+    长生命周期的浏览器/上下文池
+
+    注意：
+    - 浏览器在第一次借用时才启动，整个批次只启动一次
+    - 每个平台的上下文只从 secure_session_manager 加载一次会话，之后一直保持热状态
+    - 关闭时统一回写各平台的会话状态
+    - 配置了屏蔽规则时，每个上下文都会拦截对应类型的资源和第三方统计域名的请求
+    """
+
+    def __init__(
+        self,
+        launcher: Callable[[Any], Awaitable[Browser]],
+        user_id: int = 1,
+        project_id: int = 1,
+        use_sessions: bool = True,
+        block_resource_types: Optional[List[str]] = None,
+        block_domains: Optional[List[str]] = None
+    ):
+        """
+        初始化浏览器池
+
+        Args:
+            launcher: 浏览器启动函数，接收 playwright 实例返回 Browser
+            user_id: 会话所属用户ID
+            project_id: 会话所属项目ID
+            use_sessions: 是否加载/回写平台会话（压测模拟平台时关闭，避免污染真实会话）
+            block_resource_types: 拦截的资源类型，如 image / media / font
+            block_domains: 拦截的域名（含子域名）
+        """
+        self._launcher = launcher
+        self.user_id = user_id
+        self.project_id = project_id
+        self.use_sessions = use_sessions
+        self.block_resource_types = set(block_resource_types or [])
+        self.block_domains = tuple(d.lower().lstrip(".") for d in (block_domains or []))
+        self.blocked_requests = 0
+        self._playwright = None
+        self._browser: Optional[Browser] = None
+        self._contexts: Dict[str, BrowserContext] = {}
+        self._session_meta: Dict[str, Dict[str, Any]] = {}
+        self._launch_lock = asyncio.Lock()
+        self._context_locks: Dict[str, asyncio.Lock] = {}
+
+    @property
+    def is_started(self) -> bool:
+        return self._browser is not None
+
+    async def __aenter__(self) -> "BrowserPool":
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def _ensure_browser(self) -> Browser:
+        """确保浏览器已启动（并发安全，只启动一次）"""
+        async with self._launch_lock:
+            if self._browser is None:
+                self._playwright = await async_playwright().start()
+                self._browser = await self._launcher(self._playwright)
+                logger.info("🚀 [BrowserPool] 浏览器已启动")
+            return self._browser
+
+    async def get_context(self, platform_id: str) -> BrowserContext:
+        """
+        获取平台的常驻上下文（首次调用时加载会话并创建）
+
+        Args:
+            platform_id: AI平台ID
+
+        Returns:
+            该平台的 BrowserContext
+        """
+        lock = self._context_locks.setdefault(platform_id, asyncio.Lock())
+        async with lock:
+            context = self._contexts.get(platform_id)
+            if context is not None:
+                return context
+
+            browser = await self._ensure_browser()
+
+            storage_state = None
+            if self.use_sessions:
+                from backend.services.session_manager import secure_session_manager
+
+                storage_state = await secure_session_manager.load_session(
+                    user_id=self.user_id,
+                    project_id=self.project_id,
+                    platform=platform_id,
+                    validate=False
+                )
+
+            if storage_state:
+                logger.info(f"[BrowserPool] 成功加载平台 {platform_id} 的存储状态")
+                self._session_meta[platform_id] = {
+                    "created_at": storage_state.get("created_at"),
+                    "last_modified": storage_state.get("last_modified"),
+                }
+            elif self.use_sessions:
+                logger.warning(f"[BrowserPool] 未找到平台 {platform_id} 的存储状态，将使用新的会话")
+
+            context = await browser.new_context(
+                storage_state=storage_state,
+                user_agent=DEFAULT_USER_AGENT
+            )
+            if self.block_resource_types or self.block_domains:
+                await context.route("**/*", self._block_route)
+            self._contexts[platform_id] = context
+            return context
+
+    def is_blocked(self, resource_type: str, url: str) -> bool:
+        """请求是否命中屏蔽规则"""
+        if resource_type in self.block_resource_types:
+            return True
+        if not self.block_domains:
+            return False
+        host = (urlparse(url).hostname or "").lower()
+        return any(host == domain or host.endswith("." + domain) for domain in self.block_domains)
+
+    async def _block_route(self, route: Route):
+        """上下文级请求拦截：命中屏蔽规则的直接中止，其余原样放行"""
+        request = route.request
+        try:
+            if self.is_blocked(request.resource_type, request.url):
+                self.blocked_requests += 1
+                await route.abort()
+            else:
+                await route.continue_()
+        except Exception as e:
+            # 页面已关闭等情况下路由可能已失效
+            logger.debug(f"[BrowserPool] 请求拦截处理失败: {e}")
+
+    async def new_page(self, platform_id: str) -> Page:
+        """在平台的常驻上下文中打开一个新页面"""
+        context = await self.get_context(platform_id)
+        return await context.new_page()
+
+    async def save_sessions(self):
+        """将所有平台上下文的最新会话状态回写到 secure_session_manager"""
+        from backend.services.session_manager import secure_session_manager
+
+        for platform_id, context in list(self._contexts.items()):
+            try:
+                updated_storage_state = await context.storage_state()
+                # 保留原始会话中的时间戳信息
+                meta = self._session_meta.get(platform_id)
+                if meta:
+                    updated_storage_state["created_at"] = meta.get("created_at")
+                    updated_storage_state["last_modified"] = meta.get("last_modified")
+
+                save_result = await secure_session_manager.save_session(
+                    user_id=self.user_id,
+                    project_id=self.project_id,
+                    platform=platform_id,
+                    storage_state=updated_storage_state
+                )
+                if save_result:
+                    logger.info(f"[BrowserPool] 成功保存平台 {platform_id} 的更新会话状态")
+                else:
+                    logger.warning(f"[BrowserPool] 保存平台 {platform_id} 的更新会话状态失败")
+            except Exception as e:
+                logger.warning(f"[BrowserPool] 保存平台 {platform_id} 会话异常: {e}")
+
+    async def close(self):
+        """回写会话并释放所有上下文、浏览器和 Playwright 实例"""
+        if self._contexts and self.use_sessions:
+            await self.save_sessions()
+
+        for platform_id, context in list(self._contexts.items()):
+            try:
+                await context.close()
+            except Exception as e:
+                logger.debug(f"[BrowserPool] 关闭平台 {platform_id} 上下文失败: {e}")
+        self._contexts.clear()
+        self._session_meta.clear()
+        if self.blocked_requests:
+            logger.info(f"[BrowserPool] 本批次共拦截 {self.blocked_requests} 个资源请求")
+
+        if self._browser is not None:
+            try:
+                await self._browser.close()
+            except Exception as e:
+                logger.debug(f"[BrowserPool] 关闭浏览器失败: {e}")
+            self._browser = None
+
+        if self._playwright is not None:
+            try:
+                await self._playwright.stop()
+            except Exception as e:
+                logger.debug(f"[BrowserPool] 停止 Playwright 失败: {e}")
+            self._playwright = None
@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+"""
+收录检测执行器
+各AI平台并行检测，每个平台有自己的并发上限和提问节奏！
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from loguru import logger
+from playwright.async_api import Page
+
+from backend.config import INDEX_CHECK_PLATFORM_LIMITS, INDEX_CHECK_DEFAULT_LIMIT
+from backend.services.playwright.ai_platforms.base import AIPlatformChecker
+from backend.services.playwright.browser_pool import BrowserPool
+
+
+# 单个问题的检测处理函数：(checker, page, question_variant) -> 结果字典
+QuestionHandler = Callable[[AIPlatformChecker, Page, Any], Awaitable[Dict[str, Any]]]
+
+
+class CheckExecutor:
+    """
+    平台并行的检测执行器
+
+    注意：
+    - 不同平台之间完全并行，单个关键词的耗时取决于最慢的平台
+    - 同一平台内最多 max_concurrency 个页面同时提问，提问节奏由平台限流器控制（见 IndexCheckService._ask_platform）
+    - 页面都从 BrowserPool 的平台常驻上下文中借出
+    """
+
+    def __init__(
+        self,
+        pool: BrowserPool,
+        limits: Optional[Dict[str, Dict[str, Any]]] = None,
+        page_close_delay: float = 2.0
+    ):
+        """
+        初始化执行器
+
+        Args:
+            pool: 浏览器池
+            limits: 平台并发配置，默认读取 INDEX_CHECK_PLATFORM_LIMITS
+            page_close_delay: 关闭页面前的等待时间（秒）
+        """
+        self.pool = pool
+        self.limits = limits if limits is not None else INDEX_CHECK_PLATFORM_LIMITS
+        self.page_close_delay = page_close_delay
+
+    def get_limit(self, platform_id: str) -> Dict[str, Any]:
+        """获取平台的并发配置（缺省项用默认值补齐）"""
+        return {**INDEX_CHECK_DEFAULT_LIMIT, **self.limits.get(platform_id, {})}
+
+    async def run_platform(
+        self,
+        platform_id: str,
+        checker: AIPlatformChecker,
+        questions: List[Any],
+        handler: QuestionHandler
+    ) -> List[Dict[str, Any]]:
+        """
+        在单个平台上检测所有问题
+
+        Returns:
+            按问题原始顺序排列的结果列表
+        """
+        if not questions:
+            return []
+
+        limit = self.get_limit(platform_id)
+        concurrency = max(1, min(int(limit["max_concurrency"]), len(questions)))
+
+        queue: asyncio.Queue = asyncio.Queue()
+        for index, qv in enumerate(questions):
+            queue.put_nowait((index, qv))
+
+        results: List[Optional[Dict[str, Any]]] = [None] * len(questions)
+
+        async def worker(worker_no: int):
+            page = await self.pool.new_page(platform_id)
+            try:
+                while True:
+                    try:
+                        index, qv = queue.get_nowait()
+                    except asyncio.QueueEmpty:
+                        break
+                    results[index] = await handler(checker, page, qv)
+            finally:
+                if self.page_close_delay > 0:
+                    await asyncio.sleep(self.page_close_delay)
+                try:
+                    await page.close()
+                except Exception as e:
+                    logger.debug(f"[CheckExecutor] 关闭页面失败: {checker.name}#{worker_no}: {e}")
+
+        logger.info(f"[CheckExecutor] 平台 {checker.name}: {len(questions)} 个问题, 并发 {concurrency}")
+        await asyncio.gather(*(worker(n) for n in range(concurrency)))
+
+        return [r for r in results if r is not None]
+
+    async def run(
+        self,
+        checkers: Dict[str, AIPlatformChecker],
+        platforms: List[str],
+        questions: List[Any],
+        handler: QuestionHandler
+    ) -> List[Dict[str, Any]]:
+        """
+        所有平台并行检测
+
+        Returns:
+            按平台顺序、问题顺序排列的结果列表
+        """
+        lanes = []
+        for platform_id in platforms:
+            checker = checkers.get(platform_id)
+            if not checker:
+                logger.warning(f"未知的平台: {platform_id}")
+                continue
+            lanes.append((platform_id, checker))
+
+        lane_results = await asyncio.gather(
+            *(self.run_platform(pid, checker, questions, handler) for pid, checker in lanes),
+            return_exceptions=True
+        )
+
+        results = []
+        for (platform_id, checker), platform_results in zip(lanes, lane_results):
+            if isinstance(platform_results, BaseException):
+                logger.error(f"[CheckExecutor] 平台 {checker.name} 检测异常: {platform_results}")
+                continue
+            results.extend(platform_results)
+        return results
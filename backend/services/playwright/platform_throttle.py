@@ -0,0 +1,182 @@
+# -*- coding: utf-8 -*-
+"""
+AI平台限流与熔断
+每个平台一个自适应令牌桶：出现验证码、登录墙或报错时收紧，恢复正常后慢慢放开；平台明显挂了就直接熔断！
+"""
+
+import asyncio
+import random
+import time
+from typing import Any, Dict, Optional
+
+from loguru import logger
+
+from backend.config import INDEX_CHECK_THROTTLE, INDEX_CHECK_PLATFORM_THROTTLE
+
+
+class PlatformUnavailableError(Exception):
+    """平台熔断中，暂停访问"""
+
+    def __init__(self, platform_id: str, retry_after: float):
+        self.platform_id = platform_id
+        self.retry_after = retry_after
+        super().__init__(f"平台 {platform_id} 熔断中，{retry_after:.0f} 秒后再试")
+
+
+class PlatformThrottle:
+    """
+    平台限流器（自适应令牌桶 + 熔断器）
+
+    注意：
+    - 速率单位是"次/分钟"，成功一次加 increase_step，失败按 penalties 中的系数乘法收紧（AIMD）
+    - 连续失败达到 failure_threshold 次后熔断 cooldown_seconds 秒，之后放行一次试探：
+      试探成功恢复正常，失败则重新熔断
+    - 同一进程内每个平台只有一个实例（见 get_platform_throttle）
+    """
+
+    STATE_CLOSED = "closed"
+    STATE_OPEN = "open"
+    STATE_HALF_OPEN = "half_open"
+
+    def __init__(self, platform_id: str, config: Optional[Dict[str, Any]] = None):
+        """
+        初始化限流器
+
+        Args:
+            platform_id: 平台ID
+            config: 限流配置，默认读取 INDEX_CHECK_THROTTLE 和平台覆盖项
+        """
+        cfg = {**INDEX_CHECK_THROTTLE, **INDEX_CHECK_PLATFORM_THROTTLE.get(platform_id, {}), **(config or {})}
+        self.platform_id = platform_id
+        self.base_rate = float(cfg["rate_per_minute"])
+        self.min_rate = float(cfg["min_rate_per_minute"])
+        self.max_rate = float(cfg["max_rate_per_minute"])
+        self.increase_step = float(cfg["increase_step"])
+        self.penalties: Dict[str, float] = dict(cfg["penalties"])
+        self.burst = float(cfg["burst"])
+        self.failure_threshold = int(cfg["failure_threshold"])
+        self.cooldown_seconds = float(cfg["cooldown_seconds"])
+        self.max_backoff = float(cfg["max_backoff"])
+
+        self.rate = self.base_rate
+        self.tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+        self.consecutive_failures = 0
+        self._state = self.STATE_CLOSED
+        self._opened_at = 0.0
+
+    # ==================== 熔断器 ====================
+
+    @property
+    def state(self) -> str:
+        """当前熔断状态（冷却期过后自动转为半开）"""
+        if self._state == self.STATE_OPEN and time.monotonic() - self._opened_at >= self.cooldown_seconds:
+            self._state = self.STATE_HALF_OPEN
+            logger.info(f"[限流] {self.platform_id} 熔断冷却结束，放行试探请求")
+        return self._state
+
+    def is_open(self) -> bool:
+        """平台是否处于熔断中"""
+        return self.state == self.STATE_OPEN
+
+    def _retry_after(self) -> float:
+        return max(self.cooldown_seconds - (time.monotonic() - self._opened_at), 0.0)
+
+    def _trip(self, reason: str):
+        self._state = self.STATE_OPEN
+        self._opened_at = time.monotonic()
+        logger.warning(f"[限流] {self.platform_id} 熔断 {self.cooldown_seconds:.0f} 秒: {reason}")
+
+    # ==================== 令牌桶 ====================
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self._updated) * self.rate / 60)
+        self._updated = now
+
+    async def acquire(self, cost: float = 1.0):
+        """
+        获取令牌，令牌不足时等待
+
+        Raises:
+            PlatformUnavailableError: 平台熔断中
+        """
+        if self.is_open():
+            raise PlatformUnavailableError(self.platform_id, self._retry_after())
+
+        async with self._lock:
+            while True:
+                self._refill()
+                if self.tokens >= cost:
+                    self.tokens -= cost
+                    return
+                wait = (cost - self.tokens) * 60 / self.rate
+                await asyncio.sleep(wait)
+                if self.is_open():
+                    raise PlatformUnavailableError(self.platform_id, self._retry_after())
+
+    # ==================== 自适应调整 ====================
+
+    def record_success(self):
+        """记录一次正常响应：速率加性恢复，半开状态下恢复正常"""
+        self.consecutive_failures = 0
+        self.rate = min(self.max_rate, self.rate + self.increase_step)
+        if self._state == self.STATE_HALF_OPEN:
+            self._state = self.STATE_CLOSED
+            logger.info(f"[限流] {self.platform_id} 试探成功，恢复访问")
+
+    def record_failure(self, kind: str = "error"):
+        """
+        记录一次异常响应：速率乘法收紧，连续失败过多时熔断
+
+        Args:
+            kind: 异常类型：error=报错/超时 captcha=验证码 login=登录墙
+        """
+        self.consecutive_failures += 1
+        old_rate = self.rate
+        self.rate = max(self.min_rate, self.rate * self.penalties.get(kind, self.penalties["error"]))
+        self.tokens = min(self.tokens, 0.0)
+        logger.debug(f"[限流] {self.platform_id} {kind}: 速率 {old_rate:.1f} -> {self.rate:.1f} 次/分钟")
+
+        if self._state == self.STATE_HALF_OPEN:
+            self._trip(f"试探失败（{kind}）")
+        elif self.consecutive_failures >= self.failure_threshold:
+            self._trip(f"连续失败 {self.consecutive_failures} 次（最近一次: {kind}）")
+
+    def backoff_delay(self, attempt: int, base: float = 2.0) -> float:
+        """
+        重试等待时间：按重试次数线性增长，平台被收紧得越厉害等得越久
+
+        Args:
+            attempt: 第几次重试（从 1 开始）
+            base: 基础等待时间（秒）
+        """
+        penalty = max(self.base_rate / self.rate, 1.0)
+        return min(base * attempt * penalty, self.max_backoff) + random.uniform(0, 1)
+
+    async def backoff(self, attempt: int, base: float = 2.0):
+        """按 backoff_delay 等待"""
+        await asyncio.sleep(self.backoff_delay(attempt, base))
+
+    def snapshot(self) -> Dict[str, Any]:
+        """当前限流状态（用于监控）"""
+        return {
+            "platform": self.platform_id,
+            "state": self.state,
+            "rate_per_minute": round(self.rate, 2),
+            "consecutive_failures": self.consecutive_failures,
+            "retry_after": round(self._retry_after(), 1) if self._state == self.STATE_OPEN else 0.0
+        }
+
+
+_throttles: Dict[str, PlatformThrottle] = {}
+
+
+def get_platform_throttle(platform_id: str) -> PlatformThrottle:
+    """获取平台限流器（每个平台全局唯一）"""
+    throttle = _throttles.get(platform_id)
+    if throttle is None:
+        throttle = _throttles[platform_id] = PlatformThrottle(platform_id)
+    return throttle
@@ -0,0 +1,196 @@
+# -*- coding: utf-8 -*-
+"""
+收录记录离线重算服务
+公司名或别名变了？不用再开浏览器，直接拿历史回答重新算命中！
+"""
+
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, Future
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from loguru import logger
+from sqlalchemy.orm import Session
+
+from backend.database.models import IndexCheckRecord, Keyword, Project
+from backend.services.answer_store import resolve_answers
+from backend.services.check_rollup import apply_records
+from backend.services.hit_matcher import get_project_matcher
+
+
+# 项目匹配配置：(关键词元组, 公司名, 别名元组)
+ProjectSpec = Tuple[Tuple[str, ...], str, Tuple[str, ...]]
+# 待重算的记录：(记录ID, 项目ID, 关键词, 回答, 原关键词命中, 原公司命中)
+RecordRow = Tuple[int, int, str, Optional[str], Optional[bool], Optional[bool]]
+
+# 回写时按 ID 查原记录的每批数量（SQLite 变量数上限）
+ID_BATCH_SIZE = 500
+
+
+def score_chunk(specs: Dict[int, ProjectSpec], rows: List[RecordRow]) -> List[Dict[str, Any]]:
+    """
+    在子进程中重算一批记录（模块级函数，保证可被进程池序列化）
+
+    匹配器由 get_project_matcher 按进程缓存，每个进程每个项目只构建一次
+
+    Returns:
+        命中结果发生变化的记录：[{"id", "keyword_found", "company_found"}]
+    """
+    changed = []
+    for record_id, project_id, keyword, answer, old_keyword_found, old_company_found in rows:
+        keywords, company, aliases = specs[project_id]
+        matcher = get_project_matcher(keywords, company, aliases)
+        result = matcher.evaluate(answer or "", keyword, company)
+        if result["keyword_found"] != bool(old_keyword_found) or result["company_found"] != bool(old_company_found):
+            changed.append({
+                "id": record_id,
+                "keyword_found": result["keyword_found"],
+                "company_found": result["company_found"]
+            })
+    return changed
+
+
+class RescoreService:
+    """
+    收录记录离线重算服务
+
+    注意：
+    - 按主键分块流式读取，不会一次把整表读进内存
+    - 重算放在进程池里并行，主进程只负责读和批量写
+    - 只回写命中结果真正变化的记录，日汇总在同一个事务里同步修正
+    """
+
+    def __init__(self, db: Session):
+        """
+        初始化重算服务
+
+        Args:
+            db: 数据库会话
+        """
+        self.db = db
+
+    def _load_project_specs(self, project_id: Optional[int] = None) -> Dict[int, ProjectSpec]:
+        """加载项目的当前匹配规则（关键词、公司名、别名）"""
+        query = self.db.query(Project)
+        if project_id:
+            query = query.filter(Project.id == project_id)
+
+        specs: Dict[int, ProjectSpec] = {}
+        for project in query.all():
+            keywords = [row[0] for row in self.db.query(Keyword.keyword).filter(Keyword.project_id == project.id).all()]
+            specs[project.id] = (
+                tuple(sorted(set(k for k in keywords if k))),
+                project.company_name or "",
+                tuple(sorted(set(a for a in (project.company_aliases or []) if a)))
+            )
+        return specs
+
+    def _iter_chunks(self, project_id: Optional[int], chunk_size: int):
+        """按主键游标分块读取记录"""
+        last_id = 0
+        while True:
+            query = self.db.query(
+                IndexCheckRecord.id,
+                Keyword.project_id,
+                Keyword.keyword,
+                IndexCheckRecord.answer,
+                IndexCheckRecord.answer_hash,
+                IndexCheckRecord.keyword_found,
+                IndexCheckRecord.company_found
+            ).join(Keyword, Keyword.id == IndexCheckRecord.keyword_id).filter(IndexCheckRecord.id > last_id)
+
+            if project_id:
+                query = query.filter(Keyword.project_id == project_id)
+
+            rows = query.order_by(IndexCheckRecord.id).limit(chunk_size).all()
+            if not rows:
+                break
+            last_id = rows[-1][0]
+            # 回答正文在 answer_blobs 里的按哈希批量取出，交给子进程的仍是 (id, 项目, 关键词, 正文, 原命中...) 元组
+            answers = resolve_answers(self.db, [(row[3], row[4]) for row in rows])
+            yield [(row[0], row[1], row[2], answer, row[5], row[6]) for row, answer in zip(rows, answers)]
+
+    def _rollup_changes(self, changes: List[Dict[str, Any]]):
+        """把命中结果的变化同步到日汇总：按原值移出、按新值计入（回答没变，不影响 answered）"""
+        new_values = {change["id"]: change for change in changes}
+        ids = list(new_values)
+        for start in range(0, len(ids), ID_BATCH_SIZE):
+            rows = self.db.query(
+                IndexCheckRecord.id,
+                IndexCheckRecord.keyword_id,
+                IndexCheckRecord.platform,
+                IndexCheckRecord.check_time,
+                IndexCheckRecord.keyword_found,
+                IndexCheckRecord.company_found
+            ).filter(IndexCheckRecord.id.in_(ids[start:start + ID_BATCH_SIZE])).all()
+            old_records = [row._asdict() for row in rows]
+            apply_records(self.db, old_records, sign=-1)
+            apply_records(self.db, [{**record, **new_values[record["id"]]} for record in old_records])
+
+    def _write_changes(self, changes: List[Dict[str, Any]], dry_run: bool) -> int:
+        """批量回写变化的命中结果"""
+        if not changes or dry_run:
+            return len(changes)
+        try:
+            self._rollup_changes(changes)
+            self.db.bulk_update_mappings(IndexCheckRecord, changes)
+            self.db.commit()
+        except Exception as e:
+            logger.error(f"批量回写重算结果失败: {e}")
+            self.db.rollback()
+            raise
+        return len(changes)
+
+    def rescore(
+        self,
+        project_id: Optional[int] = None,
+        chunk_size: int = 2000,
+        workers: Optional[int] = None,
+        dry_run: bool = False
+    ) -> Dict[str, Any]:
+        """
+        用当前匹配规则重算历史收录记录
+
+        Args:
+            project_id: 只重算某个项目，默认全部
+            chunk_size: 每块读取的记录数
+            workers: 进程数，默认 CPU 核数
+            dry_run: 只统计不回写
+
+        Returns:
+            重算统计信息
+        """
+        start_time = time.time()
+        specs = self._load_project_specs(project_id)
+        if not specs:
+            return {"scanned": 0, "updated": 0, "elapsed": 0.0, "dry_run": dry_run}
+
+        workers = workers or os.cpu_count() or 1
+        max_in_flight = workers * 2
+        scanned = 0
+        updated = 0
+
+        logger.info(f"开始离线重算收录记录: 项目={project_id or '全部'}, 进程数={workers}, 分块={chunk_size}")
+
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            pending: Deque[Future] = deque()
+
+            for rows in self._iter_chunks(project_id, chunk_size):
+                scanned += len(rows)
+                rows = [row for row in rows if row[1] in specs]
+                if not rows:
+                    continue
+                chunk_specs = {row[1]: specs[row[1]] for row in rows}
+                pending.append(pool.submit(score_chunk, chunk_specs, rows))
+
+                # 控制在途任务数量，边算边写
+                while len(pending) >= max_in_flight:
+                    updated += self._write_changes(pending.popleft().result(), dry_run)
+
+            while pending:
+                updated += self._write_changes(pending.popleft().result(), dry_run)
+
+        elapsed = round(time.time() - start_time, 2)
+        logger.info(f"离线重算完成: 扫描 {scanned} 条, {'将' if dry_run else '已'}更新 {updated} 条, 耗时 {elapsed}s")
+        return {"scanned": scanned, "updated": updated, "elapsed": elapsed, "dry_run": dry_run}
@@ -0,0 +1,168 @@
+# -*- coding: utf-8 -*-
+"""
+检测结果批量写入器
+检测结果先攒在内存里，按条数或时间合并成一次批量插入，不再每个问题提交一次事务！
+"""
+
+import asyncio
+import time
+from typing import Any, Dict, List, Optional
+
+from loguru import logger
+from sqlalchemy.orm import Session
+
+from backend.config import INDEX_CHECK_SINK_BATCH_SIZE, INDEX_CHECK_SINK_FLUSH_INTERVAL
+from backend.database import bulk_insert
+from backend.database.models import IndexCheckRecord, IndexCheckCitation, IndexCheckTiming, IndexCheckJobItem
+from backend.services.answer_store import split_answers, store_blobs
+from backend.services.check_rollup import apply_records
+
+
+class IndexResultSink:
+    """
+    收录检测结果写入器
+
+    注意：
+    - 攒够 batch_size 条或距上次写入超过 flush_interval 秒就写一次
+    - 作为 async with 使用时，后台会定时写入，退出时（包括异常退出）一定会再写一次
+    - 写入失败时数据留在缓冲区，下次写入时重试
+    - 带 job_item_id 的记录，对应任务项的完成状态和记录在同一个事务里写入
+    - 引用和耗时是记录的子表，和记录在同一个事务里写入（此时插入记录需要取回主键）
+    - 日汇总（index_check_daily）和回答正文（answer_blobs，按哈希去重）也在同一个事务里写入
+    """
+
+    def __init__(
+        self,
+        db: Session,
+        batch_size: int = INDEX_CHECK_SINK_BATCH_SIZE,
+        flush_interval: float = INDEX_CHECK_SINK_FLUSH_INTERVAL
+    ):
+        """
+        初始化写入器
+
+        Args:
+            db: 数据库会话
+            batch_size: 触发写入的缓冲条数
+            flush_interval: 触发写入的时间间隔（秒）
+        """
+        self.db = db
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self._buffer: List[Dict[str, Any]] = []
+        self._item_updates: List[Dict[str, Any]] = []
+        self._citations: List[List[Dict[str, Any]]] = []
+        self._timings: List[Optional[Dict[str, Any]]] = []
+        self._last_flush = time.monotonic()
+        self._timer: Optional[asyncio.Task] = None
+        self.written = 0
+
+    def add(
+        self,
+        record: Dict[str, Any],
+        job_item_id: Optional[int] = None,
+        job_item_status: str = "done",
+        citations: Optional[List[Dict[str, Any]]] = None,
+        timing: Optional[Dict[str, Any]] = None
+    ):
+        """
+        加入一条检测记录（IndexCheckRecord 的字段字典）
+
+        Args:
+            record: 记录字段
+            job_item_id: 对应的检测任务项ID
+            job_item_status: 任务项的最终状态：done / failed
+            citations: 回答中的引用（IndexCheckCitation 的字段字典，不含 record_id）
+            timing: 分阶段耗时（IndexCheckTiming 的字段字典，不含 record_id）
+        """
+        self._buffer.append(record)
+        self._citations.append(list(citations or []))
+        self._timings.append(timing)
+        if job_item_id is not None:
+            self._item_updates.append({
+                "id": job_item_id,
+                "status": job_item_status,
+                "lease_owner": None,
+                "lease_until": None
+            })
+        if len(self._buffer) >= self.batch_size or self._is_due():
+            self.flush()
+
+    def _is_due(self) -> bool:
+        return time.monotonic() - self._last_flush >= self.flush_interval
+
+    def flush(self) -> int:
+        """
+        把缓冲区的记录批量写入数据库
+
+        Returns:
+            本次写入的条数
+        """
+        self._last_flush = time.monotonic()
+        if not self._buffer:
+            return 0
+
+        item_updates = self._item_updates
+        citations = self._citations
+        timings = self._timings
+        # 回答正文换成哈希；缓冲区保留原文，写入失败时下次重试还能用
+        rows, blobs = split_answers(self._buffer)
+        try:
+            store_blobs(self.db, blobs)
+            if any(citations) or any(timings):
+                ids = bulk_insert(self.db, IndexCheckRecord, rows, returning=[IndexCheckRecord.id])
+                for row, (record_id,) in zip(rows, ids):
+                    row["id"] = record_id
+                citation_rows = [
+                    {**citation, "record_id": row["id"]}
+                    for row, row_citations in zip(rows, citations)
+                    for citation in row_citations
+                ]
+                timing_rows = [{**timing, "record_id": row["id"]} for row, timing in zip(rows, timings) if timing]
+                bulk_insert(self.db, IndexCheckCitation, citation_rows)
+                bulk_insert(self.db, IndexCheckTiming, timing_rows)
+            else:
+                bulk_insert(self.db, IndexCheckRecord, rows)
+            apply_records(self.db, rows)
+            if item_updates:
+                self.db.bulk_update_mappings(IndexCheckJobItem, item_updates)
+            self.db.commit()
+        except Exception as e:
+            logger.error(f"批量保存检测结果失败（{len(rows)} 条，稍后重试）: {e}")
+            self.db.rollback()
+            return 0
+
+        self._buffer = []
+        self._item_updates = []
+        self._citations = []
+        self._timings = []
+        self.written += len(rows)
+        logger.debug(f"批量保存检测结果: {len(rows)} 条")
+        return len(rows)
+
+    async def _auto_flush(self):
+        """后台定时写入，防止检测变慢时结果长时间停留在内存"""
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            if self._buffer and self._is_due():
+                self.flush()
+
+    def close(self):
+        """停止定时写入并写完剩余记录"""
+        if self._timer:
+            self._timer.cancel()
+            self._timer = None
+        self.flush()
+        if self._buffer:
+            logger.error(f"检测结果写入失败，丢弃 {len(self._buffer)} 条记录")
+            self._buffer = []
+            self._item_updates = []
+            self._citations = []
+            self._timings = []
+
+    async def __aenter__(self) -> "IndexResultSink":
+        if self.flush_interval > 0:
+            self._timer = asyncio.create_task(self._auto_flush())
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self.close()
@@ -42,7 +42,9 @@ class SchedulerService:
         # 🌟 任务映射表
         self.task_registry = {
             "publish_task": self.check_and_publish_scheduled_articles,
-            "monitor_task": self.auto_check_indexing_job
+            "monitor_task": self.auto_check_indexing_job,
+            "archive_task": self.archive_check_records_job,
+            "db_maintenance_task": self.db_maintenance_job
         }
 
     def set_db_factory(self, db_factory):
@@ -53,26 +55,43 @@ class SchedulerService:
         if not self.db_factory: return
         db = self.db_factory()
         try:
-            if db.query(ScheduledTask).count() == 0:
-                defaults = [
-                    ScheduledTask(
-                        name="文章自动发布引擎",
-                        task_key="publish_task",
-                        cron_expression="*/1 * * * *",  # 每分钟扫描一次
-                        description="扫描待发布文章并触发浏览器自动化脚本",
-                        is_active=True
-                    ),
-                    ScheduledTask(
-                        name="全网收录实时监测",
-                        task_key="monitor_task",
-                        cron_expression="*/5 * * * *",  # 每5分钟监测一次
-                        description="通过AI搜索引擎检查已发布文章的收录状态",
-                        is_active=True
-                    )
-                ]
-                db.add_all(defaults)
+            defaults = [
+                ScheduledTask(
+                    name="文章自动发布引擎",
+                    task_key="publish_task",
+                    cron_expression="*/1 * * * *",  # 每分钟扫描一次
+                    description="扫描待发布文章并触发浏览器自动化脚本",
+                    is_active=True
+                ),
+                ScheduledTask(
+                    name="全网收录实时监测",
+                    task_key="monitor_task",
+                    cron_expression="*/5 * * * *",  # 每5分钟监测一次
+                    description="通过AI搜索引擎检查已发布文章的收录状态",
+                    is_active=True
+                ),
+                ScheduledTask(
+                    name="检测记录月度归档",
+                    task_key="archive_task",
+                    cron_expression="30 3 1 * *",  # 每月1日凌晨3:30
+                    description="把超过保留期的收录检测记录按月搬到归档文件，热表只留最近几个月",
+                    is_active=True
+                ),
+                ScheduledTask(
+                    name="数据库日常维护",
+                    task_key="db_maintenance_task",
+                    cron_expression="15 4 * * *",  # 每天凌晨4:15
+                    description="SQLite 执行 PRAGMA optimize 更新查询统计，并把 WAL 回写主库、截断 WAL 文件",
+                    is_active=True
+                )
+            ]
+            # 按 task_key 补齐缺失的默认任务（老库升级后新增的任务也能装上）
+            existing = {key for (key,) in db.query(ScheduledTask.task_key).all()}
+            missing = [task for task in defaults if task.task_key not in existing]
+            if missing:
+                db.add_all(missing)
                 db.commit()
-                log.info("✅ 默认定时扫描任务初始化完成")
+                log.info(f"✅ 默认定时任务初始化完成: {[task.task_key for task in missing]}")
         except Exception as e:
             log.error(f"初始化任务失败: {e}")
         finally:
@@ -233,6 +252,44 @@ class SchedulerService:
         finally:
             db.close()
 
+    async def archive_check_records_job(self):
+        """
+        [Job] 检测记录月度归档
+        """
+        if not self.db_factory: return
+
+        def run():
+            from backend.services.check_archive import CheckArchiveService
+            db = self.db_factory()
+            try:
+                return CheckArchiveService(db).archive()
+            finally:
+                db.close()
+
+        try:
+            # 归档是成批的读写，放到线程里跑，不占事件循环
+            result = await asyncio.to_thread(run)
+            if result["records"]:
+                log.info(f"🗄️ [归档] 已归档 {result['records']} 条检测记录: {result['months']}")
+        except Exception as e:
+            log.error(f"归档 Job 运行异常: {e}")
+
+    async def db_maintenance_job(self):
+        """
+        [Job] 数据库日常维护（PRAGMA optimize + WAL checkpoint）
+        """
+        from backend.database.maintenance import optimize_sqlite
+        from backend.services.check_archive import dispose_archive_engines
+
+        try:
+            # 归档文件的连接池只在查到归档时才建，每天清一次闲置连接
+            dispose_archive_engines()
+            result = await asyncio.to_thread(optimize_sqlite)
+            if result:
+                log.info(f"🧹 [维护] SQLite 优化完成: {result}")
+        except Exception as e:
+            log.error(f"数据库维护 Job 运行异常: {e}")
+
 # 单例模式
 _instance = SchedulerService()
 
@@ -159,6 +159,9 @@ export const indexCheckApi = {
     question?: string
   }) => get<any>('/index-check/records', params),
 
+  // 获取单条记录（含回答正文，列表接口不返回正文）
+  getRecord: (id: number) => get<any>(`/index-check/records/${id}`),
+
   // 删除单条记录
   deleteRecord: (id: number) => del<any>(`/index-check/records/${id}`),
 
@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+"""
+回答正文存储测试
+验证相同回答只存一份、检测记录只存哈希，以及历史 answer 列的搬移
+"""
+
+import sys
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+# 添加项目根目录到路径（从 tests/ 往上一级）
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from backend.database import Base
+from backend.database.models import AnswerBlob, IndexCheckRecord
+from backend.services.answer_store import (
+    AnswerStoreService, answer_hash, load_answers, resolve_answers, split_answers, store_blobs
+)
+from backend.services.result_sink import IndexResultSink
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+def make_record(question: str, answer) -> dict:
+    return {"keyword_id": 1, "platform": "doubao", "question": question, "answer": answer,
+            "check_time": datetime(2026, 10, 1, 12, 0)}
+
+
+@pytest.mark.monitor
+class TestAnswerStore:
+    """回答正文存储测试类"""
+
+    def test_split_answers(self):
+        """正文换成哈希，空回答不生成正文，传入的字典不被修改"""
+        rows = [make_record("问题1", "相同的回答"), make_record("问题2", "相同的回答"), make_record("问题3", "  ")]
+        records, blobs = split_answers(rows)
+
+        assert list(blobs) == [answer_hash("相同的回答")]
+        assert records[0]["answer_hash"] == records[1]["answer_hash"]
+        assert "answer" not in records[0] and "answer_hash" not in records[2]
+        assert rows[0]["answer"] == "相同的回答"
+
+    def test_store_and_load(self, db):
+        """重复写入同一正文不报错，读回来和原文一致"""
+        text = "豆包推荐了以下几家公司：" * 50
+        digest = answer_hash(text)
+        store_blobs(db, {digest: text})
+        store_blobs(db, {digest: text})
+        db.commit()
+
+        assert db.query(AnswerBlob).count() == 1
+        assert len(db.query(AnswerBlob).one().data) < len(text.encode("utf-8"))
+        assert load_answers(db, [digest, None]) == {digest: text}
+        assert resolve_answers(db, [("历史回答", None), (None, digest), (None, None)]) == ["历史回答", text, None]
+
+    def test_sink_writes_hashes(self, db):
+        """写入器只在记录里存哈希，相同回答共用一份正文"""
+        sink = IndexResultSink(db, batch_size=10, flush_interval=0)
+        for i, answer in enumerate(["回答A", "回答A", "回答B"]):
+            sink.add(make_record(f"问题{i}", answer))
+        sink.close()
+
+        records = db.query(IndexCheckRecord).order_by(IndexCheckRecord.id).all()
+        assert db.query(AnswerBlob).count() == 2
+        assert all(r.answer is None for r in records)
+        assert [r.answer_text for r in records] == ["回答A", "回答A", "回答B"]
+
+    def test_move_legacy_answers(self, db):
+        """历史 answer 列搬进 answer_blobs 后正文不变，可重复执行，无引用的正文可清理"""
+        db.bulk_insert_mappings(IndexCheckRecord, [
+            make_record("问题1", "旧回答"), make_record("问题2", "旧回答"), make_record("问题3", None)
+        ])
+        db.commit()
+        service = AnswerStoreService(db)
+
+        assert service.move_legacy_answers(chunk_size=2)["moved"] == 2
+        assert service.move_legacy_answers()["moved"] == 0
+        db.expire_all()
+        assert [r.answer_text for r in db.query(IndexCheckRecord).order_by(IndexCheckRecord.id)] == ["旧回答", "旧回答", None]
+        assert service.get_stats()["dedup_ratio"] == 2.0
+
+        store_blobs(db, {answer_hash("没人用的回答"): "没人用的回答"})
+        db.commit()
+        assert service.prune() == 1
+        assert db.query(AnswerBlob).count() == 1
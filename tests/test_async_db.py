@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+"""
+异步数据库会话测试
+验证报表查询通过 AsyncSession.run_sync 复用同步服务层，且查询期间事件循环不被阻塞
+"""
+
+import asyncio
+import sys
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import StaticPool
+
+# 添加项目根目录到路径（从 tests/ 往上一级）
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from backend.api.reports import _overview, _summary_stats, _trends
+from backend.database import Base
+from backend.database.models import GeoArticle, Keyword, Project
+from backend.services.check_rollup import apply_records
+
+# 递归 CTE 数到这个数，SQLite 大约要跑几百毫秒
+SLOW_QUERY = text(
+    "WITH RECURSIVE n(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM n WHERE x < 2000000) SELECT count(*) FROM n"
+)
+
+
+async def make_session_factory():
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:", poolclass=StaticPool)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    return engine, async_sessionmaker(engine, expire_on_commit=False)
+
+
+def seed(session):
+    project = Project(name="项目A", company_name="公司A")
+    session.add(project)
+    session.flush()
+    keyword = Keyword(project_id=project.id, keyword="关键词A", status="active")
+    session.add(keyword)
+    session.flush()
+    today = datetime.now()
+    apply_records(session, [
+        {"keyword_id": keyword.id, "platform": "doubao", "check_time": today, "keyword_found": True, "company_found": False, "answer": "回答"},
+        {"keyword_id": keyword.id, "platform": "qianwen", "check_time": today, "keyword_found": False, "company_found": True, "answer": "回答"},
+    ])
+
+
+@pytest.mark.monitor
+class TestAsyncDb:
+    """异步数据库会话测试类"""
+
+    def test_reports_run_on_async_session(self):
+        """报表查询逻辑在异步会话里执行，结果和同步一致"""
+        async def run():
+            engine, session_factory = await make_session_factory()
+            async with session_factory() as db:
+                await db.run_sync(seed)
+                await db.commit()
+                overview = await db.run_sync(_overview)
+                trends = await db.run_sync(_trends, 7, "doubao")
+            await engine.dispose()
+            return overview, trends
+
+        overview, trends = asyncio.run(run())
+        assert overview["total_keywords"] == 1
+        assert overview["keyword_found"] == 1 and overview["company_found"] == 1
+        assert [t.total_checks for t in trends] == [1]
+
+    def test_summary_stats(self):
+        """总览卡片：文章只算 GeoArticle，发布总数只算 published + failed，命中数读日汇总"""
+        def seed_summary(session):
+            seed(session)
+            keyword = session.query(Keyword).one()
+            session.add_all([
+                GeoArticle(keyword_id=keyword.id, project_id=keyword.project_id, content="正文", publish_status=status)
+                for status in ["published", "published", "failed", "draft"]
+            ])
+
+        async def run():
+            engine, session_factory = await make_session_factory()
+            async with session_factory() as db:
+                await db.run_sync(seed_summary)
+                await db.commit()
+                stats = await db.run_sync(_summary_stats, None, 7)
+            await engine.dispose()
+            return stats
+
+        stats = asyncio.run(run())
+        assert (stats.total_articles, stats.common_articles, stats.geo_articles) == (4, 0, 4)
+        assert (stats.publish_success_count, stats.publish_total_count) == (2, 3)
+        assert stats.publish_success_rate == 66.67
+        assert (stats.keyword_hit_count, stats.company_hit_count, stats.keyword_check_count) == (1, 1, 2)
+        assert stats.keyword_hit_rate == stats.company_hit_rate == 50.0
+
+    def test_slow_query_does_not_block_loop(self):
+        """慢查询执行期间，其他协程照常运行"""
+        async def run():
+            engine, session_factory = await make_session_factory()
+            ticks = 0
+            done = asyncio.Event()
+
+            async def ticker():
+                nonlocal ticks
+                while not done.is_set():
+                    ticks += 1
+                    await asyncio.sleep(0.005)
+
+            task = asyncio.create_task(ticker())
+            async with session_factory() as db:
+                count = (await db.execute(SLOW_QUERY)).scalar()
+            done.set()
+            await task
+            await engine.dispose()
+            return count, ticks
+
+        count, ticks = asyncio.run(run())
+        assert count == 2000000
+        assert ticks > 3
@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+"""
+收录检测浏览器模式测试
+验证 headless 模式的资源屏蔽规则
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+# 添加项目根目录到路径（从 tests/ 往上一级）
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from backend.services.playwright.browser_pool import BrowserPool, get_browser_profile
+
+
+async def _launcher(playwright):
+    raise AssertionError("测试中不应启动浏览器")
+
+
+def make_pool(profile_name: str) -> BrowserPool:
+    profile = get_browser_profile(profile_name)
+    return BrowserPool(
+        launcher=_launcher,
+        block_resource_types=profile["block_resource_types"],
+        block_domains=profile["block_domains"]
+    )
+
+
+@pytest.mark.monitor
+class TestBrowserProfile:
+    """浏览器模式测试类"""
+
+    def test_headed_blocks_nothing(self):
+        """有界面模式保持原样，不屏蔽任何请求"""
+        pool = make_pool("headed")
+        assert get_browser_profile("headed")["headless"] is False
+        assert not pool.is_blocked("image", "https://www.doubao.com/logo.png")
+        assert not pool.is_blocked("script", "https://hm.baidu.com/hm.js")
+
+    def test_headless_blocks_heavy_resources(self):
+        """无头模式屏蔽图片、字体、媒体"""
+        pool = make_pool("headless")
+        assert pool.is_blocked("image", "https://www.doubao.com/logo.png")
+        assert pool.is_blocked("font", "https://www.doubao.com/a.woff2")
+        assert not pool.is_blocked("script", "https://www.doubao.com/app.js")
+        assert not pool.is_blocked("fetch", "https://www.doubao.com/samantha/chat/completion")
+
+    def test_headless_blocks_tracker_subdomains(self):
+        """统计域名按后缀匹配，不误伤相似域名"""
+        pool = make_pool("headless")
+        assert pool.is_blocked("script", "https://hm.baidu.com/hm.js?abc")
+        assert pool.is_blocked("script", "https://s4.cnzz.com/z_stat.php")
+        assert not pool.is_blocked("script", "https://notcnzz.com/app.js")
+
+    def test_unknown_profile(self):
+        """未知模式报错"""
+        with pytest.raises(ValueError):
+            get_browser_profile("turbo")
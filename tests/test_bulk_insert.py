@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+"""
+批量插入测试
+验证 bulk_insert 取回的主键和传入顺序一致，按唯一列跳过已存在的行
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+# 添加项目根目录到路径（从 tests/ 往上一级）
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from backend.database import Base, bulk_insert
+from backend.database.models import ReferenceArticle
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+def article(i):
+    return {"title": f"文章{i}", "url": f"https://a.com/{i}", "content": "正文", "platform": "zhihu"}
+
+
+@pytest.mark.monitor
+class TestBulkInsert:
+    """批量插入测试类"""
+
+    def test_returning_keeps_order(self, db):
+        """取回的 ID 和传入的行一一对应"""
+        rows = bulk_insert(db, ReferenceArticle, [article(i) for i in range(5)],
+                           returning=[ReferenceArticle.id, ReferenceArticle.url])
+        db.commit()
+
+        assert [url for _, url in rows] == [f"https://a.com/{i}" for i in range(5)]
+        for row_id, url in rows:
+            assert db.get(ReferenceArticle, row_id).url == url
+
+    def test_skip_conflicts(self, db):
+        """已存在的 URL 跳过，只返回实际插入的行"""
+        bulk_insert(db, ReferenceArticle, [article(0), article(1)])
+        rows = bulk_insert(db, ReferenceArticle, [article(1), article(2)],
+                           returning=[ReferenceArticle.url], skip_conflicts_on=["url"])
+        db.commit()
+
+        assert [url for url, in rows] == ["https://a.com/2"]
+        assert db.query(ReferenceArticle).count() == 3
+
+    def test_empty_rows(self, db):
+        """没有行时不执行 SQL"""
+        assert bulk_insert(db, ReferenceArticle, [], returning=[ReferenceArticle.id]) == []
@@ -0,0 +1,177 @@
+# -*- coding: utf-8 -*-
+"""
+收录检测归档测试
+验证超过保留期的记录按月搬进归档文件，列表/详情/引用统计透明地查到归档，日汇总重建不动已归档的月份
+"""
+
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+# 添加项目根目录到路径（从 tests/ 往上一级）
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from backend.database import Base
+from backend.database.models import (
+    IndexCheckArchive, IndexCheckCitation, IndexCheckDaily, IndexCheckRecord, Keyword, Project
+)
+from backend.services import check_archive
+from backend.services.answer_store import split_answers, store_blobs
+from backend.services.check_archive import CheckArchiveService, add_months, archive_cutoff
+from backend.services.check_rollup import DailyRollupService, apply_records
+from backend.services.citation_service import CitationService
+from backend.services.index_check_service import IndexCheckService
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+@pytest.fixture
+def archive_dir(tmp_path, monkeypatch):
+    """归档写到临时目录（服务默认读 INDEX_CHECK_ARCHIVE_DIR）"""
+    monkeypatch.setattr(check_archive, "INDEX_CHECK_ARCHIVE_DIR", tmp_path)
+    return tmp_path
+
+
+@pytest.fixture
+def seeded(db):
+    """两个已过保留期的月份各 2 条、最近 2 条，每条回答都引用了同一个域名"""
+    project = Project(name="项目A", company_name="公司A")
+    db.add(project)
+    db.flush()
+    keyword = Keyword(project_id=project.id, keyword="关键词A", status="active")
+    db.add(keyword)
+    db.flush()
+
+    cutoff = archive_cutoff(6)
+    times = [
+        add_months(cutoff, -3) + timedelta(days=1), add_months(cutoff, -3) + timedelta(days=2),
+        add_months(cutoff, -1) + timedelta(days=1), add_months(cutoff, -1) + timedelta(days=2),
+        datetime.now() - timedelta(days=1), datetime.now(),
+    ]
+    rows = [
+        {"keyword_id": keyword.id, "platform": "doubao", "question": f"问题{i}", "answer": f"回答{i} 见 example.com",
+         "keyword_found": i % 2 == 0, "company_found": False, "check_time": check_time}
+        for i, check_time in enumerate(times)
+    ]
+    stored, blobs = split_answers(rows)
+    store_blobs(db, blobs)
+    records = [IndexCheckRecord(**row) for row in stored]
+    db.add_all(records)
+    db.flush()
+    db.add_all([
+        IndexCheckCitation(record_id=record.id, url="https://example.com/a", domain="example.com", position=0)
+        for record in records
+    ])
+    apply_records(db, rows)
+    db.commit()
+    # 归档会删掉热表里的记录，先把 ID 取出来
+    return project.id, [record.id for record in records]
+
+
+@pytest.mark.monitor
+class TestCheckArchive:
+    """检测记录归档测试类"""
+
+    def test_archive_moves_old_months(self, db, archive_dir, seeded):
+        """过期月份搬进归档文件，热表和引用表只剩最近的，重跑不重复搬"""
+        _, ids = seeded
+        service = CheckArchiveService(db)
+
+        result = service.archive(months=6)
+
+        assert result["records"] == 4
+        assert len(result["months"]) == 2
+        assert db.query(IndexCheckRecord).count() == 2
+        assert db.query(IndexCheckCitation).count() == 2
+        assert db.query(IndexCheckArchive).count() == 2
+        assert len(list(archive_dir.glob("index_check_*.db"))) == 2
+        assert service.archive(months=6)["records"] == 0
+
+        archived = IndexCheckService(db).get_record(ids[0])
+        assert archived.archived and archived.answer_text == "回答0 见 example.com"
+
+    def test_listing_pages_into_archives(self, db, archive_dir, seeded):
+        """热表一页不够时按时间倒序接上归档，总数包含归档"""
+        _, ids = seeded
+        CheckArchiveService(db).archive(months=6)
+        service = IndexCheckService(db)
+
+        page, total = service.get_check_records(limit=3, skip=1)
+        assert total == 6
+        assert [r.id for r in page] == [ids[4], ids[3], ids[2]]
+
+        page, total = service.get_check_records(limit=10, keyword_found=True, include_answer=True)
+        assert total == 3
+        assert [r.answer_text for r in page] == ["回答4 见 example.com", "回答2 见 example.com", "回答0 见 example.com"]
+
+        recent, total = service.get_check_records(start_date=datetime.now() - timedelta(days=7))
+        assert total == 2 and len(recent) == 2
+
+    def test_reports_include_archives(self, db, archive_dir, seeded):
+        """引用统计合并归档；日汇总重建保留已归档月份"""
+        project_id, _ = seeded
+        CheckArchiveService(db).archive(months=6)
+
+        domains = CitationService(db).get_top_domains(project_id=project_id)
+        assert domains == [{"domain": "example.com", "citations": 6, "records": 6}]
+
+        DailyRollupService(db).rebuild()
+        assert sum(row.checks for row in db.query(IndexCheckDaily).all()) == 6
+
+    def test_archive_engines_are_reused_and_disposed(self, db, archive_dir, seeded):
+        """同一个归档文件的查询复用一个引擎；归档写完和 dispose 后移出缓存，再查时重新建"""
+        CheckArchiveService(db).archive(months=6)
+        assert not any(key.startswith(str(archive_dir)) for key in check_archive._engines)
+
+        service = IndexCheckService(db)
+        service.get_check_records(limit=10)
+        service.get_check_records(limit=10)
+        cached = [key for key in check_archive._engines if key.startswith(str(archive_dir))]
+        assert len(cached) == 2
+
+        assert check_archive.dispose_archive_engines(Path(key) for key in cached) == 2
+        assert not any(key.startswith(str(archive_dir)) for key in check_archive._engines)
+        page, total = service.get_check_records(limit=10)
+        assert total == 6 and len(page) == 6
+
+    def test_full_page_stops_reading_archives(self, db, archive_dir, seeded, monkeypatch):
+        """一页取满后不再打开更早的归档文件；总数每个归档文件只统计一次"""
+        _, ids = seeded
+        CheckArchiveService(db).archive(months=6)
+        opened = {"count": [], "fetch": []}
+        count_records, fetch_records = CheckArchiveService.count_records, CheckArchiveService.fetch_records
+
+        def spy_count(self, archive, conditions):
+            opened["count"].append(archive.month)
+            return count_records(self, archive, conditions)
+
+        def spy_fetch(self, archive, *args, **kwargs):
+            opened["fetch"].append(archive.month)
+            return fetch_records(self, archive, *args, **kwargs)
+
+        monkeypatch.setattr(CheckArchiveService, "count_records", spy_count)
+        monkeypatch.setattr(CheckArchiveService, "fetch_records", spy_fetch)
+        service = IndexCheckService(db)
+        newest = add_months(archive_cutoff(6), -1).strftime("%Y-%m")
+
+        page, total = service.get_check_records(limit=3, with_total=False)
+        assert [r.id for r in page] == [ids[5], ids[4], ids[3]]
+        assert opened == {"count": [], "fetch": [newest]}
+
+        opened["fetch"].clear()
+        page, total = service.get_check_records(limit=3, question="问题")
+        assert total == 6 and len(page) == 3
+        assert len(opened["count"]) == len(set(opened["count"])) == 2
+        assert opened["fetch"] == [newest]
@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+"""
+检测任务租约测试
+验证多个执行器共用数据库时任务只会被一个执行器抢到，租约过期前不会被接手，恢复时不动别人的任务项
+"""
+
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+# 添加项目根目录到路径（从 tests/ 往上一级）
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from backend.database import Base
+from backend.database.models import IndexCheckJob, IndexCheckJobItem, Keyword, Project
+from backend.services.check_job_service import CheckJobService, find_resumable_jobs
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+@pytest.fixture
+def job(db):
+    project = Project(name="项目A", company_name="公司A")
+    db.add(project)
+    db.flush()
+    keyword = Keyword(project_id=project.id, keyword="关键词A", status="active")
+    db.add(keyword)
+    db.flush()
+    job = IndexCheckJob(project_id=project.id, platforms=["doubao"], status="pending")
+    db.add(job)
+    db.flush()
+    db.add_all([
+        IndexCheckJobItem(job_id=job.id, keyword_id=keyword.id, question=f"问题{i}", platform="doubao", status="pending")
+        for i in range(4)
+    ])
+    db.commit()
+    return job
+
+
+def expire_job_lease(db, job_id: int):
+    db.query(IndexCheckJob).filter(IndexCheckJob.id == job_id).update(
+        {IndexCheckJob.lease_until: datetime.now() - timedelta(seconds=1)}, synchronize_session=False
+    )
+    db.commit()
+
+
+@pytest.mark.monitor
+class TestCheckJobLease:
+    """检测任务租约测试类"""
+
+    def test_job_claimed_once(self, db, job):
+        """租约没过期时第二个执行器抢不到；过期后接手，只释放上一个执行器的任务项"""
+        service = CheckJobService(db)
+        assert service.claim_job(job.id, "runA") == (True, None)
+        assert service.claim_job(job.id, "runB") == (False, "runA")
+
+        service.claim_items(job.id, "doubao", "runA-doubao-0", limit=2)
+        expire_job_lease(db, job.id)
+
+        assert service.claim_job(job.id, "runB") == (True, "runA")
+        assert service.release_items(job.id, owner_prefix="runA") == 2
+        assert service.claim_job(job.id, "runC") == (False, "runB")
+
+    def test_renew_extends_own_items(self, db, job):
+        """续约连带延长本次执行的任务项租约；租约被接手后续约失败"""
+        service = CheckJobService(db)
+        service.claim_job(job.id, "runA")
+        items = service.claim_items(job.id, "doubao", "runA-doubao-0", limit=2, lease_seconds=1)
+
+        assert service.renew_job(job.id, "runA", item_lease_seconds=600)
+        db.expire_all()
+        assert all(item.lease_until > datetime.now() + timedelta(seconds=300) for item in items)
+
+        expire_job_lease(db, job.id)
+        service.claim_job(job.id, "runB")
+        assert not service.renew_job(job.id, "runA")
+
+    def test_finish_keeps_taken_over_job(self, db, job):
+        """被接手的任务，原执行器收尾时不改状态也不清掉新执行器的租约"""
+        service = CheckJobService(db)
+        service.claim_job(job.id, "runA")
+        expire_job_lease(db, job.id)
+        service.claim_job(job.id, "runB")
+
+        service._finish_job(job, "runA", None)
+
+        assert job.status == "running"
+        assert job.lease_owner == "runB"
+
+    def test_resume_skips_live_leases(self, db, job):
+        """恢复时只挑租约空闲或已过期的任务"""
+        service = CheckJobService(db)
+        assert find_resumable_jobs(db) == ([job.id], None)
+
+        service.claim_job(job.id, "runA")
+        job_ids, leased_until = find_resumable_jobs(db)
+        assert job_ids == []
+        assert leased_until > datetime.now()
+
+        expire_job_lease(db, job.id)
+        assert find_resumable_jobs(db) == ([job.id], None)
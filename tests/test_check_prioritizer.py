@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+"""
+检测优先级测试
+验证过期程度、命中波动和业务优先级的打分规则
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+# 添加项目根目录到路径（从 tests/ 往上一级）
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from backend.services.check_prioritizer import priority_score
+
+
+WEIGHTS = {"staleness": 0.6, "volatility": 0.4}
+
+
+@pytest.mark.monitor
+class TestCheckPrioritizer:
+    """检测优先级测试类"""
+
+    def test_never_checked_scores_highest(self):
+        """从未检测过的组合拿满分"""
+        assert priority_score(None, [], weights=WEIGHTS, stale_hours=72) == pytest.approx(1.0)
+
+    def test_stable_fresh_result_scores_low(self):
+        """刚检测过且结果稳定的组合几乎不用再查"""
+        score = priority_score(1, [True] * 10, weights=WEIGHTS, stale_hours=72)
+        assert score < 0.05
+
+    def test_volatile_beats_stable(self):
+        """同样新鲜的结果，来回翻转的优先级更高"""
+        stable = priority_score(24, [True, True, True, True], weights=WEIGHTS, stale_hours=72)
+        volatile = priority_score(24, [True, False, True, False], weights=WEIGHTS, stale_hours=72)
+        assert volatile > stable
+
+    def test_staleness_is_capped(self):
+        """过期程度封顶，不会无限增长"""
+        week = priority_score(24 * 7, [True, True], weights=WEIGHTS, stale_hours=72)
+        month = priority_score(24 * 30, [True, True], weights=WEIGHTS, stale_hours=72)
+        assert week == month
+
+    def test_business_priority(self):
+        """停用关键词不参与，业务优先级按比例放大"""
+        assert priority_score(None, [], priority=0.0, weights=WEIGHTS) == 0.0
+        assert priority_score(None, [], priority=2.0, weights=WEIGHTS, stale_hours=72) == pytest.approx(2.0)
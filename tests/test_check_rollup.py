@@ -0,0 +1,165 @@
+# -*- coding: utf-8 -*-
+"""
+收录检测日汇总测试
+验证增量维护（写入/删除）和从原始记录重建的结果一致，以及按项目/平台/日期汇总
+"""
+
+import sys
+from datetime import date, datetime
+from pathlib import Path
+
+import pytest
+from sqlalchemy import create_engine, func
+from sqlalchemy.orm import sessionmaker
+
+# 添加项目根目录到路径（从 tests/ 往上一级）
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from backend.database import Base
+from backend.database.models import IndexCheckDaily, IndexCheckRecord, Keyword, Project
+from backend.services.check_rollup import DailyRollupService, apply_records, record_fields, rebuild_rollup
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+@pytest.fixture
+def keywords(db):
+    """两个项目各一个关键词，第二个项目的关键词已停用"""
+    first = Project(name="项目A", company_name="公司A")
+    second = Project(name="项目B", company_name="公司B")
+    db.add_all([first, second])
+    db.flush()
+    kw_a = Keyword(project_id=first.id, keyword="关键词A", status="active")
+    kw_b = Keyword(project_id=second.id, keyword="关键词B", status="inactive")
+    db.add_all([kw_a, kw_b])
+    db.commit()
+    return kw_a, kw_b
+
+
+def make_record(keyword_id: int, platform: str, day: int, keyword_found: bool, company_found: bool, answer: str = "回答") -> dict:
+    return {
+        "keyword_id": keyword_id,
+        "platform": platform,
+        "question": "问题",
+        "answer": answer,
+        "keyword_found": keyword_found,
+        "company_found": company_found,
+        "check_time": datetime(2026, 10, day, 9, 30)
+    }
+
+
+def rollup_rows(db) -> dict:
+    return {
+        (r.keyword_id, r.platform, r.date): (r.checks, r.keyword_hits, r.company_hits, r.answered)
+        for r in db.query(IndexCheckDaily).all()
+    }
+
+
+@pytest.mark.monitor
+class TestCheckRollup:
+    """日汇总测试类"""
+
+    def test_incremental_matches_rebuild(self, db, keywords):
+        """逐批增量写入、删除后的汇总，和从原始记录重建的一致"""
+        kw_a, kw_b = keywords
+        batches = [
+            [make_record(kw_a.id, "doubao", 1, True, False), make_record(kw_a.id, "doubao", 1, False, False, answer="  ")],
+            [make_record(kw_a.id, "doubao", 1, True, True), make_record(kw_a.id, "deepseek", 2, False, True)],
+            [make_record(kw_b.id, "qianwen", 2, True, True)],
+        ]
+        for batch in batches:
+            db.bulk_insert_mappings(IndexCheckRecord, batch)
+            apply_records(db, batch)
+            db.commit()
+
+        removed = db.query(IndexCheckRecord).filter(IndexCheckRecord.platform == "deepseek").one()
+        apply_records(db, [record_fields(removed)], sign=-1)
+        db.delete(removed)
+        db.commit()
+
+        incremental = rollup_rows(db)
+        assert incremental[(kw_a.id, "doubao", date(2026, 10, 1))] == (3, 2, 1, 2)
+        assert incremental[(kw_a.id, "deepseek", date(2026, 10, 2))] == (0, 0, 0, 0)
+
+        DailyRollupService(db).rebuild()
+        rebuilt = rollup_rows(db)
+        assert {k: v for k, v in incremental.items() if v[0]} == rebuilt
+
+    def test_aggregate_filters(self, db, keywords):
+        """按平台/日期分组，按项目和启用状态筛选"""
+        kw_a, kw_b = keywords
+        records = [
+            make_record(kw_a.id, "doubao", 1, True, False),
+            make_record(kw_a.id, "doubao", 2, True, True),
+            make_record(kw_a.id, "qianwen", 2, False, False),
+            make_record(kw_b.id, "doubao", 2, True, True),
+        ]
+        apply_records(db, records)
+        db.commit()
+        service = DailyRollupService(db)
+
+        by_platform = {r.platform: r.checks for r in service.aggregate(IndexCheckDaily.platform).all()}
+        assert by_platform == {"doubao": 3, "qianwen": 1}
+
+        assert service.totals(project_id=kw_a.project_id)["keyword_hits"] == 2
+        assert service.totals(active_only=True)["checks"] == 3
+        assert service.totals(start_date=date(2026, 10, 2))["checks"] == 3
+
+        by_project = {r.project_id: r.company_hits for r in service.aggregate(Keyword.project_id).all()}
+        assert by_project == {kw_a.project_id: 1, kw_b.project_id: 1}
+
+    def test_totals_match_raw_count(self, db, keywords):
+        """缓存命中的记录照常计入、没有检测时间的记录不计入，汇总合计和同条件的 COUNT(*) 一致"""
+        kw_a, _ = keywords
+        rows = [
+            make_record(kw_a.id, "doubao", 1, True, False),
+            {**make_record(kw_a.id, "doubao", 1, True, True), "from_cache": True},
+            {**make_record(kw_a.id, "qianwen", 2, False, True), "from_cache": True},
+        ]
+        for row in rows:
+            record = IndexCheckRecord(**row)
+            db.add(record)
+            db.flush()
+            apply_records(db, [record_fields(record)])
+
+        # check_time 有默认值，传 None 也会被填上当前时间，写入后再改成 NULL 才是真正没有检测时间的记录
+        orphan = IndexCheckRecord(**make_record(kw_a.id, "qianwen", 3, True, False))
+        db.add(orphan)
+        db.flush()
+        db.query(IndexCheckRecord).filter(IndexCheckRecord.id == orphan.id).update(
+            {IndexCheckRecord.check_time: None}, synchronize_session=False
+        )
+        db.expire(orphan)
+        assert orphan.check_time is None
+        apply_records(db, [record_fields(orphan)])
+        db.commit()
+
+        def raw_count(*conditions) -> int:
+            return db.query(func.count(IndexCheckRecord.id)).filter(
+                IndexCheckRecord.check_time.isnot(None), *conditions
+            ).scalar()
+
+        service = DailyRollupService(db)
+        assert service.totals()["checks"] == raw_count() == 3
+        assert service.totals(platform="doubao")["keyword_hits"] == raw_count(
+            IndexCheckRecord.platform == "doubao", IndexCheckRecord.keyword_found == True
+        ) == 2
+        assert service.totals(start_date=date(2026, 10, 2))["checks"] == raw_count(
+            IndexCheckRecord.check_time >= datetime(2026, 10, 2)
+        ) == 1
+
+        # 删除没有检测时间的记录不会从今天的汇总里扣
+        incremental = rollup_rows(db)
+        apply_records(db, [record_fields(orphan)], sign=-1)
+        assert rollup_rows(db) == incremental
+
+        rebuild_rollup(db)
+        assert rollup_rows(db) == incremental
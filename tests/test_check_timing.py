@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+"""
+检测耗时测试
+验证分阶段计时、耗时随记录批量写入，以及按平台按天的延迟百分位统计
+"""
+
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+# 添加项目根目录到路径（从 tests/ 往上一级）
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from backend.database import Base
+from backend.database.models import IndexCheckRecord, IndexCheckTiming
+from backend.services.check_timing_service import CheckTimingService, percentile, summarize_latency
+from backend.services.playwright.ai_platforms.base import PhaseTimer
+from backend.services.result_sink import IndexResultSink
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+def make_timing(platform: str, check_time: datetime, total_ms: int, retries: int = 0) -> dict:
+    return {
+        "platform": platform,
+        "check_time": check_time,
+        "total_ms": total_ms,
+        "navigate_ms": total_ms // 4,
+        "submit_ms": 100,
+        "wait_ms": total_ms // 2,
+        "extract_ms": 50,
+        "retries": retries,
+        "answer_length": 800,
+        "wait_signal": "send_button"
+    }
+
+
+@pytest.mark.monitor
+class TestCheckTiming:
+    """检测耗时测试类"""
+
+    def test_phase_timer(self):
+        """回答阶段按等待结果拆成等待和抓取，等待耗时不会超过阶段总耗时"""
+        timer = PhaseTimer()
+        timer.mark("navigate")
+        timer.mark("submit")
+        timer.mark_answer({"elapsed_time": 10 ** 9, "signal": "network"})
+
+        assert set(timer.timings) == {"navigate_ms", "submit_ms", "wait_ms", "extract_ms", "wait_signal"}
+        assert timer.timings["extract_ms"] == 0
+        assert timer.timings["wait_signal"] == "network"
+
+    def test_summarize_latency(self):
+        """各阶段百分位独立统计，缺失的阶段为空"""
+        summary = summarize_latency({"total": [100, 200, 300, 400]}, [0, 1, 0, 2])
+
+        assert summary["count"] == 4
+        assert summary["total"]["p50"] == percentile([100, 200, 300, 400], 50) == 200
+        assert summary["total"]["max"] == 400
+        assert summary["wait"]["p95"] is None
+        assert summary["avg_retries"] == 0.75
+        assert summary["retry_rate"] == 0.5
+
+    def test_sink_writes_timings(self, db):
+        """耗时和记录同一批写入，缓存命中的记录没有耗时行"""
+        now = datetime(2026, 10, 1, 12, 0)
+        sink = IndexResultSink(db, batch_size=10, flush_interval=0)
+        for i, cached in enumerate([False, True, False]):
+            record = {"keyword_id": 1, "platform": "doubao", "question": f"问题{i}", "answer": "回答",
+                      "from_cache": cached, "check_time": now}
+            sink.add(record, timing=None if cached else make_timing("doubao", now, 1000 * (i + 1)))
+        sink.close()
+
+        assert db.query(IndexCheckRecord).count() == 3
+        timings = db.query(IndexCheckTiming).order_by(IndexCheckTiming.record_id).all()
+        assert [t.total_ms for t in timings] == [1000, 3000]
+        assert all(not t.record.from_cache for t in timings)
+
+    def test_platform_latency(self, db):
+        """按平台汇总、按天拆分，超出统计天数的不计入"""
+        end = datetime(2026, 10, 8, 12, 0)
+        rows = [
+            ("doubao", end - timedelta(days=1), 1000, 0),
+            ("doubao", end - timedelta(days=1), 3000, 1),
+            ("doubao", end - timedelta(hours=1), 2000, 0),
+            ("deepseek", end - timedelta(hours=2), 5000, 0),
+            ("doubao", end - timedelta(days=30), 90000, 2),
+        ]
+        for record_id, (platform, check_time, total_ms, retries) in enumerate(rows, start=1):
+            db.add(IndexCheckTiming(record_id=record_id, **make_timing(platform, check_time, total_ms, retries)))
+        db.commit()
+
+        report = CheckTimingService(db).get_platform_latency(days=7, end_date=end)
+
+        assert set(report["platforms"]) == {"doubao", "deepseek"}
+        doubao = report["platforms"]["doubao"]
+        assert doubao["count"] == 3
+        assert doubao["total"]["p50"] == 2000
+        assert doubao["total"]["max"] == 3000
+        assert [(d["date"], d["platform"], d["count"]) for d in report["daily"]] == [
+            ("2026-10-07", "doubao", 2),
+            ("2026-10-08", "deepseek", 1),
+            ("2026-10-08", "doubao", 1),
+        ]
+
+        only_deepseek = CheckTimingService(db).get_platform_latency(days=7, platform="deepseek", end_date=end)
+        assert list(only_deepseek["platforms"]) == ["deepseek"]
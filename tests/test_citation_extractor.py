@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+"""
+引用提取测试
+验证 URL 归一化、去重和平台自身域名过滤
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+# 添加项目根目录到路径（从 tests/ 往上一级）
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from backend.services.citation_extractor import extract_citations, normalize_url
+
+
+@pytest.mark.monitor
+class TestCitationExtractor:
+    """引用提取测试类"""
+
+    def test_normalize_url(self):
+        """协议、www、端口、跟踪参数、片段和末尾斜杠都归一化"""
+        assert normalize_url("HTTP://WWW.Zhihu.com:443/p/1/?utm_source=x&spm=a#top") == "https://zhihu.com/p/1"
+        assert normalize_url("https://example.com/a?id=2") == "https://example.com/a?id=2"
+        assert normalize_url("www.sohu.com/a/1") == "https://sohu.com/a/1"
+        assert normalize_url("ftp://example.com") is None
+        assert normalize_url("") is None
+
+    def test_extract_from_text(self):
+        """文本中的 URL、Markdown 链接、裸 www 域名都能提取，中文标点不算进 URL"""
+        text = "参考[知乎回答](https://www.zhihu.com/question/1)，详见 http://example.com/a。还有www.sohu.com/a/1，谢谢"
+        citations = extract_citations(text)
+
+        assert [c["url"] for c in citations] == [
+            "https://zhihu.com/question/1",
+            "https://example.com/a",
+            "https://sohu.com/a/1",
+        ]
+        assert citations[0]["title"] == "知乎回答"
+        assert citations[0]["domain"] == "zhihu.com"
+        assert [c["position"] for c in citations] == [0, 1, 2]
+
+    def test_page_links_first_and_deduplicated(self):
+        """页面引用链接排在前面，和文本中的同一 URL 只保留一条"""
+        links = [{"url": "https://mp.weixin.qq.com/s/abc#frag", "title": "公众号文章"}]
+        citations = extract_citations("原文 https://mp.weixin.qq.com/s/abc", links)
+
+        assert len(citations) == 1
+        assert citations[0]["title"] == "公众号文章"
+
+    def test_exclude_own_domains(self):
+        """平台自身域名（含子域名）不算引用"""
+        citations = extract_citations("https://www.doubao.com/chat https://api.doubao.com/x https://36kr.com/p/1",
+                                      exclude_domains=["doubao.com"])
+        assert [c["domain"] for c in citations] == ["36kr.com"]
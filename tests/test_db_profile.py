@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+"""
+SQLite 性能参数与只读连接测试
+验证连接建立时设置了性能参数，只读连接不能写，日常维护能把 WAL 回写并截断
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.exc import OperationalError
+
+# 添加项目根目录到路径（从 tests/ 往上一级）
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from backend.config import SQLITE_PRAGMAS
+from backend.database import set_read_only_pragma, set_sqlite_pragma
+from backend.database.maintenance import optimize_sqlite
+
+
+@pytest.fixture
+def engines(tmp_path):
+    """同一个库文件的写引擎和只读引擎（和 backend.database 的配置方式一致）"""
+    url = f"sqlite:///{tmp_path / 'profile.db'}"
+    writer = create_engine(url)
+    reader = create_engine(url)
+    event.listen(writer, "connect", set_sqlite_pragma)
+    event.listen(reader, "connect", set_read_only_pragma)
+    with writer.begin() as conn:
+        conn.exec_driver_sql("CREATE TABLE items (id INTEGER PRIMARY KEY, name TEXT)")
+    yield writer, reader, tmp_path / "profile.db"
+    writer.dispose()
+    reader.dispose()
+
+
+@pytest.mark.monitor
+class TestDatabaseProfile:
+    """数据库性能参数测试类"""
+
+    def test_pragmas_applied(self, engines):
+        """两种连接都带上性能参数，只读连接多一个 query_only"""
+        writer, reader, _ = engines
+        with writer.connect() as conn:
+            assert conn.exec_driver_sql("PRAGMA journal_mode").scalar() == "wal"
+            assert conn.exec_driver_sql("PRAGMA busy_timeout").scalar() == SQLITE_PRAGMAS["busy_timeout"]
+            assert conn.exec_driver_sql("PRAGMA cache_size").scalar() == SQLITE_PRAGMAS["cache_size"]
+            assert conn.exec_driver_sql("PRAGMA query_only").scalar() == 0
+        with reader.connect() as conn:
+            assert conn.exec_driver_sql("PRAGMA query_only").scalar() == 1
+
+    def test_reader_cannot_write(self, engines):
+        """只读连接能读到写连接提交的数据，写入直接报错"""
+        writer, reader, _ = engines
+        with writer.begin() as conn:
+            conn.exec_driver_sql("INSERT INTO items (name) VALUES ('a')")
+
+        with reader.connect() as conn:
+            assert conn.exec_driver_sql("SELECT count(*) FROM items").scalar() == 1
+            with pytest.raises(OperationalError):
+                conn.exec_driver_sql("INSERT INTO items (name) VALUES ('b')")
+
+    def test_maintenance_truncates_wal(self, engines):
+        """维护后 WAL 全部回写，文件截断为 0"""
+        writer, _, path = engines
+        with writer.begin() as conn:
+            for i in range(200):
+                conn.exec_driver_sql(f"INSERT INTO items (name) VALUES ('{i}')")
+
+        result = optimize_sqlite(writer)
+
+        assert result["busy"] is False
+        assert Path(f"{path}-wal").stat().st_size == 0
@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+"""
+全文搜索测试
+验证 FTS5 索引随原表增删改同步、按相关度排序带高亮摘要，短词退回 LIKE
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+# 添加项目根目录到路径（从 tests/ 往上一级）
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from backend.database import Base
+from backend.database.fulltext import trigram_supported
+from backend.database.models import Knowledge, KnowledgeCategory, ReferenceArticle
+from backend.services.fulltext_search import FulltextSearchService
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite:///:memory:")
+    with engine.connect() as conn:
+        if not trigram_supported(conn):
+            pytest.skip("当前 SQLite 不支持 FTS5 trigram")
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+@pytest.fixture
+def category(db):
+    category = KnowledgeCategory(name="企业知识")
+    db.add(category)
+    db.commit()
+    return category
+
+
+def add_knowledge(db, category, title, content):
+    item = Knowledge(category_id=category.id, title=title, content=content)
+    db.add(item)
+    db.commit()
+    return item
+
+
+@pytest.mark.monitor
+class TestFulltextSearch:
+    """全文搜索测试类"""
+
+    def test_index_follows_source_table(self, db, category):
+        """新增、修改、删除后索引同步"""
+        service = FulltextSearchService(db)
+        item = add_knowledge(db, category, "产品介绍", "我们提供智能搜索优化服务")
+
+        hits, total = service.search_knowledge("智能搜索")
+        assert total == 1 and hits[0].item.id == item.id
+
+        item.content = "我们提供内容营销服务"
+        db.commit()
+        assert service.search_knowledge("智能搜索")[1] == 0
+        assert service.search_knowledge("内容营销")[1] == 1
+
+        db.delete(item)
+        db.commit()
+        assert service.search_knowledge("内容营销")[1] == 0
+
+    def test_ranking_and_snippet(self, db, category):
+        """标题命中排在正文命中前面，摘要高亮命中词"""
+        body = add_knowledge(db, category, "公司简介", "公司主营业务包括智能搜索优化与品牌推广")
+        title = add_knowledge(db, category, "智能搜索优化方案", "详细方案见附件")
+
+        hits, total = FulltextSearchService(db).search_knowledge("智能搜索")
+
+        assert total == 2
+        assert [hit.item.id for hit in hits] == [title.id, body.id]
+        assert hits[0].score is not None
+        assert "<mark>" in hits[1].snippet
+
+    def test_short_terms_fall_back_to_like(self, db, category):
+        """两个字的词走 LIKE，和长词一起用时是 AND 关系"""
+        add_knowledge(db, category, "产品介绍", "我们提供智能搜索优化服务")
+        add_knowledge(db, category, "服务条款", "智能搜索服务的使用条款")
+        service = FulltextSearchService(db)
+
+        hits, total = service.search_knowledge("优化")
+        assert total == 1 and hits[0].score is None
+        assert "<mark>优化</mark>" in hits[0].snippet
+
+        assert service.search_knowledge("智能搜索 条款")[1] == 1
+
+    def test_reference_article_filters(self, db):
+        """参考文章：全文搜索 + 采集关键词（长词走列过滤，短词走 LIKE）+ 平台"""
+        db.add_all([
+            ReferenceArticle(title="GEO 优化入门", url="https://a.com/1", content="生成式引擎优化的基本方法",
+                             platform="zhihu", keyword="生成式引擎"),
+            ReferenceArticle(title="SEO 与 GEO", url="https://a.com/2", content="对比搜索引擎优化和生成式引擎优化",
+                             platform="toutiao", keyword="搜索引擎"),
+        ])
+        db.commit()
+        service = FulltextSearchService(db)
+
+        assert service.search_reference_articles(query="生成式引擎")[1] == 2
+        assert service.search_reference_articles(keyword="生成式引擎")[1] == 1
+        assert service.search_reference_articles(keyword="搜索")[1] == 1
+        hits, total = service.search_reference_articles(query="生成式引擎", platform="toutiao")
+        assert total == 1 and hits[0].item.url == "https://a.com/2"
@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+"""
+命中匹配器测试
+验证 Aho-Corasick 多模式匹配的计数、别名和边界规则
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+# 添加项目根目录到路径（从 tests/ 往上一级）
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from backend.services.hit_matcher import HitMatcher, get_project_matcher, keyword_label, COMPANY_LABEL
+
+
+@pytest.mark.monitor
+class TestHitMatcher:
+    """命中匹配器测试类"""
+
+    def test_keyword_and_company_counts(self):
+        """关键词和公司名一次扫描同时计数"""
+        matcher = get_project_matcher(["SEO优化"], "测试公司")
+        result = matcher.evaluate("SEO优化哪家强？测试公司的SEO优化服务不错。", "SEO优化", "测试公司")
+
+        assert result["keyword_found"] is True
+        assert result["keyword_count"] == 2
+        assert result["company_found"] is True
+        assert result["company_count"] == 1
+
+    def test_aliases_count_as_company(self):
+        """英文名、简称等别名都算公司命中"""
+        matcher = get_project_matcher(["GEO"], "测试公司", ["TestCo", "TC"])
+        result = matcher.evaluate("推荐 TestCo，也就是 TC。", "GEO", "测试公司")
+
+        assert result["company_count"] == 2
+        assert result["company_patterns"] == {"TestCo": 1, "TC": 1}
+        assert result["keyword_found"] is False
+
+    def test_ascii_alias_requires_word_boundary(self):
+        """纯英文缩写不会命中更长单词的一部分"""
+        matcher = get_project_matcher(["GEO"], "测试公司", ["GE"])
+        result = matcher.evaluate("geo 优化和 GE 公司", "GEO", "测试公司")
+
+        assert result["keyword_count"] == 1
+        assert result["company_count"] == 1
+
+    def test_normalization_matches_original_rules(self):
+        """标点、大小写和多余空格不影响匹配"""
+        matcher = HitMatcher({keyword_label("ai 写作"): ["AI 写作"], COMPANY_LABEL: ["测试公司"]})
+        hits = matcher.match("AI，写作！ ai   写作")
+
+        assert hits[keyword_label("ai 写作")]["count"] == 2
+
+    def test_project_matcher_is_cached(self):
+        """相同项目配置复用同一个自动机"""
+        first = get_project_matcher(["A词", "B词"], "测试公司", ["TC"])
+        second = get_project_matcher(["B词", "A词"], "测试公司", ["TC"])
+
+        assert first is second
@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+"""
+列表接口大字段延迟加载测试
+验证文章列表只带正文摘要、不加载正文和日志，账号列表不加载加密的登录态，详情接口仍返回完整内容
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+# 添加项目根目录到路径（从 tests/ 往上一级）
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from backend.api.account import get_accounts
+from backend.api.geo import ARTICLE_PREVIEW_LENGTH, ArticleListItem, get_article, list_articles
+from backend.database import Base
+from backend.database.models import Account, GeoArticle, Keyword, Project
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+@pytest.fixture
+def keyword(db):
+    project = Project(name="项目A", company_name="公司A")
+    db.add(project)
+    db.flush()
+    keyword = Keyword(project_id=project.id, keyword="关键词A", status="active")
+    db.add(keyword)
+    db.commit()
+    return keyword
+
+
+@pytest.mark.monitor
+class TestListProjection:
+    """列表大字段延迟加载测试类"""
+
+    def test_article_list_skips_content(self, db, keyword):
+        """列表只有摘要，正文、日志不在已加载的属性里；详情返回完整正文"""
+        content = "正文" * 5000
+        for i in range(3):
+            db.add(GeoArticle(keyword_id=keyword.id, title=f"文章{i}", content=content,
+                              publish_logs="日志" * 1000, index_details="详情"))
+        db.commit()
+        db.expire_all()
+
+        articles = asyncio.run(list_articles(project_id=None, skip=0, limit=2, publish_status=None, db=db))
+
+        assert len(articles) == 2
+        for article in articles:
+            assert "content" not in article.__dict__
+            assert "publish_logs" not in article.__dict__
+            assert article.content_preview == content[:ARTICLE_PREVIEW_LENGTH]
+            assert ArticleListItem.model_validate(article).content_preview
+
+        db.expire_all()
+        detail = asyncio.run(get_article(articles[0].id, db=db))
+        assert detail.content == content
+
+    def test_account_list_skips_login_state(self, db):
+        """账号列表不加载 cookies / storage_state"""
+        db.add_all([
+            Account(platform="zhihu", account_name=f"账号{i}", cookies="c" * 10000, storage_state="s" * 10000)
+            for i in range(3)
+        ])
+        db.commit()
+        db.expire_all()
+
+        accounts = asyncio.run(get_accounts(platform=None, status=None, skip=0, limit=10, db=db))
+
+        assert len(accounts) == 3
+        for account in accounts:
+            assert "cookies" not in account.__dict__
+            assert "storage_state" not in account.__dict__
@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+"""
+数据库迁移测试
+验证新库直接记版本、老库补列补索引（含最早版本的库一路升级到最新），以及已是最新版本时不再执行任何迁移
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+from sqlalchemy import create_engine, inspect
+
+# 添加项目根目录到路径（从 tests/ 往上一级）
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from backend.database import Base
+from backend.database.migrations import MIGRATIONS, SCHEMA_VERSION, get_schema_version, migrate, stamp
+
+
+# 加版本化迁移之前（最早发布版本）的表结构，只列迁移会改到的表，其余表由 create_all 新建；
+# geo_articles 用更早的、还没有质检/发布字段的结构，顺带覆盖迁移 1 的补列
+BASELINE_SCHEMA = [
+    """CREATE TABLE clients (
+        id INTEGER NOT NULL PRIMARY KEY, name VARCHAR(200) NOT NULL, company_name VARCHAR(200),
+        contact_person VARCHAR(100), phone VARCHAR(50), email VARCHAR(200), industry VARCHAR(100),
+        address VARCHAR(500), description TEXT, status INTEGER, created_at DATETIME, updated_at DATETIME
+    )""",
+    """CREATE TABLE projects (
+        id INTEGER NOT NULL PRIMARY KEY, client_id INTEGER REFERENCES clients (id) ON DELETE CASCADE,
+        name VARCHAR(200) NOT NULL, company_name VARCHAR(200), domain_keyword VARCHAR(200), description TEXT,
+        industry VARCHAR(100), status INTEGER, created_at DATETIME, updated_at DATETIME
+    )""",
+    "CREATE INDEX ix_projects_client_id ON projects (client_id)",
+    """CREATE TABLE keywords (
+        id INTEGER NOT NULL PRIMARY KEY, project_id INTEGER NOT NULL REFERENCES projects (id) ON DELETE CASCADE,
+        keyword VARCHAR(200) NOT NULL, difficulty_score INTEGER, status VARCHAR(20), created_at DATETIME
+    )""",
+    "CREATE INDEX ix_keywords_project_id ON keywords (project_id)",
+    """CREATE TABLE index_check_records (
+        id INTEGER NOT NULL PRIMARY KEY, keyword_id INTEGER NOT NULL REFERENCES keywords (id) ON DELETE CASCADE,
+        platform VARCHAR(50) NOT NULL, question TEXT NOT NULL, answer TEXT,
+        keyword_found BOOLEAN, company_found BOOLEAN, check_time DATETIME
+    )""",
+    "CREATE INDEX ix_index_check_records_keyword_id ON index_check_records (keyword_id)",
+    """CREATE TABLE geo_articles (
+        id INTEGER NOT NULL PRIMARY KEY, keyword_id INTEGER NOT NULL REFERENCES keywords (id) ON DELETE CASCADE,
+        project_id INTEGER REFERENCES projects (id) ON DELETE CASCADE, title TEXT, content TEXT NOT NULL,
+        platform VARCHAR(50), account_id INTEGER, publish_status VARCHAR(20), scheduled_at DATETIME,
+        target_platforms JSON, publish_strategy VARCHAR(20), created_at DATETIME, updated_at DATETIME
+    )""",
+    """CREATE TABLE reference_articles (
+        id INTEGER NOT NULL PRIMARY KEY, title VARCHAR(500) NOT NULL, url VARCHAR(1000) NOT NULL UNIQUE,
+        content TEXT NOT NULL, summary TEXT, platform VARCHAR(50) NOT NULL, author VARCHAR(200),
+        publish_time VARCHAR(50), likes INTEGER, reads INTEGER, comments INTEGER, keyword VARCHAR(200),
+        collected_at DATETIME, ragflow_synced BOOLEAN, ragflow_doc_id VARCHAR(100), ragflow_sync_time DATETIME,
+        status INTEGER, created_at DATETIME, updated_at DATETIME
+    )""",
+]
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path}/migrations.db")
+    yield engine
+    engine.dispose()
+
+
+def index_names(engine, table: str) -> set:
+    return {index["name"] for index in inspect(engine).get_indexes(table)}
+
+
+@pytest.mark.monitor
+class TestMigrations:
+    """数据库迁移测试类"""
+
+    def test_versions_are_sequential(self):
+        """迁移版本号从 1 开始连续递增"""
+        assert [m[0] for m in MIGRATIONS] == list(range(1, SCHEMA_VERSION + 1))
+
+    def test_fresh_database_is_stamped(self, engine):
+        """新库按模型建表后直接记为最新版本，不再执行迁移"""
+        Base.metadata.create_all(bind=engine)
+        stamp(engine)
+
+        with engine.connect() as conn:
+            assert get_schema_version(conn) == SCHEMA_VERSION
+        assert migrate(engine) == 0
+        assert "ix_index_check_records_keyword_platform_time" in index_names(engine, "index_check_records")
+
+    def test_legacy_database_is_upgraded(self, engine):
+        """没有版本表的老库：补齐缺失的列和索引，再次执行时什么都不做"""
+        Base.metadata.create_all(bind=engine)
+        with engine.begin() as conn:
+            conn.exec_driver_sql("DROP TABLE schema_migrations")
+            conn.exec_driver_sql("DROP INDEX ix_index_check_records_keyword_platform_time")
+            conn.exec_driver_sql("DROP INDEX ix_geo_articles_status_created")
+            conn.exec_driver_sql("ALTER TABLE index_check_records DROP COLUMN from_cache")
+
+        assert migrate(engine) == SCHEMA_VERSION
+
+        columns = {col["name"] for col in inspect(engine).get_columns("index_check_records")}
+        assert "from_cache" in columns
+        assert "ix_index_check_records_keyword_platform_time" in index_names(engine, "index_check_records")
+        assert "ix_geo_articles_status_created" in index_names(engine, "geo_articles")
+        with engine.connect() as conn:
+            assert get_schema_version(conn) == SCHEMA_VERSION
+
+        assert migrate(engine) == 0
+
+    def test_baseline_database_is_upgraded(self, engine):
+        """最早版本的库按启动流程（create_all 补新表 -> 迁移）升级到最新：列、索引、日汇总回填都正确"""
+        with engine.begin() as conn:
+            for statement in BASELINE_SCHEMA:
+                conn.exec_driver_sql(statement)
+            conn.exec_driver_sql("INSERT INTO projects (id, name, company_name) VALUES (1, '项目A', '公司A')")
+            conn.exec_driver_sql("INSERT INTO keywords (id, project_id, keyword, status) VALUES (1, 1, '关键词A', 'active')")
+            conn.exec_driver_sql(
+                "INSERT INTO index_check_records (keyword_id, platform, question, answer, keyword_found, company_found, check_time) "
+                "VALUES (1, 'doubao', '问题1', '回答', 1, 0, '2024-05-01 10:00:00'), "
+                "(1, 'doubao', '问题2', '', 0, 1, '2024-05-01 11:00:00'), "
+                "(1, 'qianwen', '问题3', '回答', 1, 1, '2024-05-02 09:00:00')"
+            )
+
+        Base.metadata.create_all(bind=engine)
+        assert migrate(engine) == SCHEMA_VERSION
+
+        columns = {col["name"] for col in inspect(engine).get_columns("index_check_records")}
+        assert {"from_cache", "answer_hash"} <= columns
+        assert "company_aliases" in {col["name"] for col in inspect(engine).get_columns("projects")}
+        assert {
+            "ix_index_check_records_keyword_platform_time", "ix_index_check_records_answer_hash"
+        } <= index_names(engine, "index_check_records")
+        assert "ix_clients_created_at" in index_names(engine, "clients")
+        assert "ix_reference_articles_status_collected" in index_names(engine, "reference_articles")
+
+        with engine.connect() as conn:
+            rollup = conn.exec_driver_sql(
+                "SELECT platform, date, checks, keyword_hits, company_hits, answered FROM index_check_daily ORDER BY date"
+            ).all()
+            assert [tuple(row) for row in rollup] == [
+                ("doubao", "2024-05-01", 2, 1, 1, 1),
+                ("qianwen", "2024-05-02", 1, 1, 1, 1)
+            ]
+            assert get_schema_version(conn) == SCHEMA_VERSION
+        assert migrate(engine) == 0
@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+"""
+模拟AI平台测试
+验证模拟平台的流式协议能被各平台检测器正确解析
+"""
+
+import random
+import sys
+from pathlib import Path
+
+import pytest
+
+# 添加项目根目录到路径（从 tests/ 往上一级）
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from backend.config import AI_PLATFORMS
+from backend.scripts.mock_ai_platforms import MockPlatformSettings, build_answer, format_stream_event
+from backend.scripts.benchmark_index_check import percentile
+from backend.services.playwright.ai_platforms import DoubaoChecker, QianwenChecker, DeepSeekChecker
+
+CHECKERS = {
+    "doubao": DoubaoChecker,
+    "qianwen": QianwenChecker,
+    "deepseek": DeepSeekChecker,
+}
+
+
+def stream_body(platform_id: str, answer: str, step: int = 7) -> str:
+    events = [
+        format_stream_event(platform_id, answer[end - step:end], answer[:end])
+        for end in range(step, len(answer) + step, step)
+    ]
+    return "".join(events) + "data: [DONE]\n\n"
+
+
+@pytest.mark.monitor
+class TestMockAIPlatforms:
+    """模拟AI平台测试类"""
+
+    @pytest.mark.parametrize("platform_id", list(CHECKERS))
+    def test_stream_parsed_by_checker(self, platform_id):
+        """模拟流式回答经检测器的 parse_stream_body 还原为完整回答"""
+        answer = "关于GEO优化，推荐测试公司。" * 5
+        checker = CHECKERS[platform_id](platform_id, AI_PLATFORMS[platform_id])
+
+        assert checker.parse_stream_body(stream_body(platform_id, answer)) == answer
+
+    def test_answer_mentions_company(self):
+        """mention_rate=1 时回答一定提到公司名，且长度不低于 answer_chars"""
+        settings = MockPlatformSettings(answer_chars=300, mention_rate=1.0, mentions=["测试公司"])
+        answer = build_answer("GEO优化哪家好？", settings, random.Random(1))
+
+        assert "测试公司" in answer
+        assert len(answer) == 300
+
+    def test_answer_without_mentions(self):
+        """mention_rate=0 时回答不提公司名"""
+        settings = MockPlatformSettings(mention_rate=0.0, mentions=["测试公司"])
+        assert "测试公司" not in build_answer("GEO优化哪家好？", settings, random.Random(1))
+
+    def test_percentile(self):
+        """压测延迟百分位按最近秩计算"""
+        values = [float(v) for v in range(1, 21)]
+        assert percentile(values, 50) == 10.0
+        assert percentile(values, 95) == 19.0
+        assert percentile([], 50) is None
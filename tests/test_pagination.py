@@ -0,0 +1,171 @@
+# -*- coding: utf-8 -*-
+"""
+游标分页测试
+验证按 (时间, ID) 的游标翻页不重不漏（含热表接归档、两种时间文本格式混存），总数走日汇总/缓存
+"""
+
+import asyncio
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+# 添加项目根目录到路径（从 tests/ 往上一级）
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from backend.api.client import get_clients
+from backend.database import Base
+from backend.database.models import Client, IndexCheckRecord, Keyword, Project, ReferenceArticle
+from backend.services import check_archive
+from backend.services.check_archive import CheckArchiveService, add_months, archive_cutoff
+from backend.services.check_rollup import apply_records
+from backend.services.fulltext_search import FulltextSearchService
+from backend.services.index_check_service import IndexCheckService
+from backend.services.pagination import CountCache, count_cache, decode_cursor, encode_cursor, next_cursor
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    count_cache.invalidate()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+@pytest.fixture
+def keyword(db):
+    project = Project(name="项目A", company_name="公司A")
+    db.add(project)
+    db.flush()
+    keyword = Keyword(project_id=project.id, keyword="关键词A", status="active")
+    db.add(keyword)
+    db.commit()
+    return keyword
+
+
+def add_records(db, keyword, times):
+    rows = [
+        {"keyword_id": keyword.id, "platform": "doubao", "question": f"问题{i}", "answer": "回答",
+         "keyword_found": i % 2 == 0, "company_found": False, "check_time": check_time}
+        for i, check_time in enumerate(times)
+    ]
+    db.add_all([IndexCheckRecord(**row) for row in rows])
+    apply_records(db, rows)
+    db.commit()
+
+
+def walk(fetch, limit):
+    """按游标一直翻到底，返回所有 ID"""
+    ids, cursor = [], None
+    while True:
+        page = fetch(cursor)
+        ids.extend(item.id for item in page)
+        cursor = next_cursor(page, limit, "check_time")
+        if not cursor:
+            return ids
+
+
+@pytest.mark.monitor
+class TestPagination:
+    """游标分页测试类"""
+
+    def test_cursor_round_trip(self):
+        """游标编码解码一致，乱传的游标报 ValueError"""
+        moment = datetime(2024, 5, 1, 10, 30, 0, 123456)
+        assert decode_cursor(encode_cursor(moment, 42)) == (moment, 42)
+        with pytest.raises(ValueError):
+            decode_cursor("not-a-cursor")
+
+    def test_cursor_matches_offset_order(self, db, keyword):
+        """同一时刻的多条记录按 ID 区分，游标翻页和偏移分页结果一致"""
+        now = datetime.now()
+        add_records(db, keyword, [now - timedelta(minutes=i // 3) for i in range(10)])
+        # func.now() 默认值写入的时间不带微秒（2024-01-01 10:00:00），同一秒也有多条
+        for _ in range(3):
+            db.execute(text(
+                "INSERT INTO index_check_records (keyword_id, platform, question, check_time) "
+                "VALUES (:kid, 'doubao', '默认时间', :t)"
+            ), {"kid": keyword.id, "t": (now - timedelta(minutes=1, seconds=30)).strftime("%Y-%m-%d %H:%M:%S")})
+        db.commit()
+        service = IndexCheckService(db)
+
+        expected = [r.id for r in service.get_check_records(limit=100)[0]]
+        ids = walk(lambda cursor: service.get_check_records(limit=3, cursor=cursor, with_total=False)[0], 3)
+
+        assert len(expected) == 13
+        assert ids == expected
+
+    def test_cursor_continues_into_archives(self, db, keyword, tmp_path, monkeypatch):
+        """热表翻完接着翻归档，总数从日汇总算（含归档）"""
+        monkeypatch.setattr(check_archive, "INDEX_CHECK_ARCHIVE_DIR", tmp_path)
+        cutoff = archive_cutoff(6)
+        old = [add_months(cutoff, -2) + timedelta(hours=i) for i in range(4)]
+        add_records(db, keyword, old + [datetime.now() - timedelta(hours=i) for i in range(3)])
+        CheckArchiveService(db).archive(months=6)
+        service = IndexCheckService(db)
+
+        ids = walk(lambda cursor: service.get_check_records(limit=2, cursor=cursor)[0], 2)
+        assert len(ids) == 7 and len(set(ids)) == 7
+
+        _, total = service.get_check_records(limit=2, keyword_found=True)
+        assert total == 4
+        _, total = service.get_check_records(limit=2, question="问题")
+        assert total == 7
+
+    def test_reference_article_cursor(self, db):
+        """参考文章按采集时间游标翻页，总数不含游标条件"""
+        now = datetime.now()
+        db.add_all([
+            ReferenceArticle(title=f"文章{i}", url=f"https://a.com/{i}", content="正文", platform="zhihu",
+                             collected_at=now - timedelta(hours=i))
+            for i in range(5)
+        ])
+        db.commit()
+        service = FulltextSearchService(db)
+
+        first, total = service.search_reference_articles(limit=2)
+        cursor = next_cursor([hit.item for hit in first], 2, "collected_at")
+        second, total_again = service.search_reference_articles(limit=2, cursor=cursor)
+
+        assert total == total_again == 5
+        assert [hit.item.title for hit in first + second] == ["文章0", "文章1", "文章2", "文章3"]
+
+    def test_client_pages(self, db):
+        """客户列表不带游标时按页码翻页，带游标时接着上一页往后翻"""
+        now = datetime.now()
+        db.add_all([Client(name=f"客户{i}", status=1, created_at=now - timedelta(hours=i)) for i in range(5)])
+        db.commit()
+
+        def fetch(**kwargs):
+            params = {"page": 1, "limit": 2, "status": None, "keyword": None, "industry": None,
+                      "cursor": None, "with_total": True}
+            params.update(kwargs)
+            return asyncio.run(get_clients(db=db, **params))
+
+        first = fetch()
+        second = fetch(page=2)
+        by_cursor = fetch(cursor=first["next_cursor"])
+
+        assert first["total"] == 5
+        assert [c["name"] for c in first["items"] + second["items"]] == ["客户0", "客户1", "客户2", "客户3"]
+        assert by_cursor["items"] == second["items"]
+
+    def test_count_cache(self):
+        """有效期内复用总数，失效后重新统计"""
+        cache = CountCache(ttl=60)
+        calls = []
+
+        def count():
+            calls.append(1)
+            return len(calls)
+
+        assert cache.get_or_count("clients", ("status", 1), count) == 1
+        assert cache.get_or_count("clients", ("status", 1), count) == 1
+        cache.invalidate("clients")
+        assert cache.get_or_count("clients", ("status", 1), count) == 2
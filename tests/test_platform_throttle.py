@@ -0,0 +1,173 @@
+# -*- coding: utf-8 -*-
+"""
+平台限流器测试
+验证自适应收紧/放开和熔断状态切换
+"""
+
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+# 添加项目根目录到路径（从 tests/ 往上一级）
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from backend.api.index_check import router as index_check_router
+from backend.config import AI_PLATFORMS
+from backend.database.models import Keyword, QuestionVariant
+from backend.services.index_check_service import IndexCheckService
+from backend.services.playwright.platform_throttle import PlatformThrottle, PlatformUnavailableError
+
+
+def make_throttle(**overrides):
+    config = {
+        "rate_per_minute": 60,
+        "min_rate_per_minute": 2,
+        "max_rate_per_minute": 120,
+        "increase_step": 5,
+        "burst": 1,
+        "penalties": {"error": 0.5, "login": 0.5, "captcha": 0.25},
+        "failure_threshold": 3,
+        "cooldown_seconds": 0.2,
+        "max_backoff": 60,
+    }
+    config.update(overrides)
+    return PlatformThrottle("test", config)
+
+
+class FakeChecker:
+    """按预设结果依次返回的检测器，记录取令牌次数；页面异常类型和真实检测器一样由提问方取走"""
+
+    name = "测试平台"
+
+    def __init__(self, throttle: PlatformThrottle, outcomes: list):
+        self.throttle = throttle
+        self.outcomes = list(outcomes)
+        self.acquired = 0
+        self.kinds = {}
+
+        acquire = throttle.acquire
+
+        async def counting_acquire(cost: float = 1.0):
+            self.acquired += 1
+            await acquire(cost)
+
+        async def no_wait(attempt: int, base: float = 2.0):
+            return None
+
+        throttle.acquire = counting_acquire
+        throttle.backoff = no_wait
+
+    async def check(self, page, question, keyword, company, matcher=None):
+        success, kind = self.outcomes.pop(0)
+        if kind:
+            self.kinds[id(page)] = kind
+        return {"success": success, "answer": "回答" if success else None, "error_msg": None if success else "失败"}
+
+    def pop_failure_kind(self, page):
+        return self.kinds.pop(id(page), None)
+
+    async def clear_chat_history(self, page):
+        return True
+
+    async def navigate_to_page(self, page):
+        return True
+
+
+def ask(checker: FakeChecker):
+    service = IndexCheckService.__new__(IndexCheckService)
+    qv = QuestionVariant(id=1, keyword_id=1, question="问题")
+    keyword = Keyword(id=1, project_id=1, keyword="关键词")
+    return asyncio.run(service._ask_platform(checker, object(), qv, keyword, "公司"))
+
+
+@pytest.mark.monitor
+class TestPlatformThrottle:
+    """平台限流器测试类"""
+
+    def test_failures_tighten_and_success_relaxes(self):
+        """失败按系数收紧，成功加性恢复"""
+        throttle = make_throttle()
+        throttle.record_failure("captcha")
+        assert throttle.rate == pytest.approx(15)
+        throttle.record_success()
+        assert throttle.rate == pytest.approx(20)
+
+    def test_rate_never_below_minimum(self):
+        """速率不会低于下限"""
+        throttle = make_throttle(failure_threshold=100)
+        for _ in range(20):
+            throttle.record_failure("captcha")
+        assert throttle.rate == pytest.approx(2)
+
+    def test_backoff_grows_when_tightened(self):
+        """平台被收紧后重试等待更久"""
+        throttle = make_throttle()
+        normal = throttle.backoff_delay(1, base=2) - 1
+        throttle.record_failure("error")
+        assert throttle.backoff_delay(1, base=2) > normal
+
+    def test_circuit_opens_and_recovers(self):
+        """连续失败熔断，冷却后试探成功即恢复"""
+        throttle = make_throttle()
+        for _ in range(3):
+            throttle.record_failure("error")
+        assert throttle.is_open()
+        with pytest.raises(PlatformUnavailableError):
+            asyncio.run(throttle.acquire())
+
+        time.sleep(0.25)
+        assert throttle.state == PlatformThrottle.STATE_HALF_OPEN
+        throttle.record_success()
+        assert throttle.state == PlatformThrottle.STATE_CLOSED
+
+    def test_half_open_failure_reopens(self):
+        """试探失败重新熔断"""
+        throttle = make_throttle()
+        for _ in range(3):
+            throttle.record_failure("error")
+        time.sleep(0.25)
+        assert throttle.state == PlatformThrottle.STATE_HALF_OPEN
+        throttle.record_failure("login")
+        assert throttle.is_open()
+
+    def test_each_attempt_counted_once(self):
+        """提问每次尝试只取一个令牌、只记一次结果，页面上记下的验证码按 captcha 收紧"""
+        throttle = make_throttle(rate_per_minute=6000, max_rate_per_minute=12000, burst=10)
+        checker = FakeChecker(throttle, [(False, "captcha"), (False, None), (True, None)])
+
+        result, retries = ask(checker)
+
+        assert result["success"] and retries == 2
+        assert checker.acquired == 3
+        assert throttle.consecutive_failures == 0
+        assert throttle.rate == pytest.approx(6000 * 0.25 * 0.5 + 5)
+
+    def test_circuit_opens_at_threshold(self):
+        """连续失败正好 failure_threshold 次才熔断，之后的提问直接跳过"""
+        throttle = make_throttle(rate_per_minute=6000, max_rate_per_minute=12000, burst=10, failure_threshold=3,
+                                 cooldown_seconds=60)
+        checker = FakeChecker(throttle, [(False, None)] * 3)
+
+        result, _ = ask(checker)
+
+        assert not result["success"]
+        assert throttle.consecutive_failures == 3 and throttle.is_open()
+        result, _ = ask(checker)
+        assert result["circuit_open"] and checker.acquired == 4
+
+    def test_status_api(self):
+        """限流状态接口按平台返回快照"""
+        app = FastAPI()
+        app.include_router(index_check_router)
+
+        response = TestClient(app).get("/api/index-check/platforms/throttle")
+
+        assert response.status_code == 200
+        platforms = response.json()["data"]["platforms"]
+        assert [p["platform"] for p in platforms] == list(AI_PLATFORMS.keys())
+        assert all("state" in p and "rate_per_minute" in p for p in platforms)